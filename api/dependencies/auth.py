@@ -2,19 +2,18 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
-from motor.motor_asyncio import AsyncIOMotorClient
 from typing import Annotated
-from api.dependencies.database import get_db
+from api.dependencies.repositories import get_user_repository
 from api.models.user import User
+from api.repositories import UserRepository
 from core.config import settings
-from bson import ObjectId
 from datetime import datetime, timedelta, timezone
 
 # Security scheme
 security = HTTPBearer()
 
 async def get_current_user(
-    db: Annotated[AsyncIOMotorClient, Depends(get_db)],
+    users: Annotated[UserRepository, Depends(get_user_repository)],
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)]
 ) -> User:
     """
@@ -37,16 +36,36 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = await db["users"].find_one({"_id": ObjectId(user_id)})
+    user = await users.get_by_id(user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if not user.get("is_active", True):
+        # deleted accounts stay around until purged; their tokens stop working at once
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Account is deactivated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     
     return User(**user)
 
+async def get_admin_user(
+    current_user: Annotated[User, Depends(get_current_user)]
+) -> User:
+    """
+    Dependency allowing only admin users through.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required",
+        )
+    return current_user
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     """
     Creates a new access token.
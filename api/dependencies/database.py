@@ -1,16 +1,43 @@
 # database dependency
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from fastapi import Depends
-from typing import Annotated, AsyncGenerator
+from typing import Annotated, AsyncGenerator, Optional
+from api.utils.instrumentation import InstrumentedDatabase
 from core.config import settings
 
+# One client (and so one connection pool) per worker process
+_client: Optional[AsyncIOMotorClient] = None
+
+
+def get_client() -> AsyncIOMotorClient:
+    """
+    Returns the process-wide MongoDB client, creating it on first use with the
+    pool size chosen for this worker (see core.launcher).
+    """
+    global _client
+    if _client is None:
+        _client = AsyncIOMotorClient(
+            settings.MONGODB_URI,
+            maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+        )
+    return _client
+
+
+def close_client() -> None:
+    """
+    Closes the process-wide client, if one was created.
+    """
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
 # get_db
 async def get_db() -> AsyncGenerator[AsyncIOMotorDatabase, None]:
     """
     Returns a MongoDB database session.
     """
-    client = AsyncIOMotorClient(settings.MONGODB_URI)
-    try:
-        yield client[settings.DATABASE_NAME]
-    finally:
-        client.close()
\ No newline at end of file
+    db = get_client()[settings.DATABASE_NAME]
+    # counts commands per request for api.utils.instrumentation.measure; off in production
+    yield InstrumentedDatabase(db) if settings.INSTRUMENT_DB else db
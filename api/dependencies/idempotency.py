@@ -0,0 +1,140 @@
+# idempotency dependency
+import asyncio
+import hashlib
+import json
+from contextlib import asynccontextmanager
+from fastapi import Depends, Header, HTTPException, status
+from fastapi.responses import JSONResponse
+from typing import Annotated, Any, AsyncIterator, Optional
+from api.dependencies.auth import get_current_user
+from api.dependencies.repositories import get_idempotency_repository
+from api.models.user import User
+from api.repositories import IdempotencyRepository
+from api.utils.lru import LRUCache
+from core.config import settings
+from core.metrics import register_metrics
+
+# Completed responses, so replays on this worker skip the database
+_completed = LRUCache(settings.IDEMPOTENCY_CACHE_SIZE, ttl=settings.IDEMPOTENCY_TTL_SECONDS)
+_replays = {"count": 0}
+
+
+class _KeyLocks:
+    """
+    One asyncio lock per key, dropped once nobody holds or waits for it.
+    """
+
+    def __init__(self):
+        self._locks: dict[str, list] = {}
+
+    @asynccontextmanager
+    async def hold(self, key: str) -> AsyncIterator[None]:
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[key]
+
+
+_locks = _KeyLocks()
+
+
+def _fingerprint(payload: Any) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _replay(record: dict[str, Any]) -> JSONResponse:
+    _replays["count"] += 1
+    return JSONResponse(
+        content=record["body"],
+        status_code=record["status_code"],
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+class IdempotentRequest:
+    """
+    The `Idempotency-Key` of the current request, scoped to the current user.
+    Without the header every method is a no-op.
+    """
+
+    def __init__(self, repository: IdempotencyRepository, user_id: str, key: Optional[str]):
+        self.repository = repository
+        self.key = f"{user_id}:{key}" if key else None
+        self._response: Optional[tuple[int, Any]] = None
+
+    @asynccontextmanager
+    async def guard(self, payload: Any) -> AsyncIterator[Optional[JSONResponse]]:
+        """
+        Runs the body at most once per key. Yields a replay of the stored
+        response if the key was already used, otherwise None; the response
+        passed to `save` is stored when the body finishes without error.
+        Concurrent requests with the same key on this worker wait for each
+        other; on other workers they get 409 until the first one finishes,
+        or until its lease runs out if its worker died meanwhile.
+        """
+        if self.key is None:
+            yield None
+            return
+        fingerprint = _fingerprint(payload)
+        async with _locks.hold(self.key):
+            record = _completed.get(self.key)
+            if record is None:
+                record = await self.repository.claim(self.key, fingerprint)
+            if record is not None:
+                if record["fingerprint"] != fingerprint:
+                    raise HTTPException(
+                        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        detail="Idempotency-Key was already used for a different request",
+                    )
+                if record["state"] != "done":
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail="A request with this Idempotency-Key is still in progress",
+                    )
+                _completed.set(self.key, record)
+                yield _replay(record)
+                return
+            try:
+                yield None
+            except BaseException:
+                await self.repository.release(self.key)
+                raise
+            if self._response is None:
+                await self.repository.release(self.key)
+                return
+            status_code, body = self._response
+            await self.repository.complete(self.key, status_code, body)
+            _completed.set(self.key, {
+                "fingerprint": fingerprint,
+                "state": "done",
+                "status_code": status_code,
+                "body": body,
+            })
+
+    def save(self, status_code: int, body: Any) -> Any:
+        """
+        Records the JSON response to store for the key and returns `body`.
+        """
+        self._response = (status_code, body)
+        return body
+
+
+def get_idempotency(
+    current_user: Annotated[User, Depends(get_current_user)],
+    repository: Annotated[IdempotencyRepository, Depends(get_idempotency_repository)],
+    idempotency_key: Annotated[Optional[str], Header(max_length=255)] = None,
+) -> IdempotentRequest:
+    """
+    Dependency binding the request's `Idempotency-Key` header to the current user.
+    """
+    return IdempotentRequest(repository, str(current_user.id), idempotency_key)
+
+
+register_metrics("idempotency", lambda: {"replays": _replays["count"], "cache": _completed.stats()})
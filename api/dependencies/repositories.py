@@ -0,0 +1,148 @@
+# repository dependencies
+from fastapi import Depends
+from functools import lru_cache
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from typing import Annotated, Callable
+from api.dependencies.database import get_db
+from api.repositories import (
+    AttachmentRepository,
+    AuditRepository,
+    BlobStore,
+    FileSystemBlobStore,
+    IdempotencyRepository,
+    ImportJobRepository,
+    TaskListRepository,
+    TaskRepository,
+    UserRepository,
+    InMemoryAttachmentRepository,
+    InMemoryAuditRepository,
+    InMemoryIdempotencyRepository,
+    InMemoryImportJobRepository,
+    InMemoryTaskListRepository,
+    InMemoryTaskRepository,
+    InMemoryUserRepository,
+    MongoAttachmentRepository,
+    MongoAuditRepository,
+    MongoBlobStore,
+    MongoIdempotencyRepository,
+    MongoImportJobRepository,
+    MongoTaskListRepository,
+    MongoTaskRepository,
+    MongoUserRepository,
+)
+from api.services.purge import AccountPurger
+from core.config import settings
+
+
+@lru_cache
+def task_repository(read: str = "default", write: str = "default") -> Callable[..., TaskRepository]:
+    """
+    Returns a dependency providing the task repository with the given read and
+    write profiles. Routes declare their profile next to the route definition,
+    e.g. `Depends(task_repository(read="heavy"))`.
+    """
+    def dependency(db: Annotated[AsyncIOMotorDatabase, Depends(get_db)]) -> TaskRepository:
+        if settings.REPOSITORY_BACKEND == "memory":
+            return InMemoryTaskRepository()
+        return MongoTaskRepository(db, read=read, write=write)
+    return dependency
+
+
+@lru_cache
+def user_repository(read: str = "default", write: str = "default") -> Callable[..., UserRepository]:
+    """
+    Returns a dependency providing the user repository with the given read and
+    write profiles.
+    """
+    def dependency(db: Annotated[AsyncIOMotorDatabase, Depends(get_db)]) -> UserRepository:
+        if settings.REPOSITORY_BACKEND == "memory":
+            return InMemoryUserRepository()
+        return MongoUserRepository(db, read=read, write=write)
+    return dependency
+
+
+def get_idempotency_repository(
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_db)]
+) -> IdempotencyRepository:
+    """
+    Returns the idempotency record repository for the configured backend.
+    """
+    if settings.REPOSITORY_BACKEND == "memory":
+        return InMemoryIdempotencyRepository()
+    return MongoIdempotencyRepository(db, write="light")
+
+
+def get_task_list_repository(
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_db)]
+) -> TaskListRepository:
+    """
+    Returns the shared list repository for the configured backend.
+    """
+    if settings.REPOSITORY_BACKEND == "memory":
+        return InMemoryTaskListRepository()
+    return MongoTaskListRepository(db)
+
+
+def get_attachment_repository(
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_db)]
+) -> AttachmentRepository:
+    """
+    Returns the attachment metadata repository for the configured backend.
+    """
+    if settings.REPOSITORY_BACKEND == "memory":
+        return InMemoryAttachmentRepository()
+    return MongoAttachmentRepository(db)
+
+
+def get_audit_repository(
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_db)]
+) -> AuditRepository:
+    """
+    Returns the audit log repository for the configured backend.
+    """
+    if settings.REPOSITORY_BACKEND == "memory":
+        return InMemoryAuditRepository()
+    return MongoAuditRepository(db, write="light")
+
+
+def get_import_job_repository(
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_db)]
+) -> ImportJobRepository:
+    """
+    Returns the task import job repository for the configured backend.
+    """
+    if settings.REPOSITORY_BACKEND == "memory":
+        return InMemoryImportJobRepository()
+    return MongoImportJobRepository(db)
+
+
+def get_blob_store(db: Annotated[AsyncIOMotorDatabase, Depends(get_db)]) -> BlobStore:
+    """
+    Returns the attachment content store: Mongo chunks, or files under
+    ATTACHMENT_DIR with the in-memory backend or ATTACHMENT_STORAGE=filesystem.
+    """
+    if settings.REPOSITORY_BACKEND == "memory" or settings.ATTACHMENT_STORAGE == "filesystem":
+        return FileSystemBlobStore(settings.ATTACHMENT_DIR, settings.ATTACHMENT_CHUNK_SIZE)
+    return MongoBlobStore(db, settings.ATTACHMENT_CHUNK_SIZE)
+
+
+# Default-profile dependencies
+get_task_repository = task_repository()
+get_user_repository = user_repository()
+
+
+def get_account_purger(db: Annotated[AsyncIOMotorDatabase, Depends(get_db)]) -> AccountPurger:
+    """
+    Returns the purger of deleted accounts, on the repositories of the
+    configured backend.
+    """
+    return AccountPurger(
+        users=get_user_repository(db),
+        tasks=get_task_repository(db),
+        attachments=get_attachment_repository(db),
+        store=get_blob_store(db),
+        imports=get_import_job_repository(db),
+        idempotency=get_idempotency_repository(db),
+        audit=get_audit_repository(db),
+        lists=get_task_list_repository(db),
+    )
@@ -0,0 +1,17 @@
+# custom exceptions
+
+
+class DuplicateError(Exception):
+    """
+    Raised by a repository when a write would violate a unique key.
+    """
+
+
+class UploadTooLarge(Exception):
+    """
+    Raised while storing an upload once it grows past the allowed size.
+    """
+
+    def __init__(self, limit: int):
+        super().__init__(f"Upload exceeds {limit} bytes")
+        self.limit = limit
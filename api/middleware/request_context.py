@@ -0,0 +1,59 @@
+# request context middleware
+import asyncio
+from contextvars import ContextVar
+from typing import Optional
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+_current_scope: ContextVar[Optional[Scope]] = ContextVar("current_scope", default=None)
+# request task -> scope, readable from other threads (see api.services.watchdog)
+_task_scopes: dict[asyncio.Task, Scope] = {}
+
+
+class RequestContextMiddleware:
+    """
+    Makes the ASGI scope of the request being handled available to code below
+    the router (repositories, services) through `current_route()`, and to
+    other threads through `route_for_task()`.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _current_scope.set(scope)
+        task = asyncio.current_task()
+        if task is not None:
+            _task_scopes[task] = scope
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_scope.reset(token)
+            if task is not None:
+                _task_scopes.pop(task, None)
+
+
+def _route_name(scope: Optional[Scope]) -> str:
+    if scope is None:
+        return "-"
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope.get("path", "-")
+    return f"{scope.get('method', '-')} {path}"
+
+
+def current_route() -> str:
+    """
+    Returns the matched route of the current request as "METHOD /path/{param}",
+    or "-" outside a request.
+    """
+    return _route_name(_current_scope.get())
+
+
+def route_for_task(task: Optional[asyncio.Task]) -> str:
+    """
+    Returns the route served by `task`, or "-" if it is not a request task.
+    Safe to call from another thread.
+    """
+    return _route_name(_task_scopes.get(task)) if task is not None else "-"
@@ -17,6 +17,23 @@ class Task(BaseModel):
     user_id: str = Field(..., description="ID of the user who owns this task")
     due_date: Optional[datetime] = Field(default=None, description="Optional due date for the task")
     category: Optional[str] = Field(default=None, description="Optional category for the task")
+    # multikey-indexed with user_id; per-user counts are kept in users.tag_counts
+    tags: list[str] = Field(default_factory=list, description="Free-form tags of the task, normalized to lowercase")
+    recurrence: Optional[str] = Field(default=None, description="Optional RRULE making the task recur, anchored at due_date")
+    list_id: Optional[str] = Field(default=None, description="ID of the shared list the task belongs to")
+    # materialized path: ids of the parent's ancestors followed by the parent, root first
+    parent_id: Optional[str] = Field(default=None, description="ID of the parent task, for subtasks")
+    ancestors: list[str] = Field(default_factory=list, description="IDs of all ancestor tasks, root first")
+    # roll-ups over all descendants, kept up to date on every change below the task
+    subtasks_total: int = Field(default=0, description="Number of descendant subtasks")
+    subtasks_completed: int = Field(default=0, description="Number of completed descendant subtasks")
+    # bumped by every change to the task's fields; sync mutations name the version they were based on
+    version: int = Field(default=1, description="Version counter of the task")
+    # fractional rank key (api.utils.rank); moving a task rewrites only its own key
+    position: Optional[str] = Field(default=None, description="Manual sort key of the task")
+    # Only exceptions are stored: completions, edits and skips of single
+    # occurrences, keyed by occurrence date (see api.services.recurrence)
+    occurrence_overrides: dict[str, dict] = Field(default_factory=dict, description="Per-occurrence overrides of a recurring task")
     # Define valid categories as a class variable
     VALID_CATEGORIES: ClassVar[list[str]] = [
         "work",
@@ -1,5 +1,5 @@
 # user model
-from pydantic import BaseModel, Field, EmailStr, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional
 from datetime import datetime, timezone
 from api.models.pyobjectid import PyObjectId
@@ -10,9 +10,16 @@ class User(BaseModel):
     """
     id: Optional[PyObjectId] = Field(alias='_id', default=None)
     username: str = Field(..., description="Username for the user account")
-    email: EmailStr = Field(..., description="Email address for the user account") 
+    # validated and normalized at signup (api.utils.validation); not re-checked on every load
+    email: str = Field(..., description="Email address for the user account")
     password: str = Field(..., description="Hashed password for the user account")
     is_active: bool = Field(default=True, description="Whether the user account is active")
+    is_admin: bool = Field(default=False, description="Whether the user may use admin endpoints")
+    # denormalized from task_lists.members, so authorizing shared tasks needs no extra query
+    list_access: dict[str, str] = Field(default_factory=dict, description="Role per shared list id")
+    # maintained incrementally on task writes, so tag sidebars need no aggregation
+    tag_counts: dict[str, int] = Field(default_factory=dict, description="Number of tasks per tag")
+    attachment_bytes: int = Field(default=0, description="Bytes of attachment content counted against the user's quota")
     joined_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), description="When the user joined")
 
     model_config = ConfigDict(
@@ -0,0 +1,60 @@
+# repositories
+from api.repositories.base import (
+    AttachmentRepository,
+    AuditRepository,
+    IdempotencyRepository,
+    ImportJobRepository,
+    TaskListRepository,
+    TaskRepository,
+    UserRepository,
+)
+from api.repositories.blobs import BlobStore, FileSystemBlobStore, MongoBlobStore
+from api.repositories.memory import (
+    InMemoryAttachmentRepository,
+    InMemoryAuditRepository,
+    InMemoryIdempotencyRepository,
+    InMemoryImportJobRepository,
+    InMemoryStore,
+    InMemoryTaskListRepository,
+    InMemoryTaskRepository,
+    InMemoryUserRepository,
+    memory_store,
+)
+from api.repositories.mongo import (
+    MongoAttachmentRepository,
+    MongoAuditRepository,
+    MongoIdempotencyRepository,
+    MongoImportJobRepository,
+    MongoTaskListRepository,
+    MongoTaskRepository,
+    MongoUserRepository,
+)
+
+__all__ = [
+    "AttachmentRepository",
+    "AuditRepository",
+    "BlobStore",
+    "FileSystemBlobStore",
+    "MongoBlobStore",
+    "IdempotencyRepository",
+    "ImportJobRepository",
+    "TaskListRepository",
+    "TaskRepository",
+    "UserRepository",
+    "InMemoryAttachmentRepository",
+    "InMemoryAuditRepository",
+    "InMemoryIdempotencyRepository",
+    "InMemoryImportJobRepository",
+    "InMemoryStore",
+    "InMemoryTaskListRepository",
+    "InMemoryTaskRepository",
+    "InMemoryUserRepository",
+    "memory_store",
+    "MongoAttachmentRepository",
+    "MongoAuditRepository",
+    "MongoIdempotencyRepository",
+    "MongoImportJobRepository",
+    "MongoTaskListRepository",
+    "MongoTaskRepository",
+    "MongoUserRepository",
+]
@@ -0,0 +1,548 @@
+# repository interfaces
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Any, Optional, Sequence
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def timestamp(value: Any) -> float:
+    """
+    Seconds since the epoch for a stored datetime. Naive datetimes (as
+    returned by pymongo) are taken as UTC; missing values sort first.
+    """
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return (value - _EPOCH).total_seconds()
+    return 0.0
+
+
+def created_order(document: dict[str, Any]) -> float:
+    """
+    Sort key putting task documents in creation order.
+    """
+    return timestamp(document.get("created_at"))
+
+
+def ranked_order(document: dict[str, Any]) -> tuple[str, float]:
+    """
+    Sort key putting task documents in manual order (`position`). Tasks
+    without a position sort first, in creation order, like nulls in Mongo.
+    """
+    return document.get("position") or "", created_order(document)
+
+
+class TaskRepository(ABC):
+    """
+    Data access for tasks. Every operation is scoped to the owning user;
+    where `lists` is accepted, tasks in those shared lists are in scope too
+    (the caller has already checked the user's access to them).
+    Documents are returned as plain dicts keyed like the `tasks` collection
+    (`_id`, `user_id`, ...), so they validate straight into `TaskResponse`.
+
+    Tasks live in two tiers: the hot tier holds everything users work with,
+    the archive tier holds tasks completed long ago (see `archive_completed`).
+
+    Every task carries a `version` that `create` starts at 1 and each update
+    of its fields bumps; deletes leave a tombstone for `list_deleted`. Both
+    serve the offline sync protocol.
+    """
+
+    @abstractmethod
+    async def create(self, user_id: str, data: dict[str, Any]) -> dict[str, Any]:
+        """
+        Stores a new task for the user and returns the stored document.
+        """
+
+    @abstractmethod
+    async def insert_many(self, user_id: str, documents: list[dict[str, Any]]) -> list[bool]:
+        """
+        Stores a batch of new tasks for the user in one unordered write.
+        Documents carry their own `_id`; one whose `_id` is already taken is
+        skipped. Returns, per document, whether it was inserted.
+        """
+
+    @abstractmethod
+    async def list_for_user(
+        self,
+        user_id: str,
+        include_archived: bool = False,
+        ranked: bool = False,
+        lists: Sequence[str] = (),
+        tags: Sequence[str] = (),
+        match_all: bool = True,
+    ) -> list[dict[str, Any]]:
+        """
+        Returns the user's hot tasks, oldest first, or in manual order
+        (`ranked_order`) with `ranked`. With `include_archived` archived tasks
+        are merged in, in the same order. With `tags`, only tasks carrying all
+        of them (or any of them, without `match_all`) are returned.
+        """
+
+    @abstractmethod
+    async def list_shared(self, list_id: str) -> list[dict[str, Any]]:
+        """
+        Returns the hot tasks of shared list `list_id`, oldest first.
+        """
+
+    @abstractmethod
+    async def detach_list(self, list_id: str) -> int:
+        """
+        Moves every task of a deleted shared list back to its creator.
+        Returns the number of tasks moved.
+        """
+
+    @abstractmethod
+    async def position_before(self, user_id: str, position: Optional[str] = None) -> Optional[str]:
+        """
+        Returns the highest `position` among the user's hot tasks that sorts
+        before `position` (or the highest overall when None), or None.
+        """
+
+    @abstractmethod
+    async def position_after(self, user_id: str, position: str) -> Optional[str]:
+        """
+        Returns the lowest `position` among the user's hot tasks that sorts
+        after `position`, or None.
+        """
+
+    @abstractmethod
+    async def rebalance_positions(self, user_id: str) -> int:
+        """
+        Replaces the positions of the user's hot tasks with short, evenly
+        spaced keys (`api.utils.rank.rank_sequence`), keeping their manual
+        order and giving tasks without one a position. Returns the number of
+        tasks changed.
+        """
+
+    @abstractmethod
+    async def get(
+        self, user_id: str, task_id: str, lists: Sequence[str] = ()
+    ) -> Optional[dict[str, Any]]:
+        """
+        Returns a single task, or None if it does not exist or is out of scope.
+        An archived task is restored to the hot tier on access.
+        """
+
+    @abstractmethod
+    async def update(
+        self, user_id: str, task_id: str, data: dict[str, Any], lists: Sequence[str] = ()
+    ) -> Optional[dict[str, Any]]:
+        """
+        Applies `data` to the task, bumps its version and returns the updated
+        document, or None if not found. An archived task is restored first.
+        """
+
+    @abstractmethod
+    async def delete(self, user_id: str, task_id: str, lists: Sequence[str] = ()) -> bool:
+        """
+        Deletes the task from whichever tier holds it. Returns False if nothing was deleted.
+        """
+
+    @abstractmethod
+    async def get_many(
+        self, user_id: str, task_ids: Sequence[str], lists: Sequence[str] = ()
+    ) -> list[dict[str, Any]]:
+        """
+        Returns the tasks among `task_ids` that exist, in no particular
+        order. Archived ones are restored first.
+        """
+
+    @abstractmethod
+    async def list_changed(self, user_id: str, since: datetime, lists: Sequence[str] = ()) -> list[dict[str, Any]]:
+        """
+        Returns the hot tasks updated at or after `since`, oldest change first.
+        """
+
+    @abstractmethod
+    async def list_deleted(self, user_id: str, since: datetime, lists: Sequence[str] = ()) -> list[str]:
+        """
+        Returns the ids of tasks deleted at or after `since`, from tombstones
+        kept for SYNC_TOMBSTONE_DAYS.
+        """
+
+    @abstractmethod
+    async def list_due(
+        self, user_id: str, start: datetime, end: datetime, lists: Sequence[str] = ()
+    ) -> list[dict[str, Any]]:
+        """
+        Returns the hot one-off tasks due in [start, end), by due date,
+        followed by every hot recurring task anchored before `end`, whose
+        occurrences may fall in the window (see `expand_tasks`).
+        """
+
+    @abstractmethod
+    async def count_overdue(self, user_id: str, before: datetime, lists: Sequence[str] = ()) -> int:
+        """
+        Counts the open one-off hot tasks due before `before`.
+        """
+
+    @abstractmethod
+    async def get_by_client_ids(self, user_id: str, client_ids: Sequence[str]) -> list[dict[str, Any]]:
+        """
+        Returns the user's hot tasks created by sync under one of the given
+        client ids (their `sync_client_id`), in no particular order.
+        """
+
+    @abstractmethod
+    async def apply_sync(
+        self, user_id: str, writes: list[dict[str, Any]], lists: Sequence[str] = ()
+    ) -> list[bool]:
+        """
+        Applies a batch of writes in one round trip and returns, per write,
+        whether it was applied. Each write is one of
+
+        - `{"op": "create", "document": {...}}`, the document carrying its `_id`;
+        - `{"op": "update", "task_id": ..., "version": n, "changes": {...}}`;
+        - `{"op": "delete", "task_id": ..., "version": n, "list_id": ...}`.
+
+        Updates and deletes only apply while the task is still at `version`,
+        so a concurrent write makes them fail instead of being overwritten.
+        A create fails if the user already has a task with its
+        `sync_client_id`.
+        Deletes leave tombstones; subtasks are not touched.
+        """
+
+    @abstractmethod
+    async def update_occurrence(
+        self, user_id: str, task_id: str, key: str, data: dict[str, Any]
+    ) -> Optional[dict[str, Any]]:
+        """
+        Merges `data` into the stored override for occurrence `key` of a
+        recurring task and returns the updated series, or None if not found.
+        """
+
+    @abstractmethod
+    async def list_subtree(self, user_id: str, task_id: str) -> list[dict[str, Any]]:
+        """
+        Returns the hot task and all its descendants (tasks whose `ancestors`
+        path contains it) in creation order, or an empty list if the task
+        does not exist.
+        """
+
+    @abstractmethod
+    async def set_subtree_completed(
+        self, user_id: str, task_id: str, completed: bool, now: datetime
+    ) -> int:
+        """
+        Marks the task and all its descendants completed or not in one update,
+        setting their roll-ups to match. Returns the number of tasks matched.
+        """
+
+    @abstractmethod
+    async def delete_descendants(self, user_id: str, task_id: str, batch_size: int) -> int:
+        """
+        Deletes every descendant of the task from both tiers, `batch_size` at
+        a time, and returns how many were deleted. The task itself is kept.
+        """
+
+    @abstractmethod
+    async def adjust_rollups(
+        self, user_id: str, task_ids: list[str], total: int = 0, completed: int = 0
+    ) -> None:
+        """
+        Adds to the `subtasks_total` / `subtasks_completed` roll-ups of the
+        given tasks (usually a task's ancestors) in one update.
+        """
+
+    @abstractmethod
+    async def archive_completed(self, completed_before: datetime, batch_size: int) -> int:
+        """
+        Moves up to `batch_size` tasks completed before `completed_before` (and
+        not restored since) to the archive tier. Returns the number moved.
+        """
+
+
+    @abstractmethod
+    async def delete_batch_for_user(self, user_id: str, batch_size: int) -> list[str]:
+        """
+        Deletes up to `batch_size` of the user's own tasks, hot tier first,
+        then archived ones, and returns their ids; empty once none are left.
+        Leaves no tombstones: meant for purging a deleted account.
+        """
+
+class UserRepository(ABC):
+    """
+    Data access for user accounts.
+    """
+
+    @abstractmethod
+    async def create(self, data: dict[str, Any]) -> dict[str, Any]:
+        """
+        Stores a new user and returns the stored document.
+        """
+
+    @abstractmethod
+    async def get_by_id(self, user_id: str) -> Optional[dict[str, Any]]:
+        """
+        Returns the user with the given id, or None.
+        """
+
+    @abstractmethod
+    async def get_by_email(self, email: str) -> Optional[dict[str, Any]]:
+        """
+        Returns the user with the given email, or None.
+        """
+
+    @abstractmethod
+    async def find_by_email_or_username(
+        self, email: str, username: str
+    ) -> Optional[dict[str, Any]]:
+        """
+        Returns a user matching either the email or the username, or None.
+        """
+
+    @abstractmethod
+    async def normalize_emails(self) -> list[str]:
+        """
+        Rewrites stored emails that are not in normalized form (accounts
+        created before emails were lower-cased). Returns the ids of the
+        accounts left alone because their normalized email is taken.
+        """
+
+    @abstractmethod
+    async def set_password(self, user_id: str, hashed_password: str) -> bool:
+        """
+        Replaces the stored password hash. Returns False if the user does not exist.
+        """
+
+    @abstractmethod
+    async def set_list_access(self, user_ids: Sequence[str], list_id: str, role: Optional[str]) -> None:
+        """
+        Sets (or with None, removes) `list_id` in the `list_access` index of
+        every given user, in one update.
+        """
+
+    @abstractmethod
+    async def adjust_tag_counts(self, user_id: str, deltas: dict[str, int]) -> None:
+        """
+        Adds to the user's per-tag task counts (`tag_counts`) in one update,
+        dropping tags whose count reaches zero.
+        """
+
+    @abstractmethod
+    async def add_attachment_bytes(self, user_id: str, delta: int, limit: Optional[int] = None) -> bool:
+        """
+        Adds `delta` to the user's `attachment_bytes` usage. With `limit`, the
+        change is only made if the new total stays within it; returns whether
+        it was made.
+        """
+
+
+    @abstractmethod
+    async def deactivate(self, user_id: str) -> bool:
+        """
+        Marks an active user inactive and due for purging (`deleted_at`, and
+        `purge` progress starting now). Returns False if the user does not
+        exist or was already deactivated.
+        """
+
+    @abstractmethod
+    async def list_purge_pending(self, stale_before: datetime, limit: int) -> list[dict[str, Any]]:
+        """
+        Returns up to `limit` deactivated users whose purge made no progress
+        since `stale_before`: not started by a worker, or cut short.
+        """
+
+    @abstractmethod
+    async def set_purge_progress(self, user_id: str, progress: dict[str, Any]) -> None:
+        """
+        Replaces the `purge` progress of a deactivated user.
+        """
+
+    @abstractmethod
+    async def delete(self, user_id: str) -> bool:
+        """
+        Deletes the user document. Returns False if it did not exist.
+        """
+
+class TaskListRepository(ABC):
+    """
+    Shared task lists. A list's `members` (user id -> role) is the source of
+    truth; each member's `list_access` mirrors it so that authorizing task
+    queries needs no lookup here (see `UserRepository.set_list_access`).
+    """
+
+    @abstractmethod
+    async def create(self, data: dict[str, Any]) -> dict[str, Any]:
+        """
+        Stores a new list and returns the stored document.
+        """
+
+    @abstractmethod
+    async def get(self, list_id: str) -> Optional[dict[str, Any]]:
+        """
+        Returns the list, or None.
+        """
+
+    @abstractmethod
+    async def get_many(self, list_ids: Sequence[str]) -> list[dict[str, Any]]:
+        """
+        Returns the lists with the given ids that exist, oldest first.
+        """
+
+    @abstractmethod
+    async def set_member(
+        self, list_id: str, user_id: str, role: Optional[str]
+    ) -> Optional[dict[str, Any]]:
+        """
+        Sets the member's role, or removes the member with None. Returns the
+        updated list, or None if it does not exist.
+        """
+
+    @abstractmethod
+    async def delete(self, list_id: str) -> Optional[dict[str, Any]]:
+        """
+        Deletes the list and returns the deleted document, or None.
+        """
+
+
+class IdempotencyRepository(ABC):
+    """
+    Stored outcomes of requests sent with an `Idempotency-Key`. A record is
+    "pending" while the first request runs and "done" once its response is
+    saved. A pending claim is leased for IDEMPOTENCY_LEASE_SECONDS, so a
+    claim left behind by a crashed worker does not block retries.
+    """
+
+    @abstractmethod
+    async def claim(self, key: str, fingerprint: str) -> Optional[dict[str, Any]]:
+        """
+        Claims `key` for a new request, or takes over a pending claim for the
+        same fingerprint whose lease ran out. Returns None if the claim
+        succeeded, otherwise the existing record.
+        """
+
+    @abstractmethod
+    async def complete(self, key: str, status_code: int, body: Any) -> None:
+        """
+        Saves the response for a claimed key.
+        """
+
+    @abstractmethod
+    async def release(self, key: str) -> None:
+        """
+        Drops a pending claim (the request failed and may be retried).
+        """
+
+
+    @abstractmethod
+    async def delete_for_user(self, user_id: str, batch_size: int) -> int:
+        """
+        Deletes up to `batch_size` of the user's records. Returns the number deleted.
+        """
+
+class ImportJobRepository(ABC):
+    """
+    Task import jobs: the uploaded file, progress counters, the resume
+    checkpoint (`rows` read so far) and the first IMPORT_MAX_ERRORS row
+    errors. A job is "running" while a worker holds it, then "completed" or
+    "failed"; the worker refreshes `updated_at` after every batch.
+    """
+
+    @abstractmethod
+    async def create(self, data: dict[str, Any]) -> dict[str, Any]:
+        """
+        Stores a new job and returns the stored document.
+        """
+
+    @abstractmethod
+    async def get(self, user_id: str, job_id: str) -> Optional[dict[str, Any]]:
+        """
+        Returns the user's job, or None.
+        """
+
+    @abstractmethod
+    async def claim(self, user_id: str, job_id: str, stale_before: datetime) -> Optional[dict[str, Any]]:
+        """
+        Marks a failed job, or a running one not updated since
+        `stale_before` (its worker died), as running again and returns it.
+        Returns None if the job does not exist or cannot be resumed.
+        """
+
+    @abstractmethod
+    async def update(self, job_id: Any, fields: dict[str, Any], errors: Sequence[dict[str, Any]] = ()) -> None:
+        """
+        Sets `fields` and appends `errors`, keeping at most IMPORT_MAX_ERRORS.
+        """
+
+
+    @abstractmethod
+    async def delete_for_user(self, user_id: str, batch_size: int) -> list[dict[str, Any]]:
+        """
+        Deletes up to `batch_size` of the user's jobs and returns them.
+        """
+
+class AttachmentRepository(ABC):
+    """
+    Attachment metadata. The contents live in a `BlobStore`, referenced by
+    `sha256`.
+    """
+
+    @abstractmethod
+    async def create(self, data: dict[str, Any]) -> dict[str, Any]:
+        """
+        Stores a new attachment and returns the stored document.
+        """
+
+    @abstractmethod
+    async def list_for_task(self, task_id: str) -> list[dict[str, Any]]:
+        """
+        Returns the attachments of a task, oldest first.
+        """
+
+    @abstractmethod
+    async def get(self, task_id: str, attachment_id: str) -> Optional[dict[str, Any]]:
+        """
+        Returns the attachment if it belongs to the task, or None.
+        """
+
+    @abstractmethod
+    async def delete(self, task_id: str, attachment_id: str) -> Optional[dict[str, Any]]:
+        """
+        Deletes the attachment and returns the deleted document, or None.
+        """
+
+    @abstractmethod
+    async def delete_for_task(self, task_id: str) -> list[dict[str, Any]]:
+        """
+        Deletes every attachment of a task and returns the deleted documents.
+        """
+
+
+class AuditRepository(ABC):
+    """
+    Append-only history of audit events, newest first.
+    """
+
+    @abstractmethod
+    async def insert_many(self, events: list[dict[str, Any]]) -> list[Optional[bool]]:
+        """
+        Stores a batch of events. Events carry their own `_id`, so retrying
+        is safe: an event stored by an earlier attempt counts as stored.
+        Returns, per event, True if it is stored, None if it failed for a
+        transient reason and may be retried, and False if it was rejected
+        and never will be. Raises if the write as a whole failed.
+        """
+
+    @abstractmethod
+    async def list_for_user(
+        self,
+        user_id: str,
+        limit: int,
+        before: Optional[str] = None,
+        action: Optional[str] = None,
+        task_id: Optional[str] = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Returns up to `limit` of the user's events, newest first, starting
+        after the event with id `before` if given.
+        """
+
+    @abstractmethod
+    async def delete_for_user(self, user_id: str, batch_size: int) -> int:
+        """
+        Deletes up to `batch_size` of the events in the user's history.
+        Returns the number deleted.
+        """
@@ -0,0 +1,229 @@
+# content-addressed blob storage for attachments
+import asyncio
+import os
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from typing import AsyncIterator
+
+from bson import Binary
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+# reference-count locks per store directory, shared by every FileSystemBlobStore on it
+_root_locks: dict[str, threading.Lock] = {}
+
+
+class BlobStore(ABC):
+    """
+    Stores file contents by SHA-256, each stored once however many
+    attachments reference it. An upload writes numbered chunks under a fresh
+    upload id; `commit` then either publishes them under the content hash or,
+    if that content already exists, drops them and adds a reference.
+    """
+
+    def __init__(self, chunk_size: int):
+        self.chunk_size = chunk_size
+
+    @abstractmethod
+    async def begin(self) -> str:
+        """
+        Starts an upload and returns its id.
+        """
+
+    @abstractmethod
+    async def write_chunk(self, upload_id: str, n: int, data: bytes) -> None:
+        """
+        Stores chunk `n` of an upload. Chunks arrive in order, all but the
+        last exactly `chunk_size` long.
+        """
+
+    @abstractmethod
+    async def discard(self, upload_id: str) -> None:
+        """
+        Drops the chunks of an upload that will not be committed.
+        """
+
+    @abstractmethod
+    async def commit(self, upload_id: str, sha256: str, length: int) -> bool:
+        """
+        Publishes an upload as the content `sha256`, holding one reference.
+        Returns False if the content was already stored (deduplicated).
+        """
+
+    @abstractmethod
+    async def release(self, sha256: str) -> None:
+        """
+        Drops one reference, deleting the content when none are left.
+        """
+
+    @abstractmethod
+    def read(self, sha256: str, start: int, end: int) -> AsyncIterator[bytes]:
+        """
+        Yields bytes `start` to `end` (exclusive) of the content, one chunk at a time.
+        """
+
+
+class MongoBlobStore(BlobStore):
+    """
+    GridFS-style storage: `attachment_chunks` holds the chunks of each upload,
+    `attachment_blobs` maps a content hash to the upload holding it plus a
+    reference count.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase, chunk_size: int):
+        super().__init__(chunk_size)
+        self.blobs = db["attachment_blobs"]
+        self.chunks = db["attachment_chunks"]
+
+    async def ensure_indexes(self) -> None:
+        """
+        Creates the index chunk reads walk.
+        """
+        await self.chunks.create_index([("upload_id", ASCENDING), ("n", ASCENDING)], unique=True)
+
+    async def begin(self) -> str:
+        return uuid.uuid4().hex
+
+    async def write_chunk(self, upload_id: str, n: int, data: bytes) -> None:
+        await self.chunks.insert_one({"upload_id": upload_id, "n": n, "data": Binary(data)})
+
+    async def discard(self, upload_id: str) -> None:
+        await self.chunks.delete_many({"upload_id": upload_id})
+
+    async def commit(self, upload_id: str, sha256: str, length: int) -> bool:
+        while True:
+            existing = await self.blobs.find_one_and_update({"_id": sha256}, {"$inc": {"refs": 1}})
+            if existing is not None:
+                await self.discard(upload_id)
+                return False
+            try:
+                await self.blobs.insert_one(
+                    {"_id": sha256, "upload_id": upload_id, "length": length, "refs": 1}
+                )
+                return True
+            except DuplicateKeyError:
+                # committed concurrently by an identical upload; reference that one
+                continue
+
+    async def release(self, sha256: str) -> None:
+        blob = await self.blobs.find_one_and_update(
+            {"_id": sha256}, {"$inc": {"refs": -1}}, return_document=ReturnDocument.AFTER
+        )
+        if blob is None or blob["refs"] > 0:
+            return
+        # only if no upload took a new reference in the meantime
+        if await self.blobs.find_one_and_delete({"_id": sha256, "refs": {"$lte": 0}}) is not None:
+            await self.discard(blob["upload_id"])
+
+    async def read(self, sha256: str, start: int, end: int) -> AsyncIterator[bytes]:
+        blob = await self.blobs.find_one({"_id": sha256})
+        if blob is None or start >= end:
+            return
+        first, last = start // self.chunk_size, (end - 1) // self.chunk_size
+        cursor = self.chunks.find(
+            {"upload_id": blob["upload_id"], "n": {"$gte": first, "$lte": last}}
+        ).sort("n", ASCENDING)
+        async for chunk in cursor:
+            offset = chunk["n"] * self.chunk_size
+            yield bytes(chunk["data"][max(start - offset, 0):end - offset])
+
+
+class FileSystemBlobStore(BlobStore):
+    """
+    Blob storage in a local directory: uploads are appended to a file under
+    `uploads/` and renamed to `blobs/<hash>` on commit. Reference counts live
+    next to each blob. Meant for tests and single-node setups.
+
+    A store is built per request, so reference counts are updated under a
+    lock kept per directory at module level, taken in the worker thread:
+    concurrent commits and releases of the same content stay serialized.
+    """
+
+    def __init__(self, root: str, chunk_size: int):
+        super().__init__(chunk_size)
+        self.root = root
+        self._refs = _root_locks.setdefault(os.path.realpath(root), threading.Lock())
+
+    def _upload_path(self, upload_id: str) -> str:
+        return os.path.join(self.root, "uploads", upload_id)
+
+    def _blob_path(self, sha256: str) -> str:
+        return os.path.join(self.root, "blobs", sha256[:2], sha256)
+
+    def _read_refs(self, sha256: str) -> int:
+        try:
+            with open(self._blob_path(sha256) + ".refs") as f:
+                return int(f.read())
+        except FileNotFoundError:
+            return 0
+
+    def _write_refs(self, sha256: str, refs: int) -> None:
+        with open(self._blob_path(sha256) + ".refs", "w") as f:
+            f.write(str(refs))
+
+    async def begin(self) -> str:
+        upload_id = uuid.uuid4().hex
+        await asyncio.to_thread(os.makedirs, os.path.dirname(self._upload_path(upload_id)), exist_ok=True)
+        return upload_id
+
+    async def write_chunk(self, upload_id: str, n: int, data: bytes) -> None:
+        def append():
+            with open(self._upload_path(upload_id), "ab") as f:
+                f.write(data)
+        await asyncio.to_thread(append)
+
+    async def discard(self, upload_id: str) -> None:
+        try:
+            await asyncio.to_thread(os.remove, self._upload_path(upload_id))
+        except FileNotFoundError:
+            pass
+
+    async def commit(self, upload_id: str, sha256: str, length: int) -> bool:
+        def publish() -> bool:
+            refs = self._read_refs(sha256)
+            if refs:
+                os.remove(self._upload_path(upload_id))
+            else:
+                os.makedirs(os.path.dirname(self._blob_path(sha256)), exist_ok=True)
+                os.replace(self._upload_path(upload_id), self._blob_path(sha256))
+            self._write_refs(sha256, refs + 1)
+            return refs == 0
+        def locked_publish() -> bool:
+            with self._refs:
+                return publish()
+        return await asyncio.to_thread(locked_publish)
+
+    async def release(self, sha256: str) -> None:
+        def drop():
+            refs = self._read_refs(sha256) - 1
+            if refs > 0:
+                self._write_refs(sha256, refs)
+                return
+            for path in (self._blob_path(sha256), self._blob_path(sha256) + ".refs"):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        def locked_drop():
+            with self._refs:
+                drop()
+        await asyncio.to_thread(locked_drop)
+
+    async def read(self, sha256: str, start: int, end: int) -> AsyncIterator[bytes]:
+        try:
+            f = await asyncio.to_thread(open, self._blob_path(sha256), "rb")
+        except FileNotFoundError:
+            return
+        try:
+            await asyncio.to_thread(f.seek, start)
+            remaining = end - start
+            while remaining > 0:
+                data = await asyncio.to_thread(f.read, min(self.chunk_size, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                yield data
+        finally:
+            f.close()
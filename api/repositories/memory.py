@@ -0,0 +1,799 @@
+# in-memory repositories
+from bisect import bisect_left, insort
+from datetime import datetime, timezone
+from itertools import count
+from typing import Any, Optional, Sequence
+import time
+from bson import ObjectId
+
+from api.exceptions import DuplicateError
+from api.repositories.base import (
+    AttachmentRepository,
+    AuditRepository,
+    IdempotencyRepository,
+    ImportJobRepository,
+    TaskListRepository,
+    TaskRepository,
+    UserRepository,
+    created_order,
+    ranked_order,
+    timestamp,
+)
+from api.repositories.mongo import to_object_id
+from api.utils.rank import rank_sequence
+from api.utils.validation import normalize_email
+from core.config import settings
+
+
+class _TaskRecord:
+    """
+    A stored task. The indexed fields are kept as slots next to the document
+    so the per-user index never has to look inside the dict.
+    """
+    __slots__ = ("id", "user_id", "sort_key", "doc")
+
+    def __init__(self, id: ObjectId, user_id: str, sort_key: tuple, doc: dict[str, Any]):
+        self.id = id
+        self.user_id = user_id
+        self.sort_key = sort_key
+        self.doc = doc
+
+
+class _UserRecord:
+    """
+    A stored user with its unique keys as slots.
+    """
+    __slots__ = ("id", "email", "username", "doc")
+
+    def __init__(self, id: ObjectId, email: str, username: str, doc: dict[str, Any]):
+        self.id = id
+        self.email = email
+        self.username = username
+        self.doc = doc
+
+
+class _TaskTier:
+    """
+    One tier of tasks: records by `_id`, a sorted key index per user and the
+    ids of the tasks in each shared list.
+    """
+    __slots__ = ("records", "by_user", "by_list")
+
+    def __init__(self):
+        self.records: dict[ObjectId, _TaskRecord] = {}
+        self.by_user: dict[str, list[tuple]] = {}
+        self.by_list: dict[str, set[ObjectId]] = {}
+
+    def add(self, record: _TaskRecord) -> None:
+        self.records[record.id] = record
+        insort(self.by_user.setdefault(record.user_id, []), record.sort_key)
+        if record.doc.get("list_id"):
+            self.by_list.setdefault(record.doc["list_id"], set()).add(record.id)
+
+    def remove(self, record: _TaskRecord) -> None:
+        del self.records[record.id]
+        index = self.by_user[record.user_id]
+        del index[bisect_left(index, record.sort_key)]
+        if not index:
+            del self.by_user[record.user_id]
+        self.unlist(record)
+
+    def unlist(self, record: _TaskRecord) -> None:
+        members = self.by_list.get(record.doc.get("list_id"))
+        if members is not None:
+            members.discard(record.id)
+            if not members:
+                del self.by_list[record.doc["list_id"]]
+
+    def owned(
+        self, user_id: str, oid: Optional[ObjectId], lists: Sequence[str] = ()
+    ) -> Optional[_TaskRecord]:
+        record = self.records.get(oid) if oid is not None else None
+        if record is None:
+            return None
+        if record.user_id != user_id and record.doc.get("list_id") not in lists:
+            return None
+        return record
+
+    def in_lists(self, lists: Sequence[str]) -> list[_TaskRecord]:
+        return [self.records[oid] for list_id in lists for oid in self.by_list.get(list_id, ())]
+
+    def for_user(self, user_id: str, lists: Sequence[str] = ()) -> list[dict[str, Any]]:
+        records = self.records
+        own = [records[key[-1]] for key in self.by_user.get(user_id, ())]
+        if lists:
+            shared = [record for record in self.in_lists(lists) if record.user_id != user_id]
+            own = sorted(own + shared, key=lambda record: record.sort_key)
+        return [dict(record.doc) for record in own]
+
+
+class InMemoryStore:
+    """
+    Process-local storage engine shared by the in-memory repositories.
+
+    Each task tier keeps a dict keyed by `_id` plus one sorted list per user
+    of `(created_at, sequence, _id)` keys, so listing a user's tasks is a
+    straight walk of their index and never scans other users' data.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Drops all stored data.
+        """
+        self.tasks = _TaskTier()
+        self.archive = _TaskTier()
+        self.users: dict[ObjectId, _UserRecord] = {}
+        self.users_by_email: dict[str, _UserRecord] = {}
+        self.users_by_username: dict[str, _UserRecord] = {}
+        self.idempotency: dict[str, dict[str, Any]] = {}
+        self.task_lists: dict[ObjectId, dict[str, Any]] = {}
+        self.attachments: dict[ObjectId, dict[str, Any]] = {}
+        self.audit: list[dict[str, Any]] = []
+        self.import_jobs: dict[ObjectId, dict[str, Any]] = {}
+        self.tombstones: dict[ObjectId, dict[str, Any]] = {}
+        self._sequence = count()
+
+    def next_sequence(self) -> int:
+        return next(self._sequence)
+
+
+# Single store per process, used when REPOSITORY_BACKEND is "memory"
+memory_store = InMemoryStore()
+
+
+class InMemoryTaskRepository(TaskRepository):
+    """
+    Task repository backed by an `InMemoryStore`.
+    """
+
+    def __init__(self, store: InMemoryStore = memory_store):
+        self.store = store
+
+    def _owned(self, user_id: str, task_id: str, lists: Sequence[str] = ()) -> Optional[_TaskRecord]:
+        return self.store.tasks.owned(user_id, to_object_id(task_id), lists)
+
+    def _restore(self, user_id: str, task_id: str, lists: Sequence[str] = ()) -> Optional[_TaskRecord]:
+        record = self.store.archive.owned(user_id, to_object_id(task_id), lists)
+        if record is None:
+            return None
+        self.store.archive.remove(record)
+        record.doc.pop("archived_at", None)
+        record.doc["restored_at"] = datetime.now(timezone.utc)
+        self.store.tasks.add(record)
+        return record
+
+    async def create(self, user_id: str, data: dict[str, Any]) -> dict[str, Any]:
+        oid = data.get("_id") or ObjectId()
+        doc = {"version": 1, **data, "_id": oid, "user_id": user_id}
+        sort_key = (created_order(doc), self.store.next_sequence(), oid)
+        self.store.tasks.add(_TaskRecord(oid, user_id, sort_key, doc))
+        return dict(doc)
+
+    async def insert_many(self, user_id: str, documents: list[dict[str, Any]]) -> list[bool]:
+        inserted = []
+        for document in documents:
+            taken = document["_id"] in self.store.tasks.records or document["_id"] in self.store.archive.records
+            if not taken:
+                await self.create(user_id, document)
+            inserted.append(not taken)
+        return inserted
+
+    async def list_for_user(
+        self,
+        user_id: str,
+        include_archived: bool = False,
+        ranked: bool = False,
+        lists: Sequence[str] = (),
+        tags: Sequence[str] = (),
+        match_all: bool = True,
+    ) -> list[dict[str, Any]]:
+        tasks = self.store.tasks.for_user(user_id, lists)
+        if include_archived:
+            tasks = sorted(tasks + self.store.archive.for_user(user_id, lists), key=created_order)
+        if tags:
+            wanted = set(tags)
+            tasks = [
+                task for task in tasks
+                if (wanted.issubset if match_all else wanted.intersection)(task.get("tags") or ())
+            ]
+        if ranked:
+            # stable, so tasks without a position stay in creation order
+            tasks.sort(key=lambda doc: doc.get("position") or "")
+        return tasks
+
+    def _positions(self, user_id: str) -> list[str]:
+        records = self.store.tasks.records
+        positions = (records[key[-1]].doc.get("position") for key in self.store.tasks.by_user.get(user_id, ()))
+        return [position for position in positions if position]
+
+    async def position_before(self, user_id: str, position: Optional[str] = None) -> Optional[str]:
+        return max((p for p in self._positions(user_id) if position is None or p < position), default=None)
+
+    async def position_after(self, user_id: str, position: str) -> Optional[str]:
+        return min((p for p in self._positions(user_id) if p > position), default=None)
+
+    async def rebalance_positions(self, user_id: str) -> int:
+        records = self.store.tasks.records
+        ranked = sorted(
+            (records[key[-1]] for key in self.store.tasks.by_user.get(user_id, ())),
+            key=lambda record: ranked_order(record.doc),
+        )
+        changed = 0
+        for record, key in zip(ranked, rank_sequence(len(ranked))):
+            if record.doc.get("position") != key:
+                record.doc["position"] = key
+                changed += 1
+        return changed
+
+    async def list_shared(self, list_id: str) -> list[dict[str, Any]]:
+        records = sorted(self.store.tasks.in_lists([list_id]), key=lambda record: record.sort_key)
+        return [dict(record.doc) for record in records]
+
+    async def detach_list(self, list_id: str) -> int:
+        moved = 0
+        for tier in (self.store.tasks, self.store.archive):
+            for record in tier.in_lists([list_id]):
+                tier.unlist(record)
+                record.doc["list_id"] = None
+                moved += 1
+        return moved
+
+    async def get(
+        self, user_id: str, task_id: str, lists: Sequence[str] = ()
+    ) -> Optional[dict[str, Any]]:
+        record = self._owned(user_id, task_id, lists) or self._restore(user_id, task_id, lists)
+        return dict(record.doc) if record else None
+
+    async def update(
+        self, user_id: str, task_id: str, data: dict[str, Any], lists: Sequence[str] = ()
+    ) -> Optional[dict[str, Any]]:
+        record = self._owned(user_id, task_id, lists) or self._restore(user_id, task_id, lists)
+        if record is None:
+            return None
+        record.doc.update(data)
+        record.doc["version"] = record.doc.get("version", 0) + 1
+        return dict(record.doc)
+
+    def _bury(self, tier: _TaskTier, record: _TaskRecord) -> None:
+        tier.remove(record)
+        self.store.tombstones[record.id] = {
+            "_id": record.id,
+            "user_id": record.user_id,
+            "list_id": record.doc.get("list_id"),
+            "deleted_at": datetime.now(timezone.utc),
+        }
+
+    async def delete(self, user_id: str, task_id: str, lists: Sequence[str] = ()) -> bool:
+        oid = to_object_id(task_id)
+        for tier in (self.store.tasks, self.store.archive):
+            record = tier.owned(user_id, oid, lists)
+            if record is not None:
+                self._bury(tier, record)
+                return True
+        return False
+
+    async def get_many(
+        self, user_id: str, task_ids: Sequence[str], lists: Sequence[str] = ()
+    ) -> list[dict[str, Any]]:
+        found = (self._owned(user_id, task_id, lists) or self._restore(user_id, task_id, lists) for task_id in task_ids)
+        return [dict(record.doc) for record in found if record is not None]
+
+    def _in_scope(self, doc: dict[str, Any], user_id: str, lists: Sequence[str]) -> bool:
+        return doc["user_id"] == user_id or doc.get("list_id") in lists
+
+    async def list_changed(self, user_id: str, since: datetime, lists: Sequence[str] = ()) -> list[dict[str, Any]]:
+        cutoff = timestamp(since)
+        changed = [
+            task for task in self.store.tasks.for_user(user_id, lists)
+            if task.get("updated_at") is not None and timestamp(task["updated_at"]) >= cutoff
+        ]
+        return sorted(changed, key=lambda task: timestamp(task["updated_at"]))
+
+    async def list_deleted(self, user_id: str, since: datetime, lists: Sequence[str] = ()) -> list[str]:
+        cutoff = timestamp(since)
+        found = [
+            tombstone for tombstone in self.store.tombstones.values()
+            if self._in_scope(tombstone, user_id, lists) and timestamp(tombstone["deleted_at"]) >= cutoff
+        ]
+        return [str(tombstone["_id"]) for tombstone in sorted(found, key=lambda t: t["deleted_at"])]
+
+    async def list_due(
+        self, user_id: str, start: datetime, end: datetime, lists: Sequence[str] = ()
+    ) -> list[dict[str, Any]]:
+        lower, upper = timestamp(start), timestamp(end)
+        due, series = [], []
+        for task in self.store.tasks.for_user(user_id, lists):
+            if task.get("due_date") is None:
+                continue
+            when = timestamp(task["due_date"])
+            if task.get("recurrence"):
+                if when < upper:
+                    series.append(task)
+            elif lower <= when < upper:
+                due.append(task)
+        due.sort(key=lambda task: timestamp(task["due_date"]))
+        return due + series
+
+    async def count_overdue(self, user_id: str, before: datetime, lists: Sequence[str] = ()) -> int:
+        cutoff = timestamp(before)
+        return sum(
+            1 for task in self.store.tasks.for_user(user_id, lists)
+            if task.get("due_date") is not None and not task.get("recurrence")
+            and not task.get("is_completed") and timestamp(task["due_date"]) < cutoff
+        )
+
+    async def get_by_client_ids(self, user_id: str, client_ids: Sequence[str]) -> list[dict[str, Any]]:
+        wanted = set(client_ids)
+        return [task for task in self.store.tasks.for_user(user_id) if task.get("sync_client_id") in wanted]
+
+    async def apply_sync(
+        self, user_id: str, writes: list[dict[str, Any]], lists: Sequence[str] = ()
+    ) -> list[bool]:
+        applied = []
+        for write in writes:
+            if write["op"] == "create":
+                client_id = write["document"].get("sync_client_id")
+                if write["document"].get("_id") in self.store.tasks.records or (
+                    client_id is not None and await self.get_by_client_ids(user_id, [client_id])
+                ):
+                    applied.append(False)
+                    continue
+                await self.create(user_id, write["document"])
+                applied.append(True)
+                continue
+            record = self._owned(user_id, write["task_id"], lists)
+            if record is None or record.doc.get("version", 0) != write["version"]:
+                applied.append(False)
+            elif write["op"] == "update":
+                record.doc.update(write["changes"])
+                record.doc["version"] = write["version"] + 1
+                applied.append(True)
+            else:
+                self._bury(self.store.tasks, record)
+                applied.append(True)
+        return applied
+
+    async def update_occurrence(
+        self, user_id: str, task_id: str, key: str, data: dict[str, Any]
+    ) -> Optional[dict[str, Any]]:
+        record = self._owned(user_id, task_id) or self._restore(user_id, task_id)
+        if record is None:
+            return None
+        # replace rather than mutate, so copies handed out earlier stay unchanged
+        overrides = dict(record.doc.get("occurrence_overrides") or {})
+        overrides[key] = {**overrides.get(key, {}), **data}
+        record.doc["occurrence_overrides"] = overrides
+        record.doc["version"] = record.doc.get("version", 0) + 1
+        return dict(record.doc)
+
+    def _subtree(self, tier: _TaskTier, user_id: str, task_id: str) -> list[_TaskRecord]:
+        records = tier.records
+        return [
+            records[key[-1]] for key in tier.by_user.get(user_id, ())
+            if task_id in (records[key[-1]].doc.get("ancestors") or ())
+        ]
+
+    async def list_subtree(self, user_id: str, task_id: str) -> list[dict[str, Any]]:
+        root = self._owned(user_id, task_id)
+        if root is None:
+            return []
+        subtree = [root] + self._subtree(self.store.tasks, user_id, task_id)
+        return [dict(record.doc) for record in sorted(subtree, key=lambda record: record.sort_key)]
+
+    async def set_subtree_completed(
+        self, user_id: str, task_id: str, completed: bool, now: datetime
+    ) -> int:
+        root = self._owned(user_id, task_id)
+        if root is None:
+            return 0
+        subtree = [root] + self._subtree(self.store.tasks, user_id, task_id)
+        for record in subtree:
+            doc = record.doc
+            if doc.get("is_completed") != completed:
+                doc["completed_at"] = now if completed else None
+            doc["is_completed"] = completed
+            doc["updated_at"] = now
+            doc["subtasks_completed"] = doc.get("subtasks_total", 0) if completed else 0
+            doc["version"] = doc.get("version", 0) + 1
+        return len(subtree)
+
+    async def delete_descendants(self, user_id: str, task_id: str, batch_size: int) -> int:
+        deleted = 0
+        for tier in (self.store.tasks, self.store.archive):
+            for record in self._subtree(tier, user_id, task_id):
+                self._bury(tier, record)
+                deleted += 1
+        return deleted
+
+    async def adjust_rollups(
+        self, user_id: str, task_ids: list[str], total: int = 0, completed: int = 0
+    ) -> None:
+        for task_id in task_ids:
+            record = self._owned(user_id, task_id)
+            if record is not None:
+                record.doc["subtasks_total"] = record.doc.get("subtasks_total", 0) + total
+                record.doc["subtasks_completed"] = record.doc.get("subtasks_completed", 0) + completed
+
+    async def archive_completed(self, completed_before: datetime, batch_size: int) -> int:
+        cutoff = timestamp(completed_before)
+        batch = []
+        for record in self.store.tasks.records.values():
+            doc = record.doc
+            if not doc.get("is_completed"):
+                continue
+            completed_at = doc.get("completed_at") or doc.get("updated_at")
+            if completed_at is None or timestamp(completed_at) >= cutoff:
+                continue
+            if doc.get("restored_at") is not None and timestamp(doc["restored_at"]) >= cutoff:
+                continue
+            batch.append(record)
+            if len(batch) == batch_size:
+                break
+        archived_at = datetime.now(timezone.utc)
+        for record in batch:
+            self.store.tasks.remove(record)
+            record.doc["archived_at"] = archived_at
+            self.store.archive.add(record)
+        return len(batch)
+
+
+    async def delete_batch_for_user(self, user_id: str, batch_size: int) -> list[str]:
+        for tier in (self.store.tasks, self.store.archive):
+            keys = tier.by_user.get(user_id, [])[:batch_size]
+            if keys:
+                for key in keys:
+                    tier.remove(tier.records[key[-1]])
+                return [str(key[-1]) for key in keys]
+        return []
+
+class InMemoryUserRepository(UserRepository):
+    """
+    User repository backed by an `InMemoryStore`. Email and username are
+    unique, like the indexes on the `users` collection.
+    """
+
+    def __init__(self, store: InMemoryStore = memory_store):
+        self.store = store
+
+    async def create(self, data: dict[str, Any]) -> dict[str, Any]:
+        email, username = data.get("email"), data.get("username")
+        if email in self.store.users_by_email or username in self.store.users_by_username:
+            raise DuplicateError("Email or username already exists")
+        oid = ObjectId()
+        doc = {**data, "_id": oid}
+        record = _UserRecord(oid, email, username, doc)
+        self.store.users[oid] = record
+        self.store.users_by_email[email] = record
+        self.store.users_by_username[username] = record
+        return dict(doc)
+
+    async def get_by_id(self, user_id: str) -> Optional[dict[str, Any]]:
+        oid = to_object_id(user_id)
+        record = self.store.users.get(oid) if oid is not None else None
+        return dict(record.doc) if record else None
+
+    async def get_by_email(self, email: str) -> Optional[dict[str, Any]]:
+        record = self.store.users_by_email.get(email)
+        return dict(record.doc) if record else None
+
+    async def find_by_email_or_username(
+        self, email: str, username: str
+    ) -> Optional[dict[str, Any]]:
+        record = self.store.users_by_email.get(email) or self.store.users_by_username.get(username)
+        return dict(record.doc) if record else None
+
+    async def normalize_emails(self) -> list[str]:
+        conflicts = []
+        for record in list(self.store.users.values()):
+            email = normalize_email(record.email)
+            if email == record.email:
+                continue
+            if email in self.store.users_by_email:
+                conflicts.append(str(record.id))
+                continue
+            del self.store.users_by_email[record.email]
+            record.email = record.doc["email"] = email
+            self.store.users_by_email[email] = record
+        return conflicts
+
+    async def set_password(self, user_id: str, hashed_password: str) -> bool:
+        oid = to_object_id(user_id)
+        record = self.store.users.get(oid) if oid is not None else None
+        if record is None:
+            return False
+        record.doc["password"] = hashed_password
+        return True
+
+    async def set_list_access(self, user_ids: Sequence[str], list_id: str, role: Optional[str]) -> None:
+        for user_id in user_ids:
+            oid = to_object_id(user_id)
+            record = self.store.users.get(oid) if oid is not None else None
+            if record is None:
+                continue
+            # replace rather than mutate, so copies handed out earlier stay unchanged
+            access = dict(record.doc.get("list_access") or {})
+            if role is None:
+                access.pop(list_id, None)
+            else:
+                access[list_id] = role
+            record.doc["list_access"] = access
+
+    async def adjust_tag_counts(self, user_id: str, deltas: dict[str, int]) -> None:
+        oid = to_object_id(user_id)
+        record = self.store.users.get(oid) if oid is not None else None
+        if record is None:
+            return
+        counts = dict(record.doc.get("tag_counts") or {})
+        for tag, delta in deltas.items():
+            count = counts.get(tag, 0) + delta
+            if count > 0:
+                counts[tag] = count
+            else:
+                counts.pop(tag, None)
+        record.doc["tag_counts"] = counts
+
+    async def add_attachment_bytes(self, user_id: str, delta: int, limit: Optional[int] = None) -> bool:
+        oid = to_object_id(user_id)
+        record = self.store.users.get(oid) if oid is not None else None
+        if record is None:
+            return False
+        used = record.doc.get("attachment_bytes", 0) + delta
+        if limit is not None and used > limit:
+            return False
+        record.doc["attachment_bytes"] = used
+        return True
+
+
+    def _find(self, user_id: str) -> Optional[_UserRecord]:
+        oid = to_object_id(user_id)
+        return self.store.users.get(oid) if oid is not None else None
+
+    async def deactivate(self, user_id: str) -> bool:
+        record = self._find(user_id)
+        if record is None or record.doc.get("deleted_at") is not None:
+            return False
+        now = datetime.now(timezone.utc)
+        record.doc.update(is_active=False, deleted_at=now, purge={"updated_at": now})
+        return True
+
+    async def list_purge_pending(self, stale_before: datetime, limit: int) -> list[dict[str, Any]]:
+        pending = [
+            dict(record.doc) for record in self.store.users.values()
+            if record.doc.get("deleted_at") is not None
+            and timestamp(record.doc["purge"]["updated_at"]) < timestamp(stale_before)
+        ]
+        return pending[:limit]
+
+    async def set_purge_progress(self, user_id: str, progress: dict[str, Any]) -> None:
+        record = self._find(user_id)
+        if record is not None:
+            record.doc["purge"] = dict(progress)
+
+    async def delete(self, user_id: str) -> bool:
+        record = self._find(user_id)
+        if record is None:
+            return False
+        del self.store.users[record.id]
+        del self.store.users_by_email[record.email]
+        del self.store.users_by_username[record.username]
+        return True
+
+class InMemoryAttachmentRepository(AttachmentRepository):
+    """
+    Attachment metadata in an `InMemoryStore`.
+    """
+
+    def __init__(self, store: InMemoryStore = memory_store):
+        self.store = store
+
+    async def create(self, data: dict[str, Any]) -> dict[str, Any]:
+        oid = ObjectId()
+        doc = {**data, "_id": oid}
+        self.store.attachments[oid] = doc
+        return dict(doc)
+
+    async def list_for_task(self, task_id: str) -> list[dict[str, Any]]:
+        found = [doc for doc in self.store.attachments.values() if doc["task_id"] == task_id]
+        return [dict(doc) for doc in sorted(found, key=created_order)]
+
+    async def get(self, task_id: str, attachment_id: str) -> Optional[dict[str, Any]]:
+        oid = to_object_id(attachment_id)
+        doc = self.store.attachments.get(oid) if oid is not None else None
+        return dict(doc) if doc is not None and doc["task_id"] == task_id else None
+
+    async def delete(self, task_id: str, attachment_id: str) -> Optional[dict[str, Any]]:
+        doc = await self.get(task_id, attachment_id)
+        if doc is not None:
+            del self.store.attachments[doc["_id"]]
+        return doc
+
+    async def delete_for_task(self, task_id: str) -> list[dict[str, Any]]:
+        found = [doc for doc in self.store.attachments.values() if doc["task_id"] == task_id]
+        for doc in found:
+            del self.store.attachments[doc["_id"]]
+        return found
+
+
+class InMemoryAuditRepository(AuditRepository):
+    """
+    Audit events in an `InMemoryStore`, kept in id order. Nothing expires.
+    """
+
+    def __init__(self, store: InMemoryStore = memory_store):
+        self.store = store
+
+    async def insert_many(self, events: list[dict[str, Any]]) -> list[Optional[bool]]:
+        for event in events:
+            i = bisect_left(self.store.audit, event["_id"], key=lambda e: e["_id"])
+            if i == len(self.store.audit) or self.store.audit[i]["_id"] != event["_id"]:
+                self.store.audit.insert(i, dict(event))
+        return [True] * len(events)
+
+    async def list_for_user(
+        self,
+        user_id: str,
+        limit: int,
+        before: Optional[str] = None,
+        action: Optional[str] = None,
+        task_id: Optional[str] = None,
+    ) -> list[dict[str, Any]]:
+        bound = to_object_id(before) if before is not None else None
+        found = []
+        for event in reversed(self.store.audit):
+            if len(found) == limit:
+                break
+            if event["user_id"] != user_id or (before is not None and (bound is None or event["_id"] >= bound)):
+                continue
+            if (action is None or event["action"] == action) and (task_id is None or event["task_id"] == task_id):
+                found.append(dict(event))
+        return found
+
+
+    async def delete_for_user(self, user_id: str, batch_size: int) -> int:
+        kept, deleted = [], 0
+        for event in self.store.audit:
+            if event["user_id"] == user_id and deleted < batch_size:
+                deleted += 1
+            else:
+                kept.append(event)
+        self.store.audit = kept
+        return deleted
+
+class InMemoryImportJobRepository(ImportJobRepository):
+    """
+    Import jobs in an `InMemoryStore`.
+    """
+
+    def __init__(self, store: InMemoryStore = memory_store):
+        self.store = store
+
+    async def create(self, data: dict[str, Any]) -> dict[str, Any]:
+        oid = ObjectId()
+        doc = {**data, "_id": oid}
+        self.store.import_jobs[oid] = doc
+        return dict(doc)
+
+    async def get(self, user_id: str, job_id: str) -> Optional[dict[str, Any]]:
+        oid = to_object_id(job_id)
+        doc = self.store.import_jobs.get(oid) if oid is not None else None
+        return dict(doc) if doc is not None and doc["user_id"] == user_id else None
+
+    async def claim(self, user_id: str, job_id: str, stale_before: datetime) -> Optional[dict[str, Any]]:
+        doc = await self.get(user_id, job_id)
+        if doc is None:
+            return None
+        stale = doc["status"] == "running" and timestamp(doc["updated_at"]) < timestamp(stale_before)
+        if doc["status"] != "failed" and not stale:
+            return None
+        await self.update(doc["_id"], {"status": "running", "updated_at": datetime.now(timezone.utc), "detail": None})
+        return dict(self.store.import_jobs[doc["_id"]])
+
+    async def update(self, job_id: Any, fields: dict[str, Any], errors: Sequence[dict[str, Any]] = ()) -> None:
+        doc = self.store.import_jobs.get(job_id)
+        if doc is None:
+            return
+        doc.update(fields)
+        if errors:
+            doc["errors"] = [*doc.get("errors", []), *errors][:settings.IMPORT_MAX_ERRORS]
+
+
+    async def delete_for_user(self, user_id: str, batch_size: int) -> list[dict[str, Any]]:
+        batch = [doc for doc in self.store.import_jobs.values() if doc["user_id"] == user_id][:batch_size]
+        for doc in batch:
+            del self.store.import_jobs[doc["_id"]]
+        return batch
+
+class InMemoryTaskListRepository(TaskListRepository):
+    """
+    Shared lists in an `InMemoryStore`.
+    """
+
+    def __init__(self, store: InMemoryStore = memory_store):
+        self.store = store
+
+    def _find(self, list_id: str) -> Optional[dict[str, Any]]:
+        oid = to_object_id(list_id)
+        return self.store.task_lists.get(oid) if oid is not None else None
+
+    async def create(self, data: dict[str, Any]) -> dict[str, Any]:
+        oid = ObjectId()
+        doc = {**data, "_id": oid, "members": dict(data.get("members") or {})}
+        self.store.task_lists[oid] = doc
+        return dict(doc, members=dict(doc["members"]))
+
+    async def get(self, list_id: str) -> Optional[dict[str, Any]]:
+        doc = self._find(list_id)
+        return dict(doc, members=dict(doc["members"])) if doc else None
+
+    async def get_many(self, list_ids: Sequence[str]) -> list[dict[str, Any]]:
+        found = [doc for doc in map(self._find, list_ids) if doc is not None]
+        return [dict(doc, members=dict(doc["members"])) for doc in sorted(found, key=created_order)]
+
+    async def set_member(
+        self, list_id: str, user_id: str, role: Optional[str]
+    ) -> Optional[dict[str, Any]]:
+        doc = self._find(list_id)
+        if doc is None:
+            return None
+        if role is None:
+            doc["members"].pop(user_id, None)
+        else:
+            doc["members"][user_id] = role
+        return dict(doc, members=dict(doc["members"]))
+
+    async def delete(self, list_id: str) -> Optional[dict[str, Any]]:
+        oid = to_object_id(list_id)
+        return self.store.task_lists.pop(oid, None) if oid is not None else None
+
+
+class InMemoryIdempotencyRepository(IdempotencyRepository):
+    """
+    Idempotency records in an `InMemoryStore`, expired lazily on access.
+    """
+
+    def __init__(self, store: InMemoryStore = memory_store):
+        self.store = store
+
+    def _live(self, key: str) -> Optional[dict[str, Any]]:
+        record = self.store.idempotency.get(key)
+        if record is not None and time.monotonic() - record["stored_at"] > settings.IDEMPOTENCY_TTL_SECONDS:
+            del self.store.idempotency[key]
+            return None
+        return record
+
+    async def claim(self, key: str, fingerprint: str) -> Optional[dict[str, Any]]:
+        now = time.monotonic()
+        record = self._live(key)
+        if record is not None:
+            expired = record["state"] == "pending" and record["pending_until"] < now
+            if not expired or record["fingerprint"] != fingerprint:
+                return dict(record)
+            record["pending_until"] = now + settings.IDEMPOTENCY_LEASE_SECONDS
+            return None
+        self.store.idempotency[key] = {
+            "_id": key,
+            "fingerprint": fingerprint,
+            "state": "pending",
+            "stored_at": now,
+            "pending_until": now + settings.IDEMPOTENCY_LEASE_SECONDS,
+        }
+        return None
+
+    async def complete(self, key: str, status_code: int, body: Any) -> None:
+        record = self.store.idempotency.get(key)
+        if record is not None:
+            record.update(state="done", status_code=status_code, body=body)
+
+    async def release(self, key: str) -> None:
+        record = self.store.idempotency.get(key)
+        if record is not None and record["state"] == "pending":
+            del self.store.idempotency[key]
+
+    async def delete_for_user(self, user_id: str, batch_size: int) -> int:
+        batch = [key for key in self.store.idempotency if key.startswith(f"{user_id}:")][:batch_size]
+        for key in batch:
+            del self.store.idempotency[key]
+        return len(batch)
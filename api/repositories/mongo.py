@@ -0,0 +1,984 @@
+# motor-backed repositories
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional, Sequence
+from bson import ObjectId
+from bson.errors import InvalidId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, DeleteOne, InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from api.exceptions import DuplicateError
+from api.repositories.base import (
+    AttachmentRepository,
+    AuditRepository,
+    IdempotencyRepository,
+    ImportJobRepository,
+    TaskListRepository,
+    TaskRepository,
+    UserRepository,
+    created_order,
+    ranked_order,
+)
+from api.repositories.routing import MongoRoute, session_kwargs
+from api.utils.rank import rank_sequence
+from api.utils.validation import normalize_email
+from core.config import settings
+
+# Per-document write errors worth retrying: interrupted or stepped-down
+# servers and write conflicts, as opposed to documents the server refuses
+_TRANSIENT_WRITE_ERRORS = frozenset({6, 7, 89, 91, 112, 189, 262, 9001, 10107, 11600, 11602, 13435, 13436})
+
+
+def to_object_id(value: str) -> Optional[ObjectId]:
+    """
+    Parses an id coming from a URL or a token. Malformed ids map to None so
+    they behave like a missing document instead of a server error.
+    """
+    if isinstance(value, ObjectId):
+        return value
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        return None
+
+
+def _scope(user_id: str, lists: Sequence[str]) -> dict[str, Any]:
+    """
+    Filter matching the user's own tasks plus the tasks in shared `lists`.
+    """
+    if not lists:
+        return {"user_id": user_id}
+    return {"$or": [{"user_id": user_id}, {"list_id": {"$in": list(lists)}}]}
+
+
+def _at_version(version: int) -> dict[str, Any]:
+    """
+    Filter matching a task still at `version`. Tasks from before versioning
+    have no counter and count as version 0.
+    """
+    return {"version": version} if version else {"version": {"$in": [0, None]}}
+
+
+class MongoTaskRepository(TaskRepository):
+    """
+    Task repository on top of the `tasks` collection, with archived tasks in
+    `tasks_archive` and tombstones of deleted tasks in `task_tombstones`.
+    `read` and `write` select the routing profiles (see
+    `api.repositories.routing`).
+    """
+
+    collection_name = "tasks"
+    archive_name = "tasks_archive"
+    tombstones_name = "task_tombstones"
+
+    def __init__(self, db: AsyncIOMotorDatabase, read: str = "default", write: str = "default"):
+        self.db = db
+        self.route = MongoRoute(db, read=read, write=write)
+        self.collection = self.route.collection(self.collection_name)
+        self.archive = self.route.collection(self.archive_name)
+        self.tombstones = self.route.collection(self.tombstones_name)
+
+    async def ensure_indexes(self) -> None:
+        """
+        Creates the indexes the queries below rely on.
+        """
+        await self.collection.create_index([("user_id", ASCENDING), ("created_at", ASCENDING)])
+        # manual order; created_at breaks ties between tasks that have no position yet
+        await self.collection.create_index(
+            [("user_id", ASCENDING), ("position", ASCENDING), ("created_at", ASCENDING)]
+        )
+        # tasks of shared lists, for members listing them
+        await self.collection.create_index(
+            [("list_id", ASCENDING), ("created_at", ASCENDING)],
+            partialFilterExpression={"list_id": {"$type": "string"}},
+        )
+        # subtree queries match any task listing the root in its ancestors path
+        await self.collection.create_index(
+            [("user_id", ASCENDING), ("ancestors", ASCENDING), ("created_at", ASCENDING)]
+        )
+        # sync change feeds, for own tasks and for shared lists
+        await self.collection.create_index([("user_id", ASCENDING), ("updated_at", ASCENDING)])
+        await self.collection.create_index(
+            [("list_id", ASCENDING), ("updated_at", ASCENDING)],
+            partialFilterExpression={"list_id": {"$type": "string"}},
+        )
+        # agenda range scans; recurring tasks are looked up apart, whatever their anchor date
+        await self.collection.create_index([("user_id", ASCENDING), ("due_date", ASCENDING)])
+        await self.collection.create_index(
+            [("list_id", ASCENDING), ("due_date", ASCENDING)],
+            partialFilterExpression={"list_id": {"$type": "string"}},
+        )
+        await self.collection.create_index(
+            [("user_id", ASCENDING), ("recurrence", ASCENDING)],
+            partialFilterExpression={"recurrence": {"$type": "string"}},
+        )
+        # one task per client id, so a retried sync cannot create it twice
+        await self.collection.create_index(
+            [("user_id", ASCENDING), ("sync_client_id", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"sync_client_id": {"$type": "string"}},
+        )
+        await self.tombstones.create_index([("user_id", ASCENDING), ("deleted_at", ASCENDING)])
+        await self.tombstones.create_index(
+            [("list_id", ASCENDING), ("deleted_at", ASCENDING)],
+            partialFilterExpression={"list_id": {"$type": "string"}},
+        )
+        await self.tombstones.create_index("deleted_at", expireAfterSeconds=settings.SYNC_TOMBSTONE_DAYS * 86400)
+        # multikey: one entry per tag, serving both all-of and any-of tag filters
+        await self.collection.create_index(
+            [("user_id", ASCENDING), ("tags", ASCENDING), ("created_at", ASCENDING)]
+        )
+        # only completed tasks are archival candidates, so keep the index small
+        await self.collection.create_index(
+            [("completed_at", ASCENDING)],
+            partialFilterExpression={"is_completed": True},
+        )
+        await self.archive.create_index([("user_id", ASCENDING), ("created_at", ASCENDING)])
+        await self.archive.create_index([("user_id", ASCENDING), ("ancestors", ASCENDING)])
+        await self.archive.create_index([("user_id", ASCENDING), ("tags", ASCENDING)])
+        await self.archive.create_index(
+            [("list_id", ASCENDING)], partialFilterExpression={"list_id": {"$type": "string"}}
+        )
+
+    async def create(self, user_id: str, data: dict[str, Any]) -> dict[str, Any]:
+        document = {"version": 1, **data, "user_id": user_id}
+        async with self.route.writing(user_id) as session:
+            result = await self.collection.insert_one(document, **session_kwargs(session))
+        document["_id"] = result.inserted_id
+        return document
+
+    async def insert_many(self, user_id: str, documents: list[dict[str, Any]]) -> list[bool]:
+        if not documents:
+            return []
+        inserted = [True] * len(documents)
+        async with self.route.writing(user_id) as session:
+            try:
+                await self.collection.insert_many(
+                    [{"version": 1, **document, "user_id": user_id} for document in documents],
+                    ordered=False,
+                    **session_kwargs(session),
+                )
+            except BulkWriteError as e:
+                errors = e.details.get("writeErrors", [])
+                if any(error["code"] != 11000 for error in errors):
+                    raise
+                for error in errors:
+                    inserted[error["index"]] = False
+        return inserted
+
+    async def list_for_user(
+        self,
+        user_id: str,
+        include_archived: bool = False,
+        ranked: bool = False,
+        lists: Sequence[str] = (),
+        tags: Sequence[str] = (),
+        match_all: bool = True,
+    ) -> list[dict[str, Any]]:
+        order = [("position", ASCENDING), ("created_at", ASCENDING)] if ranked else [("created_at", ASCENDING)]
+        scope = _scope(user_id, lists)
+        if tags:
+            scope["tags"] = {"$all" if match_all else "$in": list(tags)}
+        async def query():
+            async with self.route.reading(self.collection_name, user_id) as (collection, session):
+                hot = await collection.find(scope, **session_kwargs(session)).sort(order).to_list(length=None)
+            if not include_archived:
+                return hot
+            async with self.route.reading(self.archive_name, user_id) as (archive, session):
+                archived = await archive.find(scope, **session_kwargs(session)).to_list(length=None)
+            # a task caught mid-move can be in both tiers; the hot copy wins
+            hot_ids = {task["_id"] for task in hot}
+            return sorted(
+                hot + [t for t in archived if t["_id"] not in hot_ids],
+                key=ranked_order if ranked else created_order,
+            )
+        return await self.route.coalesce(
+            user_id,
+            ("tasks.list", include_archived, ranked, tuple(sorted(lists)), tuple(sorted(tags)), match_all),
+            query,
+        )
+
+    async def list_shared(self, list_id: str) -> list[dict[str, Any]]:
+        async with self.route.reading(self.collection_name, list_id) as (collection, session):
+            return await collection.find(
+                {"list_id": list_id}, **session_kwargs(session)
+            ).sort("created_at", ASCENDING).to_list(length=None)
+
+    async def detach_list(self, list_id: str) -> int:
+        moved = 0
+        for tier in (self.collection, self.archive):
+            result = await tier.update_many({"list_id": list_id}, {"$set": {"list_id": None}})
+            moved += result.modified_count
+        return moved
+
+    async def _adjacent_position(self, user_id: str, bound: dict[str, Any], direction: int) -> Optional[str]:
+        async with self.route.reading(self.collection_name, user_id) as (collection, session):
+            adjacent = await collection.find_one(
+                {"user_id": user_id, "position": {"$type": "string", **bound}},
+                {"position": 1},
+                sort=[("position", direction)],
+                **session_kwargs(session),
+            )
+        return adjacent["position"] if adjacent else None
+
+    async def position_before(self, user_id: str, position: Optional[str] = None) -> Optional[str]:
+        bound = {"$lt": position} if position is not None else {}
+        return await self._adjacent_position(user_id, bound, DESCENDING)
+
+    async def position_after(self, user_id: str, position: str) -> Optional[str]:
+        return await self._adjacent_position(user_id, {"$gt": position}, ASCENDING)
+
+    async def rebalance_positions(self, user_id: str) -> int:
+        tasks = await self.route.primary(self.collection_name).find(
+            {"user_id": user_id}, {"position": 1, "created_at": 1}
+        ).sort([("position", ASCENDING), ("created_at", ASCENDING)]).to_list(length=None)
+        # each update is conditional, so a move made meanwhile is not overwritten
+        updates = [
+            UpdateOne({"_id": task["_id"], "position": task.get("position")}, {"$set": {"position": key}})
+            for task, key in zip(tasks, rank_sequence(len(tasks)))
+            if task.get("position") != key
+        ]
+        if not updates:
+            return 0
+        async with self.route.writing(user_id) as session:
+            result = await self.collection.bulk_write(updates, ordered=False, **session_kwargs(session))
+        return result.modified_count
+
+    async def get(
+        self, user_id: str, task_id: str, lists: Sequence[str] = ()
+    ) -> Optional[dict[str, Any]]:
+        oid = to_object_id(task_id)
+        if oid is None:
+            return None
+        async def query():
+            async with self.route.reading(self.collection_name, user_id) as (collection, session):
+                return await collection.find_one(
+                    {"_id": oid, **_scope(user_id, lists)}, **session_kwargs(session)
+                )
+        task = await self.route.coalesce(user_id, ("tasks.get", oid, tuple(sorted(lists))), query)
+        if task is None:
+            task = await self._restore(user_id, oid, lists)
+        return task
+
+    async def _restore(self, user_id: str, oid: ObjectId, lists: Sequence[str] = ()) -> Optional[dict[str, Any]]:
+        """
+        Moves an archived task back to the hot tier and returns it.
+        """
+        archived = await self.route.primary(self.archive_name).find_one({"_id": oid, **_scope(user_id, lists)})
+        if archived is None:
+            return None
+        archived.pop("archived_at", None)
+        archived["restored_at"] = datetime.now(timezone.utc)
+        async with self.route.writing(user_id) as session:
+            try:
+                await self.collection.insert_one(archived, **session_kwargs(session))
+            except DuplicateKeyError:
+                # restored concurrently by another request
+                archived = await self.route.primary(self.collection_name).find_one({"_id": oid})
+            await self.archive.delete_one({"_id": oid}, **session_kwargs(session))
+        return archived
+
+    async def update(
+        self, user_id: str, task_id: str, data: dict[str, Any], lists: Sequence[str] = ()
+    ) -> Optional[dict[str, Any]]:
+        oid = to_object_id(task_id)
+        if oid is None:
+            return None
+        async with self.route.writing(user_id) as session:
+            updated = await self.collection.find_one_and_update(
+                {"_id": oid, **_scope(user_id, lists)},
+                {"$set": data, "$inc": {"version": 1}},
+                return_document=ReturnDocument.AFTER,
+                **session_kwargs(session),
+            )
+        if updated is None and await self._restore(user_id, oid, lists) is not None:
+            return await self.update(user_id, task_id, data, lists)
+        return updated
+
+    async def delete(self, user_id: str, task_id: str, lists: Sequence[str] = ()) -> bool:
+        oid = to_object_id(task_id)
+        if oid is None:
+            return False
+        scope = _scope(user_id, lists)
+        fields = {"user_id": 1, "list_id": 1}
+        async with self.route.writing(user_id) as session:
+            deleted = await self.collection.find_one_and_delete(
+                {"_id": oid, **scope}, projection=fields, **session_kwargs(session)
+            )
+            if deleted is None:
+                deleted = await self.archive.find_one_and_delete(
+                    {"_id": oid, **scope}, projection=fields, **session_kwargs(session)
+                )
+            if deleted is not None:
+                await self._bury([deleted], session)
+        return deleted is not None
+
+    async def _bury(self, tasks: list[dict[str, Any]], session=None) -> None:
+        """
+        Leaves tombstones for deleted tasks (needing `_id`, `user_id`, `list_id`).
+        """
+        now = datetime.now(timezone.utc)
+        await self.tombstones.bulk_write([
+            UpdateOne(
+                {"_id": task["_id"]},
+                {"$set": {"user_id": task["user_id"], "list_id": task.get("list_id"), "deleted_at": now}},
+                upsert=True,
+            )
+            for task in tasks
+        ], ordered=False, **session_kwargs(session))
+
+    async def get_many(
+        self, user_id: str, task_ids: Sequence[str], lists: Sequence[str] = ()
+    ) -> list[dict[str, Any]]:
+        oids = [oid for oid in map(to_object_id, task_ids) if oid is not None]
+        if not oids:
+            return []
+        scope = _scope(user_id, lists)
+        async with self.route.reading(self.collection_name, user_id) as (collection, session):
+            found = await collection.find(
+                {"_id": {"$in": oids}, **scope}, **session_kwargs(session)
+            ).to_list(length=None)
+        missing = set(oids) - {task["_id"] for task in found}
+        if missing:
+            archived = await self.route.primary(self.archive_name).find(
+                {"_id": {"$in": list(missing)}, **scope}, {"_id": 1}
+            ).to_list(length=None)
+            for task in archived:
+                restored = await self._restore(user_id, task["_id"], lists)
+                if restored is not None:
+                    found.append(restored)
+        return found
+
+    async def list_changed(self, user_id: str, since: datetime, lists: Sequence[str] = ()) -> list[dict[str, Any]]:
+        async with self.route.reading(self.collection_name, user_id) as (collection, session):
+            return await collection.find(
+                {**_scope(user_id, lists), "updated_at": {"$gte": since}}, **session_kwargs(session)
+            ).sort("updated_at", ASCENDING).to_list(length=None)
+
+    async def list_deleted(self, user_id: str, since: datetime, lists: Sequence[str] = ()) -> list[str]:
+        async with self.route.reading(self.tombstones_name, user_id) as (tombstones, session):
+            found = await tombstones.find(
+                {**_scope(user_id, lists), "deleted_at": {"$gte": since}}, {"_id": 1}, **session_kwargs(session)
+            ).sort("deleted_at", ASCENDING).to_list(length=None)
+        return [str(tombstone["_id"]) for tombstone in found]
+
+    async def list_due(
+        self, user_id: str, start: datetime, end: datetime, lists: Sequence[str] = ()
+    ) -> list[dict[str, Any]]:
+        scope = _scope(user_id, lists)
+        async with self.route.reading(self.collection_name, user_id) as (collection, session):
+            due = await collection.find(
+                {**scope, "due_date": {"$gte": start, "$lt": end}, "recurrence": None}, **session_kwargs(session)
+            ).sort("due_date", ASCENDING).to_list(length=None)
+            series = await collection.find(
+                {**scope, "recurrence": {"$type": "string"}, "due_date": {"$lt": end}}, **session_kwargs(session)
+            ).to_list(length=None)
+        return due + series
+
+    async def count_overdue(self, user_id: str, before: datetime, lists: Sequence[str] = ()) -> int:
+        async with self.route.reading(self.collection_name, user_id) as (collection, session):
+            return await collection.count_documents(
+                {**_scope(user_id, lists), "due_date": {"$lt": before}, "recurrence": None, "is_completed": {"$ne": True}},
+                **session_kwargs(session),
+            )
+
+    async def get_by_client_ids(self, user_id: str, client_ids: Sequence[str]) -> list[dict[str, Any]]:
+        if not client_ids:
+            return []
+        return await self.route.primary(self.collection_name).find(
+            {"user_id": user_id, "sync_client_id": {"$in": list(client_ids)}}
+        ).to_list(length=None)
+
+    async def apply_sync(
+        self, user_id: str, writes: list[dict[str, Any]], lists: Sequence[str] = ()
+    ) -> list[bool]:
+        if not writes:
+            return []
+        scope = _scope(user_id, lists)
+        # marks the updates of this batch, to tell them apart if some lose a race
+        token = ObjectId()
+        operations = []
+        for write in writes:
+            if write["op"] == "create":
+                operations.append(InsertOne({"version": 1, **write["document"], "user_id": user_id}))
+                continue
+            query = {"_id": to_object_id(write["task_id"]), **scope, **_at_version(write["version"])}
+            if write["op"] == "update":
+                operations.append(UpdateOne(query, {"$set": {**write["changes"], "sync_token": token}, "$inc": {"version": 1}}))
+            else:
+                operations.append(DeleteOne(query))
+
+        applied = [True] * len(writes)
+        async with self.route.writing(user_id) as session:
+            try:
+                result = await self.collection.bulk_write(operations, ordered=False, **session_kwargs(session))
+                done = result.inserted_count + result.matched_count + result.deleted_count
+            except BulkWriteError as e:
+                for error in e.details.get("writeErrors", []):
+                    applied[error["index"]] = False
+                done = e.details.get("nInserted", 0) + e.details.get("nMatched", 0) + e.details.get("nRemoved", 0)
+            if done < sum(applied):
+                # some updates or deletes found their task at another version; find out which
+                oids = [to_object_id(w["task_id"]) for w in writes if w["op"] != "create"]
+                current = {
+                    task["_id"]: task for task in await self.route.primary(self.collection_name).find(
+                        {"_id": {"$in": oids}}, {"sync_token": 1}
+                    ).to_list(length=None)
+                }
+                for i, write in enumerate(writes):
+                    oid = to_object_id(write.get("task_id"))
+                    if write["op"] == "update":
+                        applied[i] = current.get(oid, {}).get("sync_token") == token
+                    elif write["op"] == "delete":
+                        applied[i] = oid not in current
+            buried = [
+                {"_id": to_object_id(write["task_id"]), "user_id": write.get("user_id", user_id), "list_id": write.get("list_id")}
+                for write, ok in zip(writes, applied) if ok and write["op"] == "delete"
+            ]
+            if buried:
+                await self._bury(buried, session)
+        return applied
+
+    async def update_occurrence(
+        self, user_id: str, task_id: str, key: str, data: dict[str, Any]
+    ) -> Optional[dict[str, Any]]:
+        return await self.update(
+            user_id,
+            task_id,
+            {f"occurrence_overrides.{key}.{field}": value for field, value in data.items()},
+        )
+
+    async def list_subtree(self, user_id: str, task_id: str) -> list[dict[str, Any]]:
+        oid = to_object_id(task_id)
+        if oid is None:
+            return []
+        async def query():
+            async with self.route.reading(self.collection_name, user_id) as (collection, session):
+                subtree = await collection.find(
+                    {"user_id": user_id, "$or": [{"_id": oid}, {"ancestors": task_id}]},
+                    **session_kwargs(session),
+                ).sort("created_at", ASCENDING).to_list(length=None)
+            return subtree if any(task["_id"] == oid for task in subtree) else []
+        return await self.route.coalesce(user_id, ("tasks.subtree", oid), query)
+
+    async def set_subtree_completed(
+        self, user_id: str, task_id: str, completed: bool, now: datetime
+    ) -> int:
+        oid = to_object_id(task_id)
+        if oid is None:
+            return 0
+        # a pipeline update, so completed_at and roll-ups can be derived per document
+        stage = {"$set": {
+            "completed_at": {"$cond": [{"$eq": ["$is_completed", completed]}, "$completed_at", now if completed else None]},
+            "is_completed": completed,
+            "updated_at": now,
+            "subtasks_completed": {"$ifNull": ["$subtasks_total", 0]} if completed else 0,
+            "version": {"$add": [{"$ifNull": ["$version", 0]}, 1]},
+        }}
+        async with self.route.writing(user_id) as session:
+            result = await self.collection.update_many(
+                {"user_id": user_id, "$or": [{"_id": oid}, {"ancestors": task_id}]},
+                [stage],
+                **session_kwargs(session),
+            )
+        return result.matched_count
+
+    async def delete_descendants(self, user_id: str, task_id: str, batch_size: int) -> int:
+        deleted = 0
+        for tier in (self.collection_name, self.archive_name):
+            primary = self.route.primary(tier)
+            while True:
+                batch = await primary.find(
+                    {"user_id": user_id, "ancestors": task_id}, {"_id": 1, "user_id": 1, "list_id": 1}
+                ).limit(batch_size).to_list(length=None)
+                if not batch:
+                    break
+                async with self.route.writing(user_id) as session:
+                    result = await primary.delete_many(
+                        {"_id": {"$in": [task["_id"] for task in batch]}}, **session_kwargs(session)
+                    )
+                    await self._bury(batch, session)
+                deleted += result.deleted_count
+        return deleted
+
+    async def adjust_rollups(
+        self, user_id: str, task_ids: list[str], total: int = 0, completed: int = 0
+    ) -> None:
+        oids = [oid for oid in map(to_object_id, task_ids) if oid is not None]
+        if not oids or not (total or completed):
+            return
+        async with self.route.writing(user_id) as session:
+            await self.collection.update_many(
+                {"_id": {"$in": oids}, "user_id": user_id},
+                {"$inc": {"subtasks_total": total, "subtasks_completed": completed}},
+                **session_kwargs(session),
+            )
+
+    async def archive_completed(self, completed_before: datetime, batch_size: int) -> int:
+        primary = self.route.primary(self.collection_name)
+        batch = await primary.find({
+            "is_completed": True,
+            "$or": [
+                {"completed_at": {"$lt": completed_before}},
+                # tasks completed before completed_at was tracked
+                {"completed_at": None, "updated_at": {"$lt": completed_before}},
+            ],
+            "restored_at": {"$not": {"$gte": completed_before}},
+        }).limit(batch_size).to_list(length=None)
+        if not batch:
+            return 0
+
+        archived_at = datetime.now(timezone.utc)
+        for task in batch:
+            task["archived_at"] = archived_at
+        try:
+            await self.archive.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            # duplicates are left over from an interrupted earlier run
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+
+        # only remove tasks nobody touched since they were read
+        ids = [task["_id"] for task in batch]
+        result = await self.collection.delete_many({
+            "$or": [{"_id": task["_id"], "updated_at": task.get("updated_at")} for task in batch]
+        })
+        if result.deleted_count < len(batch):
+            still_hot = await primary.find({"_id": {"$in": ids}}, {"_id": 1}).to_list(length=None)
+            await self.archive.delete_many({"_id": {"$in": [t["_id"] for t in still_hot]}})
+        for user_id in {task["user_id"] for task in batch}:
+            self.route.flights.forget(user_id)
+        return result.deleted_count
+
+
+    async def delete_batch_for_user(self, user_id: str, batch_size: int) -> list[str]:
+        for tier in (self.route.primary(self.collection_name), self.archive):
+            # both walk the (user_id, created_at) index
+            batch = await tier.find({"user_id": user_id}, {"_id": 1}).limit(batch_size).to_list(length=None)
+            if batch:
+                ids = [task["_id"] for task in batch]
+                async with self.route.writing(user_id) as session:
+                    await tier.delete_many({"_id": {"$in": ids}}, **session_kwargs(session))
+                return [str(oid) for oid in ids]
+        return []
+
+class MongoUserRepository(UserRepository):
+    """
+    User repository on top of the `users` collection. Lookups that are not
+    tied to a known user (login, signup checks) always read the primary.
+    """
+
+    collection_name = "users"
+
+    def __init__(self, db: AsyncIOMotorDatabase, read: str = "default", write: str = "default"):
+        self.db = db
+        self.route = MongoRoute(db, read=read, write=write)
+        self.collection = self.route.collection(self.collection_name)
+        self.primary = self.route.primary(self.collection_name)
+
+    async def ensure_indexes(self) -> None:
+        """
+        Creates the unique indexes used for login and signup lookups, and
+        the one the account purger polls.
+        """
+        await self.collection.create_index("email", unique=True)
+        await self.collection.create_index("username", unique=True)
+        # only deactivated accounts carry purge progress
+        await self.collection.create_index(
+            "purge.updated_at", partialFilterExpression={"deleted_at": {"$type": "date"}}
+        )
+
+    async def create(self, data: dict[str, Any]) -> dict[str, Any]:
+        document = dict(data)
+        try:
+            result = await self.collection.insert_one(document)
+        except DuplicateKeyError as e:
+            raise DuplicateError("Email or username already exists") from e
+        document["_id"] = result.inserted_id
+        return document
+
+    async def get_by_id(self, user_id: str) -> Optional[dict[str, Any]]:
+        oid = to_object_id(user_id)
+        if oid is None:
+            return None
+        async def query():
+            async with self.route.reading(self.collection_name, str(oid)) as (collection, session):
+                return await collection.find_one({"_id": oid}, **session_kwargs(session))
+        return await self.route.coalesce(str(oid), ("users.get_by_id",), query)
+
+    async def get_by_email(self, email: str) -> Optional[dict[str, Any]]:
+        return await self.primary.find_one({"email": email})
+
+    async def find_by_email_or_username(
+        self, email: str, username: str
+    ) -> Optional[dict[str, Any]]:
+        return await self.primary.find_one(
+            {"$or": [{"email": email}, {"username": username}]}
+        )
+
+    async def normalize_emails(self) -> list[str]:
+        conflicts = []
+        # a scan, but only once per startup and normally matching nothing
+        async for user in self.primary.find({"email": {"$regex": r"[A-Z]|^\s|\s$"}}, {"email": 1}):
+            try:
+                await self.primary.update_one({"_id": user["_id"]}, {"$set": {"email": normalize_email(user["email"])}})
+            except DuplicateKeyError:
+                conflicts.append(str(user["_id"]))
+        return conflicts
+
+    async def set_password(self, user_id: str, hashed_password: str) -> bool:
+        oid = to_object_id(user_id)
+        if oid is None:
+            return False
+        async with self.route.writing(str(oid)) as session:
+            result = await self.collection.update_one(
+                {"_id": oid}, {"$set": {"password": hashed_password}}, **session_kwargs(session)
+            )
+        return result.matched_count > 0
+
+    async def set_list_access(self, user_ids: Sequence[str], list_id: str, role: Optional[str]) -> None:
+        oids = [oid for oid in map(to_object_id, user_ids) if oid is not None]
+        if not oids:
+            return
+        field = f"list_access.{list_id}"
+        change = {"$set": {field: role}} if role is not None else {"$unset": {field: ""}}
+        await self.primary.update_many({"_id": {"$in": oids}}, change)
+        for oid in oids:
+            self.route.flights.forget(str(oid))
+
+    async def adjust_tag_counts(self, user_id: str, deltas: dict[str, int]) -> None:
+        oid = to_object_id(user_id)
+        changes = {f"tag_counts.{tag}": delta for tag, delta in deltas.items() if delta}
+        if oid is None or not changes:
+            return
+        user = await self.primary.find_one_and_update(
+            {"_id": oid}, {"$inc": changes}, projection={"tag_counts": 1}, return_document=ReturnDocument.AFTER
+        )
+        emptied = [tag for tag, count in ((user or {}).get("tag_counts") or {}).items() if count <= 0]
+        for tag in emptied:
+            # only if no write brought it back in between
+            await self.primary.update_one(
+                {"_id": oid, f"tag_counts.{tag}": {"$lte": 0}}, {"$unset": {f"tag_counts.{tag}": ""}}
+            )
+        self.route.flights.forget(str(oid))
+
+    async def add_attachment_bytes(self, user_id: str, delta: int, limit: Optional[int] = None) -> bool:
+        oid = to_object_id(user_id)
+        if oid is None:
+            return False
+        query: dict[str, Any] = {"_id": oid}
+        if limit is not None:
+            # missing counters count as zero
+            query["$or"] = [{"attachment_bytes": {"$lte": limit - delta}}, {"attachment_bytes": {"$exists": False}}]
+        result = await self.primary.update_one(query, {"$inc": {"attachment_bytes": delta}})
+        self.route.flights.forget(str(oid))
+        return result.modified_count > 0
+
+
+    async def deactivate(self, user_id: str) -> bool:
+        oid = to_object_id(user_id)
+        if oid is None:
+            return False
+        now = datetime.now(timezone.utc)
+        async with self.route.writing(str(oid)) as session:
+            result = await self.collection.update_one(
+                {"_id": oid, "deleted_at": None},
+                {"$set": {"is_active": False, "deleted_at": now, "purge": {"updated_at": now}}},
+                **session_kwargs(session),
+            )
+        return result.modified_count > 0
+
+    async def list_purge_pending(self, stale_before: datetime, limit: int) -> list[dict[str, Any]]:
+        return await self.primary.find(
+            {"deleted_at": {"$type": "date"}, "purge.updated_at": {"$lt": stale_before}}
+        ).limit(limit).to_list(length=None)
+
+    async def set_purge_progress(self, user_id: str, progress: dict[str, Any]) -> None:
+        oid = to_object_id(user_id)
+        if oid is None:
+            return
+        async with self.route.writing(str(oid)) as session:
+            await self.collection.update_one({"_id": oid}, {"$set": {"purge": progress}}, **session_kwargs(session))
+
+    async def delete(self, user_id: str) -> bool:
+        oid = to_object_id(user_id)
+        if oid is None:
+            return False
+        async with self.route.writing(str(oid)) as session:
+            result = await self.collection.delete_one({"_id": oid}, **session_kwargs(session))
+        return result.deleted_count > 0
+
+class MongoAttachmentRepository(AttachmentRepository):
+    """
+    Attachment metadata in the `attachments` collection.
+    """
+
+    collection_name = "attachments"
+
+    def __init__(self, db: AsyncIOMotorDatabase, write: str = "default"):
+        self.db = db
+        self.route = MongoRoute(db, write=write)
+        self.collection = self.route.primary(self.collection_name)
+
+    async def ensure_indexes(self) -> None:
+        """
+        Creates the index listing a task's attachments walks.
+        """
+        await self.collection.create_index([("task_id", ASCENDING), ("created_at", ASCENDING)])
+
+    async def create(self, data: dict[str, Any]) -> dict[str, Any]:
+        document = dict(data)
+        result = await self.collection.insert_one(document)
+        document["_id"] = result.inserted_id
+        return document
+
+    async def list_for_task(self, task_id: str) -> list[dict[str, Any]]:
+        return await self.collection.find({"task_id": task_id}).sort("created_at", ASCENDING).to_list(length=None)
+
+    async def get(self, task_id: str, attachment_id: str) -> Optional[dict[str, Any]]:
+        oid = to_object_id(attachment_id)
+        return await self.collection.find_one({"_id": oid, "task_id": task_id}) if oid is not None else None
+
+    async def delete(self, task_id: str, attachment_id: str) -> Optional[dict[str, Any]]:
+        oid = to_object_id(attachment_id)
+        if oid is None:
+            return None
+        return await self.collection.find_one_and_delete({"_id": oid, "task_id": task_id})
+
+    async def delete_for_task(self, task_id: str) -> list[dict[str, Any]]:
+        attachments = await self.collection.find({"task_id": task_id}).to_list(length=None)
+        if attachments:
+            await self.collection.delete_many({"_id": {"$in": [a["_id"] for a in attachments]}})
+        return attachments
+
+
+class MongoAuditRepository(AuditRepository):
+    """
+    Audit events in the `audit_log` collection, expired by a TTL index after
+    AUDIT_RETENTION_DAYS.
+    """
+
+    collection_name = "audit_log"
+
+    def __init__(self, db: AsyncIOMotorDatabase, write: str = "default"):
+        self.db = db
+        self.route = MongoRoute(db, write=write)
+        self.collection = self.route.primary(self.collection_name)
+
+    async def ensure_indexes(self) -> None:
+        """
+        Creates the history index and the TTL index.
+        """
+        await self.collection.create_index([("user_id", ASCENDING), ("_id", DESCENDING)])
+        await self.collection.create_index("at", expireAfterSeconds=settings.AUDIT_RETENTION_DAYS * 86400)
+
+    async def insert_many(self, events: list[dict[str, Any]]) -> list[Optional[bool]]:
+        try:
+            # unordered: one bad event does not hold back the rest of the batch
+            await self.collection.insert_many(events, ordered=False)
+        except BulkWriteError as e:
+            results: list[Optional[bool]] = [True] * len(events)
+            for error in e.details.get("writeErrors", []):
+                # a duplicate _id was stored by an earlier attempt
+                if error["code"] != 11000:
+                    results[error["index"]] = None if error["code"] in _TRANSIENT_WRITE_ERRORS else False
+            if e.details.get("writeConcernErrors"):
+                # stored but maybe not durably; a retry is harmless
+                results = [None if result else result for result in results]
+            return results
+        return [True] * len(events)
+
+    async def list_for_user(
+        self,
+        user_id: str,
+        limit: int,
+        before: Optional[str] = None,
+        action: Optional[str] = None,
+        task_id: Optional[str] = None,
+    ) -> list[dict[str, Any]]:
+        query: dict[str, Any] = {"user_id": user_id}
+        if before is not None:
+            query["_id"] = {"$lt": to_object_id(before) or ObjectId("0" * 24)}
+        if action is not None:
+            query["action"] = action
+        if task_id is not None:
+            query["task_id"] = task_id
+        return await self.collection.find(query).sort("_id", DESCENDING).limit(limit).to_list(length=None)
+
+
+    async def delete_for_user(self, user_id: str, batch_size: int) -> int:
+        batch = await self.collection.find({"user_id": user_id}, {"_id": 1}).limit(batch_size).to_list(length=None)
+        if not batch:
+            return 0
+        result = await self.collection.delete_many({"_id": {"$in": [event["_id"] for event in batch]}})
+        return result.deleted_count
+
+class MongoImportJobRepository(ImportJobRepository):
+    """
+    Import jobs in the `import_jobs` collection.
+    """
+
+    collection_name = "import_jobs"
+
+    def __init__(self, db: AsyncIOMotorDatabase, write: str = "default"):
+        self.db = db
+        self.route = MongoRoute(db, write=write)
+        self.collection = self.route.primary(self.collection_name)
+
+    async def ensure_indexes(self) -> None:
+        """
+        Creates the index purging a user's jobs walks.
+        """
+        await self.collection.create_index("user_id")
+
+    async def create(self, data: dict[str, Any]) -> dict[str, Any]:
+        document = dict(data)
+        result = await self.collection.insert_one(document)
+        document["_id"] = result.inserted_id
+        return document
+
+    async def get(self, user_id: str, job_id: str) -> Optional[dict[str, Any]]:
+        oid = to_object_id(job_id)
+        return await self.collection.find_one({"_id": oid, "user_id": user_id}) if oid is not None else None
+
+    async def claim(self, user_id: str, job_id: str, stale_before: datetime) -> Optional[dict[str, Any]]:
+        oid = to_object_id(job_id)
+        if oid is None:
+            return None
+        return await self.collection.find_one_and_update(
+            {
+                "_id": oid,
+                "user_id": user_id,
+                "$or": [{"status": "failed"}, {"status": "running", "updated_at": {"$lt": stale_before}}],
+            },
+            {"$set": {"status": "running", "updated_at": datetime.now(timezone.utc), "detail": None}},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def update(self, job_id: Any, fields: dict[str, Any], errors: Sequence[dict[str, Any]] = ()) -> None:
+        change: dict[str, Any] = {"$set": fields}
+        if errors:
+            # a positive $slice keeps the first errors, which are the ones worth fixing first
+            change["$push"] = {"errors": {"$each": list(errors), "$slice": settings.IMPORT_MAX_ERRORS}}
+        await self.collection.update_one({"_id": job_id}, change)
+
+
+    async def delete_for_user(self, user_id: str, batch_size: int) -> list[dict[str, Any]]:
+        batch = await self.collection.find({"user_id": user_id}).limit(batch_size).to_list(length=None)
+        if batch:
+            await self.collection.delete_many({"_id": {"$in": [job["_id"] for job in batch]}})
+        return batch
+
+class MongoTaskListRepository(TaskListRepository):
+    """
+    Shared lists in the `task_lists` collection. Reads go to the primary:
+    membership checks must see the latest change.
+    """
+
+    collection_name = "task_lists"
+
+    def __init__(self, db: AsyncIOMotorDatabase, write: str = "default"):
+        self.db = db
+        self.route = MongoRoute(db, write=write)
+        self.collection = self.route.primary(self.collection_name)
+
+    async def create(self, data: dict[str, Any]) -> dict[str, Any]:
+        document = dict(data)
+        result = await self.collection.insert_one(document)
+        document["_id"] = result.inserted_id
+        return document
+
+    async def get(self, list_id: str) -> Optional[dict[str, Any]]:
+        oid = to_object_id(list_id)
+        return await self.collection.find_one({"_id": oid}) if oid is not None else None
+
+    async def get_many(self, list_ids: Sequence[str]) -> list[dict[str, Any]]:
+        oids = [oid for oid in map(to_object_id, list_ids) if oid is not None]
+        if not oids:
+            return []
+        return await self.collection.find({"_id": {"$in": oids}}).sort("created_at", ASCENDING).to_list(length=None)
+
+    async def set_member(
+        self, list_id: str, user_id: str, role: Optional[str]
+    ) -> Optional[dict[str, Any]]:
+        oid = to_object_id(list_id)
+        if oid is None:
+            return None
+        field = f"members.{user_id}"
+        change = {"$set": {field: role}} if role is not None else {"$unset": {field: ""}}
+        return await self.collection.find_one_and_update(
+            {"_id": oid}, change, return_document=ReturnDocument.AFTER
+        )
+
+    async def delete(self, list_id: str) -> Optional[dict[str, Any]]:
+        oid = to_object_id(list_id)
+        return await self.collection.find_one_and_delete({"_id": oid}) if oid is not None else None
+
+
+class MongoIdempotencyRepository(IdempotencyRepository):
+    """
+    Idempotency records in `idempotency_keys`, expired by a TTL index.
+    """
+
+    collection_name = "idempotency_keys"
+
+    def __init__(self, db: AsyncIOMotorDatabase, write: str = "default"):
+        self.db = db
+        self.route = MongoRoute(db, write=write)
+        self.collection = self.route.collection(self.collection_name)
+
+    async def ensure_indexes(self) -> None:
+        """
+        Creates the TTL index that expires old keys.
+        """
+        await self.collection.create_index(
+            "created_at", expireAfterSeconds=settings.IDEMPOTENCY_TTL_SECONDS
+        )
+
+    async def claim(self, key: str, fingerprint: str) -> Optional[dict[str, Any]]:
+        now = datetime.now(timezone.utc)
+        lease = timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS)
+        try:
+            await self.collection.insert_one({
+                "_id": key,
+                "fingerprint": fingerprint,
+                "state": "pending",
+                "created_at": now,
+                "pending_until": now + lease,
+            })
+            return None
+        except DuplicateKeyError:
+            pass
+        # only one retry wins the takeover; claims stored before leases expire by created_at
+        expired = {"$or": [
+            {"pending_until": {"$lt": now}},
+            {"pending_until": {"$exists": False}, "created_at": {"$lt": now - lease}},
+        ]}
+        taken = await self.collection.find_one_and_update(
+            {"_id": key, "state": "pending", "fingerprint": fingerprint, **expired},
+            {"$set": {"pending_until": now + lease}},
+        )
+        if taken is not None:
+            return None
+        return await self.collection.find_one({"_id": key})
+
+    async def complete(self, key: str, status_code: int, body: Any) -> None:
+        await self.collection.update_one(
+            {"_id": key},
+            {
+                "$set": {"state": "done", "status_code": status_code, "body": body},
+                "$unset": {"pending_until": ""},
+            },
+        )
+
+    async def release(self, key: str) -> None:
+        await self.collection.delete_one({"_id": key, "state": "pending"})
+
+    async def delete_for_user(self, user_id: str, batch_size: int) -> int:
+        # keys are "<user_id>:<key>", so the user's records are one range of the _id index
+        scope = {"_id": {"$gte": f"{user_id}:", "$lt": f"{user_id};"}}
+        batch = await self.collection.find(scope, {"_id": 1}).limit(batch_size).to_list(length=None)
+        if not batch:
+            return 0
+        result = await self.collection.delete_many({"_id": {"$in": [record["_id"] for record in batch]}})
+        return result.deleted_count
@@ -0,0 +1,214 @@
+# read/write routing for the motor repositories
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.read_preferences import (
+    Nearest,
+    Primary,
+    PrimaryPreferred,
+    Secondary,
+    SecondaryPreferred,
+)
+from pymongo.write_concern import WriteConcern
+
+from api.repositories.singleflight import SingleFlight, singleflight
+from core.config import settings
+
+_READ_MODES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+# Read profiles: "default" for reads that must be fresh, "heavy" for list/stats/export
+# reads that may be served by a secondary within the staleness bound.
+READ_PROFILES = ("default", "heavy")
+# Write profiles: "default" for user data, "light" for low-value writes (logs, caches).
+WRITE_PROFILES = ("default", "light")
+
+
+def read_preference(profile: str = "default"):
+    """
+    Builds the pymongo read preference for a read profile from settings.
+    """
+    if profile not in READ_PROFILES:
+        raise ValueError(f"Unknown read profile: {profile}")
+    mode = settings.MONGODB_HEAVY_READ_PREFERENCE if profile == "heavy" else settings.MONGODB_READ_PREFERENCE
+    if mode not in _READ_MODES:
+        raise ValueError(f"Unknown read preference: {mode}")
+    if mode == "primary":
+        return Primary()
+    return _READ_MODES[mode](max_staleness=settings.MONGODB_MAX_STALENESS_SECONDS)
+
+
+def write_concern(profile: str = "default") -> WriteConcern:
+    """
+    Builds the write concern for a write profile from settings.
+    """
+    if profile not in WRITE_PROFILES:
+        raise ValueError(f"Unknown write profile: {profile}")
+    w = settings.MONGODB_LIGHT_WRITE_CONCERN if profile == "light" else settings.MONGODB_WRITE_CONCERN
+    return WriteConcern(w=int(w) if w.isdigit() else w)
+
+
+class CausalTracker:
+    """
+    Remembers the cluster/operation time of each user's last write for a
+    short window. Reads by that user inside the window run in a causally
+    consistent session that waits for the write, even on a secondary.
+
+    The tracker is per process, so the guarantee holds for follow-up
+    requests served by the same worker. Writes are kept in the order they
+    were recorded; recording prunes the expired ones from the front, and
+    beyond `max_users` the oldest are dropped (their users' next reads may
+    then go to a lagging secondary, as after the window).
+    """
+
+    def __init__(self, window_seconds: Optional[float] = None, max_users: Optional[int] = None):
+        self.window_seconds = window_seconds
+        self.max_users = max_users
+        self._writes: dict[str, tuple[float, Any, Any]] = {}
+
+    @property
+    def window(self) -> float:
+        if self.window_seconds is not None:
+            return self.window_seconds
+        return settings.READ_YOUR_WRITES_SECONDS
+
+    def __len__(self) -> int:
+        return len(self._writes)
+
+    def record(self, user_id: str, cluster_time: Any = None, operation_time: Any = None) -> None:
+        """
+        Records a write by the user.
+        """
+        now = time.monotonic()
+        # re-inserted at the end, so the dict stays ordered by write time
+        self._writes.pop(user_id, None)
+        self._writes[user_id] = (now, cluster_time, operation_time)
+        max_users = self.max_users if self.max_users is not None else settings.READ_YOUR_WRITES_MAX_USERS
+        for oldest, entry in list(self._writes.items()):
+            if now - entry[0] <= self.window and len(self._writes) <= max_users:
+                break
+            del self._writes[oldest]
+
+    def pending(self, user_id: str) -> Optional[tuple[Any, Any]]:
+        """
+        Returns (cluster_time, operation_time) if the user wrote within the window.
+        """
+        entry = self._writes.get(user_id)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.window:
+            del self._writes[user_id]
+            return None
+        return entry[1], entry[2]
+
+
+causal_tracker = CausalTracker()
+
+
+class MongoRoute:
+    """
+    Read preference, write concern and causal sessions for one repository.
+    """
+
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        read: str = "default",
+        write: str = "default",
+        tracker: CausalTracker = causal_tracker,
+        flights: SingleFlight = singleflight,
+    ):
+        self.db = db
+        self.read = read
+        self.write = write
+        self.read_preference = read_preference(read)
+        self.write_concern = write_concern(write)
+        self.tracker = tracker
+        self.flights = flights
+
+    def collection(self, name: str):
+        """
+        Returns the collection configured with this route's read and write options.
+        """
+        return self.db.get_collection(
+            name, read_preference=self.read_preference, write_concern=self.write_concern
+        )
+
+    def primary(self, name: str):
+        """
+        Returns the collection pinned to the primary.
+        """
+        return self.db.get_collection(
+            name, read_preference=Primary(), write_concern=self.write_concern
+        )
+
+    async def _start_session(self):
+        try:
+            return await self.db.client.start_session(causal_consistency=True)
+        except (NotImplementedError, TypeError, AttributeError):
+            # e.g. mongomock, which has no sessions
+            return None
+
+    @asynccontextmanager
+    async def writing(self, user_id: str) -> AsyncIterator[Optional[Any]]:
+        """
+        Yields a causal session (or None) for a write by the user and records
+        the write so the user's next reads observe it.
+        """
+        session = await self._start_session()
+        try:
+            yield session
+        finally:
+            self.flights.forget(user_id)
+            if session is not None:
+                self.tracker.record(user_id, session.cluster_time, session.operation_time)
+                await session.end_session()
+            else:
+                self.tracker.record(user_id)
+
+    @asynccontextmanager
+    async def reading(self, name: str, user_id: str) -> AsyncIterator[tuple[Any, Optional[Any]]]:
+        """
+        Yields (collection, session) for a read by the user. Reads right after
+        one of the user's writes use a causal session, or fall back to the
+        primary when sessions are unavailable.
+        """
+        pending = None
+        if self.read_preference.mode != Primary().mode:
+            pending = self.tracker.pending(user_id)
+        if pending is None:
+            yield self.collection(name), None
+            return
+        cluster_time, operation_time = pending
+        session = await self._start_session() if operation_time is not None else None
+        if session is None:
+            yield self.primary(name), None
+            return
+        try:
+            if cluster_time is not None:
+                session.advance_cluster_time(cluster_time)
+            session.advance_operation_time(operation_time)
+            yield self.collection(name), session
+        finally:
+            await session.end_session()
+
+
+    async def coalesce(self, user_id: str, key: tuple, fn):
+        """
+        Runs the read `fn` through single-flight, keyed by database, read
+        profile and the normalized query `key`.
+        """
+        return await self.flights.do(user_id, (self.db.name, self.read) + key, fn)
+
+
+def session_kwargs(session: Optional[Any]) -> dict[str, Any]:
+    """
+    Keyword arguments passing `session` to a Motor call, if there is one.
+    """
+    return {"session": session} if session is not None else {}
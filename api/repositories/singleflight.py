@@ -0,0 +1,85 @@
+# request coalescing for identical concurrent reads
+import asyncio
+import copy
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Hashable
+
+from api.middleware.request_context import current_route
+from core.metrics import register_metrics
+
+
+class _Flight:
+    __slots__ = ("task", "waiters", "shared")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+        self.shared = False
+
+
+class SingleFlight:
+    """
+    Shares one in-flight call between concurrent callers asking the same
+    question. Flights are grouped per user so a write by that user can
+    `forget` them: callers arriving after the write never join a read that
+    started before it.
+
+    The call runs in its own task. A cancelled caller does not cancel the
+    call for the others; the call is only cancelled when every caller is gone.
+    """
+
+    def __init__(self):
+        self._flights: dict[str, dict[Hashable, _Flight]] = {}
+        self.stats: dict[str, dict[str, int]] = defaultdict(lambda: {"calls": 0, "saved": 0})
+
+    async def do(self, user_id: str, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Returns the result of `fn()`, joining an identical in-flight call for
+        the user when there is one. Each caller gets its own copy of the result.
+        """
+        route_stats = self.stats[current_route()]
+        user_flights = self._flights.setdefault(user_id, {})
+        flight = user_flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fn()))
+            user_flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._finish(user_id, key, flight))
+            route_stats["calls"] += 1
+        else:
+            flight.shared = True
+            route_stats["saved"] += 1
+
+        flight.waiters += 1
+        try:
+            result = await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+        # shared results are copied so one caller's mutations never leak to another
+        return copy.deepcopy(result) if flight.shared else result
+
+    def _finish(self, user_id: str, key: Hashable, flight: _Flight) -> None:
+        user_flights = self._flights.get(user_id)
+        if user_flights is not None and user_flights.get(key) is flight:
+            del user_flights[key]
+            if not user_flights:
+                del self._flights[user_id]
+
+    def forget(self, user_id: str) -> None:
+        """
+        Detaches the user's in-flight calls so later callers start fresh ones.
+        """
+        self._flights.pop(user_id, None)
+
+    def snapshot(self) -> dict[str, dict[str, int]]:
+        """
+        Per-route counts of calls made and calls saved by coalescing.
+        """
+        return {route: dict(counts) for route, counts in self.stats.items()}
+
+
+singleflight = SingleFlight()
+register_metrics("singleflight", singleflight.snapshot)
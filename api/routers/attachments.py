@@ -0,0 +1,213 @@
+# task attachments router
+import re
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from typing import Annotated, Any, Optional
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+from api.dependencies.auth import get_current_user
+from api.dependencies.repositories import (
+    get_attachment_repository,
+    get_blob_store,
+    get_task_repository,
+    get_user_repository,
+)
+from api.exceptions import UploadTooLarge
+from api.models.user import User
+from api.repositories import AttachmentRepository, BlobStore, TaskRepository, UserRepository
+from api.schemas.attachment import AttachmentResponse
+from api.services.attachments import UploadStream, store_upload
+from api.services.sharing import lists_with_role
+from core.config import settings
+
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)")
+
+router = APIRouter(
+    prefix="/tasks/{task_id}/attachments",
+    tags=["attachments"],
+    dependencies=[Depends(get_current_user)]
+)
+
+
+async def _get_task(tasks: TaskRepository, task_id: str, user: User, required: str) -> dict[str, Any]:
+    """
+    Returns the task if the user may read it (`viewer`) or change it (`editor`).
+    """
+    task = await tasks.get(str(user.id), task_id, lists=lists_with_role(user, required))
+    if task is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    return task
+
+
+def _parse_range(header: Optional[str], length: int) -> Optional[tuple[int, int]]:
+    """
+    Returns the [start, end) byte range a `Range` header asks for, or None to
+    send the whole content (no header, or several ranges). Raises a 416 for a
+    range outside the content.
+    """
+    match = _RANGE.fullmatch(header.strip()) if header else None
+    if match is None or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":
+        # suffix range: the last N bytes
+        start, end = max(length - int(last), 0), length
+    else:
+        start, end = int(first), min(int(last) + 1, length) if last else length
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Range not satisfiable",
+            headers={"Content-Range": f"bytes */{length}"},
+        )
+    return start, end
+
+# Upload attachment
+@router.post(
+    "",
+    response_model=AttachmentResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Upload an attachment",
+    description=(
+        "Attach a file to a task, sent as the `file` field of a multipart/form-data body. "
+        "The body is streamed to storage, never held in memory whole. Files over "
+        "ATTACHMENT_MAX_BYTES, or past the uploader's remaining quota, are rejected with 413."
+    ),
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {"file": {"type": "string", "format": "binary"}},
+                        "required": ["file"],
+                    }
+                }
+            },
+        }
+    },
+)
+async def upload_attachment(
+    task_id:str,
+    request:Request,
+    tasks:Annotated[TaskRepository,Depends(get_task_repository)],
+    users:Annotated[UserRepository,Depends(get_user_repository)],
+    attachments:Annotated[AttachmentRepository,Depends(get_attachment_repository)],
+    store:Annotated[BlobStore,Depends(get_blob_store)],
+    current_user: Annotated[User, Depends(get_current_user)]
+):
+    await _get_task(tasks, task_id, current_user, "editor")
+    user_id = str(current_user.id)
+    limit = min(settings.ATTACHMENT_MAX_BYTES, settings.ATTACHMENT_QUOTA_BYTES - current_user.attachment_bytes)
+    if limit <= 0:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Attachment quota exceeded")
+
+    try:
+        upload = UploadStream(request)
+        await upload.open()
+        sha256, length = await store_upload(store, upload, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+
+    # the quota check above is advisory; this one holds against concurrent uploads
+    if not await users.add_attachment_bytes(user_id, length, limit=settings.ATTACHMENT_QUOTA_BYTES):
+        await store.release(sha256)
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Attachment quota exceeded")
+    return await attachments.create({
+        "task_id": task_id,
+        "user_id": user_id,
+        "filename": upload.filename,
+        "content_type": upload.content_type,
+        "length": length,
+        "sha256": sha256,
+        "created_at": datetime.now(timezone.utc),
+    })
+
+# Get attachments
+@router.get(
+    "",
+    response_model=list[AttachmentResponse],
+    status_code=status.HTTP_200_OK,
+    summary="Get the attachments of a task",
+    description="Get the attachments of a task, oldest first."
+)
+async def get_attachments(
+    task_id:str,
+    tasks:Annotated[TaskRepository,Depends(get_task_repository)],
+    attachments:Annotated[AttachmentRepository,Depends(get_attachment_repository)],
+    current_user: Annotated[User, Depends(get_current_user)]
+):
+    await _get_task(tasks, task_id, current_user, "viewer")
+    return await attachments.list_for_task(task_id)
+
+# Download attachment
+@router.get(
+    "/{attachment_id}",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    summary="Download an attachment",
+    description=(
+        "Stream an attachment's content. Send `Range: bytes=start-end` (a single range) "
+        "to get part of it with 206 Partial Content, e.g. to resume a download."
+    ),
+    responses={206: {"description": "Partial content"}, 416: {"description": "Range not satisfiable"}}
+)
+async def download_attachment(
+    task_id:str,
+    attachment_id:str,
+    tasks:Annotated[TaskRepository,Depends(get_task_repository)],
+    attachments:Annotated[AttachmentRepository,Depends(get_attachment_repository)],
+    store:Annotated[BlobStore,Depends(get_blob_store)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    range:Annotated[Optional[str], Header()] = None
+):
+    await _get_task(tasks, task_id, current_user, "viewer")
+    attachment = await attachments.get(task_id, attachment_id)
+    if attachment is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Attachment not found")
+
+    length = attachment["length"]
+    requested = _parse_range(range, length)
+    start, end = requested or (0, length)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Length": str(end - start),
+        "ETag": f'"{attachment["sha256"]}"',
+        "Content-Disposition": f"attachment; filename*=UTF-8''{quote(attachment['filename'])}",
+    }
+    if requested is not None:
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{length}"
+    return StreamingResponse(
+        store.read(attachment["sha256"], start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT if requested else status.HTTP_200_OK,
+        media_type=attachment["content_type"],
+        headers=headers,
+    )
+
+# Delete attachment
+@router.delete(
+    "/{attachment_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Delete an attachment",
+    description="Delete an attachment and give its size back to the uploader's quota."
+)
+async def delete_attachment(
+    task_id:str,
+    attachment_id:str,
+    tasks:Annotated[TaskRepository,Depends(get_task_repository)],
+    users:Annotated[UserRepository,Depends(get_user_repository)],
+    attachments:Annotated[AttachmentRepository,Depends(get_attachment_repository)],
+    store:Annotated[BlobStore,Depends(get_blob_store)],
+    current_user: Annotated[User, Depends(get_current_user)]
+):
+    await _get_task(tasks, task_id, current_user, "editor")
+    deleted = await attachments.delete(task_id, attachment_id)
+    if deleted is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Attachment not found")
+    await store.release(deleted["sha256"])
+    await users.add_attachment_bytes(deleted["user_id"], -deleted["length"])
+    return
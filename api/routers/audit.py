@@ -0,0 +1,42 @@
+# audit log router
+from fastapi import APIRouter, Depends, Query, status
+from typing import Annotated, Optional
+
+from api.dependencies.auth import get_current_user
+from api.dependencies.repositories import get_audit_repository
+from api.models.user import User
+from api.repositories import AuditRepository
+from api.schemas.audit import AuditPage
+
+router = APIRouter(
+    prefix="/audit",
+    tags=["audit"],
+    dependencies=[Depends(get_current_user)]
+)
+
+# Get activity
+@router.get(
+    "",
+    response_model=AuditPage,
+    status_code=status.HTTP_200_OK,
+    summary="Get my activity history",
+    description=(
+        "Get the audit history of the current user's account and tasks, newest first: logins, "
+        "password resets, and who created, changed or deleted which task. Events are written in "
+        "batches, so the last second or so may not show yet. Page with `before=next_before`."
+    )
+)
+async def get_audit_log(
+    audit:Annotated[AuditRepository,Depends(get_audit_repository)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    before: Optional[str] = None,
+    action: Optional[str] = None,
+    task_id: Optional[str] = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 50
+):
+    # one extra tells whether there is another page
+    events = await audit.list_for_user(
+        str(current_user.id), limit + 1, before=before, action=action, task_id=task_id
+    )
+    next_before = str(events[limit - 1]["_id"]) if len(events) > limit else None
+    return {"items": events[:limit], "next_before": next_before}
@@ -1,14 +1,16 @@
 # auth router
-from fastapi import APIRouter, Depends, HTTPException, status
-from api.dependencies.database import get_db
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from api.dependencies.repositories import get_account_purger, get_user_repository
+from api.exceptions import DuplicateError
 from api.models.user import User
-from motor.motor_asyncio import AsyncIOMotorClient
+from api.repositories import UserRepository
 from passlib.context import CryptContext
 from pydantic import EmailStr
 from typing import Annotated
 from core.config import settings
-from api.dependencies.auth import create_access_token
-from api.utils.password import get_password_hash, verify_password
+from api.dependencies.auth import create_access_token, get_current_user
+from api.utils.password import get_password_hash_async, verify_password_async
+from api.utils.instrumentation import budget
 from api.schemas.user import (
     UserCreate, 
     UserLogin, 
@@ -22,9 +24,9 @@ from api.schemas.user import (
 )
 from jose import jwt, JWTError, ExpiredSignatureError
 from datetime import timedelta
-from bson import ObjectId
+from api.services.audit import audit_log
 from api.services.email import send_reset_password_email
-from fastapi_mail import ConnectionConfig, FastMail, MessageSchema, MessageType
+from api.services.purge import AccountPurger
 # timedelta is used to calculate the expiry time of the token.
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -41,27 +43,30 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto") # bcrypt is a
     summary="Create a new user",
     description="Create a new user with a unique email and username."
 )
-async def signup(user: UserCreate, db: Annotated[AsyncIOMotorClient, Depends(get_db)]):
+@budget(commands=2, alloc_kib=64)
+async def signup(user: UserCreate, users: Annotated[UserRepository, Depends(get_user_repository)]):
     """
     Signs up a new user.
     """
     # check if user already exists
-    existing_user = await db["users"].find_one(
-        {"$or": [{"email": user.email}, {"username": user.username}]}
-    )
+    existing_user = await users.find_by_email_or_username(user.email, user.username)
     if existing_user:
         raise HTTPException(
             status_code=400, detail="Email or username already exists"
         )
 
     user_data = user.model_dump()
-    user_data["password"] = get_password_hash(user_data["password"])
+    user_data["password"] = await get_password_hash_async(user_data["password"])
 
     # insert user into database
-    result = await db["users"].insert_one(user_data)
-
-    # retrieve the created user
-    created_user = await db["users"].find_one({"_id": result.inserted_id})
+    try:
+        created_user = await users.create(user_data)
+    except DuplicateError:
+        # lost a race against a concurrent signup with the same email/username
+        raise HTTPException(
+            status_code=400, detail="Email or username already exists"
+        )
+    audit_log.record("auth.signup", str(created_user["_id"]))
 
     return created_user
 
@@ -74,13 +79,21 @@ async def signup(user: UserCreate, db: Annotated[AsyncIOMotorClient, Depends(get
     summary="User login",
     description="Authenticate a user and return a JWT access token."
 )
-async def login(form_data: UserLogin, db:Annotated[AsyncIOMotorClient,Depends(get_db)]):
+@budget(commands=1, alloc_kib=64)
+async def login(form_data: UserLogin, users: Annotated[UserRepository, Depends(get_user_repository)]):
     """
     Logs in a user.
     """
     # check if user exists
-    user = await db["users"].find_one({"email": form_data.email})
-    if not user or "password" not in user or not verify_password(form_data.password, user["password"]):
+    user = await users.get_by_email(form_data.email)
+    if (
+        not user
+        or not user.get("is_active", True)
+        or "password" not in user
+        or not await verify_password_async(form_data.password, user["password"])
+    ):
+        if user and user.get("is_active", True):
+            audit_log.record("auth.login_failed", str(user["_id"]))
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials",
@@ -89,6 +102,7 @@ async def login(form_data: UserLogin, db:Annotated[AsyncIOMotorClient,Depends(ge
 
     # create access token
     access_token = create_access_token(data={"sub": str(user["_id"])})
+    audit_log.record("auth.login", str(user["_id"]))
 
     return {
         "message": "Login successful",
@@ -104,12 +118,12 @@ async def login(form_data: UserLogin, db:Annotated[AsyncIOMotorClient,Depends(ge
     summary="Send a password reset email",
     description="Send a password reset link to the user's email address."
 )
-async def forgot_password(request: ForgotPasswordRequest, db:Annotated[AsyncIOMotorClient,Depends(get_db)]):
+async def forgot_password(request: ForgotPasswordRequest, users: Annotated[UserRepository, Depends(get_user_repository)]):
     """
     Handles the forgot password request.
     """
-    user = await db["users"].find_one({"email": request.email})
-    if not user:
+    user = await users.get_by_email(request.email)
+    if not user or not user.get("is_active", True):
         raise HTTPException(status_code=404, detail="User not found")
 
     # create reset token
@@ -119,33 +133,8 @@ async def forgot_password(request: ForgotPasswordRequest, db:Annotated[AsyncIOMo
     )
 
     # send email
-    reset_link = f"http://localhost:3000/reset-password?token={reset_token}"
-    conf = ConnectionConfig(
-        MAIL_USERNAME=settings.MAIL_USERNAME,
-        MAIL_PASSWORD=settings.MAIL_PASSWORD,
-        MAIL_FROM=settings.MAIL_FROM,
-        MAIL_PORT=settings.MAIL_PORT,
-        MAIL_SERVER=settings.MAIL_SERVER,
-        MAIL_STARTTLS=True,
-        MAIL_SSL_TLS=False,
-        USE_CREDENTIALS=True,
-        VALIDATE_CERTS=True,
-    )
-
-    message = MessageSchema(
-        subject="Password Reset Request",
-        recipients=[user["email"]],
-        body=f"""
-        <p>Hi {user['username']},</p>
-        <p>You requested a password reset. Click the link below to reset your password:</p>
-        <p><a href="{reset_link}">{reset_link}</a></p>
-        <p>This link will expire in {settings.ACCESS_TOKEN_EXPIRE_MINUTES} minutes.</p>
-        """,
-        subtype=MessageType.html,
-    )
-
-    fm = FastMail(conf)
-    await fm.send_message(message)
+    await send_reset_password_email(user["email"], reset_token, user["username"])
+    audit_log.record("auth.password_reset_requested", str(user["_id"]))
 
     return {"message": "Password reset email sent"}
 
@@ -157,7 +146,7 @@ async def forgot_password(request: ForgotPasswordRequest, db:Annotated[AsyncIOMo
     summary="Reset user password",
     description="Reset the user's password using a valid token."
 )
-async def reset_password(request: ResetPasswordRequest, db:Annotated[AsyncIOMotorClient,Depends(get_db)]):
+async def reset_password(request: ResetPasswordRequest, users: Annotated[UserRepository, Depends(get_user_repository)]):
     """
     Resets the user's password.
     """
@@ -174,12 +163,38 @@ async def reset_password(request: ResetPasswordRequest, db:Annotated[AsyncIOMoto
         raise HTTPException(status_code=401, detail="Invalid token")
 
     # hash new password
-    hashed_password = get_password_hash(request.new_password)
+    hashed_password = await get_password_hash_async(request.new_password)
 
     # update user's password
-    await db["users"].update_one(
-        {"_id": ObjectId(user_id)}, {"$set": {"password": hashed_password}}
-    )
+    await users.set_password(user_id, hashed_password)
+    audit_log.record("auth.password_reset", user_id)
 
     return {"message": "Password has been reset successfully"}
-        
\ No newline at end of file
+        
+
+# Delete Account
+@router.delete(
+    "/me",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Delete my account",
+    description=(
+        "Delete the current user's account. It is deactivated at once, so its tokens stop working; "
+        "its tasks, attachments and history are then purged in the background, and the email and "
+        "username become free once that finishes."
+    )
+)
+async def delete_account(
+    background_tasks: BackgroundTasks,
+    users: Annotated[UserRepository, Depends(get_user_repository)],
+    purger: Annotated[AccountPurger, Depends(get_account_purger)],
+    current_user: Annotated[User, Depends(get_current_user)]
+):
+    """
+    Deactivates the current user and starts purging their data.
+    """
+    user_id = str(current_user.id)
+    if not await users.deactivate(user_id):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Account is already being deleted")
+    audit_log.record("auth.account_deleted", user_id)
+    background_tasks.add_task(purger.purge, user_id)
+    return
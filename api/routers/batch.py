@@ -0,0 +1,157 @@
+# batched reads router
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Annotated, Any, Awaitable, Callable
+
+from api.dependencies.auth import get_current_user
+from api.dependencies.repositories import get_task_list_repository, get_task_repository
+from api.models.user import User
+from api.repositories import TaskListRepository, TaskRepository
+from api.schemas.batch import (
+    BatchRequest,
+    BatchResponse,
+    BucketsOperation,
+    ListOperation,
+    TaskOperation,
+    TasksOperation,
+)
+from api.schemas.task import TaskResponse
+from api.schemas.task_list import TaskListResponse
+from api.schemas.user import UserResponse
+from api.services.agenda import agenda_cache, parse_timezone
+from api.services.sharing import lists_with_role
+from api.services.tags import normalize_tags
+from api.utils.instrumentation import budget
+from api.utils.loader import BatchLoader
+from core.config import settings
+
+router = APIRouter(
+    prefix="/batch",
+    tags=["batch"],
+    dependencies=[Depends(get_current_user)]
+)
+
+
+class _Batch:
+    """
+    What the operations of one batch share: the principal, the repositories,
+    and loaders merging their lookups by id into one `$in` query each.
+    """
+
+    def __init__(self, user: User, tasks: TaskRepository, lists: TaskListRepository):
+        self.user = user
+        self.user_id = str(user.id)
+        self.readable = lists_with_role(user)
+        self.tasks = tasks
+        self.lists = lists
+        self.task_loader = BatchLoader(self._fetch_tasks)
+        self.list_loader = BatchLoader(self._fetch_lists)
+
+    async def _fetch_tasks(self, task_ids: list[str]) -> dict[str, dict[str, Any]]:
+        found = await self.tasks.get_many(self.user_id, task_ids, lists=self.readable)
+        return {str(task["_id"]): task for task in found}
+
+    async def _fetch_lists(self, list_ids: list[str]) -> dict[str, dict[str, Any]]:
+        return {str(task_list["_id"]): task_list for task_list in await self.lists.get_many(list_ids)}
+
+
+async def _me(batch: _Batch, operation: Any) -> Any:
+    return UserResponse.model_validate(batch.user.model_dump(by_alias=True)).model_dump(mode="json")
+
+
+async def _tags(batch: _Batch, operation: Any) -> Any:
+    counts = sorted(batch.user.tag_counts.items(), key=lambda item: (-item[1], item[0]))
+    return [{"tag": tag, "count": count} for tag, count in counts if count > 0]
+
+
+async def _lists(batch: _Batch, operation: Any) -> Any:
+    found = await asyncio.gather(*(batch.list_loader.load(list_id) for list_id in batch.user.list_access))
+    found = sorted((task_list for task_list in found if task_list), key=lambda task_list: task_list["created_at"])
+    return [TaskListResponse.model_validate(task_list).model_dump(mode="json") for task_list in found]
+
+
+async def _list(batch: _Batch, operation: ListOperation) -> Any:
+    task_list = await batch.list_loader.load(operation.list_id)
+    if task_list is None or batch.user_id not in task_list["members"]:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="List not found")
+    return TaskListResponse.model_validate(task_list).model_dump(mode="json")
+
+
+async def _task(batch: _Batch, operation: TaskOperation) -> Any:
+    task = await batch.task_loader.load(operation.task_id)
+    if task is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    return TaskResponse.model_validate(task).model_dump(mode="json")
+
+
+async def _tasks(batch: _Batch, operation: TasksOperation) -> Any:
+    try:
+        tags = normalize_tags(operation.tags)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    found = await batch.tasks.list_for_user(
+        batch.user_id,
+        include_archived=operation.include_archived,
+        ranked=operation.order == "position",
+        lists=batch.readable,
+        tags=tags,
+        match_all=operation.tag_match == "all",
+    )
+    return [TaskResponse.model_validate(task).model_dump(mode="json") for task in found]
+
+
+async def _buckets(batch: _Batch, operation: BucketsOperation) -> Any:
+    try:
+        zone = parse_timezone(operation.tz)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    return await agenda_cache.buckets(batch.tasks, batch.user_id, zone, batch.readable)
+
+
+_OPERATIONS: dict[str, Callable[[_Batch, Any], Awaitable[Any]]] = {
+    "me": _me,
+    "tags": _tags,
+    "lists": _lists,
+    "list": _list,
+    "task": _task,
+    "tasks": _tasks,
+    "buckets": _buckets,
+}
+
+
+async def _run(batch: _Batch, operation: Any) -> dict[str, Any]:
+    try:
+        data = await _OPERATIONS[operation.op](batch, operation)
+    except HTTPException as e:
+        return {"id": operation.id, "status": e.status_code, "detail": e.detail}
+    return {"id": operation.id, "status": status.HTTP_200_OK, "data": data}
+
+# Batch
+@router.post(
+    "",
+    response_model=BatchResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Run several reads in one request",
+    description=(
+        "Run up to "
+        f"{settings.BATCH_MAX_OPERATIONS} read operations for the current user at once, e.g. everything "
+        "a screen needs: `me`, `tags`, `lists`, `list`, `task`, `tasks` and `buckets`, each taking the "
+        "parameters of its own endpoint. Operations run concurrently and are authenticated once; "
+        "`task` and `list` lookups are merged into one query per kind. Every operation gets its own "
+        "result, with the status it would have had on its own, so one missing task fails only itself."
+    )
+)
+@budget(commands=4, alloc_kib=128)
+async def run_batch(
+    request: BatchRequest,
+    tasks:Annotated[TaskRepository,Depends(get_task_repository)],
+    lists:Annotated[TaskListRepository,Depends(get_task_list_repository)],
+    current_user: Annotated[User, Depends(get_current_user)]
+):
+    operations = request.operations
+    if len(operations) > settings.BATCH_MAX_OPERATIONS:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"At most {settings.BATCH_MAX_OPERATIONS} operations per batch")
+    if len({operation.id for operation in operations}) < len(operations):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Operation ids must be unique")
+    batch = _Batch(current_user, tasks, lists)
+    return {"results": await asyncio.gather(*(_run(batch, operation) for operation in operations))}
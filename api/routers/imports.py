@@ -0,0 +1,168 @@
+# task imports router
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, status
+from typing import Annotated, Literal, Optional
+from datetime import datetime, timedelta, timezone
+
+from api.dependencies.auth import get_current_user
+from api.dependencies.repositories import (
+    get_blob_store,
+    get_import_job_repository,
+    get_task_repository,
+    get_user_repository,
+)
+from api.exceptions import UploadTooLarge
+from api.models.user import User
+from api.repositories import BlobStore, ImportJobRepository, TaskRepository, UserRepository
+from api.schemas.import_job import ImportJobResponse, ImportRowError
+from api.services.attachments import UploadStream, store_upload
+from api.services.imports import guess_format, run_import
+from core.config import settings
+
+router = APIRouter(
+    prefix="/imports",
+    tags=["imports"],
+    dependencies=[Depends(get_current_user)]
+)
+
+
+async def _get_job(jobs: ImportJobRepository, job_id: str, user: User) -> dict:
+    job = await jobs.get(str(user.id), job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import not found")
+    return job
+
+# Start import
+@router.post(
+    "",
+    response_model=ImportJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Import tasks from a file",
+    description=(
+        "Upload a file of tasks as the `file` field of a multipart/form-data body and import it in the "
+        "background. `format` is `csv` (a header row with a title column, plus any of description, "
+        "due_date, category, tags, is_completed, recurrence), `ndjson` (one task object per line) or "
+        "`todoist` (a JSON array of tasks or an export object with an `items` array); by default it "
+        "follows the file extension. Rows are validated like `POST /tasks` and land at the bottom of "
+        "your own tasks; invalid rows are skipped and reported. Poll `GET /imports/{job_id}` for progress."
+    ),
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {"file": {"type": "string", "format": "binary"}},
+                        "required": ["file"],
+                    }
+                }
+            },
+        }
+    },
+)
+async def start_import(
+    request:Request,
+    background_tasks:BackgroundTasks,
+    jobs:Annotated[ImportJobRepository,Depends(get_import_job_repository)],
+    tasks:Annotated[TaskRepository,Depends(get_task_repository)],
+    users:Annotated[UserRepository,Depends(get_user_repository)],
+    store:Annotated[BlobStore,Depends(get_blob_store)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    format:Optional[Literal["csv", "ndjson", "todoist"]] = None
+):
+    try:
+        upload = UploadStream(request)
+        await upload.open()
+        format = format or guess_format(upload.filename)
+        if format is None:
+            raise ValueError("Cannot tell the format from the file name; pass format=csv, ndjson or todoist")
+        # kept in the blob store until the job completes, so it can be resumed
+        sha256, length = await store_upload(store, upload, settings.IMPORT_MAX_BYTES)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+
+    now = datetime.now(timezone.utc)
+    job = await jobs.create({
+        "user_id": str(current_user.id),
+        "status": "running",
+        "format": format,
+        "filename": upload.filename,
+        "sha256": sha256,
+        "length": length,
+        "rows": 0,
+        "imported": 0,
+        "failed": 0,
+        "errors": [],
+        "detail": None,
+        "created_at": now,
+        "updated_at": now,
+        "finished_at": None,
+    })
+    background_tasks.add_task(run_import, job, jobs, tasks, users, store)
+    return job
+
+# Get import
+@router.get(
+    "/{job_id}",
+    response_model=ImportJobResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Get an import's progress",
+    description="Get the status and counters of an import."
+)
+async def get_import(
+    job_id:str,
+    jobs:Annotated[ImportJobRepository,Depends(get_import_job_repository)],
+    current_user: Annotated[User, Depends(get_current_user)]
+):
+    return await _get_job(jobs, job_id, current_user)
+
+# Get import errors
+@router.get(
+    "/{job_id}/errors",
+    response_model=list[ImportRowError],
+    status_code=status.HTTP_200_OK,
+    summary="Get an import's rejected rows",
+    description=(
+        "Get the rows an import skipped and why, in file order. Only the first IMPORT_MAX_ERRORS "
+        "are kept; the job's `failed` counter has the total."
+    )
+)
+async def get_import_errors(
+    job_id:str,
+    jobs:Annotated[ImportJobRepository,Depends(get_import_job_repository)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    offset: Annotated[int, Query(ge=0)] = 0,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100
+):
+    job = await _get_job(jobs, job_id, current_user)
+    return job.get("errors", [])[offset:offset + limit]
+
+# Resume import
+@router.post(
+    "/{job_id}/resume",
+    response_model=ImportJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Resume an import",
+    description=(
+        "Continue a failed import, or one that made no progress for IMPORT_STALE_SECONDS (e.g. its "
+        "worker restarted), from the last saved batch. Rows already imported are not imported twice."
+    )
+)
+async def resume_import(
+    job_id:str,
+    background_tasks:BackgroundTasks,
+    jobs:Annotated[ImportJobRepository,Depends(get_import_job_repository)],
+    tasks:Annotated[TaskRepository,Depends(get_task_repository)],
+    users:Annotated[UserRepository,Depends(get_user_repository)],
+    store:Annotated[BlobStore,Depends(get_blob_store)],
+    current_user: Annotated[User, Depends(get_current_user)]
+):
+    stale_before = datetime.now(timezone.utc) - timedelta(seconds=settings.IMPORT_STALE_SECONDS)
+    job = await jobs.claim(str(current_user.id), job_id, stale_before)
+    if job is None:
+        await _get_job(jobs, job_id, current_user)
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Only failed or stalled imports can be resumed")
+    background_tasks.add_task(run_import, job, jobs, tasks, users, store)
+    return job
@@ -0,0 +1,190 @@
+# shared lists router
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from typing import Annotated, Any
+from datetime import datetime, timezone
+
+from api.dependencies.auth import get_current_user
+from api.dependencies.repositories import (
+    get_task_list_repository,
+    get_task_repository,
+    get_user_repository,
+)
+from api.models.user import User
+from api.repositories import TaskListRepository, TaskRepository, UserRepository
+from api.schemas.task import TaskResponse
+from api.schemas.task_list import MemberUpdate, TaskListCreate, TaskListResponse
+from api.services.sharing import dissolve_list, fan_out_access, has_role
+
+router = APIRouter(
+    prefix="/lists",
+    tags=["lists"],
+    dependencies=[Depends(get_current_user)]
+)
+
+
+async def _get_list(lists: TaskListRepository, list_id: str, user: User, required: str) -> dict[str, Any]:
+    """
+    Returns the list if the user has at least `required` on it. Checks the
+    list document itself, so revocations apply before the fan-out finishes.
+    """
+    task_list = await lists.get(list_id)
+    role = task_list["members"].get(str(user.id)) if task_list else None
+    if role is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="List not found")
+    if not has_role(role, required):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Requires the {required} role on this list")
+    return task_list
+
+# Create list
+@router.post(
+    "",
+    response_model=TaskListResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Create a shared list",
+    description="Create a task list owned by the current user. Add members to share its tasks."
+)
+async def create_list(
+    task_list:TaskListCreate,
+    lists:Annotated[TaskListRepository,Depends(get_task_list_repository)],
+    users:Annotated[UserRepository,Depends(get_user_repository)],
+    current_user: Annotated[User, Depends(get_current_user)]
+):
+    user_id = str(current_user.id)
+    created = await lists.create({
+        "name": task_list.name,
+        "owner_id": user_id,
+        "members": {user_id: "owner"},
+        "created_at": datetime.now(timezone.utc),
+    })
+    await users.set_list_access([user_id], str(created["_id"]), "owner")
+    return created
+
+# Get lists
+@router.get(
+    "",
+    response_model=list[TaskListResponse],
+    status_code=status.HTTP_200_OK,
+    summary="Get my lists",
+    description="Get the lists the current user owns or is a member of."
+)
+async def get_lists(
+    lists:Annotated[TaskListRepository,Depends(get_task_list_repository)],
+    current_user: Annotated[User, Depends(get_current_user)]
+):
+    return await lists.get_many(list(current_user.list_access))
+
+# Get list
+@router.get(
+    "/{list_id}",
+    response_model=TaskListResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Get a list",
+    description="Get a shared list and its members."
+)
+async def get_list(
+    list_id:str,
+    lists:Annotated[TaskListRepository,Depends(get_task_list_repository)],
+    current_user: Annotated[User, Depends(get_current_user)]
+):
+    return await _get_list(lists, list_id, current_user, "viewer")
+
+# Get list tasks
+@router.get(
+    "/{list_id}/tasks",
+    response_model=list[TaskResponse],
+    status_code=status.HTTP_200_OK,
+    summary="Get the tasks of a list",
+    description="Get all tasks in a shared list, oldest first."
+)
+async def get_list_tasks(
+    list_id:str,
+    tasks:Annotated[TaskRepository,Depends(get_task_repository)],
+    lists:Annotated[TaskListRepository,Depends(get_task_list_repository)],
+    current_user: Annotated[User, Depends(get_current_user)]
+):
+    await _get_list(lists, list_id, current_user, "viewer")
+    return await tasks.list_shared(list_id)
+
+# Add or update member
+@router.put(
+    "/{list_id}/members",
+    response_model=TaskListResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Add a member or change their role",
+    description="Share the list with a user by email, as viewer or editor. Only the owner can manage members."
+)
+async def put_member(
+    list_id:str,
+    member:MemberUpdate,
+    lists:Annotated[TaskListRepository,Depends(get_task_list_repository)],
+    users:Annotated[UserRepository,Depends(get_user_repository)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    background_tasks: BackgroundTasks
+):
+    task_list = await _get_list(lists, list_id, current_user, "owner")
+    user = await users.get_by_email(member.email)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    member_id = str(user["_id"])
+    if member_id == task_list["owner_id"]:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="The owner's role cannot be changed")
+
+    current = task_list["members"].get(member_id)
+    downgrade = current is not None and not has_role(member.role, current)
+    if downgrade:
+        await fan_out_access(users, [member_id], list_id, member.role)
+    updated = await lists.set_member(list_id, member_id, member.role)
+    if updated is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="List not found")
+    if not downgrade:
+        background_tasks.add_task(fan_out_access, users, [member_id], list_id, member.role)
+    return updated
+
+# Remove member
+@router.delete(
+    "/{list_id}/members/{user_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Remove a member",
+    description="Remove a member from the list. The owner can remove anyone else; members can remove themselves."
+)
+async def delete_member(
+    list_id:str,
+    user_id:str,
+    lists:Annotated[TaskListRepository,Depends(get_task_list_repository)],
+    users:Annotated[UserRepository,Depends(get_user_repository)],
+    current_user: Annotated[User, Depends(get_current_user)]
+):
+    leaving = user_id == str(current_user.id)
+    task_list = await _get_list(lists, list_id, current_user, "viewer" if leaving else "owner")
+    if user_id == task_list["owner_id"]:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="The owner cannot leave the list; delete it instead")
+    if user_id not in task_list["members"]:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Member not found")
+
+    await fan_out_access(users, [user_id], list_id, None)
+    await lists.set_member(list_id, user_id, None)
+    return
+
+# Delete list
+@router.delete(
+    "/{list_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Delete a list",
+    description="Delete a shared list. Its tasks go back to the members who created them."
+)
+async def delete_list(
+    list_id:str,
+    lists:Annotated[TaskListRepository,Depends(get_task_list_repository)],
+    users:Annotated[UserRepository,Depends(get_user_repository)],
+    tasks:Annotated[TaskRepository,Depends(get_task_repository)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    background_tasks: BackgroundTasks
+):
+    task_list = await _get_list(lists, list_id, current_user, "owner")
+    await fan_out_access(users, list(task_list["members"]), list_id, None)
+    deleted = await lists.delete(list_id)
+    if deleted is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="List not found")
+    # also revokes members added meanwhile, then hands the tasks back to their creators
+    background_tasks.add_task(dissolve_list, users, tasks, list(deleted["members"]), list_id)
+    return
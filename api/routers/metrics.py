@@ -0,0 +1,24 @@
+# metrics router
+from fastapi import APIRouter, Depends, status
+from api.dependencies.auth import get_admin_user
+from core.metrics import collect_metrics
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["metrics"],
+    # cache and queue sizes and per-route stall counts are internals
+    dependencies=[Depends(get_admin_user)]
+)
+
+
+@router.get(
+    "",
+    status_code=status.HTTP_200_OK,
+    summary="In-process metrics",
+    description="Snapshot of this worker's in-process metrics (caches, coalescing, queues). Admins only."
+)
+async def get_metrics():
+    """
+    Returns the metrics of the worker serving the request.
+    """
+    return collect_metrics()
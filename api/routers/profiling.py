@@ -0,0 +1,85 @@
+# profiling router
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from typing import Literal
+from api.dependencies.auth import get_admin_user
+from api.services.profiling import allocation_snapshot, folded, loop_lag, profile_event_loop
+from api.services.watchdog import watchdog
+from core.config import settings
+
+
+def require_profiling_enabled():
+    """
+    Hides the profiling endpoints unless PROFILING_ENABLED is set.
+    """
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+
+router = APIRouter(
+    prefix="/admin/profiling",
+    tags=["admin"],
+    dependencies=[Depends(require_profiling_enabled), Depends(get_admin_user)]
+)
+
+# one profile at a time per worker; profiles are too expensive to stack
+_profiling = asyncio.Lock()
+
+
+async def _exclusive():
+    if _profiling.locked():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A profile is already running on this worker")
+    async with _profiling:
+        yield
+
+
+# Sampling profile
+@router.post(
+    "/cpu",
+    response_class=PlainTextResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Sample the event loop thread",
+    description=(
+        "Samples the stack of this worker's event loop thread and returns collapsed stacks "
+        "ready for flamegraph tools. `mode=wall` includes idle and waiting time, `mode=cpu` only on-CPU time."
+    ),
+    dependencies=[Depends(_exclusive)]
+)
+async def cpu_profile(
+    seconds: float = Query(5.0, gt=0),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+    mode: Literal["wall", "cpu"] = "wall"
+):
+    seconds = min(seconds, settings.PROFILING_MAX_SECONDS)
+    try:
+        stacks = await profile_event_loop(seconds, interval_ms / 1000, mode)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return folded(stacks)
+
+# Event loop lag
+@router.get(
+    "/loop-lag",
+    status_code=status.HTTP_200_OK,
+    summary="Event loop lag",
+    description="Recent event loop lag percentiles. Lag means a callback blocked the loop (e.g. CPU-bound work in a handler)."
+)
+async def get_loop_lag():
+    return watchdog.snapshot(stacks=True) if watchdog.running else loop_lag.snapshot()
+
+# Allocation snapshot
+@router.post(
+    "/allocations",
+    status_code=status.HTTP_200_OK,
+    summary="Allocation snapshot",
+    description="Traces allocations for a window and returns the source lines whose memory grew the most.",
+    dependencies=[Depends(_exclusive)]
+)
+async def allocations(
+    seconds: float = Query(5.0, gt=0),
+    top: int = Query(25, ge=1, le=500),
+    frames: int = Query(1, ge=1, le=50)
+):
+    seconds = min(seconds, settings.PROFILING_MAX_SECONDS)
+    return await allocation_snapshot(seconds, top=top, frames=frames)
@@ -0,0 +1,48 @@
+# tags router
+from fastapi import APIRouter, Depends, Query, status
+from typing import Annotated
+
+from api.dependencies.auth import get_current_user
+from api.models.user import User
+from api.schemas.task import TagCount
+from api.services.tags import tag_dictionary
+
+router = APIRouter(
+    prefix="/tags",
+    tags=["tags"],
+    dependencies=[Depends(get_current_user)]
+)
+
+# Get tag counts
+@router.get(
+    "",
+    response_model=list[TagCount],
+    status_code=status.HTTP_200_OK,
+    summary="Get my tags with task counts",
+    description=(
+        "Get every tag on the current user's tasks with the number of tasks carrying it, most used first. "
+        "Counts are kept up to date on each write, so this costs no query. Filter tasks by tag with "
+        "`GET /tasks?tags=...`."
+    )
+)
+async def get_tags(
+    current_user: Annotated[User, Depends(get_current_user)]
+):
+    counts = sorted(current_user.tag_counts.items(), key=lambda item: (-item[1], item[0]))
+    return [{"tag": tag, "count": count} for tag, count in counts if count > 0]
+
+# Autocomplete tags
+@router.get(
+    "/autocomplete",
+    response_model=list[TagCount],
+    status_code=status.HTTP_200_OK,
+    summary="Autocomplete a tag",
+    description="Get the current user's tags starting with `prefix`, most used first."
+)
+async def autocomplete_tags(
+    current_user: Annotated[User, Depends(get_current_user)],
+    prefix: Annotated[str, Query(max_length=32)] = "",
+    limit: Annotated[int, Query(ge=1, le=50)] = 10
+):
+    matches = tag_dictionary.complete(str(current_user.id), current_user.tag_counts, prefix, limit)
+    return [{"tag": tag, "count": count} for tag, count in matches]
@@ -1,20 +1,144 @@
 # tasks router
-from fastapi import APIRouter, Depends, HTTPException, status
-from api.dependencies.database import get_db
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, status
+from api.dependencies.repositories import (
+    get_attachment_repository,
+    get_blob_store,
+    get_task_repository,
+    get_user_repository,
+    task_repository,
+)
 from api.models.task import Task
 from api.models.user import User
-from motor.motor_asyncio import AsyncIOMotorDatabase
-from typing import Annotated
-from datetime import datetime, timezone
+from api.repositories import AttachmentRepository, BlobStore, TaskRepository, UserRepository
+from typing import Annotated, Any, Literal, Optional
+from datetime import date, datetime, timedelta, timezone
 from bson import ObjectId
 
 from api.dependencies.auth import get_current_user
-from api.schemas.task import TaskCreate, TaskResponse, TaskUpdate
+from api.dependencies.idempotency import IdempotentRequest, get_idempotency
+from api.dependencies.negotiation import ResponseFormat, get_response_format
+from api.schemas.task import (
+    AgendaResponse,
+    OccurrenceUpdate,
+    SubtreeCompletion,
+    SyncRequest,
+    SyncResponse,
+    TaskCreate,
+    TaskMove,
+    TaskResponse,
+    TaskUpdate,
+)
+from api.services.agenda import agenda_cache, day_start, group_by_day, parse_timezone
+from api.services.attachments import purge_attachments
+from api.services.audit import audit_log
+from api.services.recurrence import (
+    expand_series,
+    expand_tasks,
+    is_occurrence,
+    parse_occurrence_key,
+    parse_rule,
+)
+from api.services.sharing import has_role, lists_with_role
+from api.services.tags import normalize_tags, tag_deltas, tag_dictionary
+from api.services.task_cache import task_cache
+from api.utils.rank import rank_between
+from api.utils.instrumentation import budget
+from core.config import settings
+
+# TaskResponse fields sent as native ObjectIds in binary formats
+_TASK_IDS = ("id", "user_id", "series_id")
+
+def _rebalance_if_long(background_tasks: BackgroundTasks, tasks: TaskRepository, user_id: str, position: str) -> None:
+    """
+    Schedules a rebalance of the user's positions once keys get long.
+    """
+    if len(position) > settings.RANK_MAX_LENGTH:
+        background_tasks.add_task(tasks.rebalance_positions, user_id)
+
+
+
+async def _count_tags(users: UserRepository, user_id: str, deltas: dict[str, int]) -> None:
+    """
+    Applies tag count changes for the owner of the changed tasks.
+    """
+    if deltas:
+        await users.adjust_tag_counts(user_id, deltas)
+        tag_dictionary.forget(user_id)
+
+
+async def _new_task_data(
+    task: TaskCreate, tasks: TaskRepository, current_user: User, lower: Optional[str]
+) -> dict[str, Any]:
+    """
+    Builds the document for a new task placed after position `lower` (the
+    bottom of the manual order, normally). Raises 403/404/422 for a list the
+    user cannot add to or a missing or too deep parent.
+    """
+    task_data = task.model_dump()
+    task_data["created_at"] = datetime.now(timezone.utc)
+    task_data["updated_at"] = task_data["created_at"]
+    task_data["is_completed"] = task.is_completed or False
+    task_data["completed_at"] = task_data["created_at"] if task_data["is_completed"] else None
+    if task.list_id is not None:
+        role = current_user.list_access.get(task.list_id)
+        if role is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="List not found")
+        if not has_role(role, "editor"):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Viewers cannot add tasks to this list")
+    if task.parent_id is not None:
+        parent = await tasks.get(str(current_user.id), task.parent_id)
+        if parent is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Parent task not found")
+        task_data["parent_id"] = str(parent["_id"])
+        task_data["ancestors"] = [*parent.get("ancestors", []), task_data["parent_id"]]
+        if len(task_data["ancestors"]) > settings.SUBTASK_MAX_DEPTH:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Subtasks are nested too deeply")
+    task_data["position"] = rank_between(lower, None)
+    return task_data
+
+
+def _update_fields(update_data: dict[str, Any], existing: Optional[dict[str, Any]]) -> dict[str, Any]:
+    """
+    Adds the fields an update implies (completed_at, reset occurrence
+    overrides) and checks the recurrence rule and due date the task ends up
+    with, each taken from `existing` unless the update sets it. Raises 422
+    for a bad rule, or a rule left without a due date.
+    """
+    if "is_completed" in update_data:
+        update_data["completed_at"] = update_data["updated_at"] if update_data["is_completed"] else None
+    before = existing or {}
+    recurrence = update_data["recurrence"] if "recurrence" in update_data else before.get("recurrence")
+    due_date = update_data["due_date"] if "due_date" in update_data else before.get("due_date")
+    if recurrence and due_date is None:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Recurring tasks need a due_date to anchor the rule")
+    if update_data.get("recurrence"):
+        try:
+            parse_rule(update_data["recurrence"], due_date)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    if "recurrence" in update_data or "due_date" in update_data:
+        # overrides are keyed by occurrence date, which a new rule or anchor invalidates
+        update_data["occurrence_overrides"] = {}
+    return update_data
+
+
+def _changed_fields(update_data: dict[str, Any]) -> list[str]:
+    return sorted(update_data.keys() - {"updated_at", "completed_at", "occurrence_overrides"})
+
+
+async def _forget_agenda(request: Request, current_user: Annotated[User, Depends(get_current_user)]):
+    # every write here can move tasks between agenda buckets
+    try:
+        yield
+    finally:
+        if request.method not in ("GET", "HEAD"):
+            agenda_cache.forget(str(current_user.id))
+
 
 router = APIRouter(
     prefix="/tasks",
     tags=["tasks"],
-    dependencies=[Depends(get_current_user)]
+    dependencies=[Depends(get_current_user), Depends(_forget_agenda)]
 )
 
 # Create Task
@@ -23,23 +147,231 @@ router = APIRouter(
     response_model=TaskResponse,
     status_code=status.HTTP_201_CREATED,
     summary="Create a new task",
-    description="Create a new task for the currently authenticated user."
+    description=(
+        "Create a new task for the currently authenticated user. Send an `Idempotency-Key` "
+        "header to make retries safe: a repeated key returns the original response."
+    )
 )
+@budget(commands=4, alloc_kib=96)
 async def create_task(
     task:TaskCreate, 
-    db:Annotated[AsyncIOMotorDatabase,Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    tasks:Annotated[TaskRepository,Depends(get_task_repository)],
+    users:Annotated[UserRepository,Depends(get_user_repository)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    idempotency: Annotated[IdempotentRequest, Depends(get_idempotency)],
+    background_tasks: BackgroundTasks,
+    response_format: Annotated[ResponseFormat, Depends(get_response_format)]
 ):
-    task_data = task.model_dump()
-    task_data["user_id"] = str(current_user.id)
-    task_data["created_at"] = datetime.now(timezone.utc)
-    task_data["updated_at"] = datetime.now(timezone.utc)
-    task_data["is_completed"] = task.is_completed or False
-    
-    result = await db["tasks"].insert_one(task_data)
-    new_task = await db["tasks"].find_one({"_id":result.inserted_id})
+    async with idempotency.guard(task.model_dump(mode="json")) as replay:
+        if replay is not None:
+            return replay
+
+        # new tasks go to the bottom of the manual order
+        task_data = await _new_task_data(task, tasks, current_user, await tasks.position_before(str(current_user.id)))
+
+        new_task = await tasks.create(str(current_user.id), task_data)
+        if task.parent_id is not None:
+            await tasks.adjust_rollups(
+                str(current_user.id), task_data["ancestors"], total=1, completed=int(task_data["is_completed"])
+            )
+            await task_cache.invalidate(*task_data["ancestors"])
+        await _count_tags(users, str(current_user.id), tag_deltas(added=[task_data["tags"]]))
+        audit_log.record("task.create", str(current_user.id), task_id=str(new_task["_id"]))
+        _rebalance_if_long(background_tasks, tasks, str(current_user.id), task_data["position"])
+
+        idempotency.save(status.HTTP_201_CREATED, TaskResponse.model_validate(new_task).model_dump(mode="json"))
+        return response_format.render(new_task, TaskResponse, _TASK_IDS, status.HTTP_201_CREATED)
+
+# Sync
+@router.post(
+    "/sync",
+    response_model=SyncResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Sync offline changes",
+    description=(
+        "Apply a batch of changes made offline and get back everything that changed on the server "
+        "since the last sync, in one round trip. Updates and deletes name the `version` they were "
+        "based on; if the task has moved on since, the mutation is not applied and its result is a "
+        "`conflict` carrying the server's copy, to merge and resend (or resend with `force`). "
+        "Each task may appear in one mutation per batch. Pass the returned `server_time` as `since` "
+        "next time."
+    )
+)
+async def sync_tasks(
+    request:SyncRequest,
+    tasks:Annotated[TaskRepository,Depends(get_task_repository)],
+    users:Annotated[UserRepository,Depends(get_user_repository)],
+    attachments:Annotated[AttachmentRepository,Depends(get_attachment_repository)],
+    store:Annotated[BlobStore,Depends(get_blob_store)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    background_tasks: BackgroundTasks
+):
+    mutations = request.mutations
+    if len(mutations) > settings.SYNC_MAX_MUTATIONS:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"At most {settings.SYNC_MAX_MUTATIONS} mutations per sync")
+    targets = [m.task_id for m in mutations if m.op != "create"]
+    if len(set(targets)) < len(targets):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Squash changes to the same task into one mutation")
+    client_ids = [m.client_id for m in mutations if m.op == "create" and m.client_id is not None]
+    if len(set(client_ids)) < len(client_ids):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Each create needs its own client_id")
+    user_id = str(current_user.id)
+    # taken before anything is read, so nothing written meanwhile falls between two syncs
+    server_time = datetime.now(timezone.utc)
+    writable = lists_with_role(current_user, "editor")
+
+    existing = {str(task["_id"]): task for task in await tasks.get_many(user_id, targets, lists=writable)}
+    # creates that an earlier attempt of this sync already applied
+    created = {task["sync_client_id"]: task for task in await tasks.get_by_client_ids(user_id, client_ids)}
+    results: list[Optional[dict[str, Any]]] = [None] * len(mutations)
+    writes: list[dict[str, Any]] = []
+    planned: list[tuple[int, Optional[dict[str, Any]], dict[str, Any]]] = []
+    lower = await tasks.position_before(user_id) if any(m.op == "create" for m in mutations) else None
+    for i, mutation in enumerate(mutations):
+        result = {"client_id": mutation.client_id, "task_id": mutation.task_id}
+        if mutation.op == "create":
+            if mutation.client_id in created:
+                task = created[mutation.client_id]
+                results[i] = {**result, "task_id": str(task["_id"]), "status": "applied", "task": task}
+                continue
+            try:
+                data = await _new_task_data(mutation.task, tasks, current_user, lower)
+            except HTTPException as e:
+                results[i] = {**result, "status": "rejected", "detail": e.detail}
+                continue
+            data.update(_id=ObjectId(), updated_at=server_time, version=1)
+            if mutation.client_id is not None:
+                data["sync_client_id"] = mutation.client_id
+            lower = data["position"]
+            writes.append({"op": "create", "document": data})
+            planned.append((i, None, data))
+            continue
+
+        before = existing.get(mutation.task_id)
+        if before is None:
+            results[i] = {**result, "status": "not_found"}
+            continue
+        version = before.get("version", 0)
+        if not mutation.force and mutation.base_version != version:
+            results[i] = {**result, "status": "conflict", "task": before}
+            continue
+        if mutation.op == "update":
+            changes = mutation.changes.model_dump(exclude_unset=True)
+            changes["updated_at"] = server_time
+            try:
+                _update_fields(changes, before)
+            except HTTPException as e:
+                results[i] = {**result, "status": "rejected", "detail": e.detail}
+                continue
+            writes.append({"op": "update", "task_id": mutation.task_id, "version": version, "changes": changes})
+            planned.append((i, before, changes))
+        else:
+            subtree = [before]
+            if before.get("subtasks_total"):
+                subtree = await tasks.list_subtree(before["user_id"], mutation.task_id) or subtree
+            writes.append({
+                "op": "delete",
+                "task_id": mutation.task_id,
+                "version": version,
+                "user_id": before["user_id"],
+                "list_id": before.get("list_id"),
+            })
+            planned.append((i, before, {"subtree": subtree}))
 
-    return new_task
+    applied = await tasks.apply_sync(user_id, writes, lists=writable)
+    touched: set[str] = set()
+
+    tag_changes: dict[str, tuple[list, list]] = {}
+    lost: list[int] = []
+    for (i, before, data), write, ok in zip(planned, writes, applied):
+        mutation = mutations[i]
+        result = {"client_id": mutation.client_id, "task_id": mutation.task_id}
+        if not ok:
+            # the task changed between our read and the write
+            results[i] = {**result, "status": "conflict"}
+            lost.append(i)
+            continue
+        if write["op"] == "create":
+            task_id = str(data["_id"])
+            if data.get("parent_id") is not None:
+                await tasks.adjust_rollups(user_id, data["ancestors"], total=1, completed=int(data["is_completed"]))
+                touched.update(data["ancestors"])
+            tag_changes.setdefault(user_id, ([], []))[1].append(data["tags"])
+            audit_log.record("task.create", user_id, task_id=task_id)
+            results[i] = {**result, "task_id": task_id, "status": "applied", "task": {**data, "user_id": user_id}}
+        elif write["op"] == "update":
+            if before.get("ancestors") and "is_completed" in data and bool(before.get("is_completed")) != data["is_completed"]:
+                await tasks.adjust_rollups(before["user_id"], before["ancestors"], completed=1 if data["is_completed"] else -1)
+                touched.update(before["ancestors"])
+            touched.add(mutation.task_id)
+            if "tags" in data:
+                removed, added = tag_changes.setdefault(before["user_id"], ([], []))
+                removed.append(before.get("tags") or [])
+                added.append(data["tags"])
+            audit_log.record("task.update", before["user_id"], actor_id=user_id, task_id=mutation.task_id, fields=_changed_fields(data))
+            task = {**before, **data, "version": write["version"] + 1}
+            results[i] = {**result, "status": "applied", "task": task}
+        else:
+            subtree = data["subtree"]
+            if len(subtree) > 1:
+                await tasks.delete_descendants(before["user_id"], mutation.task_id, settings.SUBTASK_DELETE_BATCH_SIZE)
+            if before.get("ancestors"):
+                await tasks.adjust_rollups(
+                    before["user_id"],
+                    before["ancestors"],
+                    total=-(before.get("subtasks_total", 0) + 1),
+                    completed=-(before.get("subtasks_completed", 0) + int(bool(before.get("is_completed")))),
+                )
+                touched.update(before["ancestors"])
+            touched.update(str(t["_id"]) for t in subtree)
+            for deleted_task in subtree:
+                tag_changes.setdefault(deleted_task["user_id"], ([], []))[0].append(deleted_task.get("tags") or [])
+            audit_log.record("task.delete", before["user_id"], actor_id=user_id, task_id=mutation.task_id)
+            background_tasks.add_task(purge_attachments, attachments, store, users, [str(t["_id"]) for t in subtree])
+            results[i] = {**result, "status": "applied"}
+    for owner_id, (removed, added) in tag_changes.items():
+        await _count_tags(users, owner_id, tag_deltas(removed, added))
+    await task_cache.invalidate(*touched)
+    if lower is not None:
+        _rebalance_if_long(background_tasks, tasks, user_id, lower)
+    if lost:
+        current = {
+            str(task["_id"]): task
+            for task in await tasks.get_many(user_id, [mutations[i].task_id for i in lost if mutations[i].task_id], lists=writable)
+        }
+        # a create loses only to a concurrent retry of the same sync
+        raced = {
+            task["sync_client_id"]: task
+            for task in await tasks.get_by_client_ids(user_id, [mutations[i].client_id for i in lost if mutations[i].op == "create" and mutations[i].client_id])
+        }
+        for i in lost:
+            task = raced.get(mutations[i].client_id) if mutations[i].op == "create" else None
+            if task is not None:
+                results[i].update(task_id=str(task["_id"]), status="applied", task=task)
+            else:
+                results[i]["task"] = current.get(mutations[i].task_id)
+
+    readable = lists_with_role(current_user)
+    full_resync = request.since is None or request.since < server_time - timedelta(days=settings.SYNC_TOMBSTONE_DAYS)
+    if full_resync:
+        changes, deleted = await tasks.list_for_user(user_id, lists=readable), []
+    else:
+        mentioned = {result["task_id"] for result in results}
+        changes = [
+            task for task in await tasks.list_changed(user_id, request.since, lists=readable)
+            if str(task["_id"]) not in mentioned
+        ]
+        deleted = [
+            task_id for task_id in await tasks.list_deleted(user_id, request.since, lists=readable)
+            if task_id not in mentioned
+        ]
+    return {
+        "results": results,
+        "changes": changes,
+        "deleted": deleted,
+        "full_resync": full_resync,
+        "server_time": server_time,
+    }
 
 # Get All Tasks
 @router.get(
@@ -47,14 +379,94 @@ async def create_task(
     response_model=list[TaskResponse],
     status_code=status.HTTP_200_OK,
     summary="Get all tasks",
-    description="Get all tasks for the currently authenticated user."
+    description=(
+        "Get all tasks for the currently authenticated user, including tasks in lists shared with them. "
+        "Tasks completed long ago are archived "
+        "and only included with `include_archived=true`. With `start` and `end`, returns the tasks "
+        "due in that window, with recurring tasks expanded into their occurrences. "
+        "`order=position` returns the manual (drag-and-drop) order instead of creation order. "
+        "Repeat `tags` to filter by tags: tasks carrying all of them, or any with `tag_match=any`. "
+        "Like every task endpoint, answers in `application/msgpack` or `application/cbor` when the "
+        "Accept header asks for it; add `; layout=columnar` to get one array per field."
+    )
 )
+@budget(commands=2, alloc_kib=192)
 async def get_tasks(
-    db:Annotated[AsyncIOMotorDatabase,Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    tasks:Annotated[TaskRepository,Depends(task_repository(read="heavy"))],
+    current_user: Annotated[User, Depends(get_current_user)],
+    response_format: Annotated[ResponseFormat, Depends(get_response_format)],
+    include_archived: bool = False,
+    order: Literal["created", "position"] = "created",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    tags: Annotated[list[str], Query()] = [],
+    tag_match: Literal["all", "any"] = "all"
+):
+    if (start is None) != (end is None):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="start and end must be given together")
+    try:
+        tags = normalize_tags(tags)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    user_tasks = await tasks.list_for_user(
+        str(current_user.id),
+        include_archived=include_archived,
+        ranked=order == "position",
+        lists=lists_with_role(current_user),
+        tags=tags,
+        match_all=tag_match == "all",
+    )
+    if start is None:
+        return response_format.render(user_tasks, TaskResponse, _TASK_IDS)
+    if end <= start:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="end must be after start")
+    return response_format.render(expand_tasks(user_tasks, start, end), TaskResponse, _TASK_IDS)
+
+# Agenda
+@router.get(
+    "/agenda",
+    response_model=AgendaResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Get tasks by day",
+    description=(
+        "Get the tasks due on each local day from `from` to `to` (inclusive, at most "
+        f"{settings.AGENDA_MAX_DAYS} days; default: the week starting today) in time zone `tz`, "
+        "with recurring tasks expanded into their occurrences. Each day has its count and the first "
+        "`limit` tasks. `buckets` counts the open tasks that are overdue, due today and due in the "
+        f"{settings.AGENDA_UPCOMING_DAYS} days after today."
+    )
+)
+@budget(commands=3, alloc_kib=256)
+async def get_agenda(
+    tasks:Annotated[TaskRepository,Depends(task_repository(read="heavy"))],
+    current_user: Annotated[User, Depends(get_current_user)],
+    start: Annotated[Optional[date], Query(alias="from")] = None,
+    end: Annotated[Optional[date], Query(alias="to")] = None,
+    tz: str = "UTC",
+    limit: Annotated[int, Query(ge=1, le=100)] = settings.AGENDA_DAY_LIMIT
 ):
-    tasks = await db["tasks"].find({"user_id": str(current_user.id)}).to_list(length=None)
-    return tasks
+    try:
+        zone = parse_timezone(tz)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    start = start or datetime.now(timezone.utc).astimezone(zone).date()
+    end = end or start + timedelta(days=6)
+    if end < start:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="to must not be before from")
+    if (end - start).days >= settings.AGENDA_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"The window can span at most {settings.AGENDA_MAX_DAYS} days",
+        )
+    user_id = str(current_user.id)
+    lists = lists_with_role(current_user)
+    window_start, window_end = day_start(start, zone), day_start(end + timedelta(days=1), zone)
+    due = expand_tasks(await tasks.list_due(user_id, window_start, window_end, lists), window_start, window_end)
+    return {
+        "timezone": zone.key,
+        "buckets": await agenda_cache.buckets(tasks, user_id, zone, lists),
+        "days": group_by_day(due, start, end, zone, limit),
+    }
 
 # Get Task by ID
 @router.get(
@@ -62,17 +474,24 @@ async def get_tasks(
     response_model=TaskResponse, 
     status_code=status.HTTP_200_OK,
     summary="Get a single task by ID",
-    description="Get a single task by its ID. The task must belong to the currently authenticated user."
+    description=(
+        "Get a single task by its ID. The task must belong to the currently authenticated user. "
+        "Served from a short-lived cache that this API's writes keep current."
+    )
 )
+@budget(commands=2, alloc_kib=64)
 async def get_task(
     task_id:str, 
-    db:Annotated[AsyncIOMotorDatabase,Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    tasks:Annotated[TaskRepository,Depends(get_task_repository)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    response_format: Annotated[ResponseFormat, Depends(get_response_format)]
 ):
-    task = await db["tasks"].find_one({"_id":ObjectId(task_id), "user_id":str(current_user.id)})
+    user_id = str(current_user.id)
+    readable = lists_with_role(current_user)
+    task = await task_cache.get(user_id, task_id, lambda: tasks.get(user_id, task_id, lists=readable), scope=readable)
     if not task:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
-    return task
+    return response_format.render(task, TaskResponse, _TASK_IDS)
 
 # update task
 @router.put(
@@ -82,40 +501,262 @@ async def get_task(
     summary="Update a task",
     description="Update a task by its ID. The task must belong to the currently authenticated user."
 )
+@budget(commands=3, alloc_kib=80)
 async def update_task(
     task_id:str, 
     task:TaskUpdate, 
-    db:Annotated[AsyncIOMotorDatabase,Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    tasks:Annotated[TaskRepository,Depends(get_task_repository)],
+    users:Annotated[UserRepository,Depends(get_user_repository)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    response_format: Annotated[ResponseFormat, Depends(get_response_format)]
 ):
     update_data = task.model_dump(exclude_unset=True)
     update_data["updated_at"] = datetime.now(timezone.utc)
+    writable = lists_with_role(current_user, "editor")
+    existing = None
+    # clearing the due date, or a rule without one, is checked against the stored task
+    anchorless = update_data.get("due_date") is None and ("due_date" in update_data or update_data.get("recurrence"))
+    if "is_completed" in update_data or "tags" in update_data or anchorless:
+        existing = await tasks.get(str(current_user.id), task_id, lists=writable)
+        if existing is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    _update_fields(update_data, existing)
     
-    result = await db["tasks"].update_one(
-        {"_id":ObjectId(task_id), "user_id":str(current_user.id)},
-        {"$set":update_data}
-    )
-    
-    if result.matched_count == 0:
+    updated_task = await tasks.update(str(current_user.id), task_id, update_data, lists=writable)
+    if updated_task is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    if existing is not None and existing.get("ancestors") and "is_completed" in update_data \
+            and bool(existing.get("is_completed")) != update_data["is_completed"]:
+        await tasks.adjust_rollups(
+            existing["user_id"], existing["ancestors"], completed=1 if update_data["is_completed"] else -1
+        )
+        await task_cache.invalidate(*existing["ancestors"])
+    await task_cache.write(str(current_user.id), task_id, updated_task, scope=lists_with_role(current_user))
+    if "tags" in update_data:
+        await _count_tags(
+            users, existing["user_id"], tag_deltas([existing.get("tags") or []], [update_data["tags"]])
+        )
+    audit_log.record(
+        "task.update",
+        updated_task["user_id"],
+        actor_id=str(current_user.id),
+        task_id=task_id,
+        fields=_changed_fields(update_data),
+    )
 
-    updated_task = await db["tasks"].find_one({"_id":ObjectId(task_id)})
-    return updated_task
+    return response_format.render(updated_task, TaskResponse, _TASK_IDS)
 
 # delete task
 @router.delete(
     "/{task_id}", 
     status_code=status.HTTP_204_NO_CONTENT,
     summary="Delete a task",
-    description="Delete a task by its ID. The task must belong to the currently authenticated user."
+    description=(
+        "Delete a task by its ID, together with all its subtasks. "
+        "The task must belong to the currently authenticated user."
+    )
 )
+@budget(commands=7, alloc_kib=96)
 async def delete_task(
     task_id:str, 
-    db:Annotated[AsyncIOMotorDatabase,Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    tasks:Annotated[TaskRepository,Depends(get_task_repository)],
+    users:Annotated[UserRepository,Depends(get_user_repository)],
+    attachments:Annotated[AttachmentRepository,Depends(get_attachment_repository)],
+    store:Annotated[BlobStore,Depends(get_blob_store)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    background_tasks: BackgroundTasks
 ):
-    result = await db["tasks"].delete_one({"_id":ObjectId(task_id), "user_id":str(current_user.id)})
-    if result.deleted_count == 0:
+    user_id = str(current_user.id)
+    writable = lists_with_role(current_user, "editor")
+    task = await tasks.get(user_id, task_id, lists=writable)
+    if task is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    # subtasks are always created by the parent's owner, who may not be the caller on a shared list
+    owner_id = task["user_id"]
+    subtree = [task]
+    if task.get("subtasks_total"):
+        subtree = await tasks.list_subtree(owner_id, task_id) or subtree
+    # children first, so an interrupted delete can simply be retried
+    await tasks.delete_descendants(owner_id, task_id, settings.SUBTASK_DELETE_BATCH_SIZE)
+    deleted = await tasks.delete(user_id, task_id, lists=writable)
+    if not deleted:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    if task.get("ancestors"):
+        await tasks.adjust_rollups(
+            owner_id,
+            task["ancestors"],
+            total=-(task.get("subtasks_total", 0) + 1),
+            completed=-(task.get("subtasks_completed", 0) + int(bool(task.get("is_completed")))),
+        )
+    await task_cache.invalidate(*task.get("ancestors", []), *(str(t["_id"]) for t in subtree))
+    await task_cache.write(user_id, task_id, None, scope=lists_with_role(current_user))
+    owners: dict[str, list[list[str]]] = {}
+    for deleted_task in subtree:
+        owners.setdefault(deleted_task["user_id"], []).append(deleted_task.get("tags") or [])
+    for owner_id, removed in owners.items():
+        await _count_tags(users, owner_id, tag_deltas(removed=removed))
+    audit_log.record("task.delete", task["user_id"], actor_id=user_id, task_id=task_id)
+    background_tasks.add_task(purge_attachments, attachments, store, users, [str(t["_id"]) for t in subtree])
     
-    return
\ No newline at end of file
+    return
+
+# get subtree
+@router.get(
+    "/{task_id}/subtree",
+    response_model=list[TaskResponse],
+    status_code=status.HTTP_200_OK,
+    summary="Get a task with all its subtasks",
+    description=(
+        "Get a task followed by all its descendants, in creation order, in one query. "
+        "Rebuild the tree from `parent_id`."
+    )
+)
+async def get_subtree(
+    task_id:str,
+    tasks:Annotated[TaskRepository,Depends(get_task_repository)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    response_format: Annotated[ResponseFormat, Depends(get_response_format)]
+):
+    subtree = await tasks.list_subtree(str(current_user.id), task_id)
+    if not subtree:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    return response_format.render(subtree, TaskResponse, _TASK_IDS)
+
+# complete subtree
+@router.put(
+    "/{task_id}/subtree",
+    response_model=list[TaskResponse],
+    status_code=status.HTTP_200_OK,
+    summary="Complete or reopen a task with all its subtasks",
+    description="Set `is_completed` on a task and all its descendants with a single update, and return the subtree."
+)
+async def complete_subtree(
+    task_id:str,
+    completion:SubtreeCompletion,
+    tasks:Annotated[TaskRepository,Depends(get_task_repository)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    response_format: Annotated[ResponseFormat, Depends(get_response_format)]
+):
+    user_id = str(current_user.id)
+    root = await tasks.get(user_id, task_id)
+    if root is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    await tasks.set_subtree_completed(user_id, task_id, completion.is_completed, datetime.now(timezone.utc))
+    if root.get("ancestors"):
+        # the root's roll-ups say how many tasks in the subtree were already done
+        done = root.get("subtasks_completed", 0) + int(bool(root.get("is_completed")))
+        size = root.get("subtasks_total", 0) + 1
+        await tasks.adjust_rollups(user_id, root["ancestors"], completed=size - done if completion.is_completed else -done)
+    subtree = await tasks.list_subtree(user_id, task_id)
+    await task_cache.invalidate(*root.get("ancestors", []), *(str(t["_id"]) for t in subtree))
+    audit_log.record("task.complete_subtree" if completion.is_completed else "task.reopen_subtree", user_id, task_id=task_id)
+    return response_format.render(subtree, TaskResponse, _TASK_IDS)
+
+# move task
+@router.put(
+    "/{task_id}/position",
+    response_model=TaskResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Move a task in the manual order",
+    description=(
+        "Place a task right after or right before another task, or at the bottom. "
+        "Only the moved task is written."
+    )
+)
+async def move_task(
+    task_id:str,
+    move:TaskMove,
+    tasks:Annotated[TaskRepository,Depends(get_task_repository)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    background_tasks: BackgroundTasks,
+    response_format: Annotated[ResponseFormat, Depends(get_response_format)]
+):
+    user_id = str(current_user.id)
+    anchor_id = move.after or move.before
+    if anchor_id == task_id:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="A task cannot be moved relative to itself")
+    if anchor_id is None:
+        lower, upper = await tasks.position_before(user_id), None
+    else:
+        anchor = await tasks.get(user_id, anchor_id)
+        if anchor is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+        if anchor.get("position") is None:
+            # tasks from before manual ordering get their positions first
+            await tasks.rebalance_positions(user_id)
+            anchor = await tasks.get(user_id, anchor_id)
+        if move.after is not None:
+            lower = anchor["position"]
+            upper = await tasks.position_after(user_id, lower)
+        else:
+            upper = anchor["position"]
+            lower = await tasks.position_before(user_id, upper)
+
+    position = rank_between(lower, upper)
+    moved = await tasks.update(user_id, task_id, {"position": position, "updated_at": datetime.now(timezone.utc)})
+    if moved is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    await task_cache.write(user_id, task_id, moved, scope=lists_with_role(current_user))
+    _rebalance_if_long(background_tasks, tasks, user_id, position)
+    audit_log.record("task.move", user_id, task_id=task_id, fields=["position"])
+
+    return response_format.render(moved, TaskResponse, _TASK_IDS)
+
+async def _get_series(tasks: TaskRepository, user_id: str, task_id: str, occurrence: str) -> dict[str, Any]:
+    """
+    Returns the recurring task owning `occurrence`, or raises 404.
+    """
+    series = await tasks.get(user_id, task_id)
+    if not series or not series.get("recurrence") or not is_occurrence(series, occurrence):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Occurrence not found")
+    return series
+
+# update an occurrence of a recurring task
+@router.put(
+    "/{task_id}/occurrences/{occurrence}",
+    response_model=TaskResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Update one occurrence of a recurring task",
+    description="Complete or edit a single occurrence (e.g. 20240815T090000Z) of a recurring task. Only the change is stored."
+)
+async def update_occurrence(
+    task_id:str,
+    occurrence:str,
+    changes:OccurrenceUpdate,
+    tasks:Annotated[TaskRepository,Depends(get_task_repository)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    response_format: Annotated[ResponseFormat, Depends(get_response_format)]
+):
+    await _get_series(tasks, str(current_user.id), task_id, occurrence)
+    override = changes.model_dump(exclude_unset=True)
+    if "is_completed" in override:
+        override["completed_at"] = datetime.now(timezone.utc) if override["is_completed"] else None
+    series = await tasks.update_occurrence(str(current_user.id), task_id, occurrence, override)
+    if series is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Occurrence not found")
+    await task_cache.write(str(current_user.id), task_id, series, scope=lists_with_role(current_user))
+    audit_log.record("task.update_occurrence", str(current_user.id), task_id=task_id, fields=sorted(changes.model_fields_set))
+
+    when = parse_occurrence_key(occurrence)
+    return response_format.render(next(expand_series(series, when, when + timedelta(seconds=1))), TaskResponse, _TASK_IDS)
+
+# skip an occurrence of a recurring task
+@router.delete(
+    "/{task_id}/occurrences/{occurrence}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Skip one occurrence of a recurring task",
+    description="Remove a single occurrence of a recurring task without changing the rest of the series."
+)
+async def delete_occurrence(
+    task_id:str,
+    occurrence:str,
+    tasks:Annotated[TaskRepository,Depends(get_task_repository)],
+    current_user: Annotated[User, Depends(get_current_user)]
+):
+    await _get_series(tasks, str(current_user.id), task_id, occurrence)
+    if await tasks.update_occurrence(str(current_user.id), task_id, occurrence, {"deleted": True}) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Occurrence not found")
+    await task_cache.invalidate(task_id)
+    audit_log.record("task.skip_occurrence", str(current_user.id), task_id=task_id)
+
+    return
@@ -0,0 +1,18 @@
+# task attachment schemas
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field
+
+from api.models.user import PyObjectId
+
+
+class AttachmentResponse(BaseModel):
+    id: PyObjectId = Field(validation_alias="_id")
+    task_id: str
+    user_id: str = Field(description="The uploader, whose quota the attachment counts against")
+    filename: str
+    content_type: str
+    length: int = Field(description="Size in bytes")
+    sha256: str = Field(description="Hex SHA-256 of the content; also the download's ETag")
+    created_at: datetime
+
+    model_config = ConfigDict(populate_by_name=True)
@@ -0,0 +1,23 @@
+# audit log schemas
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+
+from api.models.user import PyObjectId
+
+
+class AuditEvent(BaseModel):
+    id: PyObjectId = Field(validation_alias="_id")
+    at: datetime
+    action: str = Field(description="What happened, e.g. task.update or auth.login")
+    user_id: str = Field(description="Whose history the event belongs to")
+    actor_id: str = Field(description="Who did it; differs from user_id for edits by list members")
+    task_id: Optional[str] = None
+    fields: list[str] = Field(default_factory=list, description="Task fields the change touched")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class AuditPage(BaseModel):
+    items: list[AuditEvent]
+    next_before: Optional[str] = Field(None, description="Pass as `before` to get the next (older) page")
@@ -0,0 +1,92 @@
+# batched read schemas
+from typing import Annotated, Any, Literal, Optional, Union
+from pydantic import BaseModel, Field
+
+
+class _Operation(BaseModel):
+    id: str = Field(..., min_length=1, max_length=100, description="Echoed back on the operation's result")
+
+
+class MeOperation(_Operation):
+    """
+    The current user's profile.
+    """
+    op: Literal["me"]
+
+
+class TagsOperation(_Operation):
+    """
+    The current user's tags with task counts, like `GET /tags`.
+    """
+    op: Literal["tags"]
+
+
+class ListsOperation(_Operation):
+    """
+    The lists the current user belongs to, like `GET /lists`.
+    """
+    op: Literal["lists"]
+
+
+class ListOperation(_Operation):
+    """
+    One shared list, like `GET /lists/{list_id}`.
+    """
+    op: Literal["list"]
+    list_id: str
+
+
+class TaskOperation(_Operation):
+    """
+    One task, like `GET /tasks/{task_id}`.
+    """
+    op: Literal["task"]
+    task_id: str
+
+
+class TasksOperation(_Operation):
+    """
+    The current user's tasks, like `GET /tasks` without a date range.
+    """
+    op: Literal["tasks"]
+    include_archived: bool = False
+    order: Literal["created", "position"] = "created"
+    tags: list[str] = Field(default_factory=list)
+    tag_match: Literal["all", "any"] = "all"
+
+
+class BucketsOperation(_Operation):
+    """
+    Overdue/today/upcoming counts, as in `GET /tasks/agenda`.
+    """
+    op: Literal["buckets"]
+    tz: str = "UTC"
+
+
+BatchOperation = Annotated[
+    Union[
+        MeOperation,
+        TagsOperation,
+        ListsOperation,
+        ListOperation,
+        TaskOperation,
+        TasksOperation,
+        BucketsOperation,
+    ],
+    Field(discriminator="op"),
+]
+
+
+class BatchRequest(BaseModel):
+    operations: list[BatchOperation] = Field(..., min_length=1)
+
+
+class BatchResult(BaseModel):
+    id: str
+    status: int = Field(description="HTTP status the operation would have had on its own endpoint")
+    data: Any = Field(None, description="The operation's response body, when status is 200")
+    detail: Optional[str] = None
+
+
+class BatchResponse(BaseModel):
+    results: list[BatchResult] = Field(description="One result per operation, in order")
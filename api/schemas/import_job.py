@@ -0,0 +1,28 @@
+# task import job schemas
+from datetime import datetime
+from typing import Literal, Optional
+from pydantic import BaseModel, ConfigDict, Field
+
+from api.models.user import PyObjectId
+
+
+class ImportJobResponse(BaseModel):
+    id: PyObjectId = Field(validation_alias="_id")
+    status: Literal["running", "completed", "failed"]
+    format: Literal["csv", "ndjson", "todoist"]
+    filename: Optional[str] = None
+    length: int = Field(description="Size of the uploaded file in bytes")
+    rows: int = Field(description="Rows read so far, valid or not; the point a resumed job continues from")
+    imported: int = Field(description="Tasks created so far")
+    failed: int = Field(description="Rows rejected so far, see the job's errors")
+    detail: Optional[str] = Field(None, description="Why the job failed")
+    created_at: datetime
+    updated_at: datetime = Field(description="Last progress; a running job is refreshed after every batch")
+    finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class ImportRowError(BaseModel):
+    row: int = Field(description="1-based data row: CSV record after the header, NDJSON line or JSON item")
+    message: str
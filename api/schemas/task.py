@@ -1,10 +1,12 @@
 # task schemas
-from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, Field, ConfigDict, field_validator, model_validator
+from typing import Literal, Optional
+from datetime import date, datetime
 from bson import ObjectId
 
 from api.models.user import PyObjectId
+from api.services.recurrence import normalize_rule, parse_rule
+from api.services.tags import normalize_tags
 
 
 class TaskBase(BaseModel):
@@ -12,25 +14,169 @@ class TaskBase(BaseModel):
     description: Optional[str] = Field(None, max_length=300)
     due_date: Optional[datetime] = None
     category: Optional[str] = None
+    tags: list[str] = Field(default_factory=list, description="Free-form tags; stored lowercase, without duplicates")
     is_completed: bool = False
+    recurrence: Optional[str] = Field(
+        None,
+        max_length=200,
+        description="RRULE (RFC 5545) making the task recur, anchored at due_date, e.g. FREQ=WEEKLY;BYDAY=MO,WE",
+    )
+
+    @field_validator("recurrence")
+    def validate_recurrence(cls, v):
+        return normalize_rule(v) if v else None
+
+    @field_validator("tags")
+    def validate_tags(cls, v):
+        return normalize_tags(v)
 
 
 class TaskCreate(TaskBase):
     title: str = Field(..., min_length=3, max_length=50)
+    parent_id: Optional[str] = Field(None, description="Create the task as a subtask of this task")
+    list_id: Optional[str] = Field(None, description="Create the task in this shared list (editors and owners)")
+
+    @model_validator(mode="after")
+    def validate_recurrence_anchor(self):
+        if self.recurrence:
+            if self.due_date is None:
+                raise ValueError("Recurring tasks need a due_date to anchor the rule")
+            parse_rule(self.recurrence, self.due_date)
+        return self
 
 
 class TaskUpdate(TaskBase):
     pass
 
 
+class OccurrenceUpdate(BaseModel):
+    """
+    Changes to a single occurrence of a recurring task.
+    """
+    title: Optional[str] = Field(None, min_length=3, max_length=50)
+    description: Optional[str] = Field(None, max_length=300)
+    category: Optional[str] = None
+    is_completed: Optional[bool] = None
+
+
+class SubtreeCompletion(BaseModel):
+    """
+    Completion state to apply to a task and all its subtasks.
+    """
+    is_completed: bool
+
+
+class TaskMove(BaseModel):
+    """
+    Where to put a task in the manual order: right after or right before
+    another task. With neither, the task moves to the bottom.
+    """
+    after: Optional[str] = Field(None, description="Id of the task it should follow")
+    before: Optional[str] = Field(None, description="Id of the task it should precede")
+
+    @model_validator(mode="after")
+    def validate_single_anchor(self):
+        if self.after is not None and self.before is not None:
+            raise ValueError("Give either after or before, not both")
+        return self
+
+
 class TaskResponse(TaskBase):
     id: PyObjectId = Field(validation_alias="_id")
     user_id: str
     created_at: datetime
     updated_at: datetime
+    completed_at: Optional[datetime] = None
+    archived_at: Optional[datetime] = None
+    series_id: Optional[str] = Field(None, description="For an occurrence, the id of its recurring task")
+    position: Optional[str] = Field(None, description="Manual sort key; compare as plain strings")
+    list_id: Optional[str] = None
+    parent_id: Optional[str] = None
+    ancestors: list[str] = Field(default_factory=list, description="IDs of all ancestor tasks, root first")
+    subtasks_total: int = 0
+    subtasks_completed: int = 0
+    version: int = Field(0, description="Bumped on every change; send it back as base_version when syncing")
 
     model_config = ConfigDict(
         populate_by_name=True,
         arbitrary_types_allowed=True,
         json_encoders={ObjectId: str},
     )
+
+
+class TagCount(BaseModel):
+    tag: str
+    count: int = Field(description="Number of the user's tasks carrying the tag")
+
+
+class SyncMutation(BaseModel):
+    """
+    One change a client made offline. `create` takes `task`; `update` takes
+    `task_id`, `base_version` and `changes`; `delete` takes `task_id` and
+    `base_version`. With `force`, the change wins even if the task changed
+    on the server since `base_version`.
+    """
+    op: Literal["create", "update", "delete"]
+    client_id: Optional[str] = Field(
+        None,
+        max_length=100,
+        description=(
+            "Echoed back, e.g. to map a temporary id. On a create it also names the task: resending a create "
+            "with a client_id that already created a task returns that task instead of a copy"
+        ),
+    )
+    task_id: Optional[str] = None
+    base_version: Optional[int] = Field(None, ge=0)
+    task: Optional[TaskCreate] = None
+    changes: Optional[TaskUpdate] = None
+    force: bool = False
+
+    @model_validator(mode="after")
+    def validate_payload(self):
+        if self.op == "create":
+            if self.task is None:
+                raise ValueError("create needs task")
+        elif self.task_id is None or (self.base_version is None and not self.force):
+            raise ValueError(f"{self.op} needs task_id and base_version")
+        if self.op == "update" and self.changes is None:
+            raise ValueError("update needs changes")
+        return self
+
+
+class SyncRequest(BaseModel):
+    since: Optional[datetime] = Field(None, description="server_time of the last sync; omit for a full sync")
+    mutations: list[SyncMutation] = Field(default_factory=list)
+
+
+class SyncResult(BaseModel):
+    client_id: Optional[str] = None
+    task_id: Optional[str] = None
+    status: Literal["applied", "conflict", "not_found", "rejected"]
+    task: Optional[TaskResponse] = Field(None, description="The task as stored now: after the change, or the server's version on a conflict")
+    detail: Optional[str] = None
+
+
+class SyncResponse(BaseModel):
+    results: list[SyncResult] = Field(description="One result per mutation, in order")
+    changes: list[TaskResponse] = Field(description="Tasks changed on the server since `since`, other than the ones in results")
+    deleted: list[str] = Field(description="Ids of tasks deleted since `since`")
+    full_resync: bool = Field(description="`changes` holds every task; replace the local copy")
+    server_time: datetime = Field(description="Send as `since` next time")
+
+
+class AgendaBuckets(BaseModel):
+    overdue: int = Field(description="Open one-off tasks due before today")
+    today: int = Field(description="Open tasks and occurrences due today")
+    upcoming: int = Field(description="Open tasks and occurrences due in the days after today")
+
+
+class AgendaDay(BaseModel):
+    date: date
+    count: int = Field(description="Tasks due that day, including occurrences of recurring tasks")
+    tasks: list[TaskResponse] = Field(description="The first of them, by due date")
+
+
+class AgendaResponse(BaseModel):
+    timezone: str
+    buckets: AgendaBuckets
+    days: list[AgendaDay] = Field(description="Every local day of the window, in order")
@@ -0,0 +1,29 @@
+# shared task list schemas
+from datetime import datetime
+from typing import Literal
+from pydantic import BaseModel, ConfigDict, Field
+
+from api.models.user import PyObjectId
+from api.utils.validation import LoginEmail
+
+
+class TaskListCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=50)
+
+
+class MemberUpdate(BaseModel):
+    """
+    Adds a member to a list or changes their role.
+    """
+    email: LoginEmail
+    role: Literal["viewer", "editor"] = "viewer"
+
+
+class TaskListResponse(BaseModel):
+    id: PyObjectId = Field(validation_alias="_id")
+    name: str
+    owner_id: str
+    members: dict[str, str] = Field(description="Role per member user id")
+    created_at: datetime
+
+    model_config = ConfigDict(populate_by_name=True)
@@ -3,71 +3,41 @@ from datetime import datetime
 from bson import ObjectId
 from pydantic import (
     BaseModel,
-    EmailStr,
     Field,
     field_validator,
     ConfigDict,
 )
-import re
 
 from api.models.user import PyObjectId
+from api.utils.validation import Email, LoginEmail, Password, Username
+
+# Each credential field is checked exactly once, by the compiled validators in
+# api.utils.validation. Emails are normalized so lookups hit the unique index.
 
 
 class UserBase(BaseModel):
-    email: EmailStr = Field(...)
+    email: Email = Field(...)
     password: str = Field(...)
 
 
 class UserCreate(BaseModel):
-    email: EmailStr = Field(
-        ...,
-        pattern=r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$",
-        description="User's email address",
-    )
-    password: str = Field(..., min_length=8, description="User's password")
+    email: Email = Field(..., description="User's email address")
+    password: Password = Field(..., description="User's password")
 
-    username: str = Field(
+    username: Username = Field(
         ...,
-        min_length=3,
-        max_length=20,
-        pattern=r"^[a-zA-Z0-9_]+$",
         description="User's username (alphanumeric and underscores only)",
     )
 
-    @field_validator("username")
-    def validate_username(cls, v):
-        if not re.match(r"^[a-zA-Z0-9_]+$", v):
-            raise ValueError(
-                "Username must contain only alphanumeric characters and underscores"
-            )
-        return v
-
-    @field_validator("password")
-    def validate_password(cls, v):
-        if not re.match(
-            r"^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?&#_\-^])[A-Za-z\d@$!%*?&#_\-^]{8,}$",
-            v,
-        ):
-            raise ValueError(
-                "Password must contain at least 8 characters, one uppercase letter, one lowercase letter, one number, and one special character"
-            )
-        return v
-
-    @field_validator("email")
-    def validate_email(cls, v):
-        if not re.match(r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$", v):
-            raise ValueError("Invalid email address")
-        return v
-
 
 class UserLogin(BaseModel):
-    email: EmailStr
+    email: LoginEmail
     password: str
 
 
 class UserResponse(BaseModel):
     id: PyObjectId = Field(validation_alias="_id")
-    email: EmailStr
+    email: str
     username: str
     joined_at: datetime
     is_active: bool = True
@@ -81,7 +51,7 @@ class UserResponse(BaseModel):
 
 class UserSignupResponse(BaseModel):
     id: PyObjectId = Field(validation_alias="_id")
-    email: EmailStr
+    email: str
     username: str
 
     model_config = ConfigDict(
@@ -98,7 +68,7 @@ class Token(BaseModel):
 
 
 class ForgotPasswordRequest(BaseModel):
-    email: EmailStr
+    email: LoginEmail
 
 
 class ForgotPasswordResponse(BaseModel):
@@ -107,7 +77,7 @@ class ForgotPasswordResponse(BaseModel):
 
 class ResetPasswordRequest(BaseModel):
     token: str
-    new_password: str = Field(..., min_length=8)
+    new_password: Password
     confirm_password: str
 
     @field_validator("confirm_password")
@@ -0,0 +1,100 @@
+# agenda views: tasks grouped by local day, and cached overdue/today/upcoming counts
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Optional, Sequence
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from api.repositories import TaskRepository
+from api.services.recurrence import as_utc, expand_tasks
+from api.utils.lru import LRUCache
+from core.config import settings
+from core.metrics import register_metrics
+
+
+def parse_timezone(name: str) -> ZoneInfo:
+    """
+    Returns the IANA time zone `name`. Raises ValueError for unknown zones.
+    """
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown time zone {name!r}")
+
+
+def day_start(day: date, tz: ZoneInfo) -> datetime:
+    """
+    The UTC instant local `day` starts at in `tz`.
+    """
+    return datetime.combine(day, time.min, tzinfo=tz).astimezone(timezone.utc)
+
+
+def group_by_day(
+    tasks: Sequence[dict[str, Any]], first: date, last: date, tz: ZoneInfo, limit: int
+) -> list[dict[str, Any]]:
+    """
+    One entry per local day from `first` to `last`, each with the number of
+    tasks due that day and the first `limit` of them. `tasks` must be
+    ordered by due date.
+    """
+    days: dict[date, list[dict[str, Any]]] = {
+        first + timedelta(days=n): [] for n in range((last - first).days + 1)
+    }
+    for task in tasks:
+        day = as_utc(task["due_date"]).astimezone(tz).date()
+        if day in days:
+            days[day].append(task)
+    return [{"date": day, "count": len(due), "tasks": due[:limit]} for day, due in days.items()]
+
+
+class AgendaCache:
+    """
+    Per-user overdue/today/upcoming counts, kept in a process-local LRU.
+
+    Counts depend on the local day, so they are kept per (time zone, day)
+    and a new day starts fresh. Writes through the tasks router and imports
+    call `forget`; the TTL bounds how long writes elsewhere (other workers,
+    other members of shared lists) can go unseen.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.cache = LRUCache(maxsize, ttl=ttl)
+
+    def forget(self, user_id: str) -> None:
+        self.cache.pop(user_id)
+
+    async def buckets(
+        self,
+        tasks: TaskRepository,
+        user_id: str,
+        tz: ZoneInfo,
+        lists: Sequence[str] = (),
+        now: Optional[datetime] = None,
+    ) -> dict[str, int]:
+        """
+        Returns the user's open tasks counted as `overdue` (one-off tasks due
+        before today), `today` and `upcoming` (the AGENDA_UPCOMING_DAYS days
+        after today), recurring tasks counting once per occurrence.
+        """
+        today = (now or datetime.now(timezone.utc)).astimezone(tz).date()
+        key = (tz.key, today)
+        cached = self.cache.get(user_id) or {}
+        if key in cached:
+            return cached[key]
+        start = day_start(today, tz)
+        tomorrow = day_start(today + timedelta(days=1), tz)
+        horizon = day_start(today + timedelta(days=1 + settings.AGENDA_UPCOMING_DAYS), tz)
+        due = [
+            task for task in expand_tasks(await tasks.list_due(user_id, start, horizon, lists), start, horizon)
+            if not task.get("is_completed")
+        ]
+        due_today = sum(1 for task in due if as_utc(task["due_date"]) < tomorrow)
+        counts = {
+            "overdue": await tasks.count_overdue(user_id, start, lists),
+            "today": due_today,
+            "upcoming": len(due) - due_today,
+        }
+        self.cache.set(user_id, {**cached, key: counts})
+        return counts
+
+
+agenda_cache = AgendaCache(settings.AGENDA_CACHE_SIZE, ttl=settings.AGENDA_CACHE_TTL_SECONDS)
+register_metrics("agenda_cache", agenda_cache.cache.stats)
@@ -0,0 +1,67 @@
+# background archival of completed tasks
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from api.repositories import TaskRepository
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Archiver:
+    """
+    Periodically moves tasks completed more than ARCHIVE_AFTER_DAYS ago to the
+    archive tier, in batches of ARCHIVE_BATCH_SIZE with a pause in between so
+    the primary never sees one large burst of writes.
+    """
+
+    def __init__(self, tasks: TaskRepository):
+        self.tasks = tasks
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> int:
+        """
+        Archives every eligible task, batch by batch. Returns the number moved.
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+        total = 0
+        while True:
+            moved = await self.tasks.archive_completed(cutoff, settings.ARCHIVE_BATCH_SIZE)
+            total += moved
+            if moved < settings.ARCHIVE_BATCH_SIZE:
+                return total
+            await asyncio.sleep(settings.ARCHIVE_BATCH_PAUSE_SECONDS)
+
+    async def _run_forever(self) -> None:
+        while True:
+            try:
+                moved = await self.run_once()
+                if moved:
+                    logger.info(f"Archived {moved} completed tasks")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Task archival failed")
+            await asyncio.sleep(settings.ARCHIVE_INTERVAL_SECONDS)
+
+    def start(self) -> None:
+        """
+        Starts the archival loop in the background.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self) -> None:
+        """
+        Stops the archival loop, abandoning any batch in progress (batches are
+        safe to interrupt and are picked up again on the next run).
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,147 @@
+# streaming attachment uploads
+import hashlib
+from typing import Any, AsyncIterable, AsyncIterator, Optional, Sequence
+
+from fastapi import Request
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from api.exceptions import UploadTooLarge
+from api.repositories import AttachmentRepository, BlobStore, UserRepository
+
+
+class UploadStream:
+    """
+    The content of one file field of a multipart/form-data request, parsed
+    straight off the request body: only the bytes of the current body chunk
+    are held at a time. Call `open` to read up to the start of the file, then
+    iterate for its bytes. Other fields are skipped.
+    """
+
+    def __init__(self, request: Request, field: str = "file"):
+        content_type, options = parse_options_header(request.headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or b"boundary" not in options:
+            raise ValueError("Expected a multipart/form-data body")
+        self.field = field.encode()
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self._body = request.stream().__aiter__()
+        self._pending: list[bytes] = []
+        self._headers: dict[bytes, bytes] = {}
+        self._header = (b"", b"")
+        self._in_file = False
+        self._finished = False
+        self._parser = MultipartParser(options[b"boundary"], {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    def _on_part_begin(self) -> None:
+        self._headers, self._header = {}, (b"", b"")
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header = (self._header[0] + data[start:end], self._header[1])
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header = (self._header[0], self._header[1] + data[start:end])
+
+    def _on_header_end(self) -> None:
+        name, value = self._header
+        self._headers[name.lower()] = value
+        self._header = (b"", b"")
+
+    def _on_headers_finished(self) -> None:
+        if self.filename is not None:
+            return
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if options.get(b"name") == self.field and b"filename" in options:
+            self.filename = options[b"filename"].decode("utf-8", "replace")
+            self.content_type = self._headers.get(b"content-type", b"application/octet-stream").decode("latin-1")
+            self._in_file = True
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self._pending.append(data[start:end])
+
+    def _on_part_end(self) -> None:
+        if self._in_file:
+            self._in_file, self._finished = False, True
+
+    async def _feed(self) -> bool:
+        try:
+            chunk = await self._body.__anext__()
+        except StopAsyncIteration:
+            return False
+        self._parser.write(chunk)
+        return True
+
+    async def open(self) -> None:
+        """
+        Reads the body up to the start of the file's content, filling in
+        `filename` and `content_type`. Raises ValueError if there is no such
+        file field.
+        """
+        while self.filename is None:
+            if not await self._feed():
+                raise ValueError(f"Missing file field {self.field.decode()!r}")
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        while True:
+            pending, self._pending = self._pending, []
+            for data in pending:
+                yield data
+            if self._finished:
+                return
+            if not await self._feed():
+                raise ValueError("Multipart body ended inside the file")
+
+
+async def store_upload(store: BlobStore, content: AsyncIterable[bytes], limit: int) -> tuple[str, int]:
+    """
+    Writes a stream to the blob store in `chunk_size` chunks, hashing it on
+    the way, and returns its SHA-256 and length. Identical content already in
+    the store is referenced instead of stored again. Raises UploadTooLarge as
+    soon as the stream passes `limit` bytes; nothing is kept then.
+    """
+    upload_id = await store.begin()
+    digest, buffer, length, n = hashlib.sha256(), bytearray(), 0, 0
+    try:
+        async for data in content:
+            length += len(data)
+            if length > limit:
+                raise UploadTooLarge(limit)
+            digest.update(data)
+            buffer += data
+            while len(buffer) >= store.chunk_size:
+                await store.write_chunk(upload_id, n, bytes(buffer[:store.chunk_size]))
+                del buffer[:store.chunk_size]
+                n += 1
+        if buffer or n == 0:
+            await store.write_chunk(upload_id, n, bytes(buffer))
+    except BaseException:
+        await store.discard(upload_id)
+        raise
+    sha256 = digest.hexdigest()
+    await store.commit(upload_id, sha256, length)
+    return sha256, length
+
+
+async def purge_attachments(
+    attachments: AttachmentRepository,
+    store: BlobStore,
+    users: UserRepository,
+    task_ids: Sequence[str],
+) -> None:
+    """
+    Deletes the attachments of deleted tasks, releasing their content and
+    giving the bytes back to the uploaders' quotas.
+    """
+    for task_id in task_ids:
+        deleted: list[dict[str, Any]] = await attachments.delete_for_task(task_id)
+        for attachment in deleted:
+            await store.release(attachment["sha256"])
+            await users.add_attachment_bytes(attachment["user_id"], -attachment["length"])
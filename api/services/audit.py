@@ -0,0 +1,185 @@
+# batched audit log writer
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from bson import ObjectId
+
+from api.repositories import AuditRepository
+from core.config import settings
+from core.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLog:
+    """
+    In-process pipeline for audit events. Handlers call `record`, which only
+    appends to a bounded queue; a background task writes the queue out with
+    `insert_many` once `batch_size` events are waiting or every
+    `flush_interval` seconds, whichever comes first.
+
+    When the queue is full, `drop_policy` decides what goes: "oldest" makes
+    room for the new event, "newest" discards it. Drops are counted, never
+    raised, so a slow database cannot slow down the handlers.
+    """
+
+    def __init__(self, capacity: int, batch_size: int, flush_interval: float, drop_policy: str = "oldest"):
+        if drop_policy not in ("oldest", "newest"):
+            raise ValueError(f"Unknown drop policy {drop_policy!r}")
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.drop_policy = drop_policy
+        self.queue: deque[dict[str, Any]] = deque()
+        self.enabled = True
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.high_water = 0
+        self.last_flush_ms = 0.0
+        self._sink: Optional[AuditRepository] = None
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def record(
+        self,
+        action: str,
+        user_id: str,
+        actor_id: Optional[str] = None,
+        task_id: Optional[str] = None,
+        fields: Optional[list[str]] = None,
+    ) -> None:
+        """
+        Queues an event in `user_id`'s history: `actor_id` (default: the
+        user) did `action`, e.g. "task.update", optionally on `task_id` and
+        touching `fields`.
+        """
+        if not self.enabled:
+            return
+        if len(self.queue) >= self.capacity:
+            self.dropped += 1
+            if self.drop_policy == "newest":
+                return
+            self.queue.popleft()
+        # the id carries the event time, so the history pages in event order
+        self.queue.append({
+            "_id": ObjectId(),
+            "at": datetime.now(timezone.utc),
+            "action": action,
+            "user_id": user_id,
+            "actor_id": actor_id or user_id,
+            "task_id": task_id,
+            "fields": fields or [],
+        })
+        self.recorded += 1
+        self.high_water = max(self.high_water, len(self.queue))
+        if len(self.queue) >= self.batch_size:
+            self._ready.set()
+
+    def _requeue(self, batch: list[dict[str, Any]]) -> None:
+        # back to the front, in order, keeping the newest if there is no room for all
+        room = max(self.capacity - len(self.queue), 0)
+        kept = batch[max(len(batch) - room, 0):]
+        self.dropped += len(batch) - len(kept)
+        self.queue.extendleft(reversed(kept))
+
+    async def flush(self) -> None:
+        """
+        Writes out everything queued, one batch at a time. A failed batch, or
+        the events of a batch that failed for transient reasons, are put back
+        and left for the next flush; events the database rejects for good
+        are dropped and counted.
+        """
+        if self._sink is None:
+            return
+        while self.queue:
+            batch = [self.queue.popleft() for _ in range(min(self.batch_size, len(self.queue)))]
+            started = time.perf_counter()
+            try:
+                results = await self._sink.insert_many(batch)
+            except asyncio.CancelledError:
+                self._requeue(batch)
+                raise
+            except Exception:
+                logger.exception("Writing %d audit events failed", len(batch))
+                self.failed_flushes += 1
+                self._requeue(batch)
+                return
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+            self.flushes += 1
+            self.written += results.count(True)
+            rejected = results.count(False)
+            if rejected:
+                logger.error("Dropped %d audit events the database rejected", rejected)
+                self.rejected += rejected
+            retry = [event for event, result in zip(batch, results) if result is None]
+            if retry:
+                logger.warning("Writing %d of %d audit events failed", len(retry), len(batch))
+                self.failed_flushes += 1
+                self._requeue(retry)
+                return
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._ready.wait(), self.flush_interval)
+            except TimeoutError:
+                pass
+            self._ready.clear()
+            await self.flush()
+
+    def start(self, sink: AuditRepository) -> None:
+        """
+        Starts writing queued events to `sink` in the background.
+        """
+        self._sink = sink
+        if self._task is None:
+            # bound to the running loop on first wait, so made fresh for it
+            self._ready = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stops the background writer and flushes whatever is still queued.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        self._sink = None
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "queued": len(self.queue),
+            "capacity": self.capacity,
+            "high_water": self.high_water,
+            "drop_policy": self.drop_policy,
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+        }
+
+
+audit_log = AuditLog(
+    capacity=settings.AUDIT_QUEUE_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_MS / 1000,
+    drop_policy=settings.AUDIT_DROP_POLICY,
+)
+audit_log.enabled = settings.AUDIT_ENABLED
+register_metrics("audit_log", audit_log.snapshot)
@@ -1,32 +1,218 @@
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
-from core.config import settings
+# outgoing mail: precompiled templates and a pool of persistent SMTP connections
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from email.message import EmailMessage
 from pathlib import Path
+from typing import Any, AsyncIterator, Optional, Sequence
+
+import aiosmtplib
+from jinja2 import Environment, FileSystemLoader, Template, select_autoescape
+
+from core.config import settings
+from core.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
 
-# Mail configuration
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.MAIL_USERNAME,
-    MAIL_PASSWORD=settings.MAIL_PASSWORD,
-    MAIL_FROM=settings.MAIL_FROM,
-    MAIL_PORT=settings.MAIL_PORT,
-    MAIL_SERVER=settings.MAIL_SERVER,
-    MAIL_STARTTLS=settings.MAIL_STARTTLS,
-    MAIL_SSL_TLS=settings.MAIL_SSL_TLS,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True,
-    TEMPLATE_FOLDER=Path(__file__).parent.parent.parent / 'templates'
-)
-
-async def send_reset_password_email(email_to: str, token: str):
+TEMPLATE_DIR = Path(__file__).parent.parent.parent / "templates"
+
+_stats = {"sent": 0, "failed": 0, "connections_opened": 0, "health_check_failures": 0}
+register_metrics("mail", lambda: dict(_stats))
+
+
+@dataclass
+class Mail:
+    """
+    One message: `template` (under templates/) rendered with `context`.
+    """
+    to: str
+    subject: str
+    template: str
+    context: dict[str, Any] = field(default_factory=dict)
+
+
+class MailService:
+    """
+    Sends templated HTML mail over up to `pool_size` SMTP connections that
+    stay open between messages, instead of connecting, logging in and
+    quitting for every one.
+
+    A connection idle for longer than `check_after` seconds is checked with
+    NOOP before it is reused, since servers drop idle clients; one that fails
+    the check, or fails while sending, is closed rather than put back.
+    Templates are compiled once and kept.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        sender: str,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = False,
+        start_tls: bool = True,
+        validate_certs: bool = True,
+        pool_size: int = 4,
+        check_after: float = 30.0,
+        template_dir: Path = TEMPLATE_DIR,
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.start_tls = start_tls
+        self.validate_certs = validate_certs
+        self.pool_size = pool_size
+        self.check_after = check_after
+        # the files are read once: templates ship with the code
+        self._env = Environment(loader=FileSystemLoader(template_dir), autoescape=select_autoescape(), auto_reload=False)
+        self._templates: dict[str, Template] = {}
+        # most recently used last, with the time it was put back
+        self._idle: list[tuple[aiosmtplib.SMTP, float]] = []
+        self._slots = asyncio.Semaphore(pool_size)
+
+    def render(self, template: str, context: dict[str, Any]) -> str:
+        compiled = self._templates.get(template)
+        if compiled is None:
+            compiled = self._templates[template] = self._env.get_template(template)
+        return compiled.render(**context)
+
+    def _build(self, mail: Mail) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = mail.to
+        message["Subject"] = mail.subject
+        message.set_content(self.render(mail.template, mail.context), subtype="html")
+        return message
+
+    async def _open(self) -> aiosmtplib.SMTP:
+        smtp = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            use_tls=self.use_tls,
+            start_tls=self.start_tls,
+            validate_certs=self.validate_certs,
+        )
+        await smtp.connect()
+        if self.username:
+            await smtp.login(self.username, self.password or "")
+        _stats["connections_opened"] += 1
+        return smtp
+
+    async def _checkout(self) -> aiosmtplib.SMTP:
+        while self._idle:
+            smtp, idle_since = self._idle.pop()
+            if not smtp.is_connected:
+                continue
+            if time.monotonic() - idle_since < self.check_after:
+                return smtp
+            try:
+                await smtp.noop()
+                return smtp
+            except Exception:
+                _stats["health_check_failures"] += 1
+                smtp.close()
+        return await self._open()
+
+    @asynccontextmanager
+    async def _connection(self) -> AsyncIterator[aiosmtplib.SMTP]:
+        async with self._slots:
+            smtp = await self._checkout()
+            try:
+                yield smtp
+            except BaseException:
+                # the session may be mid-transaction or gone
+                smtp.close()
+                raise
+            self._idle.append((smtp, time.monotonic()))
+
+    async def send(self, mail: Mail) -> None:
+        """
+        Sends one message, raising if the server did not take it.
+        """
+        message = self._build(mail)
+        try:
+            async with self._connection() as smtp:
+                await smtp.send_message(message)
+        except Exception:
+            _stats["failed"] += 1
+            raise
+        _stats["sent"] += 1
+
+    async def send_many(self, mails: Sequence[Mail]) -> list[Optional[Exception]]:
+        """
+        Sends a batch over the whole pool at once. Returns, for every message
+        in order, None if it was sent or the exception it failed with.
+        """
+        results = await asyncio.gather(*(self.send(mail) for mail in mails), return_exceptions=True)
+        for mail, result in zip(mails, results):
+            if isinstance(result, BaseException) and not isinstance(result, Exception):
+                raise result
+            if result is not None:
+                logger.warning(f"Sending {mail.template!r} to {mail.to} failed: {result}")
+        return results
+
+    async def close(self) -> None:
+        """
+        Quits every idle connection.
+        """
+        idle, self._idle = self._idle, []
+        for smtp, _ in idle:
+            try:
+                await smtp.quit()
+            except Exception:
+                smtp.close()
+
+
+_service: Optional[MailService] = None
+
+
+def get_mail_service() -> MailService:
+    """
+    Returns the process-wide mail service, created on first use.
+    """
+    global _service
+    if _service is None:
+        _service = MailService(
+            hostname=settings.MAIL_SERVER,
+            port=settings.MAIL_PORT,
+            sender=settings.MAIL_FROM,
+            username=settings.MAIL_USERNAME,
+            password=settings.MAIL_PASSWORD,
+            use_tls=settings.MAIL_SSL_TLS,
+            start_tls=settings.MAIL_STARTTLS,
+            pool_size=settings.MAIL_POOL_SIZE,
+            check_after=settings.MAIL_HEALTH_CHECK_SECONDS,
+        )
+    return _service
+
+
+async def close_mail_service() -> None:
+    """
+    Closes the mail service's connections, if it was ever used.
+    """
+    global _service
+    if _service is not None:
+        await _service.close()
+        _service = None
+
+
+async def send_reset_password_email(email_to: str, token: str, username: str):
     """
     Sends a password reset email to the user.
     """
-    reset_url = f"{settings.CLIENT_URL}/reset-password?token={token}"
-    message = MessageSchema(
+    await get_mail_service().send(Mail(
+        to=email_to,
         subject="Password Reset Request",
-        recipients=[email_to],
-        template_body={"reset_url": reset_url},
-        subtype="html"
-    )
-
-    fm = FastMail(conf)
-    await fm.send_message(message, template_name="email.html") 
\ No newline at end of file
+        template="email.html",
+        context={
+            "username": username,
+            "reset_url": f"{settings.CLIENT_URL}/reset-password?token={token}",
+            "expire_minutes": settings.ACCESS_TOKEN_EXPIRE_MINUTES,
+        },
+    ))
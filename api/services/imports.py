@@ -0,0 +1,387 @@
+# task imports from CSV, NDJSON and Todoist-style JSON
+import codecs
+import csv
+import hashlib
+import json
+import logging
+import re
+from datetime import datetime, timezone
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Optional
+
+from bson import ObjectId
+from pydantic import ValidationError
+
+from api.repositories import BlobStore, ImportJobRepository, TaskRepository, UserRepository
+from api.schemas.task import TaskCreate
+from api.services.audit import audit_log
+from api.services.agenda import agenda_cache
+from api.services.tags import tag_deltas, tag_dictionary
+from api.utils.rank import rank_sequence
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "ndjson", "todoist")
+_EXTENSIONS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".json": "todoist"}
+
+# CSV header (lowercased) -> task field; the first matching column wins
+_CSV_COLUMNS = {
+    "title": "title", "content": "title", "name": "title", "task": "title",
+    "description": "description", "notes": "description",
+    "due_date": "due_date", "due": "due_date", "due date": "due_date",
+    "category": "category", "project": "category",
+    "tags": "tags", "labels": "tags",
+    "is_completed": "is_completed", "completed": "is_completed", "done": "is_completed",
+    "recurrence": "recurrence", "rrule": "recurrence",
+}
+_TRUE = {"1", "true", "yes", "y", "x", "done", "completed"}
+_BOM = b"\xef\xbb\xbf"
+
+
+def guess_format(filename: Optional[str]) -> Optional[str]:
+    """
+    Import format implied by a file name's extension, or None.
+    """
+    name = (filename or "").lower()
+    for extension, format in _EXTENSIONS.items():
+        if name.endswith(extension):
+            return format
+    return None
+
+
+def _decode(line: bytes) -> str:
+    try:
+        return line.rstrip(b"\r").decode("utf-8")
+    except UnicodeDecodeError:
+        raise ValueError("The file is not UTF-8 text") from None
+
+
+async def _lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """
+    Splits a byte stream into lines, decoded one at a time (a UTF-8 newline
+    byte never occurs inside a character). Raises ValueError for a line
+    longer than IMPORT_MAX_ROW_BYTES.
+    """
+    buffer, first = b"", True
+    async for chunk in chunks:
+        buffer += chunk
+        if first and len(buffer) >= len(_BOM):
+            buffer, first = buffer.removeprefix(_BOM), False
+        lines = buffer.split(b"\n")
+        buffer = lines.pop()
+        if len(buffer) > settings.IMPORT_MAX_ROW_BYTES:
+            raise ValueError(f"A line is longer than {settings.IMPORT_MAX_ROW_BYTES} bytes")
+        for line in lines:
+            yield _decode(line)
+    if buffer:
+        yield _decode(buffer.removeprefix(_BOM) if first else buffer)
+
+
+async def _csv_rows(chunks: AsyncIterable[bytes]) -> AsyncIterator[Any]:
+    """
+    Yields the records of a CSV file with a header row as dicts keyed by
+    lowercased column name. Quoted fields may span lines; blank lines are skipped.
+    """
+    header: Optional[list[str]] = None
+    record: list[str] = []
+    async for line in _lines(chunks):
+        record.append(line)
+        text = "\n".join(record)
+        # an odd number of quotes means a quoted field goes on in the next line
+        if text.count('"') % 2:
+            if len(text) > settings.IMPORT_MAX_ROW_BYTES:
+                raise ValueError(f"A CSV record is longer than {settings.IMPORT_MAX_ROW_BYTES} bytes")
+            continue
+        record = []
+        values = next(csv.reader([text]), [])
+        if not any(value.strip() for value in values):
+            continue
+        if header is None:
+            header = [name.strip().lower() for name in values]
+            if not any(_CSV_COLUMNS.get(name) == "title" for name in header):
+                raise ValueError("The CSV header has no title column")
+            continue
+        yield dict(zip(header, values))
+    if record:
+        raise ValueError("The file ends inside a quoted CSV field")
+
+
+def _from_csv(row: dict[str, str]) -> dict[str, Any]:
+    task: dict[str, Any] = {}
+    for column, value in row.items():
+        field, value = _CSV_COLUMNS.get(column), value.strip()
+        if field is None or not value or field in task:
+            continue
+        if field == "tags":
+            task["tags"] = [tag for tag in re.split(r"[,;]", value) if tag.strip()]
+        elif field == "is_completed":
+            task["is_completed"] = value.lower() in _TRUE
+        else:
+            task[field] = value
+    return task
+
+
+async def _ndjson_rows(chunks: AsyncIterable[bytes]) -> AsyncIterator[Any]:
+    """
+    Yields the objects of an NDJSON file; a line that is not JSON yields a
+    ValueError, reported as that row's error. Blank lines are skipped.
+    """
+    async for line in _lines(chunks):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            yield ValueError(f"Invalid JSON: {e.msg}")
+
+
+class _JsonReader:
+    """
+    Pulls JSON values off a byte stream one at a time with the standard
+    decoder, so only the value being read is buffered.
+    """
+
+    def __init__(self, chunks: AsyncIterable[bytes]):
+        self._chunks = chunks.__aiter__()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        # keeps a character split across chunks for the next one
+        self._text = codecs.getincrementaldecoder("utf-8-sig")()
+
+    async def _fill(self) -> bool:
+        if self._eof:
+            return False
+        try:
+            text = self._text.decode(await self._chunks.__anext__())
+        except StopAsyncIteration:
+            self._eof = True
+            text = ""
+        except UnicodeDecodeError:
+            raise ValueError("The file is not UTF-8 text") from None
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        return True
+
+    async def peek(self) -> Optional[str]:
+        """
+        Skips whitespace and returns the next character, or None at the end.
+        """
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not await self._fill():
+                return None
+
+    async def take(self, expected: str) -> str:
+        """
+        Consumes the next character, which must be one of `expected`.
+        """
+        char = await self.peek()
+        if char is None or char not in expected:
+            raise ValueError(f"Invalid JSON: expected one of {expected!r}")
+        self._pos += 1
+        return char
+
+    async def value(self) -> Any:
+        """
+        Consumes and returns the next JSON value.
+        """
+        await self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                # a number at the end of the buffer may go on in the next chunk
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+                problem = "Invalid JSON: unexpected end of file"
+            except json.JSONDecodeError as e:
+                problem = f"Invalid JSON: {e.msg}"
+            if len(self._buffer) - self._pos > settings.IMPORT_MAX_ROW_BYTES:
+                raise ValueError(f"{problem} (or a value longer than {settings.IMPORT_MAX_ROW_BYTES} bytes)")
+            if not await self._fill():
+                raise ValueError(problem)
+
+
+async def _json_items(chunks: AsyncIterable[bytes]) -> AsyncIterator[Any]:
+    """
+    Yields the items of a JSON array, or of the "items" array of a JSON
+    object (a Todoist export). Other top-level values are read and dropped,
+    so each must fit in IMPORT_MAX_ROW_BYTES too.
+    """
+    reader = _JsonReader(chunks)
+    if await reader.take("[{") == "{":
+        while True:
+            if await reader.peek() == "}":
+                raise ValueError('The JSON object has no "items" array')
+            key = await reader.value()
+            await reader.take(":")
+            if key == "items":
+                await reader.take("[")
+                break
+            await reader.value()
+            if await reader.take(",}") == "}":
+                raise ValueError('The JSON object has no "items" array')
+    if await reader.peek() == "]":
+        return
+    while True:
+        yield await reader.value()
+        if await reader.take(",]") == "]":
+            return
+
+
+def _from_todoist(item: Any) -> Any:
+    # items already in our own shape pass through
+    if not isinstance(item, dict) or "content" not in item:
+        return item
+    due = item.get("due")
+    if isinstance(due, dict):
+        due = due.get("datetime") or due.get("date")
+    return {
+        "title": item["content"],
+        "description": item.get("description") or None,
+        "due_date": due,
+        "tags": item.get("labels") or [],
+        "is_completed": bool(item.get("checked") or item.get("is_completed")),
+    }
+
+
+_PARSERS: dict[str, tuple[Callable[[AsyncIterable[bytes]], AsyncIterator[Any]], Callable[[Any], Any]]] = {
+    "csv": (_csv_rows, _from_csv),
+    "ndjson": (_ndjson_rows, lambda row: row),
+    "todoist": (_json_items, _from_todoist),
+}
+
+
+def _row_id(job_id: ObjectId, row: int) -> ObjectId:
+    """
+    Id of the task imported from `row`: the same on every run of the job, so
+    rows written before an interruption are skipped on resume, not duplicated.
+    """
+    digest = hashlib.blake2b(job_id.binary + row.to_bytes(8, "big"), digest_size=8).digest()
+    return ObjectId(job_id.binary[:4] + digest)
+
+
+def _describe(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" if e["loc"] else e["msg"]
+        for e in error.errors()
+    )
+
+
+async def _write_batch(
+    job: dict[str, Any],
+    batch: list[tuple[int, Any]],
+    tasks: TaskRepository,
+    users: UserRepository,
+) -> tuple[int, list[dict[str, Any]]]:
+    """
+    Validates a batch of rows and inserts the valid ones at the bottom of the
+    user's manual order. Returns the number of rows imported and the row errors.
+    """
+    user_id, convert = job["user_id"], _PARSERS[job["format"]][1]
+    now = datetime.now(timezone.utc)
+    documents, errors = [], []
+    for row, raw in batch:
+        try:
+            if isinstance(raw, Exception):
+                raise raw
+            task = TaskCreate.model_validate(convert(raw))
+        except ValidationError as e:
+            errors.append({"row": row, "message": _describe(e)})
+            continue
+        except ValueError as e:
+            errors.append({"row": row, "message": str(e)})
+            continue
+        documents.append({
+            **task.model_dump(),
+            # imports always land in the user's own top-level tasks
+            "parent_id": None,
+            "list_id": None,
+            "_id": _row_id(job["_id"], row),
+            "created_at": now,
+            "updated_at": now,
+            "completed_at": now if task.is_completed else None,
+        })
+    if not documents:
+        return 0, errors
+    lower = await tasks.position_before(user_id) or ""
+    for document, position in zip(documents, rank_sequence(len(documents))):
+        document["position"] = lower + position
+    inserted = await tasks.insert_many(user_id, documents)
+    agenda_cache.forget(user_id)
+    deltas = tag_deltas(added=[document["tags"] for document, ok in zip(documents, inserted) if ok])
+    if deltas:
+        await users.adjust_tag_counts(user_id, deltas)
+        tag_dictionary.forget(user_id)
+    # a taken id means an earlier run of this job wrote the row before it was interrupted
+    return len(documents), errors
+
+
+async def run_import(
+    job: dict[str, Any],
+    jobs: ImportJobRepository,
+    tasks: TaskRepository,
+    users: UserRepository,
+    store: BlobStore,
+) -> None:
+    """
+    Runs a claimed job from its checkpoint to the end of its file, reading
+    the stored upload chunk by chunk and writing IMPORT_BATCH_SIZE rows at a
+    time, with progress saved after each batch. Rows before the checkpoint
+    are parsed again but not validated or written.
+
+    A malformed file fails the job with the reason; other errors fail it as
+    interrupted, to be resumed. A job whose worker stops without either
+    stays "running" until IMPORT_STALE_SECONDS pass and it can be resumed.
+    """
+    job_id, user_id = job["_id"], job["user_id"]
+    rows, imported, failed = job["rows"], job["imported"], job["failed"]
+    read = _PARSERS[job["format"]][0]
+    row, batch = 0, []
+
+    async def write() -> None:
+        nonlocal rows, imported, failed
+        inserted, errors = await _write_batch(job, batch, tasks, users)
+        rows, imported, failed = batch[-1][0], imported + inserted, failed + len(errors)
+        batch.clear()
+        await jobs.update(
+            job_id,
+            {"rows": rows, "imported": imported, "failed": failed, "updated_at": datetime.now(timezone.utc)},
+            errors,
+        )
+
+    try:
+        async for raw in read(store.read(job["sha256"], 0, job["length"])):
+            row += 1
+            if row <= rows:
+                continue
+            batch.append((row, raw))
+            if len(batch) == settings.IMPORT_BATCH_SIZE:
+                await write()
+        if batch:
+            await write()
+    except ValueError as e:
+        await jobs.update(job_id, {"status": "failed", "detail": str(e), "updated_at": datetime.now(timezone.utc)})
+        return
+    except Exception:
+        logger.exception("Import %s failed", job_id)
+        await jobs.update(job_id, {
+            "status": "failed",
+            "detail": "The import was interrupted; resume it to continue",
+            "updated_at": datetime.now(timezone.utc),
+        })
+        return
+
+    position = await tasks.position_before(user_id)
+    if position is not None and len(position) > settings.RANK_MAX_LENGTH:
+        await tasks.rebalance_positions(user_id)
+    finished = datetime.now(timezone.utc)
+    await jobs.update(job_id, {"status": "completed", "updated_at": finished, "finished_at": finished})
+    # the upload is only kept for resuming
+    await store.release(job["sha256"])
+    audit_log.record("task.import", user_id)
@@ -0,0 +1,163 @@
+# on-demand profiling of a running worker
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from types import FrameType
+from typing import Any, Optional
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _fold(frame: Optional[FrameType]) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def _cpu_clock(thread_id: int) -> Optional[int]:
+    try:
+        return time.pthread_getcpuclockid(thread_id)
+    except (AttributeError, OSError):
+        return None
+
+
+def sample_stacks(thread_id: int, seconds: float, interval: float, mode: str = "wall") -> Counter:
+    """
+    Samples the stack of `thread_id` every `interval` seconds for `seconds`
+    and counts identical stacks. Call it from another thread.
+
+    In "wall" mode every sample counts, so time spent waiting (idle loop,
+    I/O) shows up too. In "cpu" mode a sample only counts if the thread used
+    CPU since the previous one, which hides idle time.
+    """
+    clock = _cpu_clock(thread_id) if mode == "cpu" else None
+    if mode == "cpu" and clock is None:
+        raise ValueError("CPU sampling is not supported on this platform")
+    stacks: Counter = Counter()
+    last_cpu = time.clock_gettime(clock) if clock is not None else 0.0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        time.sleep(interval)
+        if clock is not None:
+            cpu = time.clock_gettime(clock)
+            busy, last_cpu = cpu > last_cpu, cpu
+            if not busy:
+                continue
+        frame = sys._current_frames().get(thread_id)
+        if frame is not None:
+            stacks[_fold(frame)] += 1
+    return stacks
+
+
+def folded(stacks: Counter) -> str:
+    """
+    Renders stacks in the collapsed "frame;frame;frame count" format read by
+    flamegraph.pl, speedscope and similar tools.
+    """
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+async def profile_event_loop(seconds: float, interval: float, mode: str = "wall") -> Counter:
+    """
+    Samples the thread running the current event loop without blocking it.
+    """
+    thread_id = threading.get_ident()
+    return await asyncio.get_running_loop().run_in_executor(
+        None, sample_stacks, thread_id, seconds, interval, mode
+    )
+
+
+async def allocation_snapshot(seconds: float, top: int = 25, frames: int = 1) -> list[dict[str, Any]]:
+    """
+    Traces allocations for `seconds` and returns the source lines whose
+    allocated memory grew the most. Tracing only runs during the window,
+    unless it was already on.
+    """
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(frames)
+    try:
+        before = tracemalloc.take_snapshot()
+        await asyncio.sleep(seconds)
+        after = tracemalloc.take_snapshot()
+    finally:
+        if started:
+            tracemalloc.stop()
+    key = "traceback" if frames > 1 else "lineno"
+    return [
+        {
+            "location": [f"{f.filename}:{f.lineno}" for f in stat.traceback],
+            "size_diff": stat.size_diff,
+            "size": stat.size,
+            "count_diff": stat.count_diff,
+        }
+        for stat in after.compare_to(before, key)[:top]
+    ]
+
+
+class LoopLagMonitor:
+    """
+    Measures event-loop lag: how late a timer scheduled every `interval`
+    seconds actually fires. Lag means something blocked the loop.
+    """
+
+    def __init__(self, interval: float = 0.1, history: int = 600):
+        self.interval = interval
+        self.samples: deque[float] = deque(maxlen=history)
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - expected))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Lag percentiles in milliseconds over the recent history.
+        """
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {"running": self.running, "samples": 0}
+
+        def percentile(p: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 3)
+
+        return {
+            "running": self.running,
+            "samples": len(ordered),
+            "interval_ms": self.interval * 1000,
+            "p50_ms": percentile(0.50),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(ordered[-1] * 1000, 3),
+        }
+
+
+loop_lag = LoopLagMonitor()
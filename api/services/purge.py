@@ -0,0 +1,175 @@
+# background purge of deleted accounts
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+
+from api.repositories import (
+    AttachmentRepository,
+    AuditRepository,
+    BlobStore,
+    IdempotencyRepository,
+    ImportJobRepository,
+    TaskListRepository,
+    TaskRepository,
+    UserRepository,
+)
+from api.services.agenda import agenda_cache
+from api.services.attachments import purge_attachments
+from api.services.sharing import dissolve_list, fan_out_access
+from api.services.tags import tag_dictionary
+from api.services.task_cache import task_cache
+from core.config import settings
+from core.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+_stats = {"accounts_purged": 0, "documents_deleted": 0, "batches": 0, "failures": 0}
+register_metrics("account_purge", lambda: dict(_stats))
+
+
+class AccountPurger:
+    """
+    Deletes the data of deactivated accounts (see `DELETE /auth/me`): their
+    shared lists (dissolved like `DELETE /lists/{id}`, while they are left
+    on lists of others), tasks with those tasks' attachments, import jobs,
+    stored idempotent responses and audit history, then the user itself.
+
+    Every step deletes PURGE_BATCH_SIZE documents at a time through an index
+    on the owner, pausing PURGE_BATCH_PAUSE_SECONDS in between, so the
+    primary never sees one huge delete_many. Progress is saved on the user
+    after each batch. Steps only ever delete what is left, so a purge cut
+    short by a crash is simply run again: the sweep started with `start`
+    picks up accounts whose purge made no progress for PURGE_STALE_SECONDS.
+    """
+
+    def __init__(
+        self,
+        users: UserRepository,
+        tasks: TaskRepository,
+        attachments: AttachmentRepository,
+        store: BlobStore,
+        imports: ImportJobRepository,
+        idempotency: IdempotencyRepository,
+        audit: AuditRepository,
+        lists: TaskListRepository,
+    ):
+        self.users = users
+        self.lists = lists
+        self.tasks = tasks
+        self.attachments = attachments
+        self.store = store
+        self.imports = imports
+        self.idempotency = idempotency
+        self.audit = audit
+        self._task: Optional[asyncio.Task] = None
+
+    async def _leave_lists(self, user_id: str, batch_size: int) -> int:
+        # the user's list_access names their lists; each is dropped from it once handled
+        user = await self.users.get_by_id(user_id)
+        list_ids = list((user or {}).get("list_access") or {})[:batch_size]
+        for list_id in list_ids:
+            task_list = await self.lists.get(list_id)
+            if task_list is not None and task_list["owner_id"] == user_id:
+                members = list(task_list["members"])
+                await fan_out_access(self.users, members, list_id, None)
+                await self.lists.delete(list_id)
+                await dissolve_list(self.users, self.tasks, members, list_id)
+            else:
+                if task_list is not None:
+                    await self.lists.set_member(list_id, user_id, None)
+                await self.users.set_list_access([user_id], list_id, None)
+        return len(list_ids)
+
+    async def _delete_tasks(self, user_id: str, batch_size: int) -> int:
+        task_ids = await self.tasks.delete_batch_for_user(user_id, batch_size)
+        await task_cache.invalidate(*task_ids)
+        await purge_attachments(self.attachments, self.store, self.users, task_ids)
+        return len(task_ids)
+
+    async def _delete_imports(self, user_id: str, batch_size: int) -> int:
+        jobs = await self.imports.delete_for_user(user_id, batch_size)
+        for job in jobs:
+            # completed jobs already gave their upload back
+            if job["status"] != "completed":
+                await self.store.release(job["sha256"])
+        return len(jobs)
+
+    async def purge(self, user_id: str) -> None:
+        """
+        Purges one deactivated account from start to end.
+        """
+        steps: list[tuple[str, Callable[[str, int], Awaitable[int]]]] = [
+            ("lists", self._leave_lists),
+            ("tasks", self._delete_tasks),
+            ("imports", self._delete_imports),
+            ("idempotency", self.idempotency.delete_for_user),
+            ("audit", self.audit.delete_for_user),
+        ]
+        deleted = {name: 0 for name, _ in steps}
+        for name, delete_batch in steps:
+            while True:
+                count = await delete_batch(user_id, settings.PURGE_BATCH_SIZE)
+                if not count:
+                    break
+                deleted[name] += count
+                _stats["batches"] += 1
+                _stats["documents_deleted"] += count
+                await self.users.set_purge_progress(user_id, {
+                    "updated_at": datetime.now(timezone.utc),
+                    "step": name,
+                    "deleted": dict(deleted),
+                })
+                await asyncio.sleep(settings.PURGE_BATCH_PAUSE_SECONDS)
+        await self.users.delete(user_id)
+        tag_dictionary.forget(user_id)
+        agenda_cache.forget(user_id)
+        _stats["accounts_purged"] += 1
+        logger.info(f"Purged account {user_id}: {deleted}")
+
+    async def run_once(self) -> int:
+        """
+        Purges every deactivated account whose purge is not running
+        elsewhere. Returns the number purged.
+        """
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=settings.PURGE_STALE_SECONDS)
+        purged = 0
+        for user in await self.users.list_purge_pending(stale_before, limit=100):
+            try:
+                await self.purge(str(user["_id"]))
+                purged += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                _stats["failures"] += 1
+                logger.exception(f"Purging account {user['_id']} failed")
+        return purged
+
+    async def _run_forever(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Account purge sweep failed")
+            await asyncio.sleep(settings.PURGE_INTERVAL_SECONDS)
+
+    def start(self) -> None:
+        """
+        Starts the sweep for purges to resume in the background.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self) -> None:
+        """
+        Stops the sweep; an interrupted purge is resumed by a later one.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,152 @@
+# recurring tasks: lazy occurrence expansion
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, Iterator, Optional
+from dateutil.rrule import HOURLY, MINUTELY, SECONDLY, rrule, rrulestr
+
+from core.config import settings
+
+# Occurrence keys look like 20240815T235959Z (no dots, so they are safe as
+# field names inside `occurrence_overrides`)
+OCCURRENCE_KEY_FORMAT = "%Y%m%dT%H%M%SZ"
+
+# Series fields that never appear on an occurrence
+_SERIES_ONLY_FIELDS = ("recurrence", "occurrence_overrides")
+
+# Length of one period of the sub-daily frequencies, which would otherwise be
+# walked one period at a time from the series' anchor
+_SUB_DAILY_PERIODS = {
+    HOURLY: timedelta(hours=1),
+    MINUTELY: timedelta(minutes=1),
+    SECONDLY: timedelta(seconds=1),
+}
+
+
+def as_utc(value: datetime) -> datetime:
+    """
+    Returns `value` as an aware UTC datetime (pymongo hands back naive UTC).
+    """
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def normalize_rule(rule: str) -> str:
+    """
+    Canonical form of an RRULE string: upper case, without the "RRULE:" prefix.
+    """
+    rule = rule.strip().upper()
+    if rule.startswith("RRULE:"):
+        rule = rule[len("RRULE:"):]
+    return rule
+
+
+def parse_rule(rule: str, dtstart: datetime) -> rrule:
+    """
+    Parses an RRULE anchored at `dtstart`. Raises ValueError for invalid rules.
+    """
+    try:
+        parsed = rrulestr(normalize_rule(rule), dtstart=as_utc(dtstart), cache=False)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid recurrence rule: {e}")
+    if not isinstance(parsed, rrule):
+        raise ValueError("Invalid recurrence rule: only a single RRULE is supported")
+    # a COUNT rule cannot be started later than its anchor, so it is walked in full
+    if parsed._count is not None and parsed._count > settings.RECURRENCE_MAX_COUNT:
+        raise ValueError(f"Invalid recurrence rule: COUNT may be at most {settings.RECURRENCE_MAX_COUNT}")
+    return parsed
+
+
+def _rule_from(series: dict[str, Any], start: datetime) -> rrule:
+    """
+    The series' rule, for iterating from `start` on. Sub-daily rules are
+    re-anchored at the last period boundary before `start`, which yields the
+    same occurrences from there without walking every period since the
+    series began.
+    """
+    dtstart = as_utc(series["due_date"])
+    rule = parse_rule(series["recurrence"], dtstart)
+    period = _SUB_DAILY_PERIODS.get(rule._freq)
+    if period is None or rule._count is not None or start <= dtstart:
+        return rule
+    period *= rule._interval
+    return rule.replace(dtstart=dtstart + (start - dtstart) // period * period)
+
+
+def occurrence_key(when: datetime) -> str:
+    return as_utc(when).strftime(OCCURRENCE_KEY_FORMAT)
+
+
+def parse_occurrence_key(key: str) -> datetime:
+    """
+    Parses an occurrence key. Raises ValueError if it is malformed.
+    """
+    return datetime.strptime(key, OCCURRENCE_KEY_FORMAT).replace(tzinfo=timezone.utc)
+
+
+def is_occurrence(series: dict[str, Any], key: str) -> bool:
+    """
+    Whether `key` names an occurrence generated by the series' rule.
+    """
+    try:
+        when = parse_occurrence_key(key)
+    except ValueError:
+        return False
+    return _rule_from(series, when).after(when, inc=True) == when
+
+
+def _occurrence(series: dict[str, Any], when: datetime, override: dict[str, Any]) -> dict[str, Any]:
+    occurrence = {k: v for k, v in series.items() if k not in _SERIES_ONLY_FIELDS}
+    occurrence.update(
+        _id=f"{series['_id']}:{occurrence_key(when)}",
+        series_id=str(series["_id"]),
+        due_date=when,
+        is_completed=False,
+        completed_at=None,
+    )
+    occurrence.update(override)
+    return occurrence
+
+
+def expand_series(
+    series: dict[str, Any],
+    start: datetime,
+    end: datetime,
+    limit: Optional[int] = None,
+) -> Iterator[dict[str, Any]]:
+    """
+    Lazily yields the occurrences of a recurring task due in [start, end).
+    Occurrences are computed from the rule as they are consumed; only the
+    overrides stored on the series (completions, edits, skips) are read.
+    """
+    start, end = as_utc(start), as_utc(end)
+    rule = _rule_from(series, start)
+    overrides = series.get("occurrence_overrides") or {}
+    limit = limit or settings.RECURRENCE_MAX_OCCURRENCES
+    produced = 0
+    for when in rule.xafter(start, inc=True):
+        if when >= end or produced >= limit:
+            return
+        override = overrides.get(occurrence_key(when), {})
+        if override.get("deleted"):
+            continue
+        produced += 1
+        yield _occurrence(series, when, override)
+
+
+def expand_tasks(
+    tasks: Iterable[dict[str, Any]], start: datetime, end: datetime
+) -> list[dict[str, Any]]:
+    """
+    Range view over stored tasks: one-off tasks due in [start, end) plus the
+    occurrences of every recurring series in that window, ordered by due date.
+    """
+    start, end = as_utc(start), as_utc(end)
+    results = []
+    for task in tasks:
+        if task.get("recurrence") and task.get("due_date"):
+            results.extend(expand_series(task, start, end))
+        elif task.get("due_date") is not None and start <= as_utc(task["due_date"]) < end:
+            results.append(task)
+    results.sort(key=lambda task: as_utc(task["due_date"]))
+    return results
+
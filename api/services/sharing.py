@@ -0,0 +1,45 @@
+# shared list roles and membership fan-out
+from typing import Sequence
+
+from api.models.user import User
+from api.repositories import TaskRepository, UserRepository
+
+# ordered from least to most privileged
+ROLES = ("viewer", "editor", "owner")
+
+
+def has_role(role: str, required: str) -> bool:
+    """
+    Whether `role` grants at least the rights of `required`.
+    """
+    return role in ROLES and ROLES.index(role) >= ROLES.index(required)
+
+
+def lists_with_role(user: User, required: str = "viewer") -> list[str]:
+    """
+    Ids of the shared lists where the user has at least `required`, read
+    from the principal's `list_access` index, so no query is needed.
+    """
+    return [list_id for list_id, role in user.list_access.items() if has_role(role, required)]
+
+
+async def fan_out_access(users: UserRepository, user_ids: Sequence[str], list_id: str, role: str | None) -> None:
+    """
+    Mirrors a membership change into the members' `list_access` indexes,
+    which task endpoints authorize from. Grants run after the response, once
+    the list document has them. Revocations and downgrades run before the
+    list document is changed, and before the response, so a failure can
+    only ever leave a member with less access than the list says.
+    """
+    await users.set_list_access(user_ids, list_id, role)
+
+
+async def dissolve_list(
+    users: UserRepository, tasks: TaskRepository, member_ids: Sequence[str], list_id: str
+) -> None:
+    """
+    Cleans up after a deleted list: drops it from every member's index and
+    hands its tasks back to their creators.
+    """
+    await users.set_list_access(member_ids, list_id, None)
+    await tasks.detach_list(list_id)
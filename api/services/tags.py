@@ -0,0 +1,85 @@
+# task tags: normalization, count deltas and autocomplete
+import heapq
+import re
+from bisect import bisect_left
+from collections import Counter
+from typing import Iterable, Optional
+
+from api.utils.lru import LRUCache
+from core.config import settings
+from core.metrics import register_metrics
+
+# letters, digits, "-", "_", "/" and inner spaces; never "." or "$", since tags are field names in tag_counts
+_TAG = re.compile(r"[^\W_][\w\-/ ]*")
+
+
+def normalize_tags(tags: Iterable[str]) -> list[str]:
+    """
+    Lowercases and trims tags, collapses inner whitespace and drops
+    duplicates, keeping the given order. Raises ValueError for tags that are
+    too long or contain other characters, and for too many tags.
+    """
+    normalized: list[str] = []
+    for tag in tags:
+        tag = " ".join(tag.lower().split())
+        if len(tag) > settings.TAG_MAX_LENGTH or not _TAG.fullmatch(tag):
+            raise ValueError(
+                f"Invalid tag {tag!r}: up to {settings.TAG_MAX_LENGTH} letters, digits, spaces, '-', '_' or '/'"
+            )
+        if tag not in normalized:
+            normalized.append(tag)
+    if len(normalized) > settings.TAG_MAX_PER_TASK:
+        raise ValueError(f"A task can have at most {settings.TAG_MAX_PER_TASK} tags")
+    return normalized
+
+
+def tag_deltas(removed: Iterable[Iterable[str]] = (), added: Iterable[Iterable[str]] = ()) -> dict[str, int]:
+    """
+    Net change to per-tag counts when tasks with the `removed` tag sets go
+    away and tasks with the `added` tag sets appear.
+    """
+    deltas: Counter = Counter()
+    for tags in added:
+        deltas.update(tags)
+    for tags in removed:
+        deltas.subtract(tags)
+    return {tag: delta for tag, delta in deltas.items() if delta}
+
+
+class TagDictionary:
+    """
+    Per-user sorted tag lists for prefix lookups, kept in a process-local LRU.
+
+    Counts come from the caller (the principal's `tag_counts`, loaded with
+    the user anyway); only the sorted key list is cached. Writes that add or
+    drop a tag call `forget`; the TTL bounds how long other workers can miss
+    a tag. Tags dropped elsewhere are filtered out by their zero count.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.cache = LRUCache(maxsize, ttl=ttl)
+
+    def forget(self, user_id: str) -> None:
+        self.cache.pop(user_id)
+
+    def complete(self, user_id: str, counts: dict[str, int], prefix: str, limit: int) -> list[tuple[str, int]]:
+        """
+        Returns up to `limit` (tag, count) pairs for the user's tags starting
+        with `prefix`, most used first.
+        """
+        keys = self.cache.get(user_id)
+        if keys is None:
+            keys = sorted(counts)
+            self.cache.set(user_id, keys)
+        prefix = " ".join(prefix.lower().split())
+        matches = []
+        for tag in keys[bisect_left(keys, prefix):]:
+            if not tag.startswith(prefix):
+                break
+            if counts.get(tag, 0) > 0:
+                matches.append((tag, counts[tag]))
+        return heapq.nsmallest(limit, matches, key=lambda match: (-match[1], match[0]))
+
+
+tag_dictionary = TagDictionary(settings.TAG_CACHE_SIZE, ttl=settings.TAG_CACHE_TTL_SECONDS)
+register_metrics("tag_dictionary", tag_dictionary.cache.stats)
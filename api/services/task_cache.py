@@ -0,0 +1,285 @@
+# cache-aside for single-task reads: per-worker LRU plus an optional shared tier
+import hashlib
+import json
+import logging
+import secrets
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Optional, Sequence
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from api.schemas.task import TaskResponse
+from api.utils.lru import LRUCache
+from core.config import settings
+from core.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+# stored for tasks that were not found
+_MISSING = b""
+
+
+def _encode(task: Optional[dict[str, Any]]) -> bytes:
+    # the task as its response renders it, like idempotent replays store it
+    if task is None:
+        return _MISSING
+    return json.dumps(TaskResponse.model_validate(task).model_dump(mode="json")).encode()
+
+
+def _scope_key(scope: Sequence[str]) -> str:
+    # lists the reader could see the task through; a membership change moves to new keys
+    return hashlib.blake2b(",".join(sorted(scope)).encode(), digest_size=8).hexdigest()
+
+
+class SharedCache(ABC):
+    """
+    A cache shared by all workers, e.g. Redis or memcached: byte values
+    with a per-key expiry.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """
+        Returns the value of `key`, or None if it is missing or expired.
+        """
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        """
+        Stores `value` under `key` for `ttl` seconds.
+        """
+
+    @abstractmethod
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """
+        Stores `value` under `key` unless it is already there (SET NX).
+        Returns whether it was stored.
+        """
+
+    async def close(self) -> None:
+        """
+        Releases the connections, if any.
+        """
+
+
+class LocalSharedCache(SharedCache):
+    """
+    In-process stand-in for a shared cache, for development and tests. It
+    is only shared by the tasks of one worker.
+    """
+
+    def __init__(self, maxsize: int):
+        self.cache = LRUCache(maxsize)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self.cache.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.cache.set(key, (time.monotonic() + ttl, value))
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        if await self.get(key) is not None:
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+
+class RedisSharedCache(SharedCache):
+    """
+    Redis as the shared tier, so generations and entries are seen by every
+    worker. Redis errors are logged and read as misses: the cache degrades
+    to loading from the database rather than failing requests, and a lost
+    generation bump is bounded by the TTL.
+    """
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            return await self.redis.get(key)
+        except RedisError as e:
+            logger.warning("Task cache read failed: %s", e)
+            return None
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        try:
+            await self.redis.set(key, value, px=max(1, int(ttl * 1000)))
+        except RedisError as e:
+            logger.warning("Task cache write failed: %s", e)
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        try:
+            return bool(await self.redis.set(key, value, px=max(1, int(ttl * 1000)), nx=True))
+        except RedisError as e:
+            logger.warning("Task cache write failed: %s", e)
+            return False
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+class TaskCache:
+    """
+    Cache-aside for tasks by reader: a per-worker LRU in front of an
+    optional shared tier, filled on read. Entries are keyed by the user,
+    the lists they can read (so gaining or losing a membership misses) and
+    the task, and hold the task as TaskResponse JSON. Tasks that were not
+    found are cached too, for a shorter time.
+
+    Every task has a generation in the shared tier (in a per-worker one
+    without it), a random token replaced on each write, and entries are
+    stored under the generation that was current before the database was
+    read. A write replaces the generation first, so a reader that loaded
+    the old document meanwhile stores it where nobody looks any more, and
+    entries of other users and other workers go stale at once. Without a
+    shared tier that only holds within one worker, so the launcher turns
+    the cache off when it starts several. Writes outside the tasks router
+    (rebalancing, archival, dissolving a list) are only bounded by the TTL.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        negative_ttl: float,
+        shared: Optional[SharedCache] = None,
+    ):
+        self.local = LRUCache(maxsize, ttl=ttl)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.shared = shared
+        self.generations = shared if shared is not None else LocalSharedCache(maxsize)
+        self.enabled = True
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.negative_hits = 0
+        self.stale = 0
+        self.loads = 0
+
+    @staticmethod
+    def _entry_key(user_id: str, scope: str, task_id: str, generation: bytes) -> str:
+        return f"task:{user_id}:{scope}:{task_id}:{generation.decode()}"
+
+    async def _generation(self, task_id: str) -> bytes:
+        key = f"task-gen:{task_id}"
+        generation = await self.generations.get(key)
+        if generation is None:
+            # never the same token twice, so an evicted generation cannot revive old entries
+            generation = secrets.token_hex(8).encode()
+            if not await self.generations.add(key, generation, self.ttl * 2):
+                generation = await self.generations.get(key) or generation
+        return generation
+
+    async def _bump(self, task_id: str) -> bytes:
+        generation = secrets.token_hex(8).encode()
+        await self.generations.set(f"task-gen:{task_id}", generation, self.ttl * 2)
+        return generation
+
+    async def _store(self, user_id: str, scope: str, task_id: str, generation: bytes, payload: bytes) -> None:
+        ttl = self.ttl if payload else self.negative_ttl
+        self.local.set((user_id, scope, task_id), (generation, time.monotonic() + ttl, payload))
+        if self.shared is not None:
+            await self.shared.set(self._entry_key(user_id, scope, task_id, generation), payload, ttl)
+
+    async def get(
+        self,
+        user_id: str,
+        task_id: str,
+        load: Callable[[], Awaitable[Optional[dict[str, Any]]]],
+        scope: Sequence[str] = (),
+    ) -> Optional[dict[str, Any]]:
+        """
+        Returns the task as `user_id` reading through the lists in `scope`
+        sees it: from the cache in its TaskResponse form, or as `load`
+        returns it, which is then cached.
+        """
+        if not self.enabled:
+            return await load()
+        scope_key = _scope_key(scope)
+        generation = await self._generation(task_id)
+        payload = None
+        entry = self.local.get((user_id, scope_key, task_id))
+        if entry is not None:
+            if entry[0] == generation and entry[1] >= time.monotonic():
+                payload = entry[2]
+                self.local_hits += 1
+            else:
+                self.stale += 1
+        if payload is None and self.shared is not None:
+            payload = await self.shared.get(self._entry_key(user_id, scope_key, task_id, generation))
+            if payload is not None:
+                self.shared_hits += 1
+                ttl = self.ttl if payload else self.negative_ttl
+                self.local.set((user_id, scope_key, task_id), (generation, time.monotonic() + ttl, payload))
+        if payload is None:
+            self.loads += 1
+            task = await load()
+            await self._store(user_id, scope_key, task_id, generation, _encode(task))
+            return task
+        if payload == _MISSING:
+            self.negative_hits += 1
+            return None
+        return json.loads(payload)
+
+    async def invalidate(self, *task_ids: str) -> None:
+        """
+        Makes every cached copy of the tasks stale, for all users and workers.
+        """
+        for task_id in task_ids:
+            await self._bump(task_id)
+
+    async def write(
+        self, user_id: str, task_id: str, task: Optional[dict[str, Any]], scope: Sequence[str] = ()
+    ) -> None:
+        """
+        Write-through after a write by the user: invalidates the task and
+        caches its new state for them, None meaning it is gone.
+        """
+        if not self.enabled:
+            return
+        generation = await self._bump(task_id)
+        await self._store(user_id, _scope_key(scope), task_id, generation, _encode(task))
+
+    async def close(self) -> None:
+        if self.shared is not None:
+            await self.shared.close()
+
+    def snapshot(self) -> dict[str, Any]:
+        hits = self.local_hits + self.shared_hits
+        return {
+            "size": len(self.local),
+            "maxsize": self.local.maxsize,
+            "bytes": sum(len(entry[2]) for entry in self.local.values()),
+            "shared": type(self.shared).__name__ if self.shared is not None else None,
+            "local_hits": self.local_hits,
+            "shared_hits": self.shared_hits,
+            "negative_hits": self.negative_hits,
+            "stale": self.stale,
+            "loads": self.loads,
+            "hit_ratio": hits / (hits + self.loads) if hits + self.loads else 0.0,
+        }
+
+
+def _shared_tier() -> Optional[SharedCache]:
+    if settings.TASK_CACHE_SHARED == "redis":
+        # connects on first use
+        return RedisSharedCache(Redis.from_url(settings.REDIS_URL))
+    if settings.TASK_CACHE_SHARED == "local":
+        return LocalSharedCache(settings.TASK_CACHE_SIZE)
+    return None
+
+
+task_cache = TaskCache(
+    maxsize=settings.TASK_CACHE_SIZE,
+    ttl=settings.TASK_CACHE_TTL_SECONDS,
+    negative_ttl=settings.TASK_CACHE_NEGATIVE_TTL_SECONDS,
+    shared=_shared_tier(),
+)
+task_cache.enabled = settings.TASK_CACHE_ENABLED
+register_metrics("task_cache", task_cache.snapshot)
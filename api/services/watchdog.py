@@ -0,0 +1,125 @@
+# event loop blocking watchdog
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from typing import Any, Optional
+from api.middleware.request_context import route_for_task
+from api.services.profiling import LoopLagMonitor
+from core.config import settings
+from core.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class LoopWatchdog(LoopLagMonitor):
+    """
+    Lag monitor that also catches whoever blocks the loop.
+
+    The loop side beats every `interval` seconds. A daemon thread checks the
+    beat; once it is more than `threshold` seconds late the loop is stuck in
+    a callback, so the thread records the loop thread's stack and the route
+    of the task being run right then. When the loop comes back, the stall is
+    logged and counted against that route.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        threshold: float = 0.1,
+        history: int = 600,
+        recent: int = 20,
+        stack_limit: int = 30,
+    ):
+        super().__init__(interval=interval, history=history)
+        self.threshold = threshold
+        self.stack_limit = stack_limit
+        self.by_route: Counter = Counter()
+        self.recent: deque[dict[str, Any]] = deque(maxlen=recent)
+        self._beat = 0.0
+        self._caught: Optional[tuple[str, list[str]]] = None
+        self._caught_beat = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            self._beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.samples.append(lag)
+            if lag >= self.threshold:
+                self._report(lag)
+
+    def _report(self, lag: float) -> None:
+        caught, self._caught = self._caught, None
+        route, stack = caught or ("-", [])
+        self.by_route[route] += 1
+        self.recent.append({"route": route, "blocked_ms": round(lag * 1000, 3), "stack": stack})
+        logger.warning(
+            "Event loop blocked for %.1f ms while serving %s\n%s",
+            lag * 1000, route, "".join(stack) or "(stack not captured)"
+        )
+
+    def _watch(self, loop: asyncio.AbstractEventLoop, thread_id: int) -> None:
+        check = min(self.interval, self.threshold) / 2
+        while not self._stopped.wait(check):
+            beat = self._beat
+            if not beat or beat == self._caught_beat:
+                continue
+            if time.monotonic() - beat < self.interval + self.threshold:
+                continue
+            # one capture per stall; the loop thread is still inside the culprit
+            self._caught_beat = beat
+            frame = sys._current_frames().get(thread_id)
+            stack = traceback.format_stack(frame, limit=self.stack_limit) if frame is not None else []
+            self._caught = (route_for_task(asyncio.current_task(loop)), stack)
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        super().start()
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._watch,
+            args=(asyncio.get_running_loop(), threading.get_ident()),
+            name="loop-watchdog",
+            daemon=True,
+        )
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        await super().stop()
+
+    def snapshot(self, stacks: bool = False) -> dict[str, Any]:
+        """
+        Lag percentiles plus blocked-loop counts per route and the most
+        recent stalls, with their stacks only if `stacks` is set: those are
+        for the admin profiling endpoints, never the metrics.
+        """
+        return {
+            **super().snapshot(),
+            "threshold_ms": self.threshold * 1000,
+            "blocked": sum(self.by_route.values()),
+            "blocked_by_route": dict(self.by_route.most_common()),
+            "recent": [
+                stall if stacks else {k: v for k, v in stall.items() if k != "stack"}
+                for stall in self.recent
+            ],
+        }
+
+
+watchdog = LoopWatchdog(
+    interval=settings.LOOP_WATCHDOG_INTERVAL_MS / 1000,
+    threshold=settings.LOOP_WATCHDOG_THRESHOLD_MS / 1000,
+)
+register_metrics("event_loop", watchdog.snapshot)
@@ -0,0 +1,131 @@
+# per-request database command counting and allocation measurement
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, Optional
+
+# collection methods that each cost one round trip; cursors (find, aggregate) count once when created
+_COMMANDS = frozenset({
+    "aggregate", "bulk_write", "count_documents", "create_index", "delete_many", "delete_one",
+    "distinct", "estimated_document_count", "find", "find_one", "find_one_and_delete",
+    "find_one_and_replace", "find_one_and_update", "insert_many", "insert_one", "replace_one",
+    "update_many", "update_one",
+})
+
+
+@dataclass
+class RequestCost:
+    """
+    What the code run inside `measure` cost: database commands by
+    "collection.method", and the peak of memory allocated on top of what was
+    in use when it started (only while tracemalloc traces).
+    """
+    commands: Counter = field(default_factory=Counter)
+    peak_bytes: int = 0
+
+    @property
+    def total_commands(self) -> int:
+        return sum(self.commands.values())
+
+
+_current: ContextVar[Optional[RequestCost]] = ContextVar("request_cost", default=None)
+
+
+class InstrumentedCollection:
+    """
+    A collection whose commands are counted into the `RequestCost` being
+    measured, if any. Everything else passes through.
+    """
+
+    def __init__(self, collection: Any):
+        self._collection = collection
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._collection, name)
+        if name not in _COMMANDS:
+            return attr
+        label = f"{self._collection.name}.{name}"
+
+        def call(*args, **kwargs):
+            cost = _current.get()
+            if cost is not None:
+                cost.commands[label] += 1
+            # awaited by the caller if it is a coroutine; counted at call time either way
+            return attr(*args, **kwargs)
+        return call
+
+
+class InstrumentedDatabase:
+    """
+    Wraps a Motor (or mongomock_motor) database so that every collection
+    taken from it counts its commands. Used by the test suite, and by
+    `get_db` when INSTRUMENT_DB is set.
+    """
+
+    def __init__(self, db: Any):
+        self._db = db
+
+    def get_collection(self, name: str, **kwargs) -> InstrumentedCollection:
+        return InstrumentedCollection(self._db.get_collection(name, **kwargs))
+
+    def __getitem__(self, name: str) -> InstrumentedCollection:
+        return InstrumentedCollection(self._db[name])
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._db, name)
+
+
+@contextmanager
+def measure() -> Iterator[RequestCost]:
+    """
+    Measures the code run in the block, including tasks it spawns (they
+    inherit the context). Allocations are only measured if tracemalloc is
+    tracing.
+    """
+    cost = RequestCost()
+    token = _current.set(cost)
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    try:
+        yield cost
+    finally:
+        _current.reset(token)
+        if tracing:
+            cost.peak_bytes = max(tracemalloc.get_traced_memory()[1] - baseline, 0)
+
+
+@dataclass(frozen=True)
+class Budget:
+    """
+    The most a request to an endpoint may cost: database commands, and peak
+    KiB allocated while it is handled.
+    """
+    commands: int
+    alloc_kib: int
+
+
+def budget(commands: int, alloc_kib: int) -> Callable:
+    """
+    Declares an endpoint's cost budget, next to its route:
+
+        @router.get("/tasks")
+        @budget(commands=2, alloc_kib=256)
+        async def get_tasks(...): ...
+
+    Budgets are enforced by the test suite (tests/test_budgets.py), not at runtime.
+    """
+    def declare(endpoint: Callable) -> Callable:
+        endpoint.__budget__ = Budget(commands, alloc_kib)
+        return endpoint
+    return declare
+
+
+def budget_of(endpoint: Callable) -> Optional[Budget]:
+    """
+    Returns the budget declared on an endpoint, or None.
+    """
+    return getattr(endpoint, "__budget__", None)
@@ -0,0 +1,55 @@
+# dataloader-style batching of lookups by key
+import asyncio
+from typing import Any, Awaitable, Callable, Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class BatchLoader(Generic[K, V]):
+    """
+    Collects the keys `load`ed by concurrently running coroutines and fetches
+    them with one call to `fetch_many`, which maps each key it found to its
+    value. A batch is sent once every coroutine started alongside the first
+    `load` has had its turn, so `asyncio.gather(load(a), load(b))` costs one
+    fetch. Keys are fetched at most once per loader; make one per request.
+    """
+
+    def __init__(self, fetch_many: Callable[[list[K]], Awaitable[dict[K, V]]]):
+        self.fetch_many = fetch_many
+        self.batches = 0
+        self._futures: dict[K, asyncio.Future] = {}
+        self._queued: list[K] = []
+        self._dispatches: set[asyncio.Task] = set()
+
+    async def load(self, key: K) -> Optional[V]:
+        """
+        Returns the value for `key`, or None if `fetch_many` did not find it.
+        """
+        future = self._futures.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._futures[key] = loop.create_future()
+            if not self._queued:
+                # runs after the callbacks already scheduled, i.e. the other coroutines' next steps
+                loop.call_soon(self._start_dispatch)
+            self._queued.append(key)
+        return await asyncio.shield(future)
+
+    def _start_dispatch(self) -> None:
+        # the loop only keeps weak references to tasks
+        task = asyncio.create_task(self._dispatch())
+        self._dispatches.add(task)
+        task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self) -> None:
+        keys, self._queued = self._queued, []
+        self.batches += 1
+        try:
+            found: dict[Any, Any] = await self.fetch_many(keys)
+        except Exception as e:
+            for key in keys:
+                self._futures.pop(key).set_exception(e)
+            return
+        for key in keys:
+            self._futures[key].set_result(found.get(key))
@@ -1,7 +1,24 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 from passlib.context import CryptContext
+from core.config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt releases the GIL, so hashing on a small thread pool keeps the event
+# loop free while it runs. Sized per worker by core.launcher.
+_hash_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_THREADS, thread_name_prefix="bcrypt"
+        )
+    return _hash_executor
+
 
 def get_password_hash(password: str) -> str:
     """
@@ -14,4 +31,20 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verifies a plain password against a hashed password.
     """
-    return pwd_context.verify(plain_password, hashed_password) 
\ No newline at end of file
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Hashes a password on the hashing thread pool.
+    """
+    return await asyncio.get_running_loop().run_in_executor(_executor(), get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verifies a password on the hashing thread pool.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        _executor(), verify_password, plain_password, hashed_password
+    )
@@ -0,0 +1,55 @@
+# fractional rank keys for manual ordering
+import string
+from typing import Optional
+
+# ascending in byte order, so Mongo and Python compare keys the same way
+DIGITS = string.digits + string.ascii_uppercase + string.ascii_lowercase
+BASE = len(DIGITS)
+_VALUE = {digit: value for value, digit in enumerate(DIGITS)}
+
+
+def _midpoint(lower: str, upper: Optional[str]) -> str:
+    # keys are base-62 fractions 0.xxx without trailing zeros; None is 1.0
+    if upper is not None:
+        prefix = 0
+        while prefix < len(upper) and (lower[prefix] if prefix < len(lower) else "0") == upper[prefix]:
+            prefix += 1
+        if prefix:
+            return upper[:prefix] + _midpoint(lower[prefix:], upper[prefix:])
+    low = _VALUE[lower[0]] if lower else 0
+    high = _VALUE[upper[0]] if upper is not None else BASE
+    if high - low > 1:
+        return DIGITS[(low + high) // 2]
+    if upper is not None and len(upper) > 1:
+        return upper[0]
+    return DIGITS[low] + _midpoint(lower[1:], None)
+
+
+def rank_between(lower: Optional[str], upper: Optional[str]) -> str:
+    """
+    Returns a key sorting strictly between `lower` and `upper`; None means
+    the start or the end of the list. Keys grow by about one character per
+    repeated insert at the same spot, see `rank_sequence` for resetting them.
+    """
+    if lower is not None and upper is not None and lower >= upper:
+        raise ValueError(f"{lower!r} does not sort before {upper!r}")
+    return _midpoint(lower or "", upper)
+
+
+def rank_sequence(count: int) -> list[str]:
+    """
+    Returns `count` ascending keys spread evenly over the key space, as short
+    as possible, leaving room for inserts between any two of them.
+    """
+    width = 1
+    while BASE ** width <= count:
+        width += 1
+    step = BASE ** width / (count + 1)
+    keys = []
+    for i in range(1, count + 1):
+        value, digits = int(i * step), []
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            digits.append(DIGITS[digit])
+        keys.append("".join(reversed(digits)).rstrip("0"))
+    return keys
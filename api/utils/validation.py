@@ -0,0 +1,75 @@
+# credential validation
+import re
+from typing import Annotated
+from pydantic import AfterValidator
+
+# Compiled once at import; every check below is a single pass
+EMAIL_PATTERN = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+")
+USERNAME_PATTERN = re.compile(r"[a-zA-Z0-9_]{3,20}")
+PASSWORD_PATTERN = re.compile(r"[A-Za-z\d@$!%*?&#_\-^]{8,}")
+_PASSWORD_SPECIALS = frozenset("@$!%*?&#_-^")
+
+PASSWORD_RULES = (
+    "Password must contain at least 8 characters, one uppercase letter, "
+    "one lowercase letter, one number, and one special character"
+)
+
+
+def normalize_email(email: str) -> str:
+    """
+    Canonical form of an email address, so every lookup matches the unique
+    index on `users.email`: surrounding whitespace removed and lower-cased.
+    No DNS or deliverability checks are made.
+    """
+    return email.strip().lower()
+
+
+def validate_email(email: str) -> str:
+    """
+    Checks the address format and returns it normalized.
+    """
+    email = normalize_email(email)
+    if len(email) > 254 or not EMAIL_PATTERN.fullmatch(email):
+        raise ValueError("Invalid email address")
+    return email
+
+
+def validate_username(username: str) -> str:
+    """
+    Checks that the username is 3-20 alphanumeric characters or underscores.
+    """
+    if not USERNAME_PATTERN.fullmatch(username):
+        raise ValueError(
+            "Username must be 3-20 characters and contain only alphanumeric characters and underscores"
+        )
+    return username
+
+
+def validate_password(password: str) -> str:
+    """
+    Checks password complexity with one scan of the string instead of a
+    regex with four look-aheads.
+    """
+    if not PASSWORD_PATTERN.fullmatch(password):
+        raise ValueError(PASSWORD_RULES)
+    has_lower = has_upper = has_digit = has_special = False
+    for char in password:
+        if char.islower():
+            has_lower = True
+        elif char.isupper():
+            has_upper = True
+        elif char.isdigit():
+            has_digit = True
+        elif char in _PASSWORD_SPECIALS:
+            has_special = True
+    if not (has_lower and has_upper and has_digit and has_special):
+        raise ValueError(PASSWORD_RULES)
+    return password
+
+
+# Field types for request schemas
+Email = Annotated[str, AfterValidator(validate_email)]
+Username = Annotated[str, AfterValidator(validate_username)]
+Password = Annotated[str, AfterValidator(validate_password)]
+# Login only normalizes: format errors must not reveal anything beyond "Invalid credentials"
+LoginEmail = Annotated[str, AfterValidator(normalize_email)]
@@ -0,0 +1,80 @@
+# micro-benchmark: password reset mails sent per second against a local SMTP stand-in
+# usage: python -m benchmarks.bench_mail [messages]
+import asyncio
+import sys
+import time
+
+import aiosmtplib
+
+from api.services.email import Mail, MailService
+
+
+async def _session(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    # just enough SMTP to take messages: every command is accepted, DATA is read and dropped
+    writer.write(b"220 localhost ready\r\n")
+    while line := await reader.readline():
+        command = line[:4].upper()
+        if command == b"EHLO":
+            writer.write(b"250-localhost\r\n250 8BITMIME\r\n")
+        elif command == b"DATA":
+            writer.write(b"354 go ahead\r\n")
+            while (await reader.readline()) not in (b".\r\n", b""):
+                pass
+            writer.write(b"250 queued\r\n")
+        elif command == b"QUIT":
+            writer.write(b"221 bye\r\n")
+            break
+        else:
+            writer.write(b"250 ok\r\n")
+        await writer.drain()
+    await writer.drain()
+    writer.close()
+
+
+def _mails(count: int) -> list[Mail]:
+    return [
+        Mail(
+            to=f"user{i}@example.com",
+            subject="Password Reset Request",
+            template="email.html",
+            context={"username": f"user{i}", "reset_url": f"http://localhost:3000/reset-password?token={i}", "expire_minutes": 30},
+        )
+        for i in range(count)
+    ]
+
+
+async def per_message(port: int, count: int) -> float:
+    """
+    Messages per second with a connection opened and quit for every message.
+    """
+    service = MailService("127.0.0.1", port, "bench@example.com", start_tls=False)
+    start = time.perf_counter()
+    for mail in _mails(count):
+        async with aiosmtplib.SMTP(hostname="127.0.0.1", port=port, start_tls=False) as smtp:
+            await smtp.send_message(service._build(mail))
+    return count / (time.perf_counter() - start)
+
+
+async def pooled(port: int, count: int, pool_size: int) -> float:
+    """
+    Messages per second through `MailService.send_many`.
+    """
+    service = MailService("127.0.0.1", port, "bench@example.com", start_tls=False, pool_size=pool_size)
+    start = time.perf_counter()
+    await service.send_many(_mails(count))
+    rate = count / (time.perf_counter() - start)
+    await service.close()
+    return rate
+
+
+async def main(count: int = 2000) -> None:
+    server = await asyncio.start_server(_session, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        print(f"{'per message':<16} {await per_message(port, count):>10,.0f} messages/s")
+        for pool_size in (1, 4):
+            print(f"{f'pool of {pool_size}':<16} {await pooled(port, count, pool_size):>10,.0f} messages/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
@@ -0,0 +1,34 @@
+# micro-benchmark: auth payloads validated per second
+# usage: python -m benchmarks.bench_validation [iterations]
+import sys
+import time
+
+from api.schemas.user import ResetPasswordRequest, UserCreate, UserLogin
+
+PAYLOADS = {
+    "signup": (UserCreate, {"email": "Bench.User@Example.com", "password": "ValidPassword1!", "username": "bench_user"}),
+    "login": (UserLogin, {"email": "bench.user@example.com", "password": "ValidPassword1!"}),
+    "reset-password": (ResetPasswordRequest, {"token": "t" * 180, "new_password": "NewPassword1!", "confirm_password": "NewPassword1!"}),
+}
+
+
+def bench(model, payload: dict, iterations: int) -> float:
+    """
+    Returns validations per second for `payload` against `model`.
+    """
+    validate = model.model_validate
+    for _ in range(min(iterations, 1000)):  # warm-up
+        validate(payload)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        validate(payload)
+    return iterations / (time.perf_counter() - start)
+
+
+def main(iterations: int = 100_000) -> None:
+    for name, (model, payload) in PAYLOADS.items():
+        print(f"{name:<16} {bench(model, payload, iterations):>12,.0f} validations/s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
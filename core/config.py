@@ -1,3 +1,4 @@
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -14,10 +15,144 @@ class Settings(BaseSettings):
     # Database settings
     MONGODB_URI: str
     DATABASE_NAME: str
+    # connections per worker process; set by core.launcher from MONGODB_MAX_CONNECTIONS
+    MONGODB_MAX_POOL_SIZE: int = 100
+    # connection budget for the whole deployment, shared between workers
+    MONGODB_MAX_CONNECTIONS: int = 200
+    # Storage backend for the repositories: "mongo" or "memory"
+    REPOSITORY_BACKEND: str = "mongo"
+
+    # Read/write routing
+    # read preference for "default" reads and for "heavy" (list/stats/export) reads
+    MONGODB_READ_PREFERENCE: str = "primary"
+    MONGODB_HEAVY_READ_PREFERENCE: str = "secondaryPreferred"
+    MONGODB_MAX_STALENESS_SECONDS: int = 90
+    # write concern for "default" writes and for "light" (low-value) writes
+    MONGODB_WRITE_CONCERN: str = "majority"
+    MONGODB_LIGHT_WRITE_CONCERN: str = "1"
+    # how long a user's reads stay causally tied to their last write
+    READ_YOUR_WRITES_SECONDS: int = 30
+    # most users a worker tracks recent writes for; the oldest are dropped beyond it
+    READ_YOUR_WRITES_MAX_USERS: int = 100000
+
+    # Wrap the database to count commands per request (see api.utils.instrumentation); for tests and staging
+    INSTRUMENT_DB: bool = False
+
+    # Archival of completed tasks
+    ARCHIVE_ENABLED: bool = True
+    ARCHIVE_AFTER_DAYS: int = 30
+    ARCHIVE_BATCH_SIZE: int = 500
+    ARCHIVE_BATCH_PAUSE_SECONDS: float = 1.0
+    ARCHIVE_INTERVAL_SECONDS: int = 3600
+
+    # Deleted accounts: their data is purged in batches of PURGE_BATCH_SIZE documents with a pause in
+    # between; a sweep every PURGE_INTERVAL_SECONDS resumes purges with no progress for PURGE_STALE_SECONDS
+    PURGE_ENABLED: bool = True
+    PURGE_BATCH_SIZE: int = 500
+    PURGE_BATCH_PAUSE_SECONDS: float = 0.5
+    PURGE_INTERVAL_SECONDS: int = 300
+    PURGE_STALE_SECONDS: int = 600
+
+    # Idempotency keys: how long replays are honoured, and the per-worker cache size
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_CACHE_SIZE: int = 10000
+    # how long a pending key stays claimed; a retry takes over a claim whose worker died
+    IDEMPOTENCY_LEASE_SECONDS: int = 60
+
+    # Admin profiling endpoints (/admin/profiling); off by default
+    PROFILING_ENABLED: bool = False
+    PROFILING_MAX_SECONDS: int = 60
+
+    # Event loop watchdog: logs and counts callbacks that block the loop longer than the threshold
+    LOOP_WATCHDOG_ENABLED: bool = True
+    LOOP_WATCHDOG_INTERVAL_MS: int = 100
+    LOOP_WATCHDOG_THRESHOLD_MS: int = 100
+
+    # Rank keys (task positions) longer than this trigger a background rebalance of the user's tasks
+    RANK_MAX_LENGTH: int = 24
+
+    # Subtasks: maximum nesting depth, and how many descendants a cascading delete removes per batch
+    SUBTASK_MAX_DEPTH: int = 10
+    SUBTASK_DELETE_BATCH_SIZE: int = 500
+
+    # Task attachments: where contents are stored ("mongo" chunks or "filesystem" under ATTACHMENT_DIR),
+    # the chunk size uploads are written and read in, the largest single file, and the bytes each user may store
+    ATTACHMENT_STORAGE: str = "mongo"
+    ATTACHMENT_DIR: str = "attachments"
+    ATTACHMENT_CHUNK_SIZE: int = 261120
+    ATTACHMENT_MAX_BYTES: int = 25 * 1024 * 1024
+    ATTACHMENT_QUOTA_BYTES: int = 200 * 1024 * 1024
+
+    # Tags: limits per task and per tag, and the per-worker autocomplete dictionary (users cached, seconds kept)
+    TAG_MAX_PER_TASK: int = 20
+    TAG_MAX_LENGTH: int = 32
+    TAG_CACHE_SIZE: int = 10000
+    TAG_CACHE_TTL_SECONDS: int = 60
+
+    # Audit log: events are queued in-process and written in batches of AUDIT_BATCH_SIZE or every
+    # AUDIT_FLUSH_INTERVAL_MS; when the queue is full the "oldest" or "newest" event is dropped
+    AUDIT_ENABLED: bool = True
+    AUDIT_QUEUE_SIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_MS: int = 1000
+    AUDIT_DROP_POLICY: str = "oldest"
+    AUDIT_RETENTION_DAYS: int = 90
+
+    # Offline sync: mutations accepted per POST /tasks/sync, and how long deletes are remembered for it;
+    # clients that last synced longer ago get a full resync
+    SYNC_MAX_MUTATIONS: int = 500
+    SYNC_TOMBSTONE_DAYS: int = 30
+
+    # Task imports: largest file, rows validated and inserted per batch, longest single row (CSV record,
+    # NDJSON line or JSON item), row errors kept per job, and how long a running job may go without
+    # progress before it can be resumed
+    IMPORT_MAX_BYTES: int = 100 * 1024 * 1024
+    IMPORT_BATCH_SIZE: int = 500
+    IMPORT_MAX_ROW_BYTES: int = 1024 * 1024
+    IMPORT_MAX_ERRORS: int = 1000
+    IMPORT_STALE_SECONDS: int = 300
+
+    # Single-task read cache (GET /tasks/{task_id}): per-worker entries, seconds kept, seconds a missing task
+    # is remembered, and the shared tier: "redis", "none", or "local" for the in-process stand-in. Without
+    # "redis", core.launcher turns the cache off when it starts several workers
+    TASK_CACHE_ENABLED: bool = True
+    TASK_CACHE_SIZE: int = 10000
+    TASK_CACHE_TTL_SECONDS: int = 30
+    TASK_CACHE_NEGATIVE_TTL_SECONDS: int = 5
+    TASK_CACHE_SHARED: Literal["none", "local", "redis"] = "none"
+    REDIS_URL: str = "redis://localhost:6379/0"
+
+    # Read operations accepted per POST /batch
+    BATCH_MAX_OPERATIONS: int = 20
+
+    # Upper bound on occurrences generated per recurring task in one range query
+    RECURRENCE_MAX_OCCURRENCES: int = 1000
+    # Largest COUNT accepted in a recurrence rule
+    RECURRENCE_MAX_COUNT: int = 10000
+
+    # Agenda (GET /tasks/agenda): longest window in days, tasks listed per day by default, how many days
+    # after today count as "upcoming", and the per-worker cache of bucket counts (users cached, seconds kept)
+    AGENDA_MAX_DAYS: int = 62
+    AGENDA_DAY_LIMIT: int = 20
+    AGENDA_UPCOMING_DAYS: int = 7
+    AGENDA_CACHE_SIZE: int = 10000
+    AGENDA_CACHE_TTL_SECONDS: int = 60
 
     # App name
     APP_NAME: str = "TodoApp"
 
+    # Process profile (see core.launcher); unset values are derived from the host
+    PORT: int = 8000
+    WEB_CONCURRENCY: Optional[int] = None
+    WEB_KEEPALIVE_SECONDS: int = 5
+    WEB_LOOP: str = "auto"  # "auto", "uvloop" or "asyncio"
+    WEB_HTTP: str = "auto"  # "auto", "httptools" or "h11"
+    # recycle a worker after this many requests (plus jitter) to bound memory; 0 disables
+    WEB_MAX_REQUESTS: int = 10000
+    WEB_MAX_REQUESTS_JITTER: int = 1000
+    # bcrypt threads per worker
+    PASSWORD_HASH_THREADS: int = 2
+
     # JWT settings
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str
@@ -31,6 +166,9 @@ class Settings(BaseSettings):
     MAIL_SERVER: str
     MAIL_STARTTLS: bool = True
     MAIL_SSL_TLS: bool = False
+    # persistent SMTP connections per worker, and how long one may sit idle before it is checked with NOOP
+    MAIL_POOL_SIZE: int = 4
+    MAIL_HEALTH_CHECK_SECONDS: float = 30.0
 
     # Client URL for frontend links
     CLIENT_URL: str = "http://localhost:3000"
@@ -0,0 +1,165 @@
+# process launcher: sizes workers and pools from the host, then runs gunicorn
+# usage: python -m core.launcher
+import importlib.util
+import math
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from core.config import settings
+
+# Below this many connections per worker, add connections rather than workers
+MIN_POOL_PER_WORKER = 5
+
+
+def detect_cores() -> int:
+    """
+    CPU cores this process may use, honouring CPU affinity and a cgroup v2
+    quota (containers often see every host core in os.cpu_count()).
+    """
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cores = min(cores, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cores
+
+
+def _resolve(choice: str, fast: str, fallback: str) -> str:
+    if choice != "auto":
+        return choice
+    return fast if importlib.util.find_spec(fast) is not None else fallback
+
+
+@dataclass
+class LaunchProfile:
+    """
+    Process settings chosen for this host.
+    """
+    cores: int
+    workers: int
+    mongo_pool_size: int
+    hash_threads: int
+    keepalive: int
+    loop: str
+    http: str
+    max_requests: int
+    max_requests_jitter: int
+    bind: str
+
+    def describe(self) -> str:
+        recycle = (
+            f"after {self.max_requests}+{self.max_requests_jitter} requests"
+            if self.max_requests else "never"
+        )
+        return (
+            f"Launch profile: {self.cores} cores -> {self.workers} workers on {self.bind}\n"
+            f"  per worker: mongo pool {self.mongo_pool_size}, bcrypt threads {self.hash_threads}\n"
+            f"  loop {self.loop}, http {self.http}, keep-alive {self.keepalive}s, recycle {recycle}"
+        )
+
+
+def build_profile(cores: Optional[int] = None) -> LaunchProfile:
+    """
+    Derives the profile from the detected cores and the Mongo connection
+    budget. Values set explicitly in the environment always win.
+
+    Workers are async, so one per core is enough for the event loops; bcrypt
+    runs on threads and gets the cores left over per worker. The connection
+    budget is split evenly between workers, and the worker count shrinks
+    rather than leaving any worker with a starved pool.
+    """
+    cores = cores or detect_cores()
+    explicit = settings.model_fields_set
+
+    workers = settings.WEB_CONCURRENCY or cores
+    workers = max(1, min(workers, settings.MONGODB_MAX_CONNECTIONS // MIN_POOL_PER_WORKER))
+
+    if "MONGODB_MAX_POOL_SIZE" in explicit:
+        pool_size = settings.MONGODB_MAX_POOL_SIZE
+    else:
+        pool_size = max(1, settings.MONGODB_MAX_CONNECTIONS // workers)
+
+    if "PASSWORD_HASH_THREADS" in explicit:
+        hash_threads = settings.PASSWORD_HASH_THREADS
+    else:
+        hash_threads = max(1, cores // workers)
+
+    return LaunchProfile(
+        cores=cores,
+        workers=workers,
+        mongo_pool_size=pool_size,
+        hash_threads=hash_threads,
+        keepalive=settings.WEB_KEEPALIVE_SECONDS,
+        loop=_resolve(settings.WEB_LOOP, "uvloop", "asyncio"),
+        http=_resolve(settings.WEB_HTTP, "httptools", "h11"),
+        max_requests=settings.WEB_MAX_REQUESTS,
+        max_requests_jitter=settings.WEB_MAX_REQUESTS_JITTER if settings.WEB_MAX_REQUESTS else 0,
+        bind=f"0.0.0.0:{settings.PORT}",
+    )
+
+
+def apply_profile(profile: LaunchProfile) -> None:
+    """
+    Hands the per-worker values to the workers: through the environment for
+    freshly imported settings, and on the already-loaded settings object for
+    workers forked from this process. Turns the task cache off for several
+    workers without a shared tier.
+    """
+    values = {
+        "MONGODB_MAX_POOL_SIZE": profile.mongo_pool_size,
+        "PASSWORD_HASH_THREADS": profile.hash_threads,
+        "WEB_LOOP": profile.loop,
+        "WEB_HTTP": profile.http,
+    }
+    if profile.workers > 1 and settings.TASK_CACHE_SHARED != "redis":
+        # task cache generations would be per worker, so writes on one could not reach the others
+        values["TASK_CACHE_ENABLED"] = False
+    for name, value in values.items():
+        os.environ[name] = str(value)
+        setattr(settings, name, value)
+
+
+def run(profile: LaunchProfile) -> None:
+    """
+    Runs main:app under gunicorn with uvicorn workers configured by `profile`.
+    """
+    from gunicorn.app.base import BaseApplication
+
+    class Application(BaseApplication):
+        def load_config(self):
+            options = {
+                "bind": profile.bind,
+                "workers": profile.workers,
+                "worker_class": "core.worker.ProfiledUvicornWorker",
+                "keepalive": profile.keepalive,
+                "max_requests": profile.max_requests,
+                "max_requests_jitter": profile.max_requests_jitter,
+                # let in-flight requests finish when a worker is recycled
+                "graceful_timeout": 30,
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from main import app
+            return app
+
+    Application().run()
+
+
+def main() -> None:
+    profile = build_profile()
+    apply_profile(profile)
+    print(profile.describe(), flush=True)
+    run(profile)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+# in-process metrics registry
+from typing import Any, Callable
+
+# name -> zero-argument callable returning a JSON-serializable snapshot
+_providers: dict[str, Callable[[], Any]] = {}
+
+
+def register_metrics(name: str, provider: Callable[[], Any]) -> None:
+    """
+    Registers a metrics provider under `name`. Re-registering replaces it.
+    """
+    _providers[name] = provider
+
+
+def collect_metrics() -> dict[str, Any]:
+    """
+    Returns a snapshot from every registered provider.
+    """
+    return {name: provider() for name, provider in _providers.items()}
@@ -0,0 +1,13 @@
+# gunicorn worker class for the launcher; gunicorn imports it by name in each worker
+import os
+from uvicorn_worker import UvicornWorker
+
+
+class ProfiledUvicornWorker(UvicornWorker):
+    """
+    Uvicorn worker using the loop and HTTP parser chosen by the launcher.
+    """
+    CONFIG_KWARGS = {
+        "loop": os.environ.get("WEB_LOOP", "auto"),
+        "http": os.environ.get("WEB_HTTP", "auto"),
+    }
@@ -1,5 +1,4 @@
 from fastapi import FastAPI
-from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 import os # for environment variables
 from contextlib import asynccontextmanager
@@ -8,7 +7,35 @@ import logging # for logging
 import pymongo.errors
 from api.routers.auth import router as auth_router
 from api.routers.tasks import router as tasks_router
-from api.dependencies.database import get_db
+from api.routers.lists import router as lists_router
+from api.routers.attachments import router as attachments_router
+from api.routers.tags import router as tags_router
+from api.routers.audit import router as audit_router
+from api.routers.imports import router as imports_router
+from api.routers.batch import router as batch_router
+from api.routers.metrics import router as metrics_router
+from api.routers.profiling import router as profiling_router
+from api.middleware.request_context import RequestContextMiddleware
+from api.dependencies.database import get_db, get_client, close_client
+from api.dependencies.repositories import get_account_purger
+from api.repositories import (
+    InMemoryAuditRepository,
+    InMemoryTaskRepository,
+    MongoAttachmentRepository,
+    MongoAuditRepository,
+    MongoBlobStore,
+    MongoIdempotencyRepository,
+    MongoImportJobRepository,
+    MongoTaskRepository,
+    MongoUserRepository,
+)
+from api.services.archive import Archiver
+from api.services.audit import audit_log
+from api.services.email import close_mail_service
+from api.services.profiling import loop_lag
+from api.services.task_cache import task_cache
+from api.services.watchdog import watchdog
+from core.config import settings
 from fastapi.middleware.cors import CORSMiddleware
 
 # Configure logging
@@ -38,20 +65,62 @@ db = None
 async def lifespan(app: FastAPI):
     # Startup: Connect to MongoDB
     global client, db
-    client = AsyncIOMotorClient(MONGODB_URI)
-    db = client[DATABASE_NAME]
+    if settings.REPOSITORY_BACKEND == "memory":
+        # in-memory repositories need no database connection
+        logger.info("Using in-memory repositories")
+        archiver = Archiver(InMemoryTaskRepository())
+        audit_sink = InMemoryAuditRepository()
+    else:
+        # shared with get_db, so requests reuse this client's connection pool
+        client = get_client()
+        db = client[DATABASE_NAME]
+        archiver = Archiver(MongoTaskRepository(db))
+        audit_sink = MongoAuditRepository(db, write="light")
+    purger = get_account_purger(db)
     try:
-        # Test connection
-        await client.server_info()
-        logger.info("Connected to MongoDB")
+        if client is not None:
+            # Test connection
+            await client.server_info()
+            logger.info("Connected to MongoDB")
+            await MongoTaskRepository(db).ensure_indexes()
+            await MongoUserRepository(db).ensure_indexes()
+            conflicts = await MongoUserRepository(db).normalize_emails()
+            if conflicts:
+                logger.warning("Emails of users %s differ only in case from other accounts; left as they are", conflicts)
+            await MongoIdempotencyRepository(db).ensure_indexes()
+            await MongoAttachmentRepository(db).ensure_indexes()
+            await MongoAuditRepository(db).ensure_indexes()
+            await MongoImportJobRepository(db).ensure_indexes()
+            if settings.ATTACHMENT_STORAGE == "mongo":
+                await MongoBlobStore(db, settings.ATTACHMENT_CHUNK_SIZE).ensure_indexes()
+        if settings.ARCHIVE_ENABLED:
+            archiver.start()
+        if settings.AUDIT_ENABLED:
+            audit_log.start(audit_sink)
+        if settings.PURGE_ENABLED:
+            purger.start()
+        if settings.LOOP_WATCHDOG_ENABLED:
+            # also serves /admin/profiling/loop-lag
+            watchdog.start()
+        elif settings.PROFILING_ENABLED:
+            loop_lag.start()
         yield
     except pymongo.errors.ConnectionError as e:
         logger.error(f"Failed to connect to MongoDB: {e}")
         raise
     finally:
-        # Shutdown: Close MongoDB connection
-        client.close()
-        logger.info("Disconnected from MongoDB")
+        await archiver.stop()
+        await purger.stop()
+        # before the client goes, so queued events still reach the database
+        await audit_log.stop()
+        await watchdog.stop()
+        await loop_lag.stop()
+        await close_mail_service()
+        await task_cache.close()
+        if client is not None:
+            # Shutdown: Close MongoDB connection
+            close_client()
+            logger.info("Disconnected from MongoDB")
 
 # Create FastAPI app
 app = FastAPI(
@@ -77,9 +146,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# exposes the matched route to repositories and services
+app.add_middleware(RequestContextMiddleware)
+
 # include routers
 app.include_router(auth_router)
 app.include_router(tasks_router)
+app.include_router(lists_router)
+app.include_router(attachments_router)
+app.include_router(tags_router)
+app.include_router(audit_router)
+app.include_router(imports_router)
+app.include_router(batch_router)
+app.include_router(metrics_router)
+app.include_router(profiling_router)
 
 @app.get("/", response_class=HTMLResponse, tags=["Home"])
 async def get_root():
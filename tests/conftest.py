@@ -2,7 +2,20 @@ import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
 from main import app
 from api.dependencies.database import get_db
+from api.utils.instrumentation import InstrumentedDatabase
 from mongomock_motor import AsyncMongoMockClient
+from mongomock.collection import BulkOperationBuilder
+
+
+def _drop_sort(method):
+    def wrapper(self, *args, sort=None, **kwargs):
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
+# pymongo >= 4.11 passes `sort` for UpdateOne/ReplaceOne in bulk_write, which mongomock does not accept yet
+BulkOperationBuilder.add_update = _drop_sort(BulkOperationBuilder.add_update)
+BulkOperationBuilder.add_replace = _drop_sort(BulkOperationBuilder.add_replace)
 
 # Create a mock MongoDB client for testing
 @pytest_asyncio.fixture(scope="function")
@@ -14,7 +27,8 @@ async def test_db():
 @pytest_asyncio.fixture(scope="function")
 async def client(test_db):
     async def override_get_db():
-        yield test_db
+        # counts commands per request, for the budgets in tests/test_budgets.py
+        yield InstrumentedDatabase(test_db)
 
     app.dependency_overrides[get_db] = override_get_db
     transport = ASGITransport(app=app)
@@ -0,0 +1,152 @@
+import asyncio
+import hashlib
+
+import pytest
+from httpx import AsyncClient
+
+from api.repositories import FileSystemBlobStore
+from api.services.attachments import store_upload
+from core.config import settings
+from tests.test_tasks import get_auth_headers
+
+pytestmark = pytest.mark.asyncio
+
+
+async def chunks(data: bytes, size: int = 7):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+async def upload(client: AsyncClient, task_id: str, headers: dict, content: bytes, filename: str = "notes.txt"):
+    files = {"file": (filename, content, "text/plain")}
+    return await client.post(f"/tasks/{task_id}/attachments", files=files, data={"comment": "x"}, headers=headers)
+
+
+async def test_upload_and_ranged_download(client: AsyncClient, monkeypatch):
+    """
+    Test that an attachment is stored in chunks and can be read back whole or by range.
+    """
+    monkeypatch.setattr(settings, "ATTACHMENT_CHUNK_SIZE", 10)
+    headers = await get_auth_headers(client, "attach@example.com", "ValidPassword1!")
+    task_id = (await client.post("/tasks", json={"title": "With file"}, headers=headers)).json()["id"]
+    content = bytes(range(256)) * 3
+
+    response = await upload(client, task_id, headers, content)
+    assert response.status_code == 201
+    attachment = response.json()
+    assert attachment["length"] == len(content)
+    assert attachment["sha256"] == hashlib.sha256(content).hexdigest()
+    assert attachment["filename"] == "notes.txt"
+    url = f"/tasks/{task_id}/attachments/{attachment['id']}"
+
+    whole = await client.get(url, headers=headers)
+    assert whole.status_code == 200
+    assert whole.content == content
+    assert whole.headers["etag"] == f'"{attachment["sha256"]}"'
+    assert whole.headers["accept-ranges"] == "bytes"
+
+    part = await client.get(url, headers={**headers, "Range": "bytes=15-44"})
+    assert part.status_code == 206
+    assert part.content == content[15:45]
+    assert part.headers["content-range"] == f"bytes 15-44/{len(content)}"
+    tail = await client.get(url, headers={**headers, "Range": "bytes=-5"})
+    assert tail.content == content[-5:]
+    beyond = await client.get(url, headers={**headers, "Range": f"bytes={len(content)}-"})
+    assert beyond.status_code == 416
+
+    listed = await client.get(f"/tasks/{task_id}/attachments", headers=headers)
+    assert [a["id"] for a in listed.json()] == [attachment["id"]]
+
+
+async def test_duplicate_content_is_stored_once(client: AsyncClient, test_db):
+    """
+    Test that identical uploads share one blob, kept until the last attachment is deleted.
+    """
+    headers = await get_auth_headers(client, "dedupe@example.com", "ValidPassword1!")
+    task_id = (await client.post("/tasks", json={"title": "Twice"}, headers=headers)).json()["id"]
+    first = (await upload(client, task_id, headers, b"same bytes", "a.txt")).json()
+    second = (await upload(client, task_id, headers, b"same bytes", "b.txt")).json()
+    assert first["sha256"] == second["sha256"]
+    assert await test_db["attachment_blobs"].count_documents({}) == 1
+    assert await test_db["attachment_chunks"].count_documents({}) == 1
+
+    assert (await client.delete(f"/tasks/{task_id}/attachments/{first['id']}", headers=headers)).status_code == 204
+    remaining = await client.get(f"/tasks/{task_id}/attachments/{second['id']}", headers=headers)
+    assert remaining.content == b"same bytes"
+    await client.delete(f"/tasks/{task_id}/attachments/{second['id']}", headers=headers)
+    assert await test_db["attachment_blobs"].count_documents({}) == 0
+    assert await test_db["attachment_chunks"].count_documents({}) == 0
+
+
+async def test_quota_is_enforced(client: AsyncClient, test_db, monkeypatch):
+    """
+    Test that uploads past the user's quota are rejected and deletes free it up.
+    """
+    monkeypatch.setattr(settings, "ATTACHMENT_QUOTA_BYTES", 100)
+    headers = await get_auth_headers(client, "quota@example.com", "ValidPassword1!")
+    task_id = (await client.post("/tasks", json={"title": "Quota"}, headers=headers)).json()["id"]
+
+    kept = (await upload(client, task_id, headers, b"x" * 60)).json()
+    assert (await upload(client, task_id, headers, b"y" * 60)).status_code == 413
+    assert await test_db["attachment_chunks"].count_documents({}) == 1
+
+    await client.delete(f"/tasks/{task_id}/attachments/{kept['id']}", headers=headers)
+    assert (await upload(client, task_id, headers, b"y" * 60)).status_code == 201
+
+
+async def test_attachments_follow_task_access(client: AsyncClient, test_db):
+    """
+    Test that attachments are only reachable through a task the user can see,
+    and are purged with the task.
+    """
+    owner = await get_auth_headers(client, "attachowner@example.com", "ValidPassword1!")
+    other = await get_auth_headers(client, "attachother@example.com", "ValidPassword1!")
+    task_id = (await client.post("/tasks", json={"title": "Private"}, headers=owner)).json()["id"]
+    attachment = (await upload(client, task_id, owner, b"secret")).json()
+    assert (await client.get(f"/tasks/{task_id}/attachments/{attachment['id']}", headers=other)).status_code == 404
+    assert (await upload(client, task_id, other, b"spam")).status_code == 404
+
+    await client.delete(f"/tasks/{task_id}", headers=owner)
+    assert await test_db["attachments"].count_documents({}) == 0
+    assert await test_db["attachment_blobs"].count_documents({}) == 0
+    user = await test_db["users"].find_one({"email": "attachowner@example.com"})
+    assert user["attachment_bytes"] == 0
+
+
+async def test_filesystem_store_dedupes_and_reads_ranges(tmp_path):
+    """
+    Test the local filesystem blob store used without MongoDB.
+    """
+    store = FileSystemBlobStore(str(tmp_path), chunk_size=4)
+    data = b"0123456789abcdef"
+    sha256, length = await store_upload(store, chunks(data), limit=100)
+    assert (sha256, length) == (hashlib.sha256(data).hexdigest(), len(data))
+    assert await store_upload(store, chunks(data, 3), limit=100) == (sha256, length)
+    assert list((tmp_path / "uploads").iterdir()) == []
+
+    assert b"".join([c async for c in store.read(sha256, 5, 11)]) == data[5:11]
+    await store.release(sha256)
+    assert b"".join([c async for c in store.read(sha256, 0, length)]) == data
+    await store.release(sha256)
+    assert [c async for c in store.read(sha256, 0, length)] == []
+
+
+async def test_filesystem_store_counts_concurrent_commits(tmp_path):
+    """
+    Test that identical uploads committed at once through separate stores each take a reference.
+    """
+    stores = [FileSystemBlobStore(str(tmp_path), chunk_size=4) for _ in range(8)]
+    data = b"same content"
+    sha256 = hashlib.sha256(data).hexdigest()
+    uploads = []
+    for store in stores:
+        upload_id = await store.begin()
+        await store.write_chunk(upload_id, 0, data)
+        uploads.append(upload_id)
+    await asyncio.gather(*(store.commit(upload_id, sha256, len(data)) for store, upload_id in zip(stores, uploads)))
+
+    for store in stores[1:]:
+        await store.release(sha256)
+    assert b"".join([c async for c in stores[0].read(sha256, 0, len(data))]) == data
+    await stores[0].release(sha256)
+    assert [c async for c in stores[0].read(sha256, 0, len(data))] == []
@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+from api.repositories import InMemoryAuditRepository, InMemoryStore, MongoAuditRepository
+from api.services.audit import AuditLog, audit_log
+from tests.test_tasks import get_auth_headers
+
+pytestmark = pytest.mark.asyncio
+
+
+class FlakySink(InMemoryAuditRepository):
+    def __init__(self):
+        super().__init__(InMemoryStore())
+        self.fail = False
+        self.batches = []
+
+    async def insert_many(self, events):
+        if self.fail:
+            raise RuntimeError("database unavailable")
+        self.batches.append(len(events))
+        return await super().insert_many(events)
+
+
+async def test_pipeline_batches_by_size_and_flushes_on_stop():
+    """
+    Test that full batches are written right away and the rest on shutdown.
+    """
+    sink = FlakySink()
+    log = AuditLog(capacity=100, batch_size=3, flush_interval=60)
+    log.start(sink)
+    for i in range(4):
+        log.record("task.create", "user1", task_id=str(i))
+        await asyncio.sleep(0.01)
+    assert sink.batches == [3]
+    await log.stop()
+    assert sink.batches == [3, 1]
+    events = await sink.list_for_user("user1", limit=10)
+    assert [e["task_id"] for e in events] == ["3", "2", "1", "0"]
+    assert [e["task_id"] for e in await sink.list_for_user("user1", limit=10, before=str(events[1]["_id"]))] == ["1", "0"]
+
+
+async def test_pipeline_drops_and_requeues():
+    """
+    Test the drop policies and that a failed batch is kept for the next flush.
+    """
+    oldest = AuditLog(capacity=2, batch_size=10, flush_interval=60)
+    newest = AuditLog(capacity=2, batch_size=10, flush_interval=60, drop_policy="newest")
+    for log in (oldest, newest):
+        for i in range(3):
+            log.record("auth.login", "user1", task_id=str(i))
+    assert [e["task_id"] for e in oldest.queue] == ["1", "2"]
+    assert [e["task_id"] for e in newest.queue] == ["0", "1"]
+    assert oldest.snapshot()["dropped"] == newest.snapshot()["dropped"] == 1
+
+    sink = FlakySink()
+    sink.fail = True
+    oldest.start(sink)
+    await oldest.flush()
+    assert len(oldest.queue) == 2 and oldest.failed_flushes == 1
+    sink.fail = False
+    await oldest.stop()
+    assert oldest.snapshot()["written"] == 2 and not oldest.queue
+
+
+class PartialSink(FlakySink):
+    """
+    Stores the events whose task_id is not in `transient` or `invalid`.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.transient = {"1"}
+        self.invalid = {"2"}
+
+    async def insert_many(self, events):
+        results = [None if e["task_id"] in self.transient else False if e["task_id"] in self.invalid else True for e in events]
+        await super().insert_many([e for e, result in zip(events, results) if result])
+        return results
+
+
+async def test_pipeline_requeues_only_transient_failures():
+    """
+    Test that after a partial write only the retryable events are retried, and rejected ones are dropped.
+    """
+    sink = PartialSink()
+    log = AuditLog(capacity=100, batch_size=10, flush_interval=60)
+    for i in range(4):
+        log.record("task.update", "user1", task_id=str(i))
+    log.start(sink)
+    await log.flush()
+    assert [e["task_id"] for e in log.queue] == ["1"]
+    assert log.snapshot()["rejected"] == 1 and log.snapshot()["written"] == 2
+
+    sink.transient = set()
+    await log.stop()
+    assert not log.queue and log.snapshot()["written"] == 3
+    assert sorted(e["task_id"] for e in await sink.list_for_user("user1", limit=10)) == ["0", "1", "3"]
+
+
+async def test_mongo_audit_retry_counts_stored_events(test_db):
+    """
+    Test that retrying a batch that was partly stored reports every event as stored.
+    """
+    log = AuditLog(capacity=10, batch_size=10, flush_interval=60)
+    for i in range(3):
+        log.record("task.update", "user1", task_id=str(i))
+    events = list(log.queue)
+    sink = MongoAuditRepository(test_db)
+    assert await sink.insert_many(events[:2]) == [True, True]
+    assert await sink.insert_many(events) == [True, True, True]
+    assert await test_db["audit_log"].count_documents({}) == 3
+
+
+async def test_audit_endpoint_pages_history(client: AsyncClient, test_db):
+    """
+    Test that task and auth events show up in the user's paginated history.
+    """
+    audit_log.start(MongoAuditRepository(test_db))
+    try:
+        headers = await get_auth_headers(client, "audited@example.com", "ValidPassword1!")
+        task_id = (await client.post("/tasks", json={"title": "Tracked"}, headers=headers)).json()["id"]
+        await client.put(f"/tasks/{task_id}", json={"title": "Tracked 2", "is_completed": True}, headers=headers)
+        await client.delete(f"/tasks/{task_id}", headers=headers)
+    finally:
+        await audit_log.stop()
+
+    first = (await client.get("/audit", params={"limit": 2}, headers=headers)).json()
+    assert [e["action"] for e in first["items"]] == ["task.delete", "task.update"]
+    assert first["items"][1]["fields"] == ["is_completed", "title"]
+    rest = (await client.get("/audit", params={"before": first["next_before"]}, headers=headers)).json()
+    assert [e["action"] for e in rest["items"]] == ["task.create", "auth.login", "auth.signup"]
+    assert rest["next_before"] is None
+
+    only = (await client.get("/audit", params={"action": "task.create"}, headers=headers)).json()
+    assert [e["task_id"] for e in only["items"]] == [task_id]
@@ -3,6 +3,7 @@ from httpx import AsyncClient
 from unittest.mock import patch
 
 from api.dependencies.auth import create_access_token
+from api.repositories import MongoUserRepository
 
 pytestmark = pytest.mark.asyncio
 
@@ -97,8 +98,8 @@ async def test_login_user_not_found(client: AsyncClient):
     assert response.status_code == 401
     assert "Invalid credentials" in response.text
 
-@patch("fastapi_mail.FastMail.send_message")
-async def test_forgot_password_success(mock_send_message, client: AsyncClient):
+@patch("api.services.email.MailService.send")
+async def test_forgot_password_success(mock_send, client: AsyncClient):
     """
     Test successful password reset request.
     """
@@ -117,7 +118,10 @@ async def test_forgot_password_success(mock_send_message, client: AsyncClient):
 
     assert response.status_code == 200
     assert response.json() == {"message": "Password reset email sent"}
-    mock_send_message.assert_called_once()
+    mock_send.assert_called_once()
+    mail = mock_send.call_args.args[0]
+    assert mail.to == "forgotpass@example.com"
+    assert "/reset-password?token=" in mail.context["reset_url"]
 
 async def test_forgot_password_user_not_found(client: AsyncClient):
     """
@@ -209,3 +213,86 @@ async def test_reset_password_mismatch(client: AsyncClient):
     )
     assert response.status_code == 422  # Unprocessable Entity for validation error
     assert "Passwords do not match" in response.text
+
+async def test_delete_account_purges_data(client: AsyncClient, test_db, monkeypatch):
+    """
+    Test that a deleted account is locked out at once and its data purged in batches.
+    """
+    from core.config import settings
+    from tests.test_tasks import get_auth_headers
+
+    monkeypatch.setattr(settings, "PURGE_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "PURGE_BATCH_PAUSE_SECONDS", 0)
+    headers = await get_auth_headers(client, "leaving@example.com", "ValidPassword1!")
+    other = await get_auth_headers(client, "staying@example.com", "ValidPassword1!")
+    task_ids = [
+        (await client.post("/tasks", json={"title": f"Task {i}"}, headers=headers)).json()["id"] for i in range(5)
+    ]
+    await client.post("/tasks", json={"title": "Not mine"}, headers=other)
+    files = {"file": ("notes.txt", b"secret notes", "text/plain")}
+    await client.post(f"/tasks/{task_ids[0]}/attachments", files=files, headers=headers)
+
+    response = await client.delete("/auth/me", headers=headers)
+    assert response.status_code == 204
+    assert (await client.get("/tasks", headers=headers)).status_code == 401
+    login = await client.post("/auth/login", json={"email": "leaving@example.com", "password": "ValidPassword1!"})
+    assert login.status_code == 401
+
+    # the purge ran in the background before the response returned
+    assert await test_db["tasks"].count_documents({}) == 1
+    assert await test_db["attachments"].count_documents({}) == 0
+    assert await test_db["attachment_blobs"].count_documents({}) == 0
+    assert await test_db["users"].count_documents({"email": "leaving@example.com"}) == 0
+    assert len((await client.get("/tasks", headers=other)).json()) == 1
+
+    again = await client.post("/auth/signup", json={
+        "email": "leaving@example.com", "password": "ValidPassword1!", "username": "leaving"
+    })
+    assert again.status_code == 201
+
+
+async def test_interrupted_purge_is_resumed(test_db, monkeypatch):
+    """
+    Test that the sweep finishes a purge that stopped making progress.
+    """
+    from api.dependencies.repositories import get_account_purger
+    from api.repositories import MongoTaskRepository, MongoUserRepository
+    from core.config import settings
+
+    monkeypatch.setattr(settings, "PURGE_BATCH_PAUSE_SECONDS", 0)
+    users, tasks = MongoUserRepository(test_db), MongoTaskRepository(test_db)
+    user = await users.create({"email": "gone@example.com", "username": "gone", "password": "x"})
+    user_id = str(user["_id"])
+    for i in range(3):
+        await tasks.create(user_id, {"title": f"Task {i}"})
+    assert await users.deactivate(user_id) is True
+    assert await users.deactivate(user_id) is False
+
+    purger = get_account_purger(test_db)
+    # progress is fresh, so another worker may still be on it
+    assert await purger.run_once() == 0
+    monkeypatch.setattr(settings, "PURGE_STALE_SECONDS", -60)
+    assert await purger.run_once() == 1
+    assert await tasks.list_for_user(user_id) == []
+    assert await users.get_by_id(user_id) is None
+
+
+async def test_mixed_case_emails_stored_before_normalization(client: AsyncClient, test_db):
+    """
+    Test that accounts stored with a mixed-case email can log in once emails are normalized at startup.
+    """
+    users = MongoUserRepository(test_db)
+    await users.ensure_indexes()
+    for email, username in (("legacy@example.com", "legacy"), ("taken@example.com", "taken"), ("other@example.com", "other")):
+        await client.post("/auth/signup", json={"email": email, "password": "ValidPassword1!", "username": username})
+    await test_db["users"].update_one({"username": "legacy"}, {"$set": {"email": "Legacy.User@Example.com"}})
+    await test_db["users"].update_one({"username": "other"}, {"$set": {"email": "TAKEN@example.com"}})
+    response = await client.post("/auth/login", json={"email": "Legacy.User@Example.com", "password": "ValidPassword1!"})
+    assert response.status_code == 401
+
+    other = await test_db["users"].find_one({"username": "other"})
+    assert await users.normalize_emails() == [str(other["_id"])]
+    response = await client.post("/auth/login", json={"email": "Legacy.User@Example.com", "password": "ValidPassword1!"})
+    assert response.status_code == 200
+    assert (await test_db["users"].find_one({"username": "other"}))["email"] == "TAKEN@example.com"
+    assert await users.normalize_emails() == [str(other["_id"])]
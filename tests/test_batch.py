@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+from api.utils.instrumentation import measure
+from api.utils.loader import BatchLoader
+from tests.test_tasks import get_auth_headers
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_batch_runs_screen_reads_in_one_request(client: AsyncClient):
+    """
+    Test that a batch answers each operation like its own endpoint, merging task lookups into one query.
+    """
+    headers = await get_auth_headers(client, "batch@example.com", "ValidPassword1!")
+    list_id = (await client.post("/lists", json={"name": "Home"}, headers=headers)).json()["id"]
+    task_ids = [
+        (await client.post("/tasks", json={"title": f"Task {i}", "tags": ["home"]}, headers=headers)).json()["id"]
+        for i in range(3)
+    ]
+
+    operations = [
+        {"id": "me", "op": "me"},
+        {"id": "tags", "op": "tags"},
+        {"id": "lists", "op": "lists"},
+        {"id": "home", "op": "list", "list_id": list_id},
+        *({"id": f"task{i}", "op": "task", "task_id": task_id} for i, task_id in enumerate(task_ids)),
+        {"id": "gone", "op": "task", "task_id": "0" * 24},
+        {"id": "all", "op": "tasks", "order": "position"},
+        {"id": "buckets", "op": "buckets", "tz": "Europe/Paris"},
+    ]
+    with measure() as cost:
+        response = await client.post("/batch", json={"operations": operations}, headers=headers)
+    assert response.status_code == 200
+    results = {result["id"]: result for result in response.json()["results"]}
+    assert list(results) == [operation["id"] for operation in operations]
+
+    assert results["me"]["data"]["email"] == "batch@example.com"
+    assert results["tags"]["data"] == [{"tag": "home", "count": 3}]
+    assert [task_list["name"] for task_list in results["lists"]["data"]] == ["Home"]
+    assert results["home"]["data"]["id"] == list_id
+    assert [results[f"task{i}"]["data"]["id"] for i in range(3)] == task_ids
+    assert results["gone"]["status"] == 404
+    assert results["gone"]["detail"] == "Task not found"
+    assert [task["title"] for task in results["all"]["data"]] == ["Task 0", "Task 1", "Task 2"]
+    assert results["buckets"]["data"] == {"overdue": 0, "today": 0, "upcoming": 0}
+
+    # one principal lookup, and one query for the four task lookups and one for the two list lookups;
+    # the other task queries are the task list and the agenda's two range scans
+    assert cost.commands["users.find_one"] == 1
+    assert cost.commands["task_lists.find"] == 1
+    assert cost.commands["tasks.find"] == 4
+
+    response = await client.post("/batch", json={"operations": [{"id": "a", "op": "me"}, {"id": "a", "op": "tags"}]}, headers=headers)
+    assert response.status_code == 422
+    response = await client.post("/batch", json={"operations": [{"id": "a", "op": "drop_database"}]}, headers=headers)
+    assert response.status_code == 422
+
+
+async def test_batch_loader_merges_concurrent_loads():
+    """
+    Test that loads made together are fetched in one call, each key once.
+    """
+    calls = []
+
+    async def fetch_many(keys):
+        calls.append(keys)
+        return {key: key * 2 for key in keys if key != 3}
+
+    loader = BatchLoader(fetch_many)
+    assert await asyncio.gather(loader.load(1), loader.load(2), loader.load(1), loader.load(3)) == [2, 4, 2, None]
+    assert calls == [[1, 2, 3]]
+    assert await loader.load(2) == 4
+    assert await loader.load(4) == 8
+    assert calls == [[1, 2, 3], [4]]
@@ -0,0 +1,132 @@
+import itertools
+import tracemalloc
+
+import pytest
+from fastapi.routing import APIRoute
+from httpx import AsyncClient
+
+from api.utils.instrumentation import budget_of, measure
+from main import app
+from tests.test_tasks import get_auth_headers
+
+_ids = itertools.count()
+
+
+async def _signup(client: AsyncClient, headers: dict):
+    n = next(_ids)
+    return lambda: client.post("/auth/signup", json={
+        "email": f"budget{n}-{next(_ids)}@example.com", "password": "ValidPassword1!", "username": f"budget{next(_ids)}"
+    })
+
+
+async def _login(client: AsyncClient, headers: dict):
+    return lambda: client.post("/auth/login", json={"email": "budget@example.com", "password": "ValidPassword1!"})
+
+
+async def _list_tasks(client: AsyncClient, headers: dict):
+    for i in range(20):
+        await client.post("/tasks", json={"title": f"Task {i}", "tags": ["work"]}, headers=headers)
+    return lambda: client.get("/tasks", headers=headers)
+
+
+async def _agenda(client: AsyncClient, headers: dict):
+    for i in range(20):
+        await client.post("/tasks", json={"title": f"Due {i}", "due_date": f"2030-01-{1 + i % 7:02d}T12:00:00Z"}, headers=headers)
+    await client.post("/tasks", json={"title": "Daily", "due_date": "2029-12-01T08:00:00Z", "recurrence": "FREQ=DAILY"}, headers=headers)
+    return lambda: client.get("/tasks/agenda", params={"from": "2030-01-01", "to": "2030-01-07"}, headers=headers)
+
+
+async def _batch(client: AsyncClient, headers: dict):
+    list_id = (await client.post("/lists", json={"name": "Budget"}, headers=headers)).json()["id"]
+    task_ids = [(await client.post("/tasks", json={"title": f"Task {i}"}, headers=headers)).json()["id"] for i in range(3)]
+    operations = [
+        {"id": "me", "op": "me"},
+        {"id": "tags", "op": "tags"},
+        {"id": "lists", "op": "lists"},
+        {"id": "list", "op": "list", "list_id": list_id},
+        *({"id": task_id, "op": "task", "task_id": task_id} for task_id in task_ids),
+        {"id": "tasks", "op": "tasks"},
+    ]
+    return lambda: client.post("/batch", json={"operations": operations}, headers=headers)
+
+
+async def _create_task(client: AsyncClient, headers: dict):
+    return lambda: client.post("/tasks", json={"title": "New task", "tags": ["home"]}, headers=headers)
+
+
+async def _get_task(client: AsyncClient, headers: dict):
+    task_id = (await client.post("/tasks", json={"title": "Read me"}, headers=headers)).json()["id"]
+    return lambda: client.get(f"/tasks/{task_id}", headers=headers)
+
+
+async def _update_task(client: AsyncClient, headers: dict):
+    task_id = (await client.post("/tasks", json={"title": "Edit me"}, headers=headers)).json()["id"]
+    return lambda: client.put(f"/tasks/{task_id}", json={"title": "Edited", "is_completed": True}, headers=headers)
+
+
+async def _delete_task(client: AsyncClient, headers: dict):
+    task_ids = [
+        (await client.post("/tasks", json={"title": f"Delete me {i}"}, headers=headers)).json()["id"]
+        for i in range(2)
+    ]
+    return lambda: client.delete(f"/tasks/{task_ids.pop()}", headers=headers)
+
+
+# one representative request per budgeted endpoint, keyed like current_route()
+SCENARIOS = {
+    "POST /auth/signup": _signup,
+    "POST /auth/login": _login,
+    "GET /tasks": _list_tasks,
+    "GET /tasks/agenda": _agenda,
+    "POST /batch": _batch,
+    "POST /tasks": _create_task,
+    "GET /tasks/{task_id}": _get_task,
+    "PUT /tasks/{task_id}": _update_task,
+    "DELETE /tasks/{task_id}": _delete_task,
+}
+
+
+def _budgeted_routes() -> dict:
+    return {
+        f"{method} {route.path}": budget_of(route.endpoint)
+        for route in app.routes
+        if isinstance(route, APIRoute) and budget_of(route.endpoint) is not None
+        for method in route.methods
+    }
+
+
+@pytest.fixture(scope="module")
+def tracing():
+    tracemalloc.start()
+    yield
+    tracemalloc.stop()
+
+
+def test_every_budget_has_a_scenario():
+    """
+    Test that every declared budget is exercised below, and every scenario has a budget.
+    """
+    assert set(_budgeted_routes()) == set(SCENARIOS)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("route", sorted(SCENARIOS))
+async def test_endpoint_within_budget(route: str, client: AsyncClient, tracing):
+    """
+    Test that a request stays within its endpoint's command and allocation budget.
+    """
+    budget = _budgeted_routes()[route]
+    headers = await get_auth_headers(client, "budget@example.com", "ValidPassword1!")
+    request = await SCENARIOS[route](client, headers)
+    # the first call warms up caches and lazy imports
+    assert (await request()).status_code < 400
+    with measure() as cost:
+        response = await request()
+    assert response.status_code < 400
+
+    assert cost.total_commands <= budget.commands, (
+        f"{route} ran {cost.total_commands} database commands, budget {budget.commands}: {dict(cost.commands)}"
+    )
+    assert cost.peak_bytes <= budget.alloc_kib * 1024, (
+        f"{route} allocated up to {cost.peak_bytes // 1024} KiB, budget {budget.alloc_kib} KiB"
+    )
@@ -0,0 +1,123 @@
+import json
+
+import pytest
+from httpx import AsyncClient
+
+import api.services.imports as imports
+from core.config import settings
+from tests.test_tasks import get_auth_headers
+
+pytestmark = pytest.mark.asyncio
+
+
+async def start(client: AsyncClient, headers: dict, content: bytes, filename: str, **params):
+    files = {"file": (filename, content, "application/octet-stream")}
+    return await client.post("/imports", files=files, params=params, headers=headers)
+
+
+async def test_csv_import_reports_row_errors(client: AsyncClient, monkeypatch):
+    """
+    Test that a CSV file is imported in batches, with invalid rows skipped and reported.
+    """
+    monkeypatch.setattr(settings, "ATTACHMENT_CHUNK_SIZE", 7)
+    monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 2)
+    headers = await get_auth_headers(client, "import@example.com", "ValidPassword1!")
+    await client.post("/tasks", json={"title": "Existing"}, headers=headers)
+    content = (
+        "﻿Title,Notes,Labels,Done,Ignored\n"
+        'Buy milk,"two\nbottles",shop; errand,yes,?\n'
+        "ab,too short,,,\n"
+        "\n"
+        'Call "Bob",,work,no,\n'
+        "Plan trip,,\"travel,work\",,\n"
+    ).encode()
+
+    response = await start(client, headers, content, "export.csv")
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+
+    job = (await client.get(f"/imports/{job_id}", headers=headers)).json()
+    assert job["status"] == "completed"
+    assert (job["rows"], job["imported"], job["failed"]) == (4, 3, 1)
+    errors = (await client.get(f"/imports/{job_id}/errors", headers=headers)).json()
+    assert [e["row"] for e in errors] == [2]
+    assert "title" in errors[0]["message"]
+
+    listed = (await client.get("/tasks", params={"order": "position"}, headers=headers)).json()
+    titles = [t["title"] for t in listed]
+    assert titles == ["Existing", "Buy milk", 'Call "Bob"', "Plan trip"]
+    milk = listed[1]
+    assert milk["description"] == "two\nbottles"
+    assert milk["tags"] == ["shop", "errand"] and milk["is_completed"] is True
+    counts = {c["tag"]: c["count"] for c in (await client.get("/tags", headers=headers)).json()}
+    assert counts == {"work": 2, "shop": 1, "errand": 1, "travel": 1}
+
+
+async def test_json_imports_and_format_errors(client: AsyncClient, monkeypatch):
+    """
+    Test NDJSON and Todoist-style JSON parsing across chunk boundaries, and a malformed file.
+    """
+    monkeypatch.setattr(settings, "ATTACHMENT_CHUNK_SIZE", 5)
+    headers = await get_auth_headers(client, "importjson@example.com", "ValidPassword1!")
+
+    ndjson = b'{"title": "From ndjson", "tags": ["a"]}\n\nnot json\n{"title": "Caf\xc3\xa9 run"}'
+    job = (await start(client, headers, ndjson, "tasks.jsonl")).json()
+    job = (await client.get(f"/imports/{job['id']}", headers=headers)).json()
+    assert (job["status"], job["imported"], job["failed"]) == ("completed", 2, 1)
+
+    export = json.dumps({
+        "projects": [{"id": "1", "name": "Inbox"}],
+        "items": [
+            {"content": "Todoist task", "due": {"date": "2025-03-01"}, "labels": ["Home"], "checked": 1},
+            {"content": "Another one", "description": "with notes", "priority": 4},
+        ],
+        "version": 12345,
+    }).encode()
+    job = (await start(client, headers, export, "backup.json")).json()
+    job = (await client.get(f"/imports/{job['id']}", headers=headers)).json()
+    assert (job["status"], job["imported"], job["failed"]) == ("completed", 2, 0)
+    titles = {t["title"]: t for t in (await client.get("/tasks", headers=headers)).json()}
+    assert titles["Todoist task"]["tags"] == ["home"] and titles["Todoist task"]["is_completed"] is True
+    assert titles["Todoist task"]["due_date"].startswith("2025-03-01")
+
+    broken = (await start(client, headers, b'[{"title": "Fine task"}, {"title": ', "broken", format="todoist")).json()
+    broken = (await client.get(f"/imports/{broken['id']}", headers=headers)).json()
+    assert broken["status"] == "failed" and "Invalid JSON" in broken["detail"]
+
+    unknown = await start(client, headers, b"x", "tasks.txt")
+    assert unknown.status_code == 400
+
+
+async def test_interrupted_import_resumes_without_duplicates(client: AsyncClient, monkeypatch):
+    """
+    Test that resuming a failed import continues from its checkpoint and skips rows already written.
+    """
+    monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 2)
+    write_batch, calls = imports._write_batch, []
+
+    async def crash_once(*args):
+        result = await write_batch(*args)
+        calls.append(1)
+        if len(calls) == 2:
+            # written, but the checkpoint is never saved
+            raise RuntimeError("worker died")
+        return result
+
+    monkeypatch.setattr(imports, "_write_batch", crash_once)
+    headers = await get_auth_headers(client, "resume@example.com", "ValidPassword1!")
+    content = "\n".join(json.dumps({"title": f"Task {i}"}) for i in range(5)).encode()
+    job_id = (await start(client, headers, content, "tasks.ndjson")).json()["id"]
+
+    job = (await client.get(f"/imports/{job_id}", headers=headers)).json()
+    assert (job["status"], job["rows"], job["imported"]) == ("failed", 2, 2)
+    assert len((await client.get("/tasks", headers=headers)).json()) == 4
+
+    resumed = await client.post(f"/imports/{job_id}/resume", headers=headers)
+    assert resumed.status_code == 202
+    job = (await client.get(f"/imports/{job_id}", headers=headers)).json()
+    assert (job["status"], job["rows"], job["imported"]) == ("completed", 5, 5)
+    titles = [t["title"] for t in (await client.get("/tasks", headers=headers)).json()]
+    assert sorted(titles) == [f"Task {i}" for i in range(5)]
+
+    assert (await client.post(f"/imports/{job_id}/resume", headers=headers)).status_code == 409
+    assert (await client.get(f"/imports/{'0' * 24}", headers=headers)).status_code == 404
@@ -0,0 +1,55 @@
+from core.config import settings
+from core.launcher import apply_profile, build_profile
+
+
+def test_profile_one_worker_per_core(monkeypatch):
+    """
+    Test that workers follow the cores and split the connection budget.
+    """
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", None)
+    monkeypatch.setattr(settings, "MONGODB_MAX_CONNECTIONS", 200)
+    profile = build_profile(cores=8)
+    assert profile.workers == 8
+    assert profile.mongo_pool_size == 25
+    assert profile.hash_threads == 1
+
+
+def test_profile_limited_by_connection_budget(monkeypatch):
+    """
+    Test that a small connection budget reduces workers instead of starving pools.
+    """
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", None)
+    monkeypatch.setattr(settings, "MONGODB_MAX_CONNECTIONS", 20)
+    profile = build_profile(cores=16)
+    assert profile.workers == 4
+    assert profile.mongo_pool_size == 5
+    assert profile.hash_threads == 4
+
+
+def test_profile_respects_web_concurrency(monkeypatch):
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 2)
+    monkeypatch.setattr(settings, "MONGODB_MAX_CONNECTIONS", 200)
+    profile = build_profile(cores=8)
+    assert profile.workers == 2
+    assert profile.mongo_pool_size == 100
+    assert profile.hash_threads == 4
+    assert "2 workers" in profile.describe()
+
+
+def test_several_workers_turn_off_a_per_worker_task_cache(monkeypatch):
+    """
+    Test that the task cache stays on with several workers only when they share Redis.
+    """
+    for name in ("MONGODB_MAX_POOL_SIZE", "PASSWORD_HASH_THREADS", "WEB_LOOP", "WEB_HTTP", "TASK_CACHE_ENABLED"):
+        # restored by monkeypatch afterwards
+        monkeypatch.setattr(settings, name, getattr(settings, name))
+        monkeypatch.setenv(name, "")
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 2)
+
+    monkeypatch.setattr(settings, "TASK_CACHE_SHARED", "redis")
+    apply_profile(build_profile(cores=8))
+    assert settings.TASK_CACHE_ENABLED
+
+    monkeypatch.setattr(settings, "TASK_CACHE_SHARED", "local")
+    apply_profile(build_profile(cores=8))
+    assert not settings.TASK_CACHE_ENABLED
@@ -0,0 +1,134 @@
+import pytest
+from bson import ObjectId
+from httpx import AsyncClient
+
+from tests.test_tasks import get_auth_headers
+
+pytestmark = pytest.mark.asyncio
+
+
+async def user_id(client: AsyncClient, headers: dict) -> str:
+    response = await client.post("/tasks", json={"title": "Probe"}, headers=headers)
+    return response.json()["user_id"]
+
+
+async def test_shared_list_roles(client: AsyncClient):
+    """
+    Test that members see a list's tasks according to their role.
+    """
+    owner = await get_auth_headers(client, "listowner@example.com", "ValidPassword1!")
+    editor = await get_auth_headers(client, "listeditor@example.com", "ValidPassword1!")
+    viewer = await get_auth_headers(client, "listviewer@example.com", "ValidPassword1!")
+
+    response = await client.post("/lists", json={"name": "Team"}, headers=owner)
+    assert response.status_code == 201
+    list_id = response.json()["id"]
+    await client.put(f"/lists/{list_id}/members", json={"email": "listeditor@example.com", "role": "editor"}, headers=owner)
+    response = await client.put(f"/lists/{list_id}/members", json={"email": "listviewer@example.com"}, headers=owner)
+    assert sorted(response.json()["members"].values()) == ["editor", "owner", "viewer"]
+
+    shared = await client.post("/tasks", json={"title": "Shared", "list_id": list_id}, headers=editor)
+    assert shared.status_code == 201
+    task_id = shared.json()["id"]
+    denied = await client.post("/tasks", json={"title": "Nope", "list_id": list_id}, headers=viewer)
+    assert denied.status_code == 403
+
+    assert [t["title"] for t in (await client.get(f"/lists/{list_id}/tasks", headers=viewer)).json()] == ["Shared"]
+    assert "Shared" in [t["title"] for t in (await client.get("/tasks", headers=owner)).json()]
+    assert (await client.get(f"/tasks/{task_id}", headers=viewer)).status_code == 200
+    assert (await client.put(f"/tasks/{task_id}", json={"title": "Viewer edit"}, headers=viewer)).status_code == 404
+    updated = await client.put(f"/tasks/{task_id}", json={"title": "Owner edit"}, headers=owner)
+    assert updated.json()["title"] == "Owner edit"
+
+    assert [l["name"] for l in (await client.get("/lists", headers=viewer)).json()] == ["Team"]
+
+
+async def test_removed_member_loses_access(client: AsyncClient):
+    """
+    Test that removing a member revokes access to the list's tasks.
+    """
+    owner = await get_auth_headers(client, "revokeowner@example.com", "ValidPassword1!")
+    member = await get_auth_headers(client, "revokemember@example.com", "ValidPassword1!")
+    member_id = await user_id(client, member)
+    list_id = (await client.post("/lists", json={"name": "Temp"}, headers=owner)).json()["id"]
+    await client.put(f"/lists/{list_id}/members", json={"email": "revokemember@example.com"}, headers=owner)
+    task_id = (await client.post("/tasks", json={"title": "Secret", "list_id": list_id}, headers=owner)).json()["id"]
+    assert (await client.get(f"/tasks/{task_id}", headers=member)).status_code == 200
+
+    assert (await client.delete(f"/lists/{list_id}/members/{member_id}", headers=owner)).status_code == 204
+    assert (await client.get(f"/tasks/{task_id}", headers=member)).status_code == 404
+    assert (await client.get(f"/lists/{list_id}/tasks", headers=member)).status_code == 404
+
+    assert (await client.delete(f"/lists/{list_id}", headers=member)).status_code == 404
+    assert (await client.delete(f"/lists/{list_id}", headers=owner)).status_code == 204
+    task = (await client.get(f"/tasks/{task_id}", headers=owner)).json()
+    assert task["list_id"] is None
+    assert (await client.get("/lists", headers=owner)).json() == []
+
+
+async def test_editor_deletes_and_completes_shared_subtree(client: AsyncClient):
+    """
+    Test that an editor's changes to a shared parent apply to the owner's whole subtree.
+    """
+    owner = await get_auth_headers(client, "treeowner@example.com", "ValidPassword1!")
+    editor = await get_auth_headers(client, "treeeditor@example.com", "ValidPassword1!")
+    list_id = (await client.post("/lists", json={"name": "Tree"}, headers=owner)).json()["id"]
+    await client.put(f"/lists/{list_id}/members", json={"email": "treeeditor@example.com", "role": "editor"}, headers=owner)
+    project = (await client.post("/tasks", json={"title": "Project", "list_id": list_id}, headers=owner)).json()
+    step = (await client.post("/tasks", json={"title": "Step", "list_id": list_id, "parent_id": project["id"]}, headers=owner)).json()
+    child = (await client.post("/tasks", json={"title": "Child", "parent_id": step["id"], "tags": ["tree"]}, headers=owner)).json()
+
+    assert (await client.put(f"/tasks/{step['id']}", json={"is_completed": True}, headers=editor)).status_code == 200
+    project = (await client.get(f"/tasks/{project['id']}", headers=owner)).json()
+    assert (project["subtasks_total"], project["subtasks_completed"]) == (2, 1)
+
+    assert (await client.delete(f"/tasks/{step['id']}", headers=editor)).status_code == 204
+    assert (await client.get(f"/tasks/{child['id']}", headers=owner)).status_code == 404
+    project = (await client.get(f"/tasks/{project['id']}", headers=owner)).json()
+    assert (project["subtasks_total"], project["subtasks_completed"]) == (0, 0)
+    assert (await client.get("/tags", headers=owner)).json() == []
+
+
+async def test_list_tasks_checked_against_list_document(client: AsyncClient, test_db):
+    """
+    Test that list tasks are authorized from the list itself, not only the member's access index.
+    """
+    owner = await get_auth_headers(client, "docowner@example.com", "ValidPassword1!")
+    member = await get_auth_headers(client, "docmember@example.com", "ValidPassword1!")
+    member_id = await user_id(client, member)
+    list_id = (await client.post("/lists", json={"name": "Doc"}, headers=owner)).json()["id"]
+    await client.put(f"/lists/{list_id}/members", json={"email": "docmember@example.com", "role": "editor"}, headers=owner)
+    task_id = (await client.post("/tasks", json={"title": "Shared", "list_id": list_id}, headers=owner)).json()["id"]
+
+    # downgrades reach the index before the response
+    await client.put(f"/lists/{list_id}/members", json={"email": "docmember@example.com", "role": "viewer"}, headers=owner)
+    assert (await client.put(f"/tasks/{task_id}", json={"title": "Edit"}, headers=member)).status_code == 404
+
+    # a member whose index was never cleaned up
+    await test_db["task_lists"].update_one({"_id": ObjectId(list_id)}, {"$unset": {f"members.{member_id}": ""}})
+    assert (await client.get(f"/lists/{list_id}/tasks", headers=member)).status_code == 404
+
+
+async def test_account_purge_dissolves_and_leaves_lists(client: AsyncClient, monkeypatch):
+    """
+    Test that purging an account dissolves the lists it owned and removes it from the others.
+    """
+    from core.config import settings
+
+    monkeypatch.setattr(settings, "PURGE_BATCH_SIZE", 1)
+    monkeypatch.setattr(settings, "PURGE_BATCH_PAUSE_SECONDS", 0)
+    leaving = await get_auth_headers(client, "purgedowner@example.com", "ValidPassword1!")
+    staying = await get_auth_headers(client, "purgedpeer@example.com", "ValidPassword1!")
+    leaving_id = await user_id(client, leaving)
+    owned = (await client.post("/lists", json={"name": "Owned"}, headers=leaving)).json()["id"]
+    await client.put(f"/lists/{owned}/members", json={"email": "purgedpeer@example.com", "role": "editor"}, headers=leaving)
+    joined = (await client.post("/lists", json={"name": "Joined"}, headers=staying)).json()["id"]
+    await client.put(f"/lists/{joined}/members", json={"email": "purgedowner@example.com", "role": "editor"}, headers=staying)
+    kept = (await client.post("/tasks", json={"title": "Kept", "list_id": owned}, headers=staying)).json()["id"]
+
+    assert (await client.delete("/auth/me", headers=leaving)).status_code == 204
+
+    assert [l["name"] for l in (await client.get("/lists", headers=staying)).json()] == ["Joined"]
+    assert leaving_id not in (await client.get(f"/lists/{joined}", headers=staying)).json()["members"]
+    task = (await client.get(f"/tasks/{kept}", headers=staying)).json()
+    assert task["list_id"] is None
@@ -0,0 +1,129 @@
+import asyncio
+import time
+
+import pytest
+from httpx import AsyncClient
+
+from api.services.profiling import LoopLagMonitor
+from core.config import settings
+from tests.test_tasks import get_auth_headers
+
+pytestmark = pytest.mark.asyncio
+
+
+async def admin_headers(client: AsyncClient, test_db, email: str) -> dict:
+    headers = await get_auth_headers(client, email, "ValidPassword1!")
+    await test_db["users"].update_one({"email": email}, {"$set": {"is_admin": True}})
+    return headers
+
+
+async def test_profiling_hidden_when_disabled(client: AsyncClient, test_db, monkeypatch):
+    """
+    Test that the profiling endpoints do not exist unless enabled.
+    """
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", False)
+    headers = await admin_headers(client, test_db, "admin1@example.com")
+    response = await client.get("/admin/profiling/loop-lag", headers=headers)
+    assert response.status_code == 404
+
+
+async def test_profiling_requires_admin(client: AsyncClient, monkeypatch):
+    """
+    Test that regular users cannot profile the worker.
+    """
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    headers = await get_auth_headers(client, "notadmin@example.com", "ValidPassword1!")
+    response = await client.post("/admin/profiling/cpu", params={"seconds": 0.05}, headers=headers)
+    assert response.status_code == 403
+
+
+async def test_cpu_profile_returns_folded_stacks(client: AsyncClient, test_db, monkeypatch):
+    """
+    Test that a wall-clock profile returns flamegraph-ready collapsed stacks.
+    """
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    headers = await admin_headers(client, test_db, "admin2@example.com")
+    response = await client.post(
+        "/admin/profiling/cpu", params={"seconds": 0.2, "interval_ms": 5}, headers=headers
+    )
+    assert response.status_code == 200
+    lines = response.text.strip().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert ";" in stack
+    assert int(count) > 0
+
+
+async def test_allocation_snapshot(client: AsyncClient, test_db, monkeypatch):
+    """
+    Test that an allocation snapshot lists source locations.
+    """
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    headers = await admin_headers(client, test_db, "admin3@example.com")
+    response = await client.post(
+        "/admin/profiling/allocations", params={"seconds": 0.05, "top": 5}, headers=headers
+    )
+    assert response.status_code == 200
+    assert isinstance(response.json(), list)
+
+
+async def test_loop_lag_monitor_detects_blocking():
+    """
+    Test that blocking the loop shows up as lag.
+    """
+    monitor = LoopLagMonitor(interval=0.01)
+    monitor.start()
+    await asyncio.sleep(0.05)
+    time.sleep(0.1)  # block the loop
+    await asyncio.sleep(0.03)
+    await monitor.stop()
+
+    snapshot = monitor.snapshot()
+    assert snapshot["samples"] > 0
+    assert snapshot["max_ms"] >= 50
+
+
+async def test_watchdog_reports_blocking_route(client: AsyncClient):
+    """
+    Test that a handler blocking the loop is logged against its route with the blocking stack.
+    """
+    from fastapi import APIRouter
+    from api.services.watchdog import LoopWatchdog
+    from main import app
+
+    router = APIRouter()
+
+    @router.get("/_test/blocking")
+    async def blocking():
+        time.sleep(0.3)
+        return {}
+
+    app.include_router(router)
+    monitor = LoopWatchdog(interval=0.02, threshold=0.05)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        response = await client.get("/_test/blocking")
+        await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+        app.router.routes[:] = [r for r in app.router.routes if getattr(r, "path", "") != "/_test/blocking"]
+    assert response.status_code == 200
+    snapshot = monitor.snapshot()
+    assert snapshot["blocked_by_route"].get("GET /_test/blocking") == 1
+    assert "stack" not in snapshot["recent"][-1]
+    assert any("blocking" in line for line in monitor.snapshot(stacks=True)["recent"][-1]["stack"])
+    assert snapshot["max_ms"] >= 200
+
+
+async def test_metrics_require_admin(client: AsyncClient, test_db):
+    """
+    Test that the metrics are only served to admins.
+    """
+    assert "Not authenticated" in (await client.get("/metrics")).text
+    headers = await get_auth_headers(client, "metricsuser@example.com", "ValidPassword1!")
+    assert (await client.get("/metrics", headers=headers)).status_code == 403
+    headers = await admin_headers(client, test_db, "metricsadmin@example.com")
+    response = await client.get("/metrics", headers=headers)
+    assert response.status_code == 200
+    assert "task_cache" in response.json()
@@ -0,0 +1,85 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from api.services.recurrence import expand_series, expand_tasks, is_occurrence, parse_rule
+
+
+def utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+SERIES = {
+    "_id": "series1",
+    "title": "Water plants",
+    "user_id": "user1",
+    "due_date": utc(2024, 1, 1, 9),
+    "recurrence": "FREQ=WEEKLY;BYDAY=MO,WE",
+    "occurrence_overrides": {
+        "20240103T090000Z": {"is_completed": True},
+        "20240108T090000Z": {"deleted": True},
+    },
+}
+
+
+def test_expand_series_applies_overrides():
+    """
+    Test that occurrences in the window are generated with their overrides.
+    """
+    occurrences = list(expand_series(SERIES, utc(2024, 1, 1), utc(2024, 1, 11)))
+    assert [o["due_date"] for o in occurrences] == [utc(2024, 1, 1, 9), utc(2024, 1, 3, 9), utc(2024, 1, 10, 9)]
+    assert [o["is_completed"] for o in occurrences] == [False, True, False]
+    assert occurrences[0]["_id"] == "series1:20240101T090000Z"
+    assert occurrences[0]["series_id"] == "series1"
+    assert "recurrence" not in occurrences[0]
+
+
+def test_expand_series_is_lazy_and_bounded():
+    """
+    Test that an endless rule is only expanded as far as it is consumed.
+    """
+    daily = {**SERIES, "recurrence": "FREQ=DAILY", "occurrence_overrides": {}}
+    occurrences = expand_series(daily, utc(2024, 1, 1), utc(2124, 1, 1), limit=5)
+    assert len(list(occurrences)) == 5
+
+
+def test_expand_tasks_mixes_one_off_tasks():
+    """
+    Test that range views include one-off tasks due in the window.
+    """
+    one_off = {"_id": "task1", "title": "Dentist", "due_date": utc(2024, 1, 2, 12)}
+    outside = {"_id": "task2", "title": "Later", "due_date": utc(2024, 2, 1)}
+    undated = {"_id": "task3", "title": "Someday"}
+    result = expand_tasks([SERIES, one_off, outside, undated], utc(2024, 1, 1), utc(2024, 1, 4))
+    assert [t["title"] for t in result] == ["Water plants", "Dentist", "Water plants"]
+
+
+def test_is_occurrence():
+    assert is_occurrence(SERIES, "20240103T090000Z")
+    assert not is_occurrence(SERIES, "20240104T090000Z")
+    assert not is_occurrence(SERIES, "not-a-date")
+
+
+def test_parse_rule_rejects_invalid_rules():
+    with pytest.raises(ValueError):
+        parse_rule("FREQ=SOMETIMES", utc(2024, 1, 1))
+
+
+def test_sub_daily_series_with_old_anchor_expands_from_the_window():
+    """
+    Test that a sub-daily series anchored long ago is not walked from its anchor.
+    """
+    secondly = {**SERIES, "due_date": utc(2014, 1, 1, 0, 0, 7), "recurrence": "FREQ=SECONDLY;INTERVAL=15", "occurrence_overrides": {}}
+    occurrences = list(expand_series(secondly, utc(2024, 6, 1, 12), utc(2024, 6, 1, 12, 1)))
+    assert [o["due_date"] for o in occurrences] == [utc(2024, 6, 1, 12, 0, s) for s in (7, 22, 37, 52)]
+    assert is_occurrence(secondly, "20240601T120022Z")
+    assert not is_occurrence(secondly, "20240601T120023Z")
+
+    # same occurrences as walking the rule from its anchor
+    hourly = {**SERIES, "due_date": utc(2024, 1, 1, 0, 30), "recurrence": "FREQ=HOURLY;INTERVAL=5;BYDAY=MO,TU", "occurrence_overrides": {}}
+    start, end = utc(2024, 3, 4, 7), utc(2024, 3, 12)
+    walked = [when for when in parse_rule(hourly["recurrence"], hourly["due_date"]).between(start, end, inc=True) if when < end]
+    assert [o["due_date"] for o in expand_series(hourly, start, end)] == walked
+
+    with pytest.raises(ValueError):
+        parse_rule("FREQ=SECONDLY;COUNT=100000000", utc(2024, 1, 1))
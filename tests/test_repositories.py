@@ -0,0 +1,432 @@
+import pytest
+import pytest_asyncio
+from bson import ObjectId
+from datetime import datetime, timedelta, timezone
+
+from api.exceptions import DuplicateError
+from api.repositories import (
+    InMemoryIdempotencyRepository,
+    InMemoryStore,
+    InMemoryTaskRepository,
+    InMemoryUserRepository,
+    MongoIdempotencyRepository,
+    MongoTaskRepository,
+    MongoUserRepository,
+)
+from core.config import settings
+
+pytestmark = pytest.mark.asyncio
+
+# Every backend must pass the same conformance suite
+BACKENDS = ["mongo", "memory"]
+
+
+@pytest_asyncio.fixture(params=BACKENDS)
+async def repos(request, test_db):
+    """
+    Yields a (tasks, users) repository pair for each backend.
+    """
+    if request.param == "mongo":
+        users = MongoUserRepository(test_db)
+        await users.ensure_indexes()
+        yield MongoTaskRepository(test_db), users
+    else:
+        store = InMemoryStore()
+        yield InMemoryTaskRepository(store), InMemoryUserRepository(store)
+
+
+@pytest_asyncio.fixture(params=BACKENDS)
+async def idempotency(request, test_db):
+    """
+    Yields an idempotency repository for each backend.
+    """
+    if request.param == "mongo":
+        yield MongoIdempotencyRepository(test_db)
+    else:
+        yield InMemoryIdempotencyRepository(InMemoryStore())
+
+
+def task_data(title: str, offset: int = 0) -> dict:
+    now = datetime.now(timezone.utc) + timedelta(seconds=offset)
+    return {"title": title, "is_completed": False, "created_at": now, "updated_at": now}
+
+
+async def test_create_and_get_task(repos):
+    tasks, _ = repos
+    created = await tasks.create("user1", task_data("First"))
+    assert created["user_id"] == "user1"
+    assert "_id" in created
+
+    fetched = await tasks.get("user1", str(created["_id"]))
+    assert fetched["title"] == "First"
+
+
+async def test_get_task_scoped_to_owner(repos):
+    tasks, _ = repos
+    created = await tasks.create("user1", task_data("Private"))
+    assert await tasks.get("user2", str(created["_id"])) is None
+
+
+async def test_get_task_malformed_id(repos):
+    tasks, _ = repos
+    assert await tasks.get("user1", "not-an-object-id") is None
+    assert await tasks.delete("user1", "not-an-object-id") is False
+
+
+async def test_list_for_user_in_creation_order(repos):
+    tasks, _ = repos
+    await tasks.create("user1", task_data("A", 0))
+    await tasks.create("user2", task_data("Other", 1))
+    await tasks.create("user1", task_data("B", 2))
+
+    titles = [t["title"] for t in await tasks.list_for_user("user1")]
+    assert titles == ["A", "B"]
+    assert await tasks.list_for_user("nobody") == []
+
+
+async def test_update_task(repos):
+    tasks, _ = repos
+    created = await tasks.create("user1", task_data("Before"))
+    updated = await tasks.update("user1", str(created["_id"]), {"title": "After", "is_completed": True})
+    assert updated["title"] == "After"
+    assert updated["is_completed"] is True
+    assert await tasks.update("user2", str(created["_id"]), {"title": "Nope"}) is None
+
+
+async def test_delete_task(repos):
+    tasks, _ = repos
+    first = await tasks.create("user1", task_data("Keep", 0))
+    second = await tasks.create("user1", task_data("Drop", 1))
+
+    assert await tasks.delete("user2", str(second["_id"])) is False
+    assert await tasks.delete("user1", str(second["_id"])) is True
+    assert await tasks.delete("user1", str(second["_id"])) is False
+    assert [t["_id"] for t in await tasks.list_for_user("user1")] == [first["_id"]]
+
+
+async def test_user_lookups(repos):
+    _, users = repos
+    created = await users.create({"email": "a@example.com", "username": "alice", "password": "hash"})
+
+    assert (await users.get_by_id(str(created["_id"])))["username"] == "alice"
+    assert (await users.get_by_email("a@example.com"))["_id"] == created["_id"]
+    assert (await users.find_by_email_or_username("x@example.com", "alice"))["_id"] == created["_id"]
+    assert await users.find_by_email_or_username("x@example.com", "bob") is None
+    assert await users.get_by_id("bad-id") is None
+
+
+async def test_user_unique_email(repos):
+    _, users = repos
+    await users.create({"email": "a@example.com", "username": "alice", "password": "hash"})
+    with pytest.raises(DuplicateError):
+        await users.create({"email": "a@example.com", "username": "other", "password": "hash"})
+
+
+
+async def test_normalize_emails(repos):
+    _, users = repos
+    legacy = await users.create({"email": "Legacy@Example.com", "username": "legacy", "password": "hash"})
+    await users.create({"email": "b@example.com", "username": "bob", "password": "hash"})
+    clash = await users.create({"email": "B@example.com", "username": "bobby", "password": "hash"})
+
+    assert await users.normalize_emails() == [str(clash["_id"])]
+    assert (await users.get_by_email("legacy@example.com"))["_id"] == legacy["_id"]
+    assert await users.get_by_email("Legacy@Example.com") is None
+    assert (await users.get_by_email("B@example.com"))["_id"] == clash["_id"]
+
+async def test_set_password(repos):
+    _, users = repos
+    created = await users.create({"email": "a@example.com", "username": "alice", "password": "old"})
+    assert await users.set_password(str(created["_id"]), "new") is True
+    assert (await users.get_by_id(str(created["_id"])))["password"] == "new"
+
+
+async def test_set_list_access(repos):
+    _, users = repos
+    alice = str((await users.create({"email": "a@example.com", "username": "alice", "password": "h"}))["_id"])
+    bob = str((await users.create({"email": "b@example.com", "username": "bob", "password": "h"}))["_id"])
+
+    await users.set_list_access([alice, bob], "list1", "editor")
+    await users.set_list_access([bob], "list2", "viewer")
+    await users.set_list_access([alice], "list1", None)
+    assert (await users.get_by_id(alice)).get("list_access") == {}
+    assert (await users.get_by_id(bob))["list_access"] == {"list1": "editor", "list2": "viewer"}
+
+
+async def test_tag_filters_and_counts(repos):
+    tasks, users = repos
+    user_id = str((await users.create({"email": "t@example.com", "username": "tagger", "password": "h"}))["_id"])
+    await tasks.create(user_id, {**task_data("Both", 0), "tags": ["a", "b"]})
+    await tasks.create(user_id, {**task_data("Only A", 1), "tags": ["a"]})
+    await tasks.create(user_id, {**task_data("None", 2), "tags": []})
+
+    assert [t["title"] for t in await tasks.list_for_user(user_id, tags=["a", "b"])] == ["Both"]
+    assert [t["title"] for t in await tasks.list_for_user(user_id, tags=["a", "b"], match_all=False)] == ["Both", "Only A"]
+
+    await users.adjust_tag_counts(user_id, {"a": 2, "b": 1})
+    await users.adjust_tag_counts(user_id, {"b": -1, "c": 1})
+    assert (await users.get_by_id(user_id))["tag_counts"] == {"a": 2, "c": 1}
+
+
+async def test_add_attachment_bytes_respects_limit(repos):
+    _, users = repos
+    user_id = str((await users.create({"email": "q@example.com", "username": "quota", "password": "h"}))["_id"])
+
+    assert await users.add_attachment_bytes(user_id, 60, limit=100)
+    assert not await users.add_attachment_bytes(user_id, 50, limit=100)
+    assert await users.add_attachment_bytes(user_id, -60)
+    assert (await users.get_by_id(user_id))["attachment_bytes"] == 0
+
+
+def completed_task(title: str, days_ago: int) -> dict:
+    completed = datetime.now(timezone.utc) - timedelta(days=days_ago)
+    return {
+        "title": title,
+        "is_completed": True,
+        "created_at": completed - timedelta(days=1),
+        "updated_at": completed,
+        "completed_at": completed,
+    }
+
+
+async def test_archive_completed_moves_old_tasks(repos):
+    tasks, _ = repos
+    old = await tasks.create("user1", completed_task("Old", 60))
+    await tasks.create("user1", completed_task("Recent", 1))
+    await tasks.create("user1", task_data("Open"))
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=30)
+    assert await tasks.archive_completed(cutoff, batch_size=10) == 1
+    assert await tasks.archive_completed(cutoff, batch_size=10) == 0
+
+    hot = [t["title"] for t in await tasks.list_for_user("user1")]
+    assert hot == ["Recent", "Open"]
+    everything = await tasks.list_for_user("user1", include_archived=True)
+    assert [t["title"] for t in everything] == ["Old", "Recent", "Open"]
+    assert everything[0]["_id"] == old["_id"]
+    assert everything[0]["archived_at"] is not None
+
+
+async def test_archive_completed_respects_batch_size(repos):
+    tasks, _ = repos
+    for i in range(5):
+        await tasks.create("user1", completed_task(f"Old {i}", 60))
+    cutoff = datetime.now(timezone.utc) - timedelta(days=30)
+    assert await tasks.archive_completed(cutoff, batch_size=2) == 2
+    assert len(await tasks.list_for_user("user1")) == 3
+
+
+async def test_archived_task_restored_on_access(repos):
+    tasks, _ = repos
+    old = await tasks.create("user1", completed_task("Old", 60))
+    cutoff = datetime.now(timezone.utc) - timedelta(days=30)
+    await tasks.archive_completed(cutoff, batch_size=10)
+
+    assert await tasks.get("user2", str(old["_id"])) is None
+    restored = await tasks.get("user1", str(old["_id"]))
+    assert restored["title"] == "Old"
+    assert "archived_at" not in restored
+    assert [t["_id"] for t in await tasks.list_for_user("user1")] == [old["_id"]]
+    # a freshly restored task is not archived again straight away
+    assert await tasks.archive_completed(cutoff, batch_size=10) == 0
+
+
+async def test_update_and_delete_archived_task(repos):
+    tasks, _ = repos
+    first = await tasks.create("user1", completed_task("First", 60))
+    second = await tasks.create("user1", completed_task("Second", 60))
+    cutoff = datetime.now(timezone.utc) - timedelta(days=30)
+    await tasks.archive_completed(cutoff, batch_size=10)
+
+    updated = await tasks.update("user1", str(first["_id"]), {"title": "Reopened", "is_completed": False})
+    assert updated["title"] == "Reopened"
+    assert await tasks.delete("user1", str(second["_id"])) is True
+    assert [t["title"] for t in await tasks.list_for_user("user1", include_archived=True)] == ["Reopened"]
+
+
+async def test_update_occurrence_merges_overrides(repos):
+    tasks, _ = repos
+    series = await tasks.create("user1", {**task_data("Standup"), "recurrence": "FREQ=DAILY"})
+    task_id = str(series["_id"])
+
+    await tasks.update_occurrence("user1", task_id, "20240102T090000Z", {"is_completed": True})
+    updated = await tasks.update_occurrence("user1", task_id, "20240102T090000Z", {"title": "Moved"})
+    assert updated["occurrence_overrides"] == {"20240102T090000Z": {"is_completed": True, "title": "Moved"}}
+    assert await tasks.update_occurrence("user2", task_id, "20240102T090000Z", {"deleted": True}) is None
+
+
+async def test_positions_order_and_rebalance(repos):
+    tasks, _ = repos
+    legacy = await tasks.create("user1", task_data("Legacy", 0))
+    b = await tasks.create("user1", {**task_data("B", 1), "position": "b"})
+    a = await tasks.create("user1", {**task_data("A", 2), "position": "a"})
+    await tasks.create("user2", {**task_data("Other", 3), "position": "0"})
+
+    assert await tasks.position_before("user1") == "b"
+    assert await tasks.position_before("user1", "b") == "a"
+    assert await tasks.position_after("user1", "a") == "b"
+    assert await tasks.position_after("user1", "b") is None
+    ranked = await tasks.list_for_user("user1", ranked=True)
+    assert [t["title"] for t in ranked] == ["Legacy", "A", "B"]
+
+    assert await tasks.rebalance_positions("user1") == 3
+    ranked = await tasks.list_for_user("user1", ranked=True)
+    assert [t["title"] for t in ranked] == ["Legacy", "A", "B"]
+    assert [t["position"] for t in ranked] == sorted(t["position"] for t in ranked)
+    assert all(len(t["position"]) == 1 for t in ranked)
+    assert await tasks.rebalance_positions("user1") == 0
+    assert (await tasks.get("user2", str(b["_id"]))) is None
+    assert {str(t["_id"]) for t in ranked} == {str(legacy["_id"]), str(a["_id"]), str(b["_id"])}
+
+
+async def test_subtree_queries(repos):
+    tasks, _ = repos
+    root = await tasks.create("user1", task_data("Root", 0))
+    root_id = str(root["_id"])
+    child = await tasks.create("user1", {**task_data("Child", 1), "parent_id": root_id, "ancestors": [root_id]})
+    child_id = str(child["_id"])
+    await tasks.create("user1", {**task_data("Leaf", 2), "parent_id": child_id, "ancestors": [root_id, child_id]})
+    await tasks.create("user1", task_data("Unrelated", 3))
+    await tasks.adjust_rollups("user1", [root_id], total=2)
+    await tasks.adjust_rollups("user1", [child_id], total=1)
+
+    assert [t["title"] for t in await tasks.list_subtree("user1", root_id)] == ["Root", "Child", "Leaf"]
+    assert [t["title"] for t in await tasks.list_subtree("user1", child_id)] == ["Child", "Leaf"]
+    assert await tasks.list_subtree("user2", root_id) == []
+
+    now = datetime.now(timezone.utc)
+    assert await tasks.set_subtree_completed("user1", child_id, True, now) == 2
+    subtree = await tasks.list_subtree("user1", root_id)
+    assert [t["is_completed"] for t in subtree] == [False, True, True]
+    assert subtree[1]["subtasks_completed"] == 1
+    assert subtree[2]["completed_at"] is not None
+
+    assert await tasks.delete_descendants("user1", root_id, batch_size=1) == 2
+    assert [t["title"] for t in await tasks.list_subtree("user1", root_id)] == ["Root"]
+    assert len(await tasks.list_for_user("user1")) == 2
+
+
+async def test_shared_list_scope(repos):
+    tasks, _ = repos
+    own = await tasks.create("user1", task_data("Own", 0))
+    shared = await tasks.create("user2", {**task_data("Shared", 1), "list_id": "list1"})
+    await tasks.create("user2", {**task_data("Private", 2), "list_id": None})
+    shared_id = str(shared["_id"])
+
+    assert [t["title"] for t in await tasks.list_for_user("user1", lists=["list1"])] == ["Own", "Shared"]
+    assert [t["title"] for t in await tasks.list_shared("list1")] == ["Shared"]
+    assert await tasks.get("user1", shared_id) is None
+    assert (await tasks.get("user1", shared_id, lists=["list1"]))["title"] == "Shared"
+    assert (await tasks.update("user1", shared_id, {"title": "Edited"}, lists=["list1"]))["title"] == "Edited"
+
+    assert await tasks.detach_list("list1") == 1
+    assert await tasks.list_shared("list1") == []
+    assert await tasks.get("user1", shared_id, lists=["list1"]) is None
+    assert await tasks.delete("user1", str(own["_id"]), lists=["list1"]) is True
+
+
+async def test_insert_many_skips_taken_ids(repos):
+    tasks, _ = repos
+    first, second = ObjectId(), ObjectId()
+    assert await tasks.insert_many("user1", [{**task_data("One", 0), "_id": first}]) == [True]
+    inserted = await tasks.insert_many("user1", [
+        {**task_data("One again", 1), "_id": first},
+        {**task_data("Two", 2), "_id": second},
+    ])
+    assert inserted == [False, True]
+    assert [t["title"] for t in await tasks.list_for_user("user1")] == ["One", "Two"]
+
+async def test_apply_sync_checks_versions(repos):
+    tasks, _ = repos
+    since = datetime.now(timezone.utc) - timedelta(seconds=1)
+    kept = await tasks.create("user1", task_data("Kept", 0))
+    gone = await tasks.create("user1", task_data("Gone", 1))
+    kept_id, gone_id = str(kept["_id"]), str(gone["_id"])
+    assert kept["version"] == 1
+
+    new_id = ObjectId()
+    applied = await tasks.apply_sync("user1", [
+        {"op": "create", "document": {**task_data("New", 2), "_id": new_id, "version": 1}},
+        {"op": "update", "task_id": kept_id, "version": 1, "changes": {"title": "Edited"}},
+        {"op": "update", "task_id": gone_id, "version": 5, "changes": {"title": "Stale"}},
+        {"op": "delete", "task_id": gone_id, "version": 1, "list_id": None},
+    ])
+    assert applied == [True, True, False, True]
+    assert {t["title"]: t["version"] for t in await tasks.get_many("user1", [kept_id, gone_id, str(new_id)])} == {
+        "Edited": 2, "New": 1,
+    }
+    assert await tasks.list_deleted("user1", since) == [gone_id]
+    assert await tasks.list_deleted("user2", since) == []
+    assert str(new_id) in [str(t["_id"]) for t in await tasks.list_changed("user1", since)]
+
+async def test_account_purge_operations(repos):
+    tasks, users = repos
+    user = await users.create({"email": "a@example.com", "username": "a", "password": "x"})
+    user_id = str(user["_id"])
+    for i in range(3):
+        await tasks.create(user_id, {**task_data(f"Task {i}", i - 10), "is_completed": i == 0})
+    await tasks.create("other", task_data("Other", 3))
+    assert await tasks.archive_completed(datetime.now(timezone.utc), 10) == 1
+
+    assert await users.deactivate(user_id) is True
+    assert (await users.get_by_id(user_id))["is_active"] is False
+    future = datetime.now(timezone.utc) + timedelta(seconds=1)
+    assert [str(u["_id"]) for u in await users.list_purge_pending(future, 10)] == [user_id]
+    await users.set_purge_progress(user_id, {"updated_at": future, "step": "tasks"})
+    assert await users.list_purge_pending(future, 10) == []
+
+    assert len(await tasks.delete_batch_for_user(user_id, 2)) == 2
+    assert len(await tasks.delete_batch_for_user(user_id, 2)) == 1
+    assert await tasks.delete_batch_for_user(user_id, 2) == []
+    assert len(await tasks.list_for_user("other")) == 1
+    assert await users.delete(user_id) is True
+    assert await users.get_by_email("a@example.com") is None
+
+async def test_idempotency_claim_complete_release(idempotency):
+    assert await idempotency.claim("user1:key", "fp") is None
+    pending = await idempotency.claim("user1:key", "fp")
+    assert pending["state"] == "pending"
+
+    await idempotency.complete("user1:key", 201, {"id": "abc"})
+    done = await idempotency.claim("user1:key", "fp")
+    assert (done["state"], done["status_code"], done["body"]) == ("done", 201, {"id": "abc"})
+
+    # completed keys are never released; pending ones are
+    await idempotency.release("user1:key")
+    assert (await idempotency.claim("user1:key", "fp"))["state"] == "done"
+    assert await idempotency.claim("user1:other", "fp") is None
+    await idempotency.release("user1:other")
+    assert await idempotency.claim("user1:other", "fp") is None
+
+
+async def test_idempotency_expired_claim_is_taken_over(idempotency, monkeypatch):
+    """
+    Test that a pending claim whose lease ran out can be claimed again, by the same request only.
+    """
+    monkeypatch.setattr(settings, "IDEMPOTENCY_LEASE_SECONDS", -1)
+    assert await idempotency.claim("user1:crashed", "fp") is None
+    assert (await idempotency.claim("user1:crashed", "other"))["fingerprint"] == "fp"
+    assert await idempotency.claim("user1:crashed", "fp") is None
+
+    monkeypatch.setattr(settings, "IDEMPOTENCY_LEASE_SECONDS", 60)
+    assert await idempotency.claim("user1:running", "fp") is None
+    assert (await idempotency.claim("user1:running", "fp"))["state"] == "pending"
+    await idempotency.complete("user1:running", 201, {"id": "abc"})
+    monkeypatch.setattr(settings, "IDEMPOTENCY_LEASE_SECONDS", -1)
+    assert (await idempotency.claim("user1:running", "fp"))["state"] == "done"
+
+
+async def test_list_due_and_count_overdue(repos):
+    tasks, _ = repos
+    day = datetime(2024, 3, 10, tzinfo=timezone.utc)
+    await tasks.create("user1", {**task_data("Late", 0), "due_date": day - timedelta(days=1)})
+    await tasks.create("user1", {**task_data("Done", 1), "due_date": day - timedelta(days=2), "is_completed": True})
+    await tasks.create("user1", {**task_data("Later", 2), "due_date": day + timedelta(hours=20)})
+    await tasks.create("user1", {**task_data("Sooner", 3), "due_date": day + timedelta(hours=2)})
+    await tasks.create("user1", {**task_data("Next week", 4), "due_date": day + timedelta(days=7)})
+    await tasks.create("user1", {**task_data("Daily", 5), "due_date": day - timedelta(days=30), "recurrence": "FREQ=DAILY"})
+    await tasks.create("user2", {**task_data("Other", 6), "due_date": day + timedelta(hours=1)})
+
+    due = await tasks.list_due("user1", day, day + timedelta(days=1))
+    assert [t["title"] for t in due] == ["Sooner", "Later", "Daily"]
+    assert await tasks.count_overdue("user1", day) == 1
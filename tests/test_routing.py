@@ -0,0 +1,95 @@
+import pytest
+from pymongo.read_preferences import Primary, SecondaryPreferred
+
+from api.dependencies.repositories import get_audit_repository, get_idempotency_repository
+from api.repositories import MongoTaskRepository
+from api.repositories.routing import CausalTracker, MongoRoute, read_preference, write_concern
+from core.config import settings
+
+
+def test_read_profiles():
+    """
+    Test that heavy reads go to secondaries with a staleness bound.
+    """
+    assert read_preference("default") == Primary()
+    heavy = read_preference("heavy")
+    assert isinstance(heavy, SecondaryPreferred)
+    assert heavy.max_staleness == settings.MONGODB_MAX_STALENESS_SECONDS
+    with pytest.raises(ValueError):
+        read_preference("unknown")
+
+
+def test_write_profiles():
+    """
+    Test that write profiles map to the configured write concerns.
+    """
+    assert write_concern("default").document == {"w": "majority"}
+    assert write_concern("light").document == {"w": 1}
+
+
+def test_low_value_writes_use_light_profile(test_db):
+    """
+    Test that audit events and idempotency records are written with the light concern.
+    """
+    assert get_audit_repository(test_db).route.write_concern.document == {"w": 1}
+    assert get_idempotency_repository(test_db).route.write_concern.document == {"w": 1}
+
+
+def test_causal_tracker_window():
+    """
+    Test that a recorded write is only pending inside the window.
+    """
+    tracker = CausalTracker(window_seconds=60)
+    tracker.record("user1", "cluster", "op")
+    assert tracker.pending("user1") == ("cluster", "op")
+    assert tracker.pending("user2") is None
+
+    expired = CausalTracker(window_seconds=0)
+    expired.record("user1")
+    assert expired.pending("user1") is None
+
+
+def test_causal_tracker_is_bounded():
+    """
+    Test that recording prunes expired writes and drops the oldest beyond the limit.
+    """
+    tracker = CausalTracker(window_seconds=60, max_users=2)
+    for user_id in ("user1", "user2", "user1", "user3"):
+        tracker.record(user_id)
+    assert len(tracker) == 2
+    assert tracker.pending("user2") is None
+    assert tracker.pending("user1") is not None and tracker.pending("user3") is not None
+
+    expired = CausalTracker(window_seconds=0)
+    for i in range(100):
+        expired.record(f"user{i}")
+    assert len(expired) == 1
+
+
+@pytest.mark.asyncio
+async def test_read_after_write_falls_back_to_primary(test_db):
+    """
+    Test that without sessions, a heavy read right after a write is pinned to the primary.
+    """
+    tracker = CausalTracker(window_seconds=60)
+    route = MongoRoute(test_db, read="heavy", tracker=tracker)
+
+    async with route.reading("tasks", "user1") as (collection, session):
+        assert isinstance(collection.read_preference, SecondaryPreferred)
+
+    async with route.writing("user1") as session:
+        assert session is None  # mongomock has no sessions
+
+    async with route.reading("tasks", "user1") as (collection, session):
+        assert collection.read_preference == Primary()
+
+
+@pytest.mark.asyncio
+async def test_heavy_repository_reads_own_writes(test_db):
+    """
+    Test that a heavy-profile repository still returns the user's fresh write.
+    """
+    tasks = MongoTaskRepository(test_db, read="heavy")
+    created = await tasks.create("user1", {"title": "Fresh"})
+    listed = await tasks.list_for_user("user1")
+    assert [t["_id"] for t in listed] == [created["_id"]]
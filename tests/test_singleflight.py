@@ -0,0 +1,101 @@
+import asyncio
+import pytest
+
+from api.repositories.singleflight import SingleFlight
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_concurrent_calls_share_one_flight():
+    """
+    Test that identical concurrent reads make a single call.
+    """
+    flights = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def query():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return [{"title": "Task"}]
+
+    waiters = [asyncio.create_task(flights.do("user1", ("tasks.list",), query)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters)
+
+    assert calls == 1
+    assert all(r == [{"title": "Task"}] for r in results)
+    # each caller gets its own copy
+    results[0][0]["title"] = "Changed"
+    assert results[1][0]["title"] == "Task"
+    assert flights.snapshot()["-"] == {"calls": 1, "saved": 4}
+
+
+async def test_different_users_do_not_share():
+    """
+    Test that flights are keyed per user.
+    """
+    flights = SingleFlight()
+    calls = 0
+
+    async def query():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0)
+        return calls
+
+    await asyncio.gather(
+        flights.do("user1", ("tasks.list",), query),
+        flights.do("user2", ("tasks.list",), query),
+    )
+    assert calls == 2
+
+
+async def test_cancelled_caller_does_not_cancel_others():
+    """
+    Test that cancelling one waiter leaves the shared call running for the rest.
+    """
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def query():
+        await release.wait()
+        return "done"
+
+    first = asyncio.create_task(flights.do("user1", ("k",), query))
+    second = asyncio.create_task(flights.do("user1", ("k",), query))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await second == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+async def test_forget_starts_a_new_flight():
+    """
+    Test that a read after a write does not join a flight started before it.
+    """
+    flights = SingleFlight()
+    release = asyncio.Event()
+    calls = 0
+
+    async def query():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return calls
+
+    before = asyncio.create_task(flights.do("user1", ("k",), query))
+    await asyncio.sleep(0)
+    flights.forget("user1")
+    after = asyncio.create_task(flights.do("user1", ("k",), query))
+    await asyncio.sleep(0)
+    release.set()
+
+    await asyncio.gather(before, after)
+    assert calls == 2
@@ -1,6 +1,14 @@
+import asyncio
+import cbor2
+import msgpack
 import pytest
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
 from httpx import AsyncClient
 
+from api.repositories import MongoTaskRepository
+from api.utils.instrumentation import measure
+
 pytestmark = pytest.mark.asyncio
 
 
@@ -211,3 +219,465 @@ async def test_delete_task_not_owned_by_user(client: AsyncClient):
     # 3. User B tries to delete User A's task
     response = await client.delete(f"/tasks/{task_id_a}", headers=headers_b)
     assert response.status_code == 404
+
+
+async def test_get_tasks_include_archived(client: AsyncClient, test_db):
+    """
+    Test that archived tasks are hidden by default and listed with include_archived.
+    """
+    headers = await get_auth_headers(
+        client, "archive@example.com", "ValidPassword1!"
+    )
+    await client.post("/tasks", json={"title": "Done long ago", "is_completed": True}, headers=headers)
+    await client.post("/tasks", json={"title": "Still open"}, headers=headers)
+
+    # archive everything completed before "tomorrow"
+    cutoff = datetime.now(timezone.utc) + timedelta(days=1)
+    assert await MongoTaskRepository(test_db).archive_completed(cutoff, batch_size=10) == 1
+
+    response = await client.get("/tasks", headers=headers)
+    assert [t["title"] for t in response.json()] == ["Still open"]
+
+    response = await client.get("/tasks", params={"include_archived": "true"}, headers=headers)
+    data = response.json()
+    assert [t["title"] for t in data] == ["Done long ago", "Still open"]
+    assert data[0]["archived_at"] is not None
+
+
+async def test_recurring_task_expands_lazily(client: AsyncClient, test_db):
+    """
+    Test that a recurring task is stored once and expanded in range queries.
+    """
+    headers = await get_auth_headers(
+        client, "recurring@example.com", "ValidPassword1!"
+    )
+    create_response = await client.post(
+        "/tasks",
+        json={"title": "Standup", "due_date": "2024-01-01T09:00:00Z", "recurrence": "FREQ=DAILY"},
+        headers=headers,
+    )
+    assert create_response.status_code == 201
+    series_id = create_response.json()["id"]
+
+    response = await client.get(
+        "/tasks",
+        params={"start": "2024-01-01T00:00:00Z", "end": "2025-01-01T00:00:00Z"},
+        headers=headers,
+    )
+    occurrences = response.json()
+    assert len(occurrences) == 366
+    assert occurrences[1]["id"] == f"{series_id}:20240102T090000Z"
+    assert await test_db["tasks"].count_documents({}) == 1
+
+    # complete one occurrence and skip another
+    response = await client.put(
+        f"/tasks/{series_id}/occurrences/20240102T090000Z", json={"is_completed": True}, headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json()["is_completed"] is True
+    response = await client.delete(f"/tasks/{series_id}/occurrences/20240103T090000Z", headers=headers)
+    assert response.status_code == 204
+
+    response = await client.get(
+        "/tasks",
+        params={"start": "2024-01-01T00:00:00Z", "end": "2024-01-05T00:00:00Z"},
+        headers=headers,
+    )
+    assert [t["is_completed"] for t in response.json()] == [False, True, False]
+    assert await test_db["tasks"].count_documents({}) == 1
+
+
+async def test_recurring_task_requires_due_date(client: AsyncClient):
+    """
+    Test that a recurrence rule needs a due date to anchor it.
+    """
+    headers = await get_auth_headers(
+        client, "norecur@example.com", "ValidPassword1!"
+    )
+    response = await client.post(
+        "/tasks", json={"title": "Standup", "recurrence": "FREQ=DAILY"}, headers=headers
+    )
+    assert response.status_code == 422
+
+    create_response = await client.post(
+        "/tasks", json={"title": "Standup", "due_date": "2024-01-01T09:00:00Z", "recurrence": "FREQ=DAILY"}, headers=headers
+    )
+    series_id = create_response.json()["id"]
+    response = await client.put(
+        f"/tasks/{series_id}/occurrences/20240101T100000Z", json={"is_completed": True}, headers=headers
+    )
+    assert response.status_code == 404
+
+
+async def test_recurring_task_keeps_its_due_date(client: AsyncClient):
+    """
+    Test that an update or sync cannot clear the due date a recurrence rule is anchored to.
+    """
+    headers = await get_auth_headers(client, "keepanchor@example.com", "ValidPassword1!")
+    series = (await client.post(
+        "/tasks", json={"title": "Standup", "due_date": "2024-01-01T09:00:00Z", "recurrence": "FREQ=DAILY"}, headers=headers
+    )).json()
+    for changes in ({"due_date": None}, {"recurrence": "FREQ=WEEKLY", "due_date": None}):
+        response = await client.put(f"/tasks/{series['id']}", json=changes, headers=headers)
+        assert response.status_code == 422
+    response = await client.post("/tasks/sync", json={"mutations": [
+        {"op": "update", "task_id": series["id"], "base_version": 1, "changes": {"due_date": None}},
+    ]}, headers=headers)
+    assert response.json()["results"][0]["status"] == "rejected"
+
+    response = await client.put(
+        f"/tasks/{series['id']}/occurrences/20240102T090000Z", json={"is_completed": True}, headers=headers
+    )
+    assert response.status_code == 200
+
+    cleared = await client.put(f"/tasks/{series['id']}", json={"recurrence": None, "due_date": None}, headers=headers)
+    assert cleared.status_code == 200 and cleared.json()["due_date"] is None
+
+
+async def test_create_task_idempotency_key_replays(client: AsyncClient, test_db):
+    """
+    Test that retrying a create with the same Idempotency-Key inserts once.
+    """
+    headers = await get_auth_headers(
+        client, "idempotent@example.com", "ValidPassword1!"
+    )
+    retry_headers = {**headers, "Idempotency-Key": "create-1"}
+    first = await client.post("/tasks", json={"title": "Only once"}, headers=retry_headers)
+    second = await client.post("/tasks", json={"title": "Only once"}, headers=retry_headers)
+
+    assert first.status_code == second.status_code == 201
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert await test_db["tasks"].count_documents({}) == 1
+
+    # the same key with a different body is rejected
+    response = await client.post("/tasks", json={"title": "Something else"}, headers=retry_headers)
+    assert response.status_code == 422
+
+
+async def test_create_task_concurrent_duplicates_serialized(client: AsyncClient, test_db):
+    """
+    Test that concurrent requests with the same key create a single task.
+    """
+    headers = await get_auth_headers(
+        client, "concurrent@example.com", "ValidPassword1!"
+    )
+    headers["Idempotency-Key"] = "create-2"
+    responses = await asyncio.gather(*[
+        client.post("/tasks", json={"title": "Once"}, headers=headers) for _ in range(3)
+    ])
+    assert {r.status_code for r in responses} == {201}
+    assert len({r.json()["id"] for r in responses}) == 1
+    assert await test_db["tasks"].count_documents({}) == 1
+
+
+async def test_get_tasks_msgpack_matches_json(client: AsyncClient):
+    """
+    Test that MessagePack responses carry the same data as JSON, with native datetimes and ObjectIds.
+    """
+    headers = await get_auth_headers(client, "msgpack@example.com", "ValidPassword1!")
+    due = "2030-01-02T03:04:05Z"
+    await client.post("/tasks", json={"title": "Packed 1", "due_date": due}, headers=headers)
+    await client.post("/tasks", json={"title": "Packed 2"}, headers=headers)
+    expected = (await client.get("/tasks", headers=headers)).json()
+
+    response = await client.get("/tasks", headers={**headers, "Accept": "application/msgpack"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    assert response.headers["vary"] == "Accept"
+    rows = msgpack.unpackb(response.content, timestamp=3)
+    assert len(rows) == 2
+    assert rows[0]["id"] == bytes.fromhex(expected[0]["id"])
+    assert rows[0]["due_date"] == datetime(2030, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    for row, json_row in zip(rows, expected):
+        assert row.keys() == json_row.keys()
+        assert row["title"] == json_row["title"]
+        assert row["user_id"].hex() == json_row["user_id"]
+
+
+async def test_get_tasks_columnar_cbor(client: AsyncClient):
+    """
+    Test that `layout=columnar` returns one array per field.
+    """
+    headers = await get_auth_headers(client, "columnar@example.com", "ValidPassword1!")
+    for title in ("Col 1", "Col 2", "Col 3"):
+        await client.post("/tasks", json={"title": title}, headers=headers)
+
+    response = await client.get(
+        "/tasks", headers={**headers, "Accept": "application/cbor; layout=columnar, application/json; q=0.5"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/cbor; layout=columnar"
+    columns = cbor2.loads(response.content)
+    assert columns["title"] == ["Col 1", "Col 2", "Col 3"]
+    assert len(columns["id"]) == 3 and all(len(oid) == 12 for oid in columns["id"])
+    assert all(isinstance(created, datetime) for created in columns["created_at"])
+
+    single = await client.get(f"/tasks/{columns['id'][0].hex()}", headers={**headers, "Accept": "application/cbor"})
+    assert cbor2.loads(single.content)["title"] == "Col 1"
+
+
+async def test_move_task_reorders_with_single_update(client: AsyncClient, test_db):
+    """
+    Test that moving a task changes only its own position and the ranked listing follows.
+    """
+    headers = await get_auth_headers(client, "ranking@example.com", "ValidPassword1!")
+    ids = []
+    for title in ("One", "Two", "Three"):
+        response = await client.post("/tasks", json={"title": title}, headers=headers)
+        ids.append(response.json()["id"])
+    before = {t["_id"]: t["position"] for t in await test_db["tasks"].find().to_list(length=None)}
+
+    response = await client.put(f"/tasks/{ids[2]}/position", json={"after": ids[0]}, headers=headers)
+    assert response.status_code == 200
+    after = {t["_id"]: t["position"] for t in await test_db["tasks"].find().to_list(length=None)}
+    assert [str(oid) for oid in before if before[oid] != after[oid]] == [ids[2]]
+
+    ranked = await client.get("/tasks", params={"order": "position"}, headers=headers)
+    assert [t["title"] for t in ranked.json()] == ["One", "Three", "Two"]
+
+    await client.put(f"/tasks/{ids[1]}/position", json={"before": ids[0]}, headers=headers)
+    await client.put(f"/tasks/{ids[0]}/position", json={}, headers=headers)
+    ranked = await client.get("/tasks", params={"order": "position"}, headers=headers)
+    assert [t["title"] for t in ranked.json()] == ["Two", "Three", "One"]
+
+    both = await client.put(f"/tasks/{ids[0]}/position", json={"after": ids[1], "before": ids[2]}, headers=headers)
+    assert both.status_code == 422
+
+
+async def test_subtask_rollups(client: AsyncClient):
+    """
+    Test that parents keep completion roll-ups over their whole subtree.
+    """
+    headers = await get_auth_headers(client, "subtasks@example.com", "ValidPassword1!")
+    project = (await client.post("/tasks", json={"title": "Project"}, headers=headers)).json()
+    step = (await client.post("/tasks", json={"title": "Step", "parent_id": project["id"]}, headers=headers)).json()
+    assert step["ancestors"] == [project["id"]]
+    for title in ("Check 1", "Check 2"):
+        await client.post("/tasks", json={"title": title, "parent_id": step["id"]}, headers=headers)
+
+    project = (await client.get(f"/tasks/{project['id']}", headers=headers)).json()
+    assert (project["subtasks_total"], project["subtasks_completed"]) == (3, 0)
+
+    response = await client.put(f"/tasks/{step['id']}/subtree", json={"is_completed": True}, headers=headers)
+    assert response.status_code == 200
+    assert [t["is_completed"] for t in response.json()] == [True, True, True]
+    project = (await client.get(f"/tasks/{project['id']}", headers=headers)).json()
+    assert project["subtasks_completed"] == 3
+
+    subtree = (await client.get(f"/tasks/{project['id']}/subtree", headers=headers)).json()
+    check = subtree[-1]
+    await client.put(f"/tasks/{check['id']}", json={"is_completed": False}, headers=headers)
+    project = (await client.get(f"/tasks/{project['id']}", headers=headers)).json()
+    assert project["subtasks_completed"] == 2
+
+    assert (await client.delete(f"/tasks/{step['id']}", headers=headers)).status_code == 204
+    subtree = (await client.get(f"/tasks/{project['id']}/subtree", headers=headers)).json()
+    assert [t["title"] for t in subtree] == ["Project"]
+    assert (subtree[0]["subtasks_total"], subtree[0]["subtasks_completed"]) == (0, 0)
+
+    missing = await client.post("/tasks", json={"title": "Orphan", "parent_id": step["id"]}, headers=headers)
+    assert missing.status_code == 404
+
+
+async def test_tags_filter_and_counts(client: AsyncClient):
+    """
+    Test that tags are normalized, filterable with all/any and counted per user.
+    """
+    headers = await get_auth_headers(client, "tags@example.com", "ValidPassword1!")
+    a = (await client.post("/tasks", json={"title": "Alpha", "tags": ["Work", " urgent ", "work"]}, headers=headers)).json()
+    await client.post("/tasks", json={"title": "Beta", "tags": ["work"]}, headers=headers)
+    await client.post("/tasks", json={"title": "Gamma", "tags": ["home"]}, headers=headers)
+    assert a["tags"] == ["work", "urgent"]
+    assert (await client.post("/tasks", json={"title": "Bad", "tags": ["a.b"]}, headers=headers)).status_code == 422
+
+    both = await client.get("/tasks", params={"tags": ["work", "urgent"]}, headers=headers)
+    assert [t["title"] for t in both.json()] == ["Alpha"]
+    either = await client.get("/tasks", params={"tags": ["urgent", "home"], "tag_match": "any"}, headers=headers)
+    assert [t["title"] for t in either.json()] == ["Alpha", "Gamma"]
+
+    counts = (await client.get("/tags", headers=headers)).json()
+    assert counts == [{"tag": "work", "count": 2}, {"tag": "home", "count": 1}, {"tag": "urgent", "count": 1}]
+
+    await client.put(f"/tasks/{a['id']}", json={"tags": ["home"]}, headers=headers)
+    counts = {c["tag"]: c["count"] for c in (await client.get("/tags", headers=headers)).json()}
+    assert counts == {"work": 1, "home": 2}
+    await client.delete(f"/tasks/{a['id']}", headers=headers)
+    counts = {c["tag"]: c["count"] for c in (await client.get("/tags", headers=headers)).json()}
+    assert counts == {"work": 1, "home": 1}
+
+
+async def test_tag_autocomplete(client: AsyncClient):
+    """
+    Test that autocomplete returns prefix matches, most used first, and picks up new tags.
+    """
+    headers = await get_auth_headers(client, "tagcomplete@example.com", "ValidPassword1!")
+    await client.post("/tasks", json={"title": "One", "tags": ["project-a", "personal"]}, headers=headers)
+    await client.post("/tasks", json={"title": "Two", "tags": ["project-b", "personal"]}, headers=headers)
+
+    response = await client.get("/tags/autocomplete", params={"prefix": "P"}, headers=headers)
+    assert [c["tag"] for c in response.json()] == ["personal", "project-a", "project-b"]
+    await client.post("/tasks", json={"title": "Three", "tags": ["project-c"]}, headers=headers)
+    response = await client.get("/tags/autocomplete", params={"prefix": "proj", "limit": 2}, headers=headers)
+    assert [c["tag"] for c in response.json()] == ["project-a", "project-b"]
+    response = await client.get("/tags/autocomplete", params={"prefix": "project-c"}, headers=headers)
+    assert response.json() == [{"tag": "project-c", "count": 1}]
+
+
+async def test_sync_applies_mutations_and_detects_conflicts(client: AsyncClient):
+    """
+    Test that a sync batch is applied in one go and stale updates come back as conflicts.
+    """
+    headers = await get_auth_headers(client, "sync@example.com", "ValidPassword1!")
+    kept = (await client.post("/tasks", json={"title": "Kept"}, headers=headers)).json()
+    stale = (await client.post("/tasks", json={"title": "Stale"}, headers=headers)).json()
+    gone = (await client.post("/tasks", json={"title": "Gone", "tags": ["x"]}, headers=headers)).json()
+    assert kept["version"] == 1
+    # edited on another device meanwhile
+    await client.put(f"/tasks/{stale['id']}", json={"title": "Server edit"}, headers=headers)
+
+    response = await client.post("/tasks/sync", json={"mutations": [
+        {"op": "create", "client_id": "tmp-1", "task": {"title": "Offline new", "tags": ["x"]}},
+        {"op": "update", "task_id": kept["id"], "base_version": 1, "changes": {"title": "Offline edit", "is_completed": True}},
+        {"op": "update", "task_id": stale["id"], "base_version": 1, "changes": {"title": "Lost edit"}},
+        {"op": "delete", "task_id": gone["id"], "base_version": 1},
+        {"op": "update", "task_id": "0" * 24, "base_version": 1, "changes": {"title": "Nobody"}},
+    ]}, headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert [r["status"] for r in body["results"]] == ["applied", "applied", "conflict", "applied", "not_found"]
+    created, edited, conflict = body["results"][0], body["results"][1], body["results"][2]
+    assert created["client_id"] == "tmp-1" and created["task"]["title"] == "Offline new"
+    assert edited["task"]["title"] == "Offline edit" and edited["task"]["version"] == 2
+    assert conflict["task"]["title"] == "Server edit" and conflict["task"]["version"] == 2
+    assert body["full_resync"] is True
+
+    stored = (await client.get(f"/tasks/{kept['id']}", headers=headers)).json()
+    assert stored["is_completed"] is True and stored["version"] == 2
+    assert (await client.get(f"/tasks/{gone['id']}", headers=headers)).status_code == 404
+    assert {c["tag"]: c["count"] for c in (await client.get("/tags", headers=headers)).json()} == {"x": 1}
+
+    forced = await client.post("/tasks/sync", json={"since": body["server_time"], "mutations": [
+        {"op": "update", "task_id": stale["id"], "base_version": 1, "changes": {"title": "Forced edit"}, "force": True},
+    ]}, headers=headers)
+    assert forced.json()["results"][0]["status"] == "applied"
+    assert forced.json()["results"][0]["task"]["version"] == 3
+
+
+async def test_sync_retry_does_not_duplicate_creates(client: AsyncClient, test_db):
+    """
+    Test that resending a sync whose response was lost returns the tasks it created instead of copies.
+    """
+    await MongoTaskRepository(test_db).ensure_indexes()
+    headers = await get_auth_headers(client, "syncretry@example.com", "ValidPassword1!")
+    mutations = [
+        {"op": "create", "client_id": "tmp-1", "task": {"title": "Offline one", "tags": ["x"]}},
+        {"op": "create", "task": {"title": "No client id"}},
+    ]
+    first = (await client.post("/tasks/sync", json={"mutations": mutations}, headers=headers)).json()
+    retry = (await client.post("/tasks/sync", json={"mutations": mutations}, headers=headers)).json()
+    assert [r["status"] for r in retry["results"]] == ["applied", "applied"]
+    assert retry["results"][0]["task_id"] == first["results"][0]["task_id"]
+    titles = [t["title"] for t in (await client.get("/tasks", headers=headers)).json()]
+    assert titles.count("Offline one") == 1
+    assert {c["tag"]: c["count"] for c in (await client.get("/tags", headers=headers)).json()} == {"x": 1}
+
+    duplicate = [mutations[0], {**mutations[0], "task": {"title": "Other"}}]
+    response = await client.post("/tasks/sync", json={"mutations": duplicate}, headers=headers)
+    assert response.status_code == 422
+
+async def test_sync_returns_server_changes_since_last_sync(client: AsyncClient):
+    """
+    Test that a reconnecting client gets the changes and deletes made elsewhere.
+    """
+    headers = await get_auth_headers(client, "syncfeed@example.com", "ValidPassword1!")
+    a = (await client.post("/tasks", json={"title": "Task A"}, headers=headers)).json()
+    b = (await client.post("/tasks", json={"title": "Task B"}, headers=headers)).json()
+    (await client.post("/tasks", json={"title": "Task C"}, headers=headers)).json()
+    first = (await client.post("/tasks/sync", json={}, headers=headers)).json()
+    assert len(first["changes"]) == 3
+
+    await client.put(f"/tasks/{a['id']}", json={"title": "Task A2"}, headers=headers)
+    await client.delete(f"/tasks/{b['id']}", headers=headers)
+    second = (await client.post("/tasks/sync", json={"since": first["server_time"]}, headers=headers)).json()
+    assert second["full_resync"] is False
+    assert [t["title"] for t in second["changes"]] == ["Task A2"]
+    assert second["deleted"] == [b["id"]]
+
+    duplicate = await client.post("/tasks/sync", json={"mutations": [
+        {"op": "delete", "task_id": a["id"], "base_version": 2},
+        {"op": "update", "task_id": a["id"], "base_version": 2, "changes": {"title": "Twice"}},
+    ]}, headers=headers)
+    assert duplicate.status_code == 422
+
+
+async def test_agenda_groups_by_local_day_with_cached_buckets(client: AsyncClient):
+    """
+    Test that the agenda groups tasks by day in the given time zone and that writes refresh the buckets.
+    """
+    headers = await get_auth_headers(client, "agenda@example.com", "ValidPassword1!")
+    zone = ZoneInfo("America/New_York")
+    today = datetime.now(zone).date()
+
+    def at(days: int, hour: int, minute: int = 0) -> str:
+        local = datetime.combine(today + timedelta(days=days), time(hour, minute), tzinfo=zone)
+        return local.astimezone(timezone.utc).isoformat()
+
+    for title, due, extra in [
+        ("Overdue", at(-2, 12), {}),
+        ("Done late", at(-1, 12), {"is_completed": True}),
+        ("Late tonight", at(0, 23, 30), {}),
+        ("Tomorrow", at(1, 10), {}),
+        ("Daily", at(-10, 8), {"recurrence": "FREQ=DAILY"}),
+    ]:
+        response = await client.post("/tasks", json={"title": title, "due_date": due, **extra}, headers=headers)
+        assert response.status_code == 201
+
+    params = {"from": str(today), "to": str(today + timedelta(days=2)), "tz": "America/New_York", "limit": 1}
+    agenda = (await client.get("/tasks/agenda", params=params, headers=headers)).json()
+    assert agenda["timezone"] == "America/New_York"
+    assert agenda["buckets"] == {"overdue": 1, "today": 2, "upcoming": 8}
+    assert [(day["date"], day["count"]) for day in agenda["days"]] == [
+        (str(today), 2), (str(today + timedelta(days=1)), 2), (str(today + timedelta(days=2)), 1),
+    ]
+    assert [task["title"] for task in agenda["days"][0]["tasks"]] == ["Daily"]
+
+    # a write through the tasks router drops the cached buckets
+    await client.post("/tasks", json={"title": "Also today", "due_date": at(0, 15)}, headers=headers)
+    agenda = (await client.get("/tasks/agenda", params=params, headers=headers)).json()
+    assert agenda["buckets"]["today"] == 3
+
+    response = await client.get("/tasks/agenda", params={"tz": "Mars/Olympus"}, headers=headers)
+    assert response.status_code == 422
+    response = await client.get(
+        "/tasks/agenda", params={"from": "2024-01-01", "to": "2024-06-01"}, headers=headers
+    )
+    assert response.status_code == 422
+
+
+async def test_get_task_cache_hits_and_write_through(client: AsyncClient):
+    """
+    Test that repeated reads of a task skip the database and still see every write.
+    """
+    headers = await get_auth_headers(client, "taskcache@example.com", "ValidPassword1!")
+    task_id = (await client.post("/tasks", json={"title": "Cached"}, headers=headers)).json()["id"]
+    await client.get(f"/tasks/{task_id}", headers=headers)
+    with measure() as cost:
+        response = await client.get(f"/tasks/{task_id}", headers=headers)
+    assert response.json()["title"] == "Cached"
+    # only the principal lookup
+    assert cost.commands == {"users.find_one": 1}
+
+    await client.put(f"/tasks/{task_id}", json={"title": "Edited"}, headers=headers)
+    with measure() as cost:
+        response = await client.get(f"/tasks/{task_id}", headers=headers)
+    assert response.json()["title"] == "Edited"
+    assert cost.commands == {"users.find_one": 1}
+
+    await client.delete(f"/tasks/{task_id}", headers=headers)
+    assert (await client.get(f"/tasks/{task_id}", headers=headers)).status_code == 404
+    missing = "0" * 24
+    assert (await client.get(f"/tasks/{missing}", headers=headers)).status_code == 404
+    with measure() as cost:
+        assert (await client.get(f"/tasks/{missing}", headers=headers)).status_code == 404
+    assert cost.commands == {"users.find_one": 1}
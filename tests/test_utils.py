@@ -0,0 +1,242 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+import aiosmtplib
+from bson import ObjectId
+from redis.exceptions import ConnectionError as RedisConnectionError
+from pydantic import ValidationError
+
+from api.services import email
+from api.services.email import Mail, MailService
+from api.services.task_cache import LocalSharedCache, RedisSharedCache, TaskCache
+from api.schemas.task import TaskResponse
+from api.schemas.user import ResetPasswordRequest, UserCreate, UserLogin
+from api.utils.rank import rank_between, rank_sequence
+from api.utils.validation import normalize_email, validate_password, validate_username
+
+
+def test_normalize_email():
+    """
+    Test that emails are normalized for index lookups.
+    """
+    assert normalize_email("  John.Doe@Example.COM ") == "john.doe@example.com"
+
+
+def test_user_create_normalizes_email():
+    """
+    Test that signup stores the normalized email.
+    """
+    user = UserCreate(email="John@Example.com", password="ValidPassword1!", username="john")
+    assert user.email == "john@example.com"
+    assert UserLogin(email="JOHN@example.com", password="x").email == "john@example.com"
+
+
+@pytest.mark.parametrize("email", ["not-an-email", "a@b", "a b@example.com", "a@" + "x" * 260 + ".com"])
+def test_user_create_rejects_bad_email(email):
+    with pytest.raises(ValidationError, match="Invalid email address"):
+        UserCreate(email=email, password="ValidPassword1!", username="john")
+
+
+@pytest.mark.parametrize("password", ["Short1!", "nouppercase1!", "NOLOWERCASE1!", "NoDigits!!", "NoSpecial11", "Has space1!"])
+def test_validate_password_rejects_weak_passwords(password):
+    with pytest.raises(ValueError):
+        validate_password(password)
+
+
+def test_validate_password_accepts_strong_password():
+    assert validate_password("ValidPassword1!") == "ValidPassword1!"
+
+
+@pytest.mark.parametrize("username", ["ab", "a" * 21, "bad-name", "bad name"])
+def test_validate_username_rejects_invalid(username):
+    with pytest.raises(ValueError):
+        validate_username(username)
+
+
+def test_reset_password_checks_complexity():
+    """
+    Test that the new password on reset follows the signup rules.
+    """
+    with pytest.raises(ValidationError, match="Password must contain"):
+        ResetPasswordRequest(token="t", new_password="alllowercase", confirm_password="alllowercase")
+
+
+def test_rank_between_keeps_order_under_inserts():
+    """
+    Test that repeated inserts at the edges and in one gap always land between their neighbours.
+    """
+    keys = rank_sequence(3)
+    for _ in range(50):
+        keys.insert(0, rank_between(None, keys[0]))
+        keys.append(rank_between(keys[-1], None))
+        keys.insert(2, rank_between(keys[1], keys[2]))
+    assert keys == sorted(keys)
+    assert len(set(keys)) == len(keys)
+    assert not any(key.endswith("0") for key in keys)
+    with pytest.raises(ValueError):
+        rank_between("b", "a")
+
+
+def test_rank_sequence_is_short_and_sorted():
+    keys = rank_sequence(1000)
+    assert keys == sorted(keys)
+    assert len(set(keys)) == 1000
+    assert max(map(len, keys)) == 2
+
+
+class FakeSMTP:
+    """
+    Stands in for aiosmtplib.SMTP, keeping every session opened.
+    """
+    sessions: list["FakeSMTP"] = []
+
+    def __init__(self, **kwargs):
+        self.is_connected = False
+        self.alive = True
+        self.sent = []
+        FakeSMTP.sessions.append(self)
+
+    async def connect(self):
+        self.is_connected = True
+
+    async def login(self, username, password):
+        pass
+
+    async def noop(self):
+        if not self.alive:
+            raise aiosmtplib.SMTPServerDisconnected("Connection lost")
+
+    async def send_message(self, message):
+        await asyncio.sleep(0)
+        self.sent.append(message)
+
+    async def quit(self):
+        self.is_connected = False
+
+    def close(self):
+        self.is_connected = False
+
+
+@pytest.mark.asyncio
+async def test_mail_service_reuses_connections(monkeypatch):
+    """
+    Test that a batch goes out over at most pool_size connections, and that a stale idle one is replaced.
+    """
+    FakeSMTP.sessions = []
+    monkeypatch.setattr(email.aiosmtplib, "SMTP", FakeSMTP)
+    service = MailService("localhost", 25, "app@example.com", username="app", pool_size=2)
+    mails = [
+        Mail(f"user{i}@example.com", "Reset", "email.html", {"username": f"user{i}", "reset_url": f"https://x/{i}", "expire_minutes": 30})
+        for i in range(10)
+    ]
+
+    assert await service.send_many(mails) == [None] * 10
+    assert len(FakeSMTP.sessions) == 2
+    sent = [message for session in FakeSMTP.sessions for message in session.sent]
+    assert sorted(message["To"] for message in sent) == sorted(mail.to for mail in mails)
+    assert "Hello user3," in next(m for m in sent if m["To"] == "user3@example.com").get_content()
+    assert len(service._templates) == 1
+
+    # idle connections past check_after are checked first; dead ones are dropped
+    service.check_after = 0
+    for session in FakeSMTP.sessions:
+        session.alive = False
+    await service.send(mails[0])
+    assert len(FakeSMTP.sessions) == 3
+    assert len(FakeSMTP.sessions[2].sent) == 1
+
+    await service.close()
+    assert not any(session.is_connected for session in FakeSMTP.sessions)
+
+
+
+def _task(title: str) -> dict:
+    now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return {"_id": ObjectId("65a000000000000000000001"), "user_id": "u1", "title": title, "created_at": now, "updated_at": now}
+
+
+@pytest.mark.asyncio
+async def test_task_cache_discards_reads_racing_a_write():
+    """
+    Test that a load overlapping a write cannot cache the old task, and that other workers see the write.
+    """
+    shared = LocalSharedCache(100)
+    worker_a = TaskCache(100, ttl=30, negative_ttl=5, shared=shared)
+    worker_b = TaskCache(100, ttl=30, negative_ttl=5, shared=shared)
+    stored = _task("Old")
+
+    async def slow_load():
+        old = dict(stored)
+        # the write lands while this read is in flight
+        stored["title"] = "New"
+        await worker_a.write("u1", "t1", dict(stored))
+        return old
+
+    assert (await worker_b.get("u1", "t1", slow_load))["title"] == "Old"
+
+    async def load():
+        return dict(stored)
+
+    assert (await worker_b.get("u1", "t1", load))["title"] == "New"
+    cached = await worker_a.get("u1", "t1", load)
+    assert cached == TaskResponse.model_validate(stored).model_dump(mode="json")
+    assert worker_a.snapshot()["loads"] == 0
+    # another set of readable lists is another entry
+    assert (await worker_a.get("u1", "t1", load, scope=["list1"]))["title"] == "New"
+    assert worker_a.snapshot()["loads"] == 1
+
+    async def not_found():
+        return None
+
+    assert await worker_a.get("u1", "gone", not_found) is None
+    assert await worker_b.get("u1", "gone", load) is None
+    assert worker_b.snapshot()["negative_hits"] == 1
+
+
+class FakeRedis:
+    """
+    Just the commands RedisSharedCache uses, optionally failing.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.down = False
+
+    async def get(self, key):
+        if self.down:
+            raise RedisConnectionError("down")
+        return self.data.get(key)
+
+    async def set(self, key, value, px=None, nx=False):
+        if self.down:
+            raise RedisConnectionError("down")
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+
+@pytest.mark.asyncio
+async def test_redis_shared_cache_degrades_to_loads():
+    """
+    Test that workers share generations through Redis, and that a Redis outage only costs loads.
+    """
+    redis = FakeRedis()
+    worker_a = TaskCache(100, ttl=30, negative_ttl=5, shared=RedisSharedCache(redis))
+    worker_b = TaskCache(100, ttl=30, negative_ttl=5, shared=RedisSharedCache(redis))
+    stored = _task("Old")
+
+    async def load():
+        return dict(stored)
+
+    await worker_a.get("u1", "t1", load)
+    assert (await worker_b.get("u1", "t1", load))["title"] == "Old"
+    assert worker_b.snapshot()["shared_hits"] == 1
+    stored["title"] = "New"
+    await worker_b.write("u1", "t1", dict(stored))
+    assert (await worker_a.get("u1", "t1", load))["title"] == "New"
+
+    redis.down = True
+    stored["title"] = "Offline"
+    assert (await worker_a.get("u1", "t1", load))["title"] == "Offline"